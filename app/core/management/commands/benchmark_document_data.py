@@ -0,0 +1,75 @@
+"""
+Django command to compare the joined document data queries against the staged loader.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ducumentation.services import (
+    EscrituraPublicaDocumentService, GarantiasMobiliariasDocumentService, TestamentoDocumentService,
+)
+from ducumentation.shared import staged_loader
+
+
+class Command(BaseCommand):
+    help = "Benchmark the joined escritura/garantia/testamento data queries vs. the staged loader"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kardex', nargs='+', help='Kardex numbers, ideally with many parties and payments')
+        parser.add_argument('--idtipoacto', type=str, default='')
+        parser.add_argument('--template-id', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=10)
+
+    def handle(self, *args, **options):
+        idtipoacto = options['idtipoacto']
+        template_id = options['template_id']
+        escritura = EscrituraPublicaDocumentService()
+        garantias = GarantiasMobiliariasDocumentService()
+        testamento = TestamentoDocumentService()
+
+        for kardex in options['kardex']:
+            loaders = (
+                ('escritura',
+                 lambda stats=None: staged_loader.load_escritura(kardex, idtipoacto, template_id, stats),
+                 lambda: escritura._consulta_escritura_joined(kardex, idtipoacto, template_id)),
+                ('garantias',
+                 lambda stats=None: staged_loader.load_transferencia(kardex, idtipoacto, template_id, stats),
+                 lambda: garantias._consulta_transferencia_joined(kardex, idtipoacto, template_id)),
+                ('testamento',
+                 lambda stats=None: staged_loader.load_testamento(kardex, stats),
+                 lambda: testamento._fetch_all_data_raw_joined(kardex)),
+            )
+            self.stdout.write(f"Kardex {kardex} ({options['iterations']} iterations)")
+            for name, staged, joined in loaders:
+                stats = {}
+                staged_data = staged(stats)
+                joined_data = joined()
+                staged_time, staged_queries = self._time(staged, options['iterations'])
+                joined_time, joined_queries = self._time(joined, options['iterations'])
+
+                self.stdout.write(
+                    f"  {name:<11} joined: {joined_time * 1000:8.2f} ms, {joined_queries} query, "
+                    f"{stats.get('joined_rows', 0)} rows before GROUP BY"
+                )
+                self.stdout.write(
+                    f"  {'':<11} staged: {staged_time * 1000:8.2f} ms, {staged_queries} queries, "
+                    f"{stats.get('rows_fetched', 0)} rows"
+                )
+                if staged_data == joined_data:
+                    self.stdout.write(self.style.SUCCESS(f"  {'':<11} identical output"))
+                else:
+                    differing = sorted(
+                        key for key in set(staged_data or {}) | set(joined_data or {})
+                        if (staged_data or {}).get(key) != (joined_data or {}).get(key)
+                    )
+                    self.stdout.write(self.style.WARNING(f"  {'':<11} output differs in: {', '.join(differing)}"))
+
+    def _time(self, fn, iterations: int):
+        with CaptureQueriesContext(connection) as queries:
+            fn()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        return (time.perf_counter() - start) / iterations, len(queries)
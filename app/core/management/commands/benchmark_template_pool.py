@@ -0,0 +1,75 @@
+"""
+Django command to compare DOCX parsing against the pre-parsed template pool.
+"""
+import io
+import time
+
+from django.core.management.base import BaseCommand
+from docx import Document
+from docxtpl import DocxTemplate
+
+from ducumentation.shared.template_pool import TemplatePool
+
+
+class Command(BaseCommand):
+    help = "Benchmark Document()/DocxTemplate parsing vs. the pre-parsed template pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', type=str, help='Path to a .docx template (defaults to a generated one)')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--paragraphs', type=int, default=500, help='Size of the generated template')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        if options['file']:
+            with open(options['file'], 'rb') as fh:
+                template_bytes = fh.read()
+        else:
+            template_bytes = self._generated_template(options['paragraphs'])
+
+        pool = TemplatePool(max_size=1)
+        compiled = pool.get(template_bytes)
+
+        parse_time = self._time(lambda: Document(io.BytesIO(template_bytes)), iterations)
+        pool_time = self._time(compiled.new_document, iterations)
+
+        def render_parsed():
+            doc = DocxTemplate(io.BytesIO(template_bytes))
+            doc.render({})
+
+        def render_pooled():
+            doc = DocxTemplate(io.BytesIO(template_bytes))
+            doc.docx = compiled.new_document()
+            doc.render({})
+
+        render_parsed_time = self._time(render_parsed, iterations)
+        render_pooled_time = self._time(render_pooled, iterations)
+
+        self.stdout.write(f"Template size: {len(template_bytes)} bytes, {iterations} iterations")
+        self.stdout.write(f"Document() parse:        {parse_time * 1000:8.2f} ms")
+        self.stdout.write(f"Pool new_document():     {pool_time * 1000:8.2f} ms")
+        self.stdout.write(f"DocxTemplate render:     {render_parsed_time * 1000:8.2f} ms")
+        self.stdout.write(f"Pooled DocxTemplate:     {render_pooled_time * 1000:8.2f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"Parse cost saved per document: {(parse_time - pool_time) * 1000:.2f} ms"
+        ))
+
+    def _time(self, fn, iterations: int) -> float:
+        fn()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        return (time.perf_counter() - start) / iterations
+
+    def _generated_template(self, paragraphs: int) -> bytes:
+        doc = Document()
+        doc.sections[0].header.paragraphs[0].text = "{{NRO_ESC}}"
+        for i in range(paragraphs):
+            doc.add_paragraph(f"CLAUSULA {i}: {{{{P_NOM_{i}}}}} IDENTIFICADO CON {{{{P_DOC_{i}}}}}")
+        table = doc.add_table(rows=20, cols=4)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = "{{C_NOM_1}}"
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
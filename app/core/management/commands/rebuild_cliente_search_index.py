@@ -0,0 +1,27 @@
+"""
+Django command that rebuilds the Cliente2 name and document search indexes.
+"""
+from django.core.management.base import BaseCommand
+
+from notaria.document_lookup import rebuild_document_index
+from notaria.search import catch_up_index, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Cliente2 search indexes (cliente2_name_tokens, cliente2_document_keys)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Index rows written per INSERT')
+        parser.add_argument('--catch-up', action='store_true',
+                            help='Only index names of clients added since the last run (e.g. by the legacy system)')
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        if options['catch_up']:
+            indexed = catch_up_index(batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Indexed names of {indexed} new client(s)"))
+            return
+        indexed = rebuild_index(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Indexed names of {indexed} client(s)"))
+        indexed = rebuild_document_index(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Indexed document numbers of {indexed} client(s)"))
@@ -0,0 +1,81 @@
+"""
+Django command that processes queued document generation jobs.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ducumentation.jobs import requeue_stale_jobs, run_job_by_id
+from ducumentation.models import DocumentJob
+
+
+class Command(BaseCommand):
+    help = "Run the document generation job worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Jobs processed in parallel')
+        parser.add_argument('--executor', choices=['thread', 'process'], default='thread')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls when idle')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit')
+        parser.add_argument('--max-jobs', type=int, default=0, help='Exit after this many jobs (0 = no limit)')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Requeue jobs running for longer than this many seconds')
+        parser.add_argument('--stale-check-interval', type=float, default=60.0,
+                            help='Seconds between sweeps for stale jobs')
+
+    def handle(self, *args, **options):
+        workers = max(options['workers'], 1)
+        executor_class = ProcessPoolExecutor if options['executor'] == 'process' else ThreadPoolExecutor
+        if options['executor'] == 'process':
+            # Forked workers must not share the parent's database connection
+            connections.close_all()
+
+        self.stdout.write(f"Document job worker started ({options['executor']} x {workers})")
+        processed = 0
+        in_flight = {}
+        next_sweep = 0.0
+        with executor_class(max_workers=workers) as executor:
+            while True:
+                if time.monotonic() >= next_sweep:
+                    # Jobs of a worker that died would otherwise block their document until a restart
+                    requeued = requeue_stale_jobs(options['stale_after'], exclude_ids=in_flight.values())
+                    if requeued:
+                        self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale job(s)"))
+                    next_sweep = time.monotonic() + options['stale_check_interval']
+
+                free = workers - len(in_flight)
+                if free > 0:
+                    pending = list(
+                        DocumentJob.objects.filter(status=DocumentJob.STATUS_PENDING)
+                        .exclude(id__in=in_flight.values())
+                        .order_by('id').values_list('id', flat=True)[:free]
+                    )
+                    for job_id in pending:
+                        in_flight[executor.submit(run_job_by_id, job_id)] = job_id
+
+                if not in_flight:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                done, _ = wait(list(in_flight), timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = in_flight.pop(future)
+                    try:
+                        job_status = future.result()
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f"Job {job_id} crashed: {e}"))
+                        continue
+                    if job_status is None:
+                        continue
+                    processed += 1
+                    style = self.style.SUCCESS if job_status == DocumentJob.STATUS_DONE else self.style.ERROR
+                    self.stdout.write(style(f"Job {job_id}: {job_status}"))
+
+                if options['max_jobs'] and processed >= options['max_jobs']:
+                    break
+
+        self.stdout.write(f"Processed {processed} job(s)")
@@ -0,0 +1,21 @@
+"""
+Django command that realigns the correlative sequences with the existing records.
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from notaria.sequences import sync_sequences
+
+
+class Command(BaseCommand):
+    help = "Set every correlative sequence (kardex, num_formu, num_carta, ...) to the last number in its table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=datetime.now().year, help='Period of the yearly series')
+
+    def handle(self, *args, **options):
+        synced = sync_sequences(options['year'])
+        for (series, period), last_value in sorted(synced.items()):
+            self.stdout.write(f"{series} {period or '-'}: {last_value}")
+        self.stdout.write(self.style.SUCCESS(f"Synced {len(synced)} sequence(s)"))
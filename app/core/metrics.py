@@ -0,0 +1,177 @@
+"""
+Process-local metrics in the Prometheus text exposition format.
+
+Histograms are observed in-process (one registry per worker process, the
+same way the caches are per process); components with a `stats` dict or a
+`metrics()` method register a collector instead of pushing every change.
+`render()` produces the body of the /metrics endpoint.
+"""
+import logging
+import math
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+logger = logging.getLogger(__name__)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    rendered = ','.join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return f'{{{rendered}}}' if rendered else ''
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram per label set.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        with self._lock:
+            # [bucket counts..., sum, count]
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, *labelvalues: str) -> int:
+        series = self._series.get(labelvalues)
+        return series[-1] if series else 0
+
+    def total(self, *labelvalues: str) -> float:
+        series = self._series.get(labelvalues)
+        return series[-2] if series else 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted(self._series.items())
+        for labelvalues, values in series:
+            pairs = list(zip(self.labelnames, labelvalues))
+            for bound, bucket_count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{_labels(pairs + [("le", _format_value(bound))])} {bucket_count}')
+            lines.append(f'{self.name}_sum{_labels(pairs)} {_format_value(values[-2])}')
+            lines.append(f'{self.name}_count{_labels(pairs)} {values[-1]}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Histograms plus named collectors. A collector returns the current
+    numeric values of a component, reported as gauges `<prefix>_<key>`.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._collectors: Dict[str, Tuple[str, Callable[[], Dict[str, float]]]] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(name, documentation, labelnames, buckets)
+            return histogram
+
+    def register_collector(self, prefix: str, documentation: str, collect: Callable[[], Dict[str, float]]) -> None:
+        with self._lock:
+            self._collectors[prefix] = (documentation, collect)
+
+    def clear(self) -> None:
+        for histogram in list(self._histograms.values()):
+            histogram.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for histogram in list(self._histograms.values()):
+            lines.extend(histogram.render())
+        for prefix, (documentation, collect) in sorted(self._collectors.items()):
+            try:
+                values = collect()
+            except Exception as e:
+                logger.warning("Metrics collector %s failed: %s", prefix, e)
+                continue
+            for key, value in sorted(values.items()):
+                if value is None or isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f'{prefix}_{key}'
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+class QueryCounter:
+    """
+    Django execute wrapper counting the SQL statements run on a connection.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries(using: str = 'default'):
+    """
+    Count the queries run by this thread inside the block:
+
+        with count_queries() as queries:
+            ...
+        queries.count
+    """
+    from django.db import connections
+
+    counter = QueryCounter()
+    with connections[using].execute_wrapper(counter):
+        yield counter
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> MetricsRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+    return _registry
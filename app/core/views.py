@@ -1 +1,24 @@
-from django.shortcuts import render
+import hmac
+import os
+
+from django.http import HttpResponse, HttpResponseNotFound
+from django.views.decorators.http import require_GET
+
+from .metrics import get_registry
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@require_GET
+def metrics(request):
+    """
+    Metrics of this worker process in the Prometheus text format. The
+    scraper must send METRICS_TOKEN as a bearer token; without a configured
+    token the endpoint does not exist.
+    """
+    token = os.environ.get('METRICS_TOKEN')
+    if not token:
+        return HttpResponseNotFound()
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(get_registry().render(), content_type=PROMETHEUS_CONTENT_TYPE)
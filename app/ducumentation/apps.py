@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class DucumentationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ducumentation'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .shared.instrumentation import register_collectors
+
+        register_collectors()
@@ -0,0 +1,276 @@
+"""
+Batch generation of protocolar documents for many kardex at once.
+
+Instead of N independent open-document calls (each with its own template
+fetch, routing queries and upload), a batch:
+  1. resolves tipkar/codactos for every kardex in one query,
+  2. groups the items by template and fetches each template once,
+  3. builds the template data for every kardex (bounded thread pool),
+  4. renders in the shared render pool (spawned workers, see
+     shared/render_pool.py), one task per template chunk so the template
+     bytes cross the process boundary once per chunk,
+  5. uploads the results through the write-behind uploader, waiting for
+     them to land in R2.
+"""
+import io
+import logging
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db import connection
+
+from notaria.models import Kardex
+from .services import (
+    VehicleTransferDocumentService, NonContentiousDocumentService, TestamentoDocumentService,
+    GarantiasMobiliariasDocumentService, EscrituraPublicaDocumentService, process_project_document,
+)
+from .shared.instrumentation import span
+from .shared.render_cache import upload_rendered
+from .shared.render_pool import get_render_pool
+from .shared.template_cache import get_template_bytes, get_template_filename
+
+DOCUMENT_PREFIX = 'rodriguez-zea/documentos/'
+MAX_BATCH_SIZE = int(os.environ.get('BATCH_MAX_ITEMS', '200'))
+
+logger = logging.getLogger(__name__)
+
+# tipkar -> (service class, whether cleanup is a separate step after rendering)
+BATCH_SERVICES = {
+    5: (TestamentoDocumentService, True),
+    4: (GarantiasMobiliariasDocumentService, True),
+    3: (VehicleTransferDocumentService, True),
+    2: (NonContentiousDocumentService, False),
+    1: (EscrituraPublicaDocumentService, False),
+}
+
+
+def document_filename(kardex: str) -> str:
+    return f"__PROY__{kardex}.docx"
+
+
+def render_document(tipkar: int, template_bytes: bytes, data: Dict[str, Any], kardex: str) -> bytes:
+    """
+    Render one document to .docx bytes with the service for its tipkar.
+    Touches no database, so it can run in a worker process.
+    """
+    from docxcompose.properties import CustomProperties
+
+    service_class, separate_cleanup = BATCH_SERVICES[tipkar]
+    service = service_class()
+    doc = process_project_document(service, template_bytes, data, separate_cleanup)
+
+    custom_props = CustomProperties(doc)
+    custom_props['documentoGeneradoId'] = kardex
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def render_chunk(template_bytes: bytes, jobs: List[Tuple[str, int, Dict[str, Any]]]) -> List[Tuple[str, Optional[bytes], Optional[str]]]:
+    """
+    Process pool entry point: render every (kardex, tipkar, data) sharing a template.
+    Returns (kardex, content, error) per job.
+    """
+    rendered = []
+    for kardex, tipkar, data in jobs:
+        try:
+            rendered.append((kardex, render_document(tipkar, template_bytes, data, kardex), None))
+        except Exception as e:
+            traceback.print_exc()
+            rendered.append((kardex, None, f"Render failed: {e}"))
+    return rendered
+
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class BatchDocumentGenerator:
+    """
+    Generates protocolar documents for a list of kardex.
+
+    Each item is a dict with `kardex`, `template_id` and optionally
+    `idtipoacto`. Results are dicts with `kardex`, `template_id`, `status`
+    ('ok' | 'error'), `filename`, `object_key`, `uploaded`, `error` and
+    `content` (the .docx bytes, None on error).
+    """
+
+    def __init__(self, render_workers: int = None, io_workers: int = None, data_workers: int = None):
+        self.render_workers = int(render_workers if render_workers is not None
+                                  else os.environ.get('BATCH_RENDER_WORKERS', os.cpu_count() or 2))
+        self.io_workers = int(io_workers if io_workers is not None else os.environ.get('BATCH_IO_WORKERS', '8'))
+        self.data_workers = int(data_workers if data_workers is not None
+                                else os.environ.get('BATCH_DATA_WORKERS', '4'))
+
+    def generate(self, items: List[Dict[str, Any]], upload: bool = True) -> List[Dict[str, Any]]:
+        start_time = time.perf_counter()
+        results = self._prepare(items)
+        pending = [result for result in results.values() if result['status'] == 'pending']
+        logger.info("Batch of %d kardex, %d routable", len(results), len(pending))
+
+        # One fetch per distinct template
+        with span('template', self):
+            templates = self._fetch_templates({result['template_id'] for result in pending})
+        for result in pending:
+            if templates.get(result['template_id']) is None:
+                self._fail(result, f"Template {result['template_id']} not found")
+
+        with span('sql', self):
+            data = self._build_data([result for result in results.values() if result['status'] == 'pending'])
+
+        with span('render', self):
+            self._render(results, templates, data)
+
+        if upload:
+            with span('upload', self):
+                self._upload([result for result in results.values() if result['status'] == 'ok'])
+
+        logger.info("Batch generation of %d kardex took %.2fs", len(results), time.perf_counter() - start_time)
+        return list(results.values())
+
+    def _prepare(self, items: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Validate the items and route them by tipkar with a single query.
+        Repeated kardex are generated once (first occurrence wins).
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            kardex = str(item.get('kardex') or '').strip()
+            if not kardex or kardex in results:
+                continue
+            result = {
+                'kardex': kardex,
+                'template_id': item.get('template_id'),
+                'idtipoacto': item.get('idtipoacto'),
+                'tipkar': None,
+                'status': 'pending',
+                'filename': document_filename(kardex),
+                'object_key': f"{DOCUMENT_PREFIX}{document_filename(kardex)}",
+                'uploaded': False,
+                'error': None,
+                'content': None,
+            }
+            try:
+                result['template_id'] = int(result['template_id'])
+            except (TypeError, ValueError):
+                self._fail(result, 'Invalid template_id format.')
+            results[kardex] = result
+
+        kardex_rows = Kardex.objects.filter(kardex__in=list(results)).values_list('kardex', 'idtipkar', 'codactos')
+        found = {kardex: (idtipkar, codactos) for kardex, idtipkar, codactos in kardex_rows}
+
+        for kardex, result in results.items():
+            if result['status'] != 'pending':
+                continue
+            if kardex not in found:
+                self._fail(result, f"Kardex {kardex} not found")
+                continue
+            tipkar, codactos = found[kardex]
+            if tipkar not in BATCH_SERVICES:
+                self._fail(result, f"Document generation not implemented for tipkar {tipkar}")
+                continue
+            result['tipkar'] = tipkar
+            if not result['idtipoacto'] and codactos:
+                result['idtipoacto'] = codactos[:3]
+            if tipkar == 2 and not result['idtipoacto']:
+                self._fail(result, 'idtipoacto is required for non-contentious documents')
+        return results
+
+    def _fetch_templates(self, template_ids) -> Dict[int, Optional[bytes]]:
+        def fetch(template_id):
+            try:
+                return template_id, get_template_bytes(get_template_filename(template_id))
+            except Exception as e:
+                logger.debug("Batch template %s unavailable: %s", template_id, e)
+                return template_id, None
+
+        template_ids = list(template_ids)
+        if len(template_ids) <= 1:
+            return dict(fetch(template_id) for template_id in template_ids)
+        with ThreadPoolExecutor(max_workers=min(self.io_workers, len(template_ids))) as executor:
+            return dict(executor.map(fetch, template_ids))
+
+    def _build_data(self, pending: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        def build(result):
+            service_class, _ = BATCH_SERVICES[result['tipkar']]
+            try:
+                return result['kardex'], service_class().build_document_data(
+                    result['kardex'], result['idtipoacto'], result['template_id'])
+            except Exception as e:
+                traceback.print_exc()
+                self._fail(result, f"Data retrieval failed: {e}")
+                return result['kardex'], None
+
+        def build_in_thread(result):
+            try:
+                return build(result)
+            finally:
+                connection.close()
+
+        if self.data_workers <= 1 or len(pending) <= 1:
+            pairs = [build(result) for result in pending]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.data_workers, len(pending))) as executor:
+                pairs = list(executor.map(build_in_thread, pending))
+        return {kardex: data for kardex, data in pairs if data is not None}
+
+    def _render(self, results: Dict[str, Dict[str, Any]], templates: Dict[int, Optional[bytes]],
+                data: Dict[str, Dict[str, Any]]) -> None:
+        groups: Dict[int, List[Tuple[str, int, Dict[str, Any]]]] = {}
+        for kardex, result in results.items():
+            if result['status'] == 'pending':
+                groups.setdefault(result['template_id'], []).append((kardex, result['tipkar'], data[kardex]))
+        total = sum(len(jobs) for jobs in groups.values())
+        if not total:
+            return
+
+        if self.render_workers <= 1 or total <= 1:
+            rendered = [render_chunk(templates[template_id], jobs) for template_id, jobs in groups.items()]
+        else:
+            chunk_size = max(1, -(-total // self.render_workers))
+            executor = get_render_pool(self.render_workers)
+            futures = [
+                executor.submit(render_chunk, templates[template_id], chunk)
+                for template_id, jobs in groups.items()
+                for chunk in _chunks(jobs, chunk_size)
+            ]
+            rendered = [future.result() for future in futures]
+
+        for chunk in rendered:
+            for kardex, content, error in chunk:
+                result = results[kardex]
+                if error:
+                    self._fail(result, error)
+                else:
+                    result['content'] = content
+                    result['status'] = 'ok'
+
+    def _upload(self, done: List[Dict[str, Any]]) -> None:
+        """
+        Upload through the write-behind uploader so a batch write is ordered
+        with any upload already queued for the same key, and wait for each
+        document to land in R2.
+        """
+        if not done:
+            return
+
+        def upload(result):
+            try:
+                result['uploaded'] = upload_rendered(result['object_key'], result['content'], wait=True)
+            except Exception as e:
+                logger.warning("Failed to upload batch document to R2 for kardex %s: %s", result['kardex'], e)
+            if not result['uploaded']:
+                logger.warning("Batch document for kardex %s did not reach R2", result['kardex'])
+
+        with ThreadPoolExecutor(max_workers=min(self.io_workers, len(done))) as executor:
+            list(executor.map(upload, done))
+
+    @staticmethod
+    def _fail(result: Dict[str, Any], error: str) -> None:
+        result['status'] = 'error'
+        result['error'] = error
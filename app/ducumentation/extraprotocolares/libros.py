@@ -1,13 +1,12 @@
-import os
 import io
 import traceback
 from typing import Dict, Any, Optional
 
 from django.db import connection
 from django.http import HttpResponse, JsonResponse
-from docxtpl import DocxTemplate
 
-from ..shared.base_r2_documents import get_s3_client, BaseR2DocumentService
+from ..shared.presigned_urls import redirect_requested
+from ..shared.base_r2_documents import BaseR2DocumentService
 from ..utils import NumberToLetterConverter
 
 
@@ -29,7 +28,7 @@ class LibrosDocumentService(BaseR2DocumentService):
         # Default; can be overridden per-call based on orientation
         self.template_filename = self.V_TEMPLATE
 
-    def retrieve_libro_document(self, num_libro: str, anio_libro: str, mode: str = "download") -> HttpResponse:
+    def retrieve_libro_document(self, num_libro: str, anio_libro: str, mode: str = "download", request=None) -> HttpResponse:
         try:
             if not num_libro or not anio_libro:
                 return HttpResponse("Error: num_libro and anio_libro are required", status=400)
@@ -38,12 +37,10 @@ class LibrosDocumentService(BaseR2DocumentService):
 
             if mode == "open":
                 return self._create_response(None, filename, f"{num_libro}-{anio_libro}", mode)
+            if redirect_requested(request, mode):
+                return self._redirect_to_document(filename, request)
 
-            s3 = get_s3_client()
-            object_key = self._object_key_for_document(filename)
-            response = s3.get_object(Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'), Key=object_key)
-            buffer = io.BytesIO(response['Body'].read())
-            return self._create_response(buffer, filename, f"{num_libro}-{anio_libro}", mode)
+            return self._stream_document(filename, request)
         except Exception as e:
             if hasattr(e, 'response') and isinstance(getattr(e, 'response'), dict):
                 if e.response.get('Error', {}).get('Code') == 'NoSuchKey':
@@ -80,47 +77,17 @@ class LibrosDocumentService(BaseR2DocumentService):
             context.update(self._get_notary_data())
             context.update(libro_data)
 
-            doc = DocxTemplate(io.BytesIO(template_bytes))
-            doc.render(context)
-
-            buffer = io.BytesIO()
-            doc.save(buffer)
-            self._save_document_to_r2(buffer, filename)
+            buffer = self._render_document(template_bytes, context)
+            self._save_document_to_r2(buffer, filename, wait=(mode == "open"))
             return self._create_response(buffer, filename, f"{num_libro}-{anio_libro}", mode)
         except Exception as e:
             traceback.print_exc()
             return self.json_error(500, f"Error generating document: {e}")
 
-    def _get_template_from_r2(self) -> Optional[bytes]:
-        s3 = get_s3_client()
-        object_key = self._object_key_for_template(self.template_filename)
-        try:
-            response = s3.get_object(Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'), Key=object_key)
-            return response['Body'].read()
-        except Exception:
-            return None
-
-    def _save_document_to_r2(self, buffer: io.BytesIO, filename: str) -> None:
-        s3 = get_s3_client()
-        object_key = self._object_key_for_document(filename)
-        buffer.seek(0)
-        s3.put_object(
-            Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'),
-            Key=object_key,
-            Body=buffer.read(),
-        )
-        buffer.seek(0)
-
     def _create_response(self, buffer: Optional[io.BytesIO], filename: str, key_id: str, mode: str = "download") -> HttpResponse:
         if mode == "open":
-            s3 = get_s3_client()
-            object_key = self._object_key_for_document(filename)
             try:
-                url = s3.generate_presigned_url(
-                    'get_object',
-                    Params={'Bucket': os.environ.get('CLOUDFLARE_R2_BUCKET'), 'Key': object_key},
-                    ExpiresIn=3600,
-                )
+                url = self._presigned_document_url(filename)
                 response = JsonResponse({
                     'status': 'success', 'mode': 'open', 'url': url,
                     'filename': filename, 'libro': key_id,
@@ -1,5 +1,3 @@
-import boto3
-from botocore.client import Config
 from botocore.exceptions import ClientError
 from django.conf import settings
 import os
@@ -17,7 +15,10 @@ import traceback
 
 
 
+from ..shared.presigned_urls import redirect_requested
 from ..shared.base_r2_documents import get_s3_client, BaseR2DocumentService
+from ..shared.document_uploader import is_pending_document
+from ..shared.template_pool import open_docx_template
 
 
 class BasePermisoViajeDocumentService(BaseR2DocumentService):
@@ -28,7 +29,7 @@ class BasePermisoViajeDocumentService(BaseR2DocumentService):
         self.letras = NumberToLetterConverter()
         self.template_filename = None  # Must be set by child classes
     
-    def retrieve_document(self, id_permiviaje: int, mode: str = "download") -> HttpResponse:
+    def retrieve_document(self, id_permiviaje: int, mode: str = "download", request=None) -> HttpResponse:
         try:
             permiviaje = PermiViaje.objects.get(id_viaje=id_permiviaje)
             num_kardex = permiviaje.num_kardex
@@ -40,13 +41,10 @@ class BasePermisoViajeDocumentService(BaseR2DocumentService):
 
             if mode == "open":
                 return self._create_response(None, filename, id_permiviaje, mode)
+            if redirect_requested(request, mode):
+                return self._redirect_to_document(filename, request)
 
-            s3 = get_s3_client()
-            object_key = f"rodriguez-zea/documentos/{filename}"
-            response = s3.get_object(Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'), Key=object_key)
-            buffer = io.BytesIO(response['Body'].read())
-            
-            return self._create_response(buffer, filename, id_permiviaje, mode)
+            return self._stream_document(filename, request)
 
         except PermiViaje.DoesNotExist:
             return HttpResponse(f"Error: PermiViaje with id {id_permiviaje} not found", status=404)
@@ -60,22 +58,6 @@ class BasePermisoViajeDocumentService(BaseR2DocumentService):
             traceback.print_exc()
             return HttpResponse(f"Error retrieving document: {e}", status=500)
 
-    def _get_template_from_r2(self) -> bytes:
-        if not self.template_filename:
-            raise ValueError("template_filename must be set in the child service class.")
-        s3 = get_s3_client()
-        object_key = f"rodriguez-zea/plantillas/{self.template_filename}"
-        try:
-            response = s3.get_object(Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'), Key=object_key)
-            return response['Body'].read()
-        except ClientError as e:
-            if e.response['Error']['Code'] == 'NoSuchKey':
-                return None
-            else:
-                raise
-        except Exception as e:
-            raise
-
     def _get_licencia_data(self, fecha_ingreso: str) -> Dict[str, str]:
         if not fecha_ingreso:
             return {'licencia': ''}
@@ -135,7 +117,7 @@ class BasePermisoViajeDocumentService(BaseR2DocumentService):
         """
         Renders the document using docxtpl with Jinja2 syntax.
         """
-        doc = DocxTemplate(io.BytesIO(template_bytes))
+        doc = open_docx_template(template_bytes)
         
         # Temporarily disabling RichText to debug file corruption issue.
         # This will render the document without red color.
@@ -157,14 +139,8 @@ class BasePermisoViajeDocumentService(BaseR2DocumentService):
 
     def _create_response(self, buffer: io.BytesIO, filename: str, id_permiviaje: int, mode: str = "download"):
         if mode == "open":
-            s3 = get_s3_client()
-            object_key = f"rodriguez-zea/documentos/{filename}"
             try:
-                url = s3.generate_presigned_url(
-                    'get_object',
-                    Params={'Bucket': os.environ.get('CLOUDFLARE_R2_BUCKET'), 'Key': object_key},
-                    ExpiresIn=3600  # URL expires in 1 hour
-                )
+                url = self._presigned_document_url(filename)
                 response = JsonResponse({
                     'status': 'success',
                     'mode': 'open',
@@ -187,20 +163,11 @@ class BasePermisoViajeDocumentService(BaseR2DocumentService):
             response['Access-Control-Allow-Origin'] = '*'
             return response
 
-    def _save_document_to_r2(self, buffer: io.BytesIO, filename: str):
-        s3 = get_s3_client()
-        object_key = f"rodriguez-zea/documentos/{filename}"
-        buffer.seek(0)
-        s3.put_object(
-            Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'),
-            Key=object_key,
-            Body=buffer.read()
-        )
-        buffer.seek(0)
-
     def _document_exists_in_r2(self, filename: str) -> bool:
-        s3 = get_s3_client()
         object_key = f"rodriguez-zea/documentos/{filename}"
+        if is_pending_document(object_key):
+            return True
+        s3 = get_s3_client()
         try:
             s3.head_object(Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'), Key=object_key)
             return True
@@ -244,10 +211,8 @@ class PermisoViajeInteriorDocumentService(BasePermisoViajeDocumentService):
                 return self.json_error(404, f"Template file '{self.template_filename}' not found in 'rodriguez-zea/plantillas/'.")
             
             document_data = self.get_document_data(id_permiviaje)
-            doc = self._process_document(template_bytes, document_data)
-            buffer = io.BytesIO()
-            doc.save(buffer)
-            self._save_document_to_r2(buffer, filename)
+            buffer = self._render_document(template_bytes, document_data, self._process_document)
+            self._save_document_to_r2(buffer, filename, wait=(mode == "open"))
             
             return self._create_response(buffer, filename, id_permiviaje, mode)
 
@@ -382,10 +347,8 @@ class PermisoViajeExteriorDocumentService(BasePermisoViajeDocumentService):
                 return self.json_error(404, f"Template file '{self.template_filename}' not found in 'rodriguez-zea/plantillas/'.")
             
             document_data = self.get_document_data(id_permiviaje)
-            doc = self._process_document(template_bytes, document_data)
-            buffer = io.BytesIO()
-            doc.save(buffer)
-            self._save_document_to_r2(buffer, filename)
+            buffer = self._render_document(template_bytes, document_data, self._process_document)
+            self._save_document_to_r2(buffer, filename, wait=(mode == "open"))
             
             return self._create_response(buffer, filename, id_permiviaje, mode)
 
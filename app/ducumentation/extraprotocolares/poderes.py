@@ -1,7 +1,6 @@
 import boto3
 from botocore.client import Config
 from botocore.exceptions import ClientError
-import os
 import io
 import logging
 from typing import Dict, Any, List, Optional, Tuple
@@ -9,7 +8,9 @@ from django.http import HttpResponse, JsonResponse
 from django.db import connection
 from docxtpl import DocxTemplate, RichText
 import traceback
-from ..shared.base_r2_documents import get_s3_client, BaseR2DocumentService
+from ..shared.presigned_urls import redirect_requested
+from ..shared.base_r2_documents import BaseR2DocumentService
+from ..shared.template_pool import open_docx_template
 from ..utils import NumberToLetterConverter
 
 logger = logging.getLogger(__name__)
@@ -26,21 +27,14 @@ class BasePoderDocumentService(BaseR2DocumentService):
         self.letras = NumberToLetterConverter()
         self.template_filename: Optional[str] = None
 
-    def retrieve_document(self, id_poder: int, filename: str, mode: str = "download") -> HttpResponse:
+    def retrieve_document(self, id_poder: int, filename: str, mode: str = "download", request=None) -> HttpResponse:
         try:
             if not filename:
                 return self.json_error(400, "filename is required to retrieve document")
 
             # Use the provided filename only (legacy-specific per endpoint)
-            s3 = get_s3_client()
-            bucket = os.environ.get('CLOUDFLARE_R2_BUCKET')
-            object_key = f"rodriguez-zea/documentos/{filename}"
             if mode == "open":
-                url = s3.generate_presigned_url(
-                    'get_object',
-                    Params={'Bucket': bucket, 'Key': object_key},
-                    ExpiresIn=3600,
-                )
+                url = self._presigned_document_url(filename)
                 response = JsonResponse({
                     'status': 'success', 'mode': 'open', 'url': url,
                     'filename': filename, 'id_poder': id_poder,
@@ -48,10 +42,10 @@ class BasePoderDocumentService(BaseR2DocumentService):
                 })
                 response['Access-Control-Allow-Origin'] = '*'
                 return response
+            if redirect_requested(request, mode):
+                return self._redirect_to_document(filename, request)
 
-            response = s3.get_object(Bucket=bucket, Key=object_key)
-            buffer = io.BytesIO(response['Body'].read())
-            return self._create_response(buffer, filename, id_poder, mode)
+            return self._stream_document(filename, request)
         except ClientError as e:
             code = e.response.get('Error', {}).get('Code')
             if code == 'NoSuchKey':
@@ -65,21 +59,8 @@ class BasePoderDocumentService(BaseR2DocumentService):
             traceback.print_exc()
             return self.json_error(500, f"Error retrieving document: {e}")
 
-    def _get_template_from_r2(self) -> Optional[bytes]:
-        if not self.template_filename:
-            raise ValueError("template_filename must be set in child class")
-        s3 = get_s3_client()
-        object_key = f"rodriguez-zea/plantillas/{self.template_filename}"
-        try:
-            response = s3.get_object(Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'), Key=object_key)
-            return response['Body'].read()
-        except ClientError as e:
-            if e.response['Error']['Code'] == 'NoSuchKey':
-                return None
-            raise
-
     def _render_with_coloring(self, template_bytes: bytes, context: Dict[str, Any]) -> DocxTemplate:
-        doc = DocxTemplate(io.BytesIO(template_bytes))
+        doc = open_docx_template(template_bytes)
         colored: Dict[str, Any] = {}
         for key, value in context.items():
             if isinstance(value, list):
@@ -100,14 +81,8 @@ class BasePoderDocumentService(BaseR2DocumentService):
 
     def _create_response(self, buffer: Optional[io.BytesIO], filename: str, id_poder: int, mode: str = "download") -> HttpResponse:
         if mode == "open":
-            s3 = get_s3_client()
-            object_key = f"rodriguez-zea/documentos/{filename}"
             try:
-                url = s3.generate_presigned_url(
-                    'get_object',
-                    Params={'Bucket': os.environ.get('CLOUDFLARE_R2_BUCKET'), 'Key': object_key},
-                    ExpiresIn=3600,
-                )
+                url = self._presigned_document_url(filename)
                 response = JsonResponse({
                     'status': 'success', 'mode': 'open', 'url': url,
                     'filename': filename, 'id_poder': id_poder,
@@ -126,17 +101,6 @@ class BasePoderDocumentService(BaseR2DocumentService):
         response['Access-Control-Allow-Origin'] = '*'
         return response
 
-    def _save_document_to_r2(self, buffer: io.BytesIO, filename: str) -> None:
-        s3 = get_s3_client()
-        object_key = f"rodriguez-zea/documentos/{filename}"
-        buffer.seek(0)
-        s3.put_object(
-            Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'),
-            Key=object_key,
-            Body=buffer.read(),
-        )
-        buffer.seek(0)
-
     def _get_notary_data(self) -> Dict[str, str]:
         with connection.cursor() as cursor:
             cursor.execute("SELECT CONCAT(nombre, ' ', apellido) AS notario, direccion, distrito AS distrito_notario FROM confinotario")
@@ -197,10 +161,8 @@ class PoderFueraDeRegistroDocumentService(BasePoderDocumentService):
                 )
 
             context = self._build_context(id_poder, poder_data)
-            doc = self._render_with_coloring(template_bytes, context)
-            buffer = io.BytesIO()
-            doc.save(buffer)
-            self._save_document_to_r2(buffer, filename)
+            buffer = self._render_document(template_bytes, context, self._render_with_coloring)
+            self._save_document_to_r2(buffer, filename, wait=(mode == "open"))
             return self._create_response(buffer, filename, id_poder, mode)
         except Exception as e:
             traceback.print_exc()
@@ -532,12 +494,8 @@ class PoderEssaludDocumentService(BasePoderDocumentService):
 
             context = self._build_context(id_poder, poder_data)
             # Since we are not coloring this document, we use a simpler render method
-            doc = DocxTemplate(io.BytesIO(template_bytes))
-            doc.render(context)
-            
-            buffer = io.BytesIO()
-            doc.save(buffer)
-            self._save_document_to_r2(buffer, filename)
+            buffer = self._render_document(template_bytes, context)
+            self._save_document_to_r2(buffer, filename, wait=(mode == "open"))
             return self._create_response(buffer, filename, id_poder, mode)
         except Exception as e:
             traceback.print_exc()
@@ -684,12 +642,8 @@ class PoderPensionDocumentService(BasePoderDocumentService):
                 )
 
             context = self._build_context(id_poder, poder_data)
-            doc = DocxTemplate(io.BytesIO(template_bytes))
-            doc.render(context)
-
-            buffer = io.BytesIO()
-            doc.save(buffer)
-            self._save_document_to_r2(buffer, filename)
+            buffer = self._render_document(template_bytes, context)
+            self._save_document_to_r2(buffer, filename, wait=(mode == "open"))
             return self._create_response(buffer, filename, id_poder, mode)
         except Exception as e:
             traceback.print_exc()
@@ -0,0 +1,330 @@
+"""
+Database-backed document generation queue.
+
+Views enqueue a DocumentJob and answer immediately with its id; the
+`run_document_jobs` management command (or the in-process executor when
+DOCUMENT_JOBS_EAGER is set) claims pending jobs and runs the same document
+services the synchronous endpoints use, always in mode "open" so the worker
+uploads to R2 and stores the JSON summary instead of the document bytes.
+Uploads made by a job are waited for: the client fetches the document from
+another process, so a job is only done once its document is in R2.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils import timezone
+
+from notaria.models import Kardex, IngresoPoderes, IngresoCartas, CertDomiciliario, Libros
+from .models import DocumentJob
+from .shared.document_uploader import synchronous_uploads
+from .services import (
+    VehicleTransferDocumentService, NonContentiousDocumentService, TestamentoDocumentService,
+    GarantiasMobiliariasDocumentService, EscrituraPublicaDocumentService,
+)
+from .extraprotocolares.permiso_viajes import PermisoViajeInteriorDocumentService, PermisoViajeExteriorDocumentService
+from .extraprotocolares.poderes import PoderFueraDeRegistroDocumentService, PoderPensionDocumentService, PoderEssaludDocumentService
+from .extraprotocolares.cartas_notariales import CartasNotarialesDocumentService
+from .extraprotocolares.cert_domiciliarios import CertDomiciliariosDocumentService
+from .extraprotocolares.libros import LibrosDocumentService
+
+logger = logging.getLogger(__name__)
+
+JOB_MODE = 'open'
+DEFAULT_MAX_ATTEMPTS = 3
+CONTENT_DISPOSITION_FILENAME = re.compile(r'filename="?([^";]+)"?')
+
+
+class JobError(Exception):
+    """
+    Raised by a job handler when the request cannot be processed
+    (missing record, invalid parameters). The message is stored on the job.
+    """
+
+
+def generate_protocolar_document(template_id: int, kardex: str, idtipoacto: Optional[str] = None,
+                                 action: str = 'generate', mode: str = 'download') -> HttpResponse:
+    """
+    Route a kardex to its document service by Kardex.idtipkar.
+    """
+    kardex_obj = Kardex.objects.filter(kardex=kardex).first()
+    if not kardex_obj:
+        raise JobError(f"Kardex {kardex} not found")
+
+    tipkar = kardex_obj.idtipkar
+    if not idtipoacto and kardex_obj.codactos:
+        idtipoacto = kardex_obj.codactos[:3]
+
+    if tipkar == 5:  # TESTAMENTOS
+        return TestamentoDocumentService().generate_testamento_document(
+            template_id, kardex, idtipoacto, action, mode)
+    if tipkar == 4:  # GARANTIAS MOBILIARIAS
+        return GarantiasMobiliariasDocumentService().generate_garantias_mobiliarias_document(
+            template_id, kardex, idtipoacto, action, mode)
+    if tipkar == 3:  # TRANSFERENCIAS VEHICULARES
+        return VehicleTransferDocumentService().generate_vehicle_transfer_document(
+            template_id, kardex, action, mode)
+    if tipkar == 2:  # ASUNTOS NO CONTENCIOSOS
+        if not idtipoacto:
+            raise JobError('idtipoacto is required for non-contentious documents')
+        return NonContentiousDocumentService().generate_non_contentious_document(
+            template_id, kardex, idtipoacto, action, mode)
+    if tipkar == 1:  # ESCRITURA PUBLICA
+        return EscrituraPublicaDocumentService().generate_escritura_publica_document(
+            template_id, kardex, idtipoacto, str(tipkar), action, mode)
+    raise JobError(f'Document generation not implemented for tipkar {tipkar}')
+
+
+def _required(params: Dict[str, Any], name: str) -> Any:
+    value = params.get(name)
+    if value in (None, ''):
+        raise JobError(f'{name} parameter is required')
+    return value
+
+
+def _protocolar(params: Dict[str, Any]) -> HttpResponse:
+    try:
+        template_id = int(_required(params, 'template_id'))
+    except (TypeError, ValueError):
+        raise JobError('Invalid template_id format.')
+    return generate_protocolar_document(
+        template_id, _required(params, 'kardex'), params.get('idtipoacto'), 'generate', JOB_MODE)
+
+
+def _permiso_viaje_interior(params: Dict[str, Any]) -> HttpResponse:
+    return PermisoViajeInteriorDocumentService().generate_permiso_viaje_interior_document(
+        _required(params, 'id_viaje'), JOB_MODE)
+
+
+def _permiso_viaje_exterior(params: Dict[str, Any]) -> HttpResponse:
+    return PermisoViajeExteriorDocumentService().generate_permiso_viaje_exterior_document(
+        _required(params, 'id_viaje'), JOB_MODE)
+
+
+def _poder(service_class, method_name: str) -> Callable[[Dict[str, Any]], HttpResponse]:
+    def handler(params: Dict[str, Any]) -> HttpResponse:
+        id_poder = _required(params, 'id_poder')
+        if not IngresoPoderes.objects.filter(id_poder=id_poder).exists():
+            raise JobError(f'IngresoPoderes with id_poder {id_poder} not found')
+        return getattr(service_class(), method_name)(id_poder, JOB_MODE)
+    return handler
+
+
+def _carta_notarial(params: Dict[str, Any]) -> HttpResponse:
+    id_carta = _required(params, 'id_carta')
+    num_carta = IngresoCartas.objects.filter(id_carta=id_carta).values_list('num_carta', flat=True).first()
+    if not num_carta:
+        raise JobError(f'IngresoCartas with id_carta {id_carta} not found')
+    return CartasNotarialesDocumentService().generate_carta_document(num_carta, JOB_MODE)
+
+
+def _cert_domiciliario(params: Dict[str, Any]) -> HttpResponse:
+    id_domiciliario = _required(params, 'id_domiciliario')
+    num_certificado = CertDomiciliario.objects.filter(
+        id_domiciliario=id_domiciliario).values_list('num_certificado', flat=True).first()
+    if not num_certificado:
+        raise JobError(f'CertDomiciliario with id_domiciliario {id_domiciliario} not found')
+    return CertDomiciliariosDocumentService().generate_cdom_document(num_certificado, JOB_MODE)
+
+
+def _libro(params: Dict[str, Any]) -> HttpResponse:
+    id_libro = _required(params, 'id_libro')
+    rec = Libros.objects.filter(id=id_libro).values_list('numlibro', 'ano').first()
+    if not rec:
+        raise JobError(f'Libros with id {id_libro} not found')
+    num_libro, anio_libro = rec
+    if not anio_libro:
+        raise JobError(f'ano is empty for the provided num_libro {num_libro}')
+    return LibrosDocumentService().generate_libro_document(
+        num_libro, str(anio_libro), params.get('orientation', 'V'), JOB_MODE)
+
+
+# kind -> (handler, parameter that identifies the document for deduplication)
+JOB_KINDS: Dict[str, Tuple[Callable[[Dict[str, Any]], HttpResponse], str]] = {
+    'protocolar': (_protocolar, 'kardex'),
+    'permiso-viaje-interior': (_permiso_viaje_interior, 'id_viaje'),
+    'permiso-viaje-exterior': (_permiso_viaje_exterior, 'id_viaje'),
+    'poder-fuera-registro': (_poder(PoderFueraDeRegistroDocumentService, 'generate_poder_fuera_registro_document'), 'id_poder'),
+    'poder-essalud': (_poder(PoderEssaludDocumentService, 'generate_poder_essalud_document'), 'id_poder'),
+    'poder-onp': (_poder(PoderPensionDocumentService, 'generate_poder_pension_document'), 'id_poder'),
+    'carta-notarial': (_carta_notarial, 'id_carta'),
+    'cert-domiciliario': (_cert_domiciliario, 'id_domiciliario'),
+    'libro': (_libro, 'id_libro'),
+}
+
+
+def dedup_key_for(kind: str, params: Dict[str, Any]) -> str:
+    """
+    Jobs with the same key produce the same document. Protocolar documents
+    are keyed by kardex, template and act type, so a request with another
+    template is queued on its own instead of getting the pending job back.
+    """
+    if kind not in JOB_KINDS:
+        raise JobError(f'Unknown job kind: {kind}')
+    _, key_param = JOB_KINDS[kind]
+    value = _required(params, key_param)
+    if kind == 'protocolar':
+        template_id = str(_required(params, 'template_id')).strip()
+        idtipoacto = params.get('idtipoacto') or ''
+        return f'kardex:{value}:{template_id}:{idtipoacto}'
+    return f'{kind}:{value}'
+
+
+def enqueue_job(kind: str, params: Dict[str, Any], usuario: Optional[int] = None) -> Tuple[DocumentJob, bool]:
+    """
+    Queue a job, or return the pending/running job for the same document.
+    Returns (job, created).
+    """
+    dedup_key = dedup_key_for(kind, params)
+    existing = DocumentJob.objects.filter(active_key=dedup_key).first()
+    if existing:
+        return existing, False
+    try:
+        with transaction.atomic():
+            job = DocumentJob.objects.create(
+                kind=kind, dedup_key=dedup_key, active_key=dedup_key,
+                params=params, usuario=usuario,
+            )
+    except IntegrityError:
+        # Lost the race against a concurrent request for the same document
+        existing = DocumentJob.objects.filter(active_key=dedup_key).first()
+        if existing:
+            return existing, False
+        raise
+
+    logger.debug("Enqueued document job %s (%s)", job.id, dedup_key)
+    if eager_jobs_enabled():
+        transaction.on_commit(lambda: submit_eager(job.id))
+    return job, True
+
+
+def claim_next_job() -> Optional[DocumentJob]:
+    """
+    Atomically move the oldest pending job to running. The conditional
+    UPDATE makes concurrent workers skip jobs already claimed by another one.
+    """
+    candidates = DocumentJob.objects.filter(status=DocumentJob.STATUS_PENDING).order_by('id').values_list('id', flat=True)[:10]
+    for job_id in candidates:
+        if claim_job(job_id):
+            return DocumentJob.objects.get(pk=job_id)
+    return None
+
+
+def claim_job(job_id: int) -> bool:
+    claimed = DocumentJob.objects.filter(pk=job_id, status=DocumentJob.STATUS_PENDING).update(
+        status=DocumentJob.STATUS_RUNNING, started_at=timezone.now(), attempts=F('attempts') + 1,
+    )
+    return claimed == 1
+
+
+def _response_result(response: HttpResponse) -> Dict[str, Any]:
+    result: Dict[str, Any] = {'status_code': response.status_code}
+    content_type = response.get('Content-Type', '')
+    if 'application/json' in content_type:
+        try:
+            result.update(json.loads(response.content))
+        except ValueError:
+            pass
+    disposition = response.get('Content-Disposition', '')
+    match = CONTENT_DISPOSITION_FILENAME.search(disposition)
+    if match and 'filename' not in result:
+        result['filename'] = match.group(1)
+    return result
+
+
+def run_job(job: DocumentJob) -> DocumentJob:
+    """
+    Execute a claimed job and store its outcome. Never raises.
+    """
+    start_time = time.time()
+    logger.info("Running document job %s (%s)", job.id, job.dedup_key)
+    try:
+        handler, _ = JOB_KINDS[job.kind]
+        with synchronous_uploads() as failed_uploads:
+            response = handler(job.params or {})
+        if response.status_code >= 400:
+            job.status = DocumentJob.STATUS_FAILED
+            job.error = response.content.decode('utf-8', errors='replace')[:2000]
+        elif failed_uploads:
+            job.status = DocumentJob.STATUS_FAILED
+            job.error = f"Upload to R2 did not complete: {', '.join(failed_uploads)}"
+        else:
+            job.status = DocumentJob.STATUS_DONE
+            job.error = None
+        job.result = _response_result(response)
+    except KeyError:
+        job.status = DocumentJob.STATUS_FAILED
+        job.error = f'Unknown job kind: {job.kind}'
+    except JobError as e:
+        job.status = DocumentJob.STATUS_FAILED
+        job.error = str(e)
+    except Exception:
+        job.status = DocumentJob.STATUS_FAILED
+        job.error = traceback.format_exc()[-2000:]
+
+    job.active_key = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'active_key', 'finished_at'])
+    logger.info("Document job %s finished as %s in %.2fs", job.id, job.status, time.time() - start_time)
+    return job
+
+
+def run_job_by_id(job_id: int) -> Optional[str]:
+    """
+    Claim and run one job. Entry point for pool executors (picklable for
+    process pools); returns the final status, or None if another worker
+    claimed it first.
+    """
+    close_old_connections()
+    try:
+        if not claim_job(job_id):
+            return None
+        return run_job(DocumentJob.objects.get(pk=job_id)).status
+    finally:
+        close_old_connections()
+
+
+def requeue_stale_jobs(stale_after: int, exclude_ids=(), max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+    """
+    Put back jobs left running by a worker that died (older than stale_after
+    seconds), except `exclude_ids` (the caller's own jobs in flight). Jobs
+    that already used max_attempts fail instead, releasing their active_key.
+    Returns the number of jobs requeued.
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    stale = DocumentJob.objects.filter(
+        status=DocumentJob.STATUS_RUNNING, started_at__lt=cutoff,
+    ).exclude(id__in=list(exclude_ids))
+    stale.filter(attempts__gte=max_attempts).update(
+        status=DocumentJob.STATUS_FAILED, active_key=None, finished_at=timezone.now(),
+        error=f'Worker stopped while running the job ({max_attempts} attempts)',
+    )
+    return stale.update(status=DocumentJob.STATUS_PENDING)
+
+
+# In-process executor, for deployments without a separate worker
+_eager_executor: Optional[ThreadPoolExecutor] = None
+_eager_lock = threading.Lock()
+
+
+def eager_jobs_enabled() -> bool:
+    return os.environ.get('DOCUMENT_JOBS_EAGER', '').lower() in ('1', 'true', 'yes')
+
+
+def submit_eager(job_id: int):
+    global _eager_executor
+    with _eager_lock:
+        if _eager_executor is None:
+            workers = int(os.environ.get('DOCUMENT_JOBS_EAGER_WORKERS', '2'))
+            _eager_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='document-job')
+    return _eager_executor.submit(run_job_by_id, job_id)
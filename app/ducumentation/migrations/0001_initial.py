@@ -0,0 +1,62 @@
+# Generated by Django 5.2.1 on 2026-10-17 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Documentogenerados',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('observacion', models.TextField(blank=True, null=True)),
+                ('fecha', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.IntegerField(blank=True, null=True)),
+                ('ip', models.CharField(blank=True, max_length=20, null=True)),
+                ('pc', models.CharField(blank=True, max_length=50, null=True)),
+                ('tipogeneracion', models.CharField(blank=True, max_length=30, null=True)),
+                ('kardex', models.CharField(blank=True, max_length=15, null=True)),
+                ('cliente', models.CharField(blank=True, max_length=255, null=True)),
+                ('tipo_docu', models.IntegerField(blank=True, null=True)),
+                ('num_docu', models.CharField(blank=True, max_length=15, null=True)),
+                ('fecha_partest', models.CharField(blank=True, max_length=15, null=True)),
+                ('flag', models.CharField(blank=True, max_length=5, null=True)),
+                ('hora', models.CharField(blank=True, max_length=20, null=True)),
+                ('estado', models.IntegerField(blank=True, null=True)),
+                ('extension', models.CharField(blank=True, max_length=10, null=True)),
+                ('otrotipo', models.CharField(blank=True, db_column='otroTipo', max_length=150, null=True)),
+            ],
+            options={
+                'db_table': 'documentogenerados',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='DocumentJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=40)),
+                ('dedup_key', models.CharField(db_index=True, max_length=120)),
+                ('active_key', models.CharField(blank=True, max_length=120, null=True, unique=True)),
+                ('params', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('usuario', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'document_jobs',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -22,3 +22,41 @@ class Documentogenerados(models.Model):
     class Meta:
         managed = False
         db_table = 'documentogenerados'
+
+
+class DocumentJob(models.Model):
+    """
+    Queued document generation request, processed by `manage.py run_document_jobs`.
+    `active_key` is only set while the job is pending/running; its unique
+    constraint is what deduplicates concurrent jobs for the same kardex/document.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=40)
+    dedup_key = models.CharField(max_length=120, db_index=True)
+    active_key = models.CharField(max_length=120, unique=True, blank=True, null=True)
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    usuario = models.IntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'document_jobs'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.kind} {self.dedup_key} ({self.status})"
@@ -12,4 +12,16 @@ class DocumentosGeneradosSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = models.Documentogenerados
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class DocumentJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for queued document generation jobs.
+    """
+
+    class Meta:
+        model = models.DocumentJob
+        fields = ['id', 'kind', 'dedup_key', 'params', 'status', 'result', 'error',
+                  'attempts', 'usuario', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = ['dedup_key', 'status', 'result', 'error', 'attempts',
+                            'usuario', 'created_at', 'started_at', 'finished_at']
@@ -1,42 +1,82 @@
-import boto3
-from botocore.client import Config
 from django.conf import settings
-import os
 import io
 from docx import Document
-from docxtpl import DocxTemplate
 from docxcompose.properties import CustomProperties
-from docx.shared import RGBColor, Pt
+from docx.shared import Pt
 from decimal import Decimal
 from typing import Dict, Any
 from .constants import ROLE_LABELS, TIPO_DOCUMENTO, CIVIL_STATUS
 import re
 from datetime import datetime
 from django.http import HttpResponse, JsonResponse
-from notaria.models import TplTemplate, Contratantesxacto, Detallevehicular, Patrimonial, Contratantes, Actocondicion, Cliente2, Nacionalidades, Kardex, Usuarios, Sedesregistrales, Ubigeo
+from notaria.models import Detallevehicular, Patrimonial, Kardex, Usuarios, Sedesregistrales
 from notaria.constants import MONEDAS, OPORTUNIDADES_PAGO, FORMAS_PAGO
 from .utils import NumberToLetterConverter
-import time
+from .shared.template_cache import get_template_bytes, get_template_filename
+from .shared.template_pool import open_document, open_docx_template
+from .shared.placeholders import PlaceholderSubstitution, RED
+from .shared.document_walker import DocumentWalker, PlaceholderCleanup
+from .shared.field_manifest import FieldManifest
+from .shared.instrumentation import generation, span
+from .shared.render_cache import render_cached, upload_rendered
+from .shared.contractor_loader import load_kardex_parties, load_act_parties
+from .shared.document_data_cache import cached_document_data
+from .shared.staged_loader import load_escritura, load_testamento, load_transferencia, use_joined_loader
+from notaria.catalogs import catalog
+import logging
 from django.db import connection
 
-# Cached S3 client to avoid recreating on every request
-_s3_client = None
+logger = logging.getLogger(__name__)
 
-def get_s3_client():
+
+def upload_project_document(content: bytes, kardex: str) -> bool:
+    """
+    Hand a rendered project to the write-behind uploader (skipped when R2
+    already holds these bytes). The response does not wait for R2, except
+    inside a document job (see synchronous_uploads).
+    """
+    return upload_rendered(f"rodriguez-zea/documentos/__PROY__{kardex}.docx", content)
+
+
+def process_project_document(service, template_bytes: bytes, data: Dict[str, Any], cleanup: bool = False):
+    """
+    Render and clean up a project. Services with a field_manifest() record
+    where each value went, so updates can patch just the changed fields.
+    """
+    manifest = service.field_manifest() if hasattr(service, 'field_manifest') else None
+    with span('render', service):
+        if manifest is None:
+            doc = service._process_document(template_bytes, data)
+        else:
+            doc = service._process_document(template_bytes, data, manifest)
+    with span('cleanup', service):
+        if cleanup:
+            service.remove_unfilled_placeholders(doc)
+        if manifest is not None:
+            manifest.attach(doc)
+    return doc
+
+
+def render_project_document(service, template_id: int, template_bytes: bytes, data: Dict[str, Any], cleanup: bool = False):
     """
-    Get a cached S3 client for R2 operations
+    Render a project through the render cache. Returns the document (for the
+    response) and its serialized bytes (for the upload); when the template
+    and data are unchanged the cached bytes are reopened instead of rendered.
     """
-    global _s3_client
-    if _s3_client is None:
-        _s3_client = boto3.client(
-            's3',
-            endpoint_url=os.environ.get('CLOUDFLARE_R2_ENDPOINT'),
-            aws_access_key_id=os.environ.get('CLOUDFLARE_R2_ACCESS_KEY'),
-            aws_secret_access_key=os.environ.get('CLOUDFLARE_R2_SECRET_KEY'),
-            config=Config(signature_version='s3v4'),
-            region_name='auto',
-        )
-    return _s3_client
+    rendered = {}
+
+    def render() -> bytes:
+        doc = process_project_document(service, template_bytes, data, cleanup)
+        with span('serialize', service):
+            buffer = io.BytesIO()
+            doc.save(buffer)
+        rendered['doc'] = doc
+        return buffer.getvalue()
+
+    content = render_cached(service, get_template_filename(template_id), template_bytes, data, render)
+    doc = rendered.get('doc') or Document(io.BytesIO(content))
+    return doc, content
+
 
 class VehicleTransferDocumentService:
     """
@@ -50,171 +90,62 @@ class VehicleTransferDocumentService:
         """
         Main method to generate vehicle transfer document
         """
-        start_time = time.time()
-        print(f"PERF: Starting vehicle document generation for kardex: {num_kardex}")
-        
-        try:
-            # Step 1: Get template from R2
-            template_start = time.time()
-            template = self._get_template_from_r2(template_id)
-            template_time = time.time() - template_start
-            print(f"PERF: Template download took {template_time:.2f}s")
-            
-            # Step 2: Get document data
-            data_start = time.time()
-            document_data = self.get_document_data(num_kardex)
-            data_time = time.time() - data_start
-            print(f"PERF: Data retrieval took {data_time:.2f}s")
-            
-            # Step 3: Process document
-            process_start = time.time()
-            doc = self._process_document(template, document_data)
-            process_time = time.time() - process_start
-            print(f"PERF: Document processing took {process_time:.2f}s")
-            
-            # Step 4: Remove placeholders
-            cleanup_start = time.time()
-            self.remove_unfilled_placeholders(doc)
-            cleanup_time = time.time() - cleanup_start
-            print(f"PERF: Placeholder cleanup took {cleanup_time:.2f}s")
-            
-            # Step 5: Upload to R2
-            upload_start = time.time()
-            upload_success = self.create_documento_in_r2(doc, num_kardex)
-            upload_time = time.time() - upload_start
-            print(f"PERF: R2 upload took {upload_time:.2f}s")
-            
-            if not upload_success:
-                print(f"WARNING: Failed to upload document to R2 for kardex: {num_kardex}")
-            
-            total_time = time.time() - start_time
-            print(f"PERF: Total vehicle document generation took {total_time:.2f}s")
-            
-            return self._create_response(doc, f"__PROY__{num_kardex}.docx", num_kardex, mode)
-        except FileNotFoundError as e:
-            return HttpResponse(str(e), status=404)
-        except Exception as e:
-            total_time = time.time() - start_time
-            print(f"PERF: Vehicle document generation failed after {total_time:.2f}s")
-            return HttpResponse(f"Error generating document: {str(e)}", status=500)
+        with generation(self, num_kardex) as trace:
+            try:
+                # Step 1: Get template from R2
+                with span('template'):
+                    template = self._get_template_from_r2(template_id)
+                
+                # Step 2: Get document data
+                with span('sql'):
+                    document_data = self.get_document_data(num_kardex)
+                
+                # Step 3: Process document and remove placeholders (cached when nothing changed)
+                doc, content = render_project_document(self, template_id, template, document_data, cleanup=True)
+                
+                # Step 4: Upload to R2
+                with span('upload'):
+                    upload_success = self.create_documento_in_r2(content, num_kardex)
+                
+                if not upload_success:
+                    logger.warning("Failed to upload document to R2 for kardex: %s", num_kardex)
+                
+                with span('serialize'):
+                    return self._create_response(doc, f"__PROY__{num_kardex}.docx", num_kardex, mode)
+            except FileNotFoundError as e:
+                trace.failed()
+                return HttpResponse(str(e), status=404)
+            except Exception as e:
+                trace.failed()
+                logger.error("Vehicle document generation failed for kardex %s: %s", num_kardex, e)
+                return HttpResponse(f"Error generating document: {str(e)}", status=500)
+
+    def build_document_data(self, num_kardex: str, idtipoacto: str = None, template_id: int = None, action: str = 'generate') -> Dict[str, Any]:
+        """
+        Template data for a kardex (shared by generate and the batch generator)
+        """
+        return self.get_document_data(num_kardex)
 
-    def create_documento_in_r2(self, doc, kardex):
+    def create_documento_in_r2(self, content, kardex):
         """
-        Create a new document in R2 storage
+        Queue the upload of the generated document to R2 (write-behind)
         """
         try:
-            print(f"DEBUG: Starting R2 upload for kardex: {kardex}")
-            
-            # Save the document to a bytes buffer
-            from io import BytesIO
-            buffer = BytesIO()
-            doc.save(buffer)
-            buffer.seek(0)
-            doc_content = buffer.read()
-            
-            print(f"DEBUG: Document size: {len(doc_content)} bytes")
-            
-            # Define the object key for R2
-            object_key = f"rodriguez-zea/documentos/__PROY__{kardex}.docx"
-            
-            # Check environment variables
-            endpoint_url = os.environ.get('CLOUDFLARE_R2_ENDPOINT')
-            access_key = os.environ.get('CLOUDFLARE_R2_ACCESS_KEY')
-            secret_key = os.environ.get('CLOUDFLARE_R2_SECRET_KEY')
-            bucket = os.environ.get('CLOUDFLARE_R2_BUCKET')
-            
-            print(f"DEBUG: R2 Configuration - Endpoint: {endpoint_url}")
-            print(f"DEBUG: R2 Configuration - Access Key: {'SET' if access_key else 'NOT SET'}")
-            print(f"DEBUG: R2 Configuration - Secret Key: {'SET' if secret_key else 'NOT SET'}")
-            print(f"DEBUG: R2 Configuration - Bucket: {bucket}")
-            
-            # Upload to R2
-            s3 = boto3.client(
-                's3',
-                endpoint_url=endpoint_url,
-                aws_access_key_id=access_key,
-                aws_secret_access_key=secret_key,
-                config=Config(signature_version='s3v4'),
-                region_name='auto',
-            )
-            
-            print(f"DEBUG: S3 client created successfully")
-            print(f"DEBUG: Uploading to bucket: {bucket}, key: {object_key}")
-            
-            s3.upload_fileobj(
-                BytesIO(doc_content),
-                bucket,
-                object_key
-            )
-            
-            print(f"DEBUG: Document uploaded to R2: {object_key}")
-            return True
-            
+            return upload_project_document(content, kardex)
         except Exception as e:
-            print(f"ERROR: Failed to upload document to R2: {e}")
-            print(f"ERROR: Exception type: {type(e).__name__}")
-            import traceback
-            print(f"ERROR: Full traceback: {traceback.format_exc()}")
+            logger.error("Error queuing vehicle document upload to R2: %s", e)
             return False
 
-
     def remove_unfilled_placeholders(self, doc):
         """
         Remove all [E.SOMETHING] placeholders and hide {{SOMETHING}} placeholders from user.
         Keep and hide: {{NRO_ESC}}, {{FI}}, {{FF}}, {{S_IN}}, {{S_FN}}, {{FECHA_ACT}}
         Remove all others: [E.P_NOM_2], [E.C_NOM_2], etc.
         """
-        import re
-        placeholder_pattern = re.compile(r'\[E\.[A-Z0-9_]+\]')
-        curly_placeholder_pattern = re.compile(r'\{\{[A-Z0-9_]+\}\}')
-        representation_pattern = re.compile(
-            r'EN REPRESENTACION DE\s*Y[\s.·…‥⋯⋮⋱⋰⋯—–-]*', re.IGNORECASE
-        )
-
-        # List of placeholders to keep and hide
-        keep_placeholders = ['{{NRO_ESC}}', '{{FI}}', '{{FF}}', '{{S_IN}}', '{{S_FN}}', '{{FECHA_ACT}}']
-
-        def clean_runs(runs):
-            # Remove all [E.SOMETHING] placeholders
-            for run in runs:
-                run.text = placeholder_pattern.sub('', run.text)
-                
-                # Hide {{SOMETHING}} placeholders by making them white
-                # BUT only if they are actually placeholders (not real values)
-                if curly_placeholder_pattern.search(run.text):
-                    # Check if this is actually a placeholder or a real value
-                    should_hide = True
-                    for placeholder in keep_placeholders:
-                        if placeholder in run.text:
-                            # If it's a placeholder we want to keep, check if it has a real value
-                            # Real values would not be exactly the placeholder text
-                            if run.text.strip() == placeholder:
-                                # This is still a placeholder, hide it
-                                run.font.color.rgb = RGBColor(255, 255, 255)  # White color
-                                print(f"DEBUG: Hiding curly placeholder in run: '{run.text}'")
-                            else:
-                                # This has a real value, don't hide it
-                                should_hide = False
-                                print(f"DEBUG: Keeping visible value in run: '{run.text}'")
-                            break
-                    
-                    # For other curly placeholders not in keep_placeholders, hide them
-                    if should_hide and not any(placeholder in run.text for placeholder in keep_placeholders):
-                        run.font.color.rgb = RGBColor(255, 255, 255)  # White color
-                        print(f"DEBUG: Hiding other curly placeholder in run: '{run.text}'")
-                
-                # Remove unwanted phrase
-                run.text = representation_pattern.sub('', run.text)
-
-        # Clean paragraphs
-        for paragraph in doc.paragraphs:
-            clean_runs(paragraph.runs)
-        # Clean tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        clean_runs(paragraph.runs)
+        DocumentWalker(self._cleanup_visitor()).walk(doc)
+
+    def _cleanup_visitor(self) -> PlaceholderCleanup:
+        return PlaceholderCleanup(unfilled='hide')
     
     def clean_text(self, text):
         # Remove duplicate commas, semicolons, and spaces
@@ -242,32 +173,16 @@ class VehicleTransferDocumentService:
     
     def _get_template_from_r2(self, template_id: int) -> bytes:
         """
-        Get template from R2 storage (placeholder for your existing logic)
+        Get template bytes from R2 through the shared template cache
+        (memory LRU + disk, revalidated with a conditional GET after the TTL)
         """
-        template = TplTemplate.objects.get(pktemplate=template_id)
-        s3 = boto3.client(
-            's3',
-            endpoint_url=os.environ.get('CLOUDFLARE_R2_ENDPOINT'),
-            aws_access_key_id=os.environ.get('CLOUDFLARE_R2_ACCESS_KEY'),
-            aws_secret_access_key=os.environ.get('CLOUDFLARE_R2_SECRET_KEY'),
-            config=Config(signature_version='s3v4'),
-            region_name='auto',
-        )
-        
-        # Template path in simplified structure
-        object_key = f"rodriguez-zea/plantillas/{template.filename}"
-        
-        try:
-            s3_response = s3.get_object(
-                Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'), 
-                Key=object_key
-            )
-            return s3_response['Body'].read()
-        except Exception as e:
-            # Log the error and return a 404 or raise
-            print(f'Template not found in R2: {e}')
-            raise FileNotFoundError(f"Template not found in R2: {object_key}")
-    
+        filename = get_template_filename(template_id)
+        template_bytes = get_template_bytes(filename)
+        if template_bytes is None:
+            raise FileNotFoundError(f"Template not found in R2: rodriguez-zea/plantillas/{filename}")
+        return template_bytes
+
+    @cached_document_data
     def get_document_data(self, num_kardex: str) -> Dict[str, Any]:
         """
         Get dummy data for document placeholders
@@ -362,7 +277,7 @@ class VehicleTransferDocumentService:
         num_zona = ''
         zona_registral = ''
         if vehicle and vehicle.idsedereg:
-            sede_obj = Sedesregistrales.objects.filter(idsedereg=vehicle.idsedereg).first()
+            sede_obj = catalog(Sedesregistrales).get('idsedereg', str(vehicle.idsedereg))
             if sede_obj:
                 sede = sede_obj.dessede or ''
                 num_zona = sede_obj.num_zona or ''
@@ -458,19 +373,16 @@ class VehicleTransferDocumentService:
         }
         REPRESENTATIVE_ROLES = {"APODERADO", "REPRESENTANTE"}
 
-        contratantes = list(Contratantes.objects.filter(kardex=kardex))
-        id_to_contratante = {c.idcontratante: c for c in contratantes}
+        # Contratantes, Cliente2, Actocondicion and Nacionalidades in one query each
+        parties = load_kardex_parties(kardex)
+        id_to_contratante = parties.parties_by_id
         contratantes_list = []
 
-        for contratante in contratantes:
-            condiciones = contratante.condicion.split('/')
-            condiciones_list = []
-            for condicion in condiciones:
-                if condicion:
-                    condicion_int = condicion.split('.')[0]
-                    condicion_str = Actocondicion.objects.get(idcondicion=condicion_int).condicion
-                    condiciones_list.append(condicion_str)
-            cliente2 = Cliente2.objects.get(idcontratante=contratante.idcontratante)
+        for contratante in parties.parties:
+            condiciones_list = parties.condition_names(contratante.condicion)
+            cliente2 = parties.cliente(contratante.idcontratante)
+            if cliente2 is None:
+                continue
             # Robust nacionalidad handling
             if cliente2.tipper == 'J':
                 nacionalidad = 'EMPRESA'
@@ -479,8 +391,7 @@ class VehicleTransferDocumentService:
                 estado_civil = ''
                 direccion = cliente2.domfiscal or ''
             else:
-                nacionalidad_obj = Nacionalidades.objects.filter(idnacionalidad=cliente2.nacionalidad).first()
-                nacionalidad = nacionalidad_obj.descripcion if nacionalidad_obj else ''
+                nacionalidad = parties.nacionalidad(cliente2)
                 sexo = cliente2.sexo or ''
                 ocupacion = re.split(r'[/,;]', cliente2.detaprofesion)[0].strip() if cliente2.detaprofesion else ''
                 estado_civil = self.get_civil_status_by_gender(CIVIL_STATUS[cliente2.idestcivil]['label'].upper(), sexo) if cliente2.idestcivil in CIVIL_STATUS else ''
@@ -515,8 +426,8 @@ class VehicleTransferDocumentService:
         for c in naturals:
             if c['condicion_str'] in REPRESENTATIVE_ROLES and c.get('idcontratanterp'):
                 principal_contratante = id_to_contratante.get(c['idcontratanterp'])
-                if principal_contratante:
-                    principal_cliente = Cliente2.objects.get(idcontratante=principal_contratante.idcontratante)
+                principal_cliente = parties.cliente(principal_contratante.idcontratante) if principal_contratante else None
+                if principal_cliente:
                     if principal_cliente.tipper == 'J':
                         principal_name = principal_cliente.razonsocial or ''
                     else:
@@ -540,14 +451,14 @@ class VehicleTransferDocumentService:
         for c in naturals:
             if c['condicion_str'] in REPRESENTATIVE_ROLES and c.get('idcontratanterp'):
                 principal_contratante = id_to_contratante.get(c['idcontratanterp'])
-                if principal_contratante:
-                    principal_cliente = Cliente2.objects.get(idcontratante=principal_contratante.idcontratante)
+                principal_cliente = parties.cliente(principal_contratante.idcontratante) if principal_contratante else None
+                if principal_cliente:
                     if principal_cliente.tipper == 'J':
                         principal_name = principal_cliente.razonsocial or ''
                     else:
                         principal_name = f'{principal_cliente.prinom} {principal_cliente.segnom} {principal_cliente.apepat} {principal_cliente.apemat}'
-                    principal_condiciones = principal_contratante.condicion.split('/')
-                    principal_condicion_str = Actocondicion.objects.get(idcondicion=principal_condiciones[0].split('.')[0]).condicion if principal_condiciones and principal_condiciones[0] else ''
+                    principal_condiciones = parties.condition_names(principal_contratante.condicion)
+                    principal_condicion_str = principal_condiciones[0] if principal_condiciones else ''
                     if principal_condicion_str in ACQUIRER_ROLES:
                         c = c.copy()
                         c['nombres'] = f"{c['nombres'].strip()}, EN REPRESENTACION DE {principal_name.strip()}"
@@ -754,12 +665,16 @@ class VehicleTransferDocumentService:
             f'{role_prefix}_AMBOS': ambos,
         }
     
-    def _process_document(self, template_bytes: bytes, data: Dict[str, str]) -> Document:
+    def field_manifest(self) -> FieldManifest:
+        return FieldManifest()
+
+    def _process_document(self, template_bytes: bytes, data: Dict[str, str], manifest: FieldManifest = None) -> Document:
         """
         Process the document template with data
         """
-        buffer = io.BytesIO(template_bytes)
-        doc = DocxTemplate(buffer)
+        doc = open_docx_template(template_bytes)
+        if manifest is not None:
+            manifest.mark_template(doc.docx, data)
         doc.render(data)
         return doc
     
@@ -811,104 +726,50 @@ class NonContentiousDocumentService:
         """
         Main method to generate non-contentious document
         """
-        start_time = time.time()
-        print(f"PERF: Starting non-contentious document generation for kardex: {num_kardex}")
-        
-        try:
-            # Step 1: Get template from R2
-            template_start = time.time()
-            template = self._get_template_from_r2(template_id)
-            template_time = time.time() - template_start
-            print(f"PERF: Non-contentious template download took {template_time:.2f}s")
-            
-            # Step 2: Get document data
-            data_start = time.time()
-            document_data = self.get_document_data(num_kardex, idtipoacto)
-            data_time = time.time() - data_start
-            print(f"PERF: Non-contentious data retrieval took {data_time:.2f}s")
-            
-            # Step 3: Process document
-            process_start = time.time()
-            doc = self._process_document(template, document_data)
-            process_time = time.time() - process_start
-            print(f"PERF: Non-contentious document processing took {process_time:.2f}s")
-            
-            # Step 4: Remove placeholders
-            cleanup_start = time.time()
-            self.remove_unfilled_placeholders(doc)
-            cleanup_time = time.time() - cleanup_start
-            print(f"PERF: Non-contentious placeholder cleanup took {cleanup_time:.2f}s")
-            
-            # Step 5: Upload to R2
-            upload_start = time.time()
-            upload_success = self.create_documento_in_r2(doc, num_kardex)
-            upload_time = time.time() - upload_start
-            print(f"PERF: Non-contentious R2 upload took {upload_time:.2f}s")
-            
-            if not upload_success:
-                print(f"WARNING: Failed to upload non-contentious document to R2 for kardex: {num_kardex}")
-            
-            total_time = time.time() - start_time
-            print(f"PERF: Total non-contentious document generation took {total_time:.2f}s")
-            
-            return self._create_response(doc, f"__PROY__{num_kardex}.docx", num_kardex, mode)
-        except FileNotFoundError as e:
-            return HttpResponse(str(e), status=404)
-        except Exception as e:
-            total_time = time.time() - start_time
-            print(f"PERF: Non-contentious document generation failed after {total_time:.2f}s")
-            return HttpResponse(f"Error generating document: {str(e)}", status=500)
+        with generation(self, num_kardex) as trace:
+            try:
+                # Step 1: Get template from R2
+                with span('template'):
+                    template = self._get_template_from_r2(template_id)
+                
+                # Step 2: Get document data
+                with span('sql'):
+                    document_data = self.get_document_data(num_kardex, idtipoacto)
+                
+                # Step 3: Process document (substitution + placeholder cleanup in one pass)
+                doc, content = render_project_document(self, template_id, template, document_data)
+                
+                # Step 4: Upload to R2
+                with span('upload'):
+                    upload_success = self.create_documento_in_r2(content, num_kardex)
+                
+                if not upload_success:
+                    logger.warning("Failed to upload non-contentious document to R2 for kardex: %s", num_kardex)
+                
+                with span('serialize'):
+                    return self._create_response(doc, f"__PROY__{num_kardex}.docx", num_kardex, mode)
+            except FileNotFoundError as e:
+                trace.failed()
+                return HttpResponse(str(e), status=404)
+            except Exception as e:
+                trace.failed()
+                logger.error("Non-contentious document generation failed for kardex %s: %s", num_kardex, e)
+                return HttpResponse(f"Error generating document: {str(e)}", status=500)
+
+    def build_document_data(self, num_kardex: str, idtipoacto: str = None, template_id: int = None, action: str = 'generate') -> Dict[str, Any]:
+        """
+        Template data for a kardex (shared by generate and the batch generator)
+        """
+        return self.get_document_data(num_kardex, idtipoacto)
 
-    def create_documento_in_r2(self, doc, kardex):
+    def create_documento_in_r2(self, content, kardex):
         """
-        Create a new document in R2 storage
+        Queue the upload of the generated document to R2 (write-behind)
         """
         try:
-            print(f"DEBUG: Starting R2 upload for non-contentious kardex: {kardex}")
-            
-            # Save the document to a bytes buffer
-            from io import BytesIO
-            buffer = BytesIO()
-            doc.save(buffer)
-            buffer.seek(0)
-            doc_content = buffer.read()
-            
-            print(f"DEBUG: Non-contentious document size: {len(doc_content)} bytes")
-            
-            # Define the object key for R2 - simplified path structure
-            object_key = f"rodriguez-zea/documentos/__PROY__{kardex}.docx"
-            
-            # Check environment variables
-            endpoint_url = os.environ.get('CLOUDFLARE_R2_ENDPOINT')
-            access_key = os.environ.get('CLOUDFLARE_R2_ACCESS_KEY')
-            secret_key = os.environ.get('CLOUDFLARE_R2_SECRET_KEY')
-            bucket = os.environ.get('CLOUDFLARE_R2_BUCKET')
-            
-            print(f"DEBUG: R2 Configuration - Endpoint: {endpoint_url}")
-            print(f"DEBUG: R2 Configuration - Access Key: {'SET' if access_key else 'NOT SET'}")
-            print(f"DEBUG: R2 Configuration - Secret Key: {'SET' if secret_key else 'NOT SET'}")
-            print(f"DEBUG: R2 Configuration - Bucket: {bucket}")
-            
-            # Use cached S3 client
-            s3 = get_s3_client()
-            
-            print(f"DEBUG: S3 client created successfully for non-contentious")
-            print(f"DEBUG: Uploading non-contentious document to bucket: {bucket}, key: {object_key}")
-            
-            s3.upload_fileobj(
-                BytesIO(doc_content),
-                bucket,
-                object_key
-            )
-            
-            print(f"DEBUG: Non-contentious document uploaded to R2: {object_key}")
-            return True
-            
+            return upload_project_document(content, kardex)
         except Exception as e:
-            print(f"ERROR: Failed to upload non-contentious document to R2: {e}")
-            print(f"ERROR: Exception type: {type(e).__name__}")
-            import traceback
-            print(f"ERROR: Full traceback: {traceback.format_exc()}")
+            logger.error("Error queuing non-contentious document upload to R2: %s", e)
             return False
 
     def remove_unfilled_placeholders(self, doc):
@@ -917,85 +778,22 @@ class NonContentiousDocumentService:
         Keep and hide: {{NRO_ESC}}, {{FI}}, {{FF}}, {{S_IN}}, {{S_FN}}, {{FECHA_ACT}}
         Remove all others: [E.P_NOM_2], [E.C_NOM_2], etc.
         """
-        import re
-        placeholder_pattern = re.compile(r'\[E\.[A-Z0-9_]+\]')
-        curly_placeholder_pattern = re.compile(r'\{\{[A-Z0-9_]+\}\}')
-        representation_pattern = re.compile(
-            r'EN REPRESENTACION DE\s*Y[\s.·…‥⋯⋮⋱⋰⋯—–-]*', re.IGNORECASE
-        )
-
-        # List of placeholders to keep and hide
-        keep_placeholders = ['{{NRO_ESC}}', '{{FI}}', '{{FF}}', '{{S_IN}}', '{{S_FN}}', '{{FECHA_ACT}}']
-
-        def clean_runs(runs):
-            # Remove [E.SOMETHING] placeholders and hide {{SOMETHING}} placeholders
-            for run in runs:
-                # Remove all [E.SOMETHING] placeholders
-                run.text = placeholder_pattern.sub('', run.text)
-                
-                # Hide {{SOMETHING}} placeholders by making them white
-                # BUT only if they are actually placeholders (not real values)
-                if curly_placeholder_pattern.search(run.text):
-                    # Check if this is actually a placeholder or a real value
-                    should_hide = True
-                    for placeholder in keep_placeholders:
-                        if placeholder in run.text:
-                            # If it's a placeholder we want to keep, check if it has a real value
-                            # Real values would not be exactly the placeholder text
-                            if run.text.strip() == placeholder:
-                                # This is still a placeholder, hide it
-                                run.font.color.rgb = RGBColor(255, 255, 255)  # White color
-                                print(f"DEBUG: Hiding curly placeholder in run: '{run.text}'")
-                            else:
-                                # This has a real value, don't hide it
-                                should_hide = False
-                                print(f"DEBUG: Keeping visible value in run: '{run.text}'")
-                            break
-                    
-                    # For other curly placeholders not in keep_placeholders, hide them
-                    if should_hide and not any(placeholder in run.text for placeholder in keep_placeholders):
-                        run.font.color.rgb = RGBColor(255, 255, 255)  # White color
-                        print(f"DEBUG: Hiding other curly placeholder in run: '{run.text}'")
-                
-                # Remove unwanted phrase
-                run.text = representation_pattern.sub('', run.text)
-                
-                # Only fix repeated commas - do NOT remove spaces
-                run.text = re.sub(r',\s*,+', ',', run.text)
-                run.text = re.sub(r',\s*$', '', run.text)
-
-        # Clean paragraphs
-        for paragraph in doc.paragraphs:
-            clean_runs(paragraph.runs)
-        # Clean tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        clean_runs(paragraph.runs)
+        DocumentWalker(self._cleanup_visitor()).walk(doc)
+
+    def _cleanup_visitor(self) -> PlaceholderCleanup:
+        return PlaceholderCleanup(unfilled='hide', fix_commas=True)
 
     def _get_template_from_r2(self, template_id: int) -> bytes:
         """
         Get template from R2 storage for non-contentious documents
         """
-        template = TplTemplate.objects.get(pktemplate=template_id)
-        
-        # Use cached S3 client
-        s3 = get_s3_client()
-        
-        # Template path in simplified structure
-        object_key = f"rodriguez-zea/plantillas/{template.filename}"
-        
-        try:
-            s3_response = s3.get_object(
-                Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'), 
-                Key=object_key
-            )
-            return s3_response['Body'].read()
-        except Exception as e:
-            print(f"Error getting template from R2: {e}")
-            raise FileNotFoundError(f"Template not found: {template.filename}")
+        filename = get_template_filename(template_id)
+        template_bytes = get_template_bytes(filename)
+        if template_bytes is None:
+            raise FileNotFoundError(f"Template not found in R2: rodriguez-zea/plantillas/{filename}")
+        return template_bytes
 
+    @cached_document_data
     def get_document_data(self, num_kardex: str, idtipoacto: str) -> Dict[str, Any]:
         """
         Get all document data for non-contentious documents
@@ -1025,23 +823,24 @@ class NonContentiousDocumentService:
             all_data.update(escrituracion_data)
             
             # Debug: Print some key placeholders
-            print(f"DEBUG: Generated data for kardex {num_kardex}:")
-            print(f"DEBUG: C_NOM_1: {all_data.get('C_NOM_1', 'NOT FOUND')}")
-            print(f"DEBUG: P_NOM_1: {all_data.get('P_NOM_1', 'NOT FOUND')}")
-            print(f"DEBUG: C_NOM: {all_data.get('C_NOM', 'NOT FOUND')}")
-            print(f"DEBUG: P_NOM: {all_data.get('P_NOM', 'NOT FOUND')}")
-            print(f"DEBUG: C_DOMICILIO: {all_data.get('C_DOMICILIO', 'NOT FOUND')}")
-            print(f"DEBUG: P_DOMICILIO: {all_data.get('P_DOMICILIO', 'NOT FOUND')}")
-            print(f"DEBUG: C_IDE: {all_data.get('C_IDE', 'NOT FOUND')}")
-            print(f"DEBUG: P_IDE: {all_data.get('P_IDE', 'NOT FOUND')}")
-            print(f"DEBUG: All C_ keys: {[k for k in all_data.keys() if k.startswith('C_')]}")
-            print(f"DEBUG: All P_ keys: {[k for k in all_data.keys() if k.startswith('P_')]}")
-            print(f"DEBUG: Total placeholders: {len(all_data)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Generated data for kardex %s:", num_kardex)
+                logger.debug("C_NOM_1: %s", all_data.get('C_NOM_1', 'NOT FOUND'))
+                logger.debug("P_NOM_1: %s", all_data.get('P_NOM_1', 'NOT FOUND'))
+                logger.debug("C_NOM: %s", all_data.get('C_NOM', 'NOT FOUND'))
+                logger.debug("P_NOM: %s", all_data.get('P_NOM', 'NOT FOUND'))
+                logger.debug("C_DOMICILIO: %s", all_data.get('C_DOMICILIO', 'NOT FOUND'))
+                logger.debug("P_DOMICILIO: %s", all_data.get('P_DOMICILIO', 'NOT FOUND'))
+                logger.debug("C_IDE: %s", all_data.get('C_IDE', 'NOT FOUND'))
+                logger.debug("P_IDE: %s", all_data.get('P_IDE', 'NOT FOUND'))
+                logger.debug("All C_ keys: %s", [k for k in all_data.keys() if k.startswith('C_')])
+                logger.debug("All P_ keys: %s", [k for k in all_data.keys() if k.startswith('P_')])
+                logger.debug("Total placeholders: %s", len(all_data))
             
             return all_data
             
         except Exception as e:
-            print(f"Error getting document data: {e}")
+            logger.error("Error getting document data: %s", e)
             raise
 
     def _get_document_data(self, num_kardex: str, anio_kardex: str) -> Dict[str, str]:
@@ -1104,21 +903,12 @@ class NonContentiousDocumentService:
         """
         Get contractors (transferors and acquirers) information for non-contentious documents
         """
-        # Get all contratantes for this kardex with optimized queries
-        contratantes = Contratantesxacto.objects.filter(kardex=num_kardex)
-        
-        # Pre-fetch all related data to avoid N+1 queries
-        contratante_ids = [cxa.idcontratante for cxa in contratantes]
-        clientes = {c.idcontratante: c for c in Cliente2.objects.filter(idcontratante__in=contratante_ids)}
-        condicion_ids = [cxa.idcondicion for cxa in contratantes if cxa.idcondicion]
-        condiciones = {c.idcondicion: c for c in Actocondicion.objects.filter(idcondicion__in=condicion_ids)}
-        
-        # Pre-fetch nationality and ubigeo data
-        nacionalidad_ids = [c.nacionalidad for c in clientes.values() if c.nacionalidad]
-        nacionalidades = {n.idnacionalidad: n for n in Nacionalidades.objects.filter(idnacionalidad__in=nacionalidad_ids)}
-        
-        ubigeo_ids = [c.idubigeo for c in clientes.values() if c.idubigeo]
-        ubigeos = {u.coddis: u for u in Ubigeo.objects.filter(coddis__in=ubigeo_ids)}
+        # All contratantes for this kardex and their related rows, one query per table
+        parties = load_act_parties(num_kardex, with_ubigeo=True)
+        contratantes = parties.parties
+        clientes = parties.clientes
+        condiciones = parties.condiciones
+        ubigeos = parties.ubigeos
         
         transferors = []
         acquirers = []
@@ -1148,11 +938,7 @@ class NonContentiousDocumentService:
                 nombres = f"{cliente.prinom or ''} {cliente.segnom or ''} {cliente.apepat or ''} {cliente.apemat or ''}".strip()
                 
                 # Get nationality and civil status
-                nacionalidad = ''
-                if cliente.nacionalidad:
-                    nac_obj = nacionalidades.get(cliente.nacionalidad)
-                    if nac_obj:
-                        nacionalidad = nac_obj.descripcion or ''
+                nacionalidad = parties.nacionalidad(cliente)
                 
                 estado_civil = ''
                 if cliente.idestcivil:
@@ -1419,109 +1205,28 @@ class NonContentiousDocumentService:
             'S_FN': papelfin if papelfin else '{{S_FN}}',
         }
 
-    def _process_document(self, template_bytes: bytes, data: Dict[str, str]) -> Document:
+    def field_manifest(self) -> FieldManifest:
+        return FieldManifest(color=RED, skip_empty=True)
+
+    def _process_document(self, template_bytes: bytes, data: Dict[str, str], manifest: FieldManifest = None) -> Document:
         """
         Process the document using the same approach as other services.
         """
-        doc = Document(io.BytesIO(template_bytes))
+        doc = open_document(template_bytes)
+        substitution = PlaceholderSubstitution(data, color=RED, skip_empty=True, manifest=manifest)
         
-        # Process each paragraph
-        for paragraph in doc.paragraphs:
-            self._replace_placeholders_in_paragraph(paragraph, data)
-        
-        # Process tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        self._replace_placeholders_in_paragraph(paragraph, data)
+        # Substitution and placeholder cleanup in a single walk over body,
+        # headers, footers, nested tables and text boxes
+        DocumentWalker(substitution.replace_in_paragraph, self._cleanup_visitor()).walk(doc)
         
         return doc
 
     def _replace_placeholders_in_paragraph(self, paragraph, data: Dict[str, str]):
         """
-        Replace placeholders in a paragraph, handling cases where placeholders span multiple runs
+        Replace placeholders in a paragraph, handling cases where placeholders span multiple runs.
+        Replaced values are colored red; placeholders with empty values are left for cleanup.
         """
-        # Get the full text of the paragraph
-        full_text = paragraph.text
-        modified_text = full_text
-        
-        # Debug: Check if this paragraph contains placeholders
-        if '{{' in full_text and '}}' in full_text:
-            print(f"DEBUG: Found placeholders in paragraph: '{full_text[:100]}...'")
-        
-        # Replace all placeholders in the text
-        for key, value in data.items():
-            placeholder = f'{{{{{key}}}}}'
-            if placeholder in modified_text:
-                print(f"DEBUG: Replacing {placeholder} with '{value}'")
-                modified_text = modified_text.replace(placeholder, str(value))
-        
-        # If the text changed, rebuild the paragraph with proper coloring
-        if modified_text != full_text:
-            print(f"DEBUG: Text changed from '{full_text[:50]}...' to '{modified_text[:50]}...'")
-            # Clear all runs
-            paragraph.clear()
-            
-            # Split the text by all possible placeholders to identify what was replaced
-            import re
-            placeholder_pattern = re.compile(r'\{\{[A-Z0-9_]+\}\}')
-            
-            # Find all placeholders in the original text
-            original_placeholders = placeholder_pattern.findall(full_text)
-            
-            # Build the new text with coloring
-            current_pos = 0
-            for match in placeholder_pattern.finditer(full_text):
-                placeholder = match.group()
-                start_pos = match.start()
-                end_pos = match.end()
-                
-                # Add text before this placeholder
-                if start_pos > current_pos:
-                    text_before = full_text[current_pos:start_pos]
-                    if text_before:
-                        paragraph.add_run(text_before)
-                
-                # Find the replacement value
-                replacement = None
-                for key, value in data.items():
-                    if f'{{{{{key}}}}}' == placeholder:
-                        replacement = value
-                        break
-                
-                if replacement:
-                    # Add replacement in red
-                    red_run = paragraph.add_run(str(replacement))
-                    red_run.font.color.rgb = RGBColor(255, 0, 0)  # Red color
-                else:
-                    # Keep original placeholder if no replacement found
-                    paragraph.add_run(placeholder)
-                
-                current_pos = end_pos
-            
-            # Add remaining text after the last placeholder
-            if current_pos < len(full_text):
-                remaining_text = full_text[current_pos:]
-                if remaining_text:
-                    paragraph.add_run(remaining_text)
-        else:
-            print(f"DEBUG: No changes detected in paragraph: '{full_text[:50]}...'")
-            # If no changes in full text, try replacing in individual runs
-            for run in paragraph.runs:
-                run_text = run.text
-                modified_run_text = run_text
-                
-                for key, value in data.items():
-                    placeholder = f'{{{{{key}}}}}'
-                    if placeholder in modified_run_text:
-                        print(f"DEBUG: Replacing in run: {placeholder} -> {value}")
-                        modified_run_text = modified_run_text.replace(placeholder, str(value))
-                
-                if modified_run_text != run_text:
-                    run.text = modified_run_text
-                    # Color the entire run red since we can't easily identify just the replacement
-                    run.font.color.rgb = RGBColor(255, 0, 0)  # Red color
+        return PlaceholderSubstitution(data, color=RED, skip_empty=True).replace_in_paragraph(paragraph)
 
     def _create_response(self, doc: Document, filename: str, kardex: str, mode: str = "download") -> HttpResponse:
         """
@@ -1561,21 +1266,12 @@ class NonContentiousDocumentService:
         """
         Get contractors (transferors and acquirers) information for non-contentious documents
         """
-        # Get all contratantes for this kardex with optimized queries
-        contratantes = Contratantesxacto.objects.filter(kardex=num_kardex)
-        
-        # Pre-fetch all related data to avoid N+1 queries
-        contratante_ids = [cxa.idcontratante for cxa in contratantes]
-        clientes = {c.idcontratante: c for c in Cliente2.objects.filter(idcontratante__in=contratante_ids)}
-        condicion_ids = [cxa.idcondicion for cxa in contratantes if cxa.idcondicion]
-        condiciones = {c.idcondicion: c for c in Actocondicion.objects.filter(idcondicion__in=condicion_ids)}
-        
-        # Pre-fetch nationality and ubigeo data
-        nacionalidad_ids = [c.nacionalidad for c in clientes.values() if c.nacionalidad]
-        nacionalidades = {n.idnacionalidad: n for n in Nacionalidades.objects.filter(idnacionalidad__in=nacionalidad_ids)}
-        
-        ubigeo_ids = [c.idubigeo for c in clientes.values() if c.idubigeo]
-        ubigeos = {u.coddis: u for u in Ubigeo.objects.filter(coddis__in=ubigeo_ids)}
+        # All contratantes for this kardex and their related rows, one query per table
+        parties = load_act_parties(num_kardex, with_ubigeo=True)
+        contratantes = parties.parties
+        clientes = parties.clientes
+        condiciones = parties.condiciones
+        ubigeos = parties.ubigeos
         
         transferors = []
         acquirers = []
@@ -1605,11 +1301,7 @@ class NonContentiousDocumentService:
                 nombres = f"{cliente.prinom or ''} {cliente.segnom or ''} {cliente.apepat or ''} {cliente.apemat or ''}".strip()
                 
                 # Get nationality and civil status
-                nacionalidad = ''
-                if cliente.nacionalidad:
-                    nac_obj = nacionalidades.get(cliente.nacionalidad)
-                    if nac_obj:
-                        nacionalidad = nac_obj.descripcion or ''
+                nacionalidad = parties.nacionalidad(cliente)
                 
                 estado_civil = ''
                 if cliente.idestcivil:
@@ -1788,42 +1480,60 @@ class TestamentoDocumentService:
         """
         Main method to generate testamento document.
         """
-        try:
-            # Step 1: Fetch all data using a raw SQL query mirroring the legacy script
-            raw_data = self._fetch_all_data_raw(num_kardex)
-            if not raw_data:
-                raise ValueError(f"No data found for kardex {num_kardex}")
+        with generation(self, num_kardex) as trace:
+            try:
+                # Step 1: Fetch and format all data for the template
+                with span('sql'):
+                    final_data = self.build_document_data(num_kardex, idtipoacto, template_id, action)
 
-            # Step 2: Get template from R2
-            template_bytes = self._get_template_from_r2(template_id)
-            
-            # Step 3: Process data into the required format for the template
-            document_data = self._get_document_data(raw_data)
-            contractors_data = self._get_contractors_data(raw_data)
-            
-            # Combine all data sources
-            final_data = {**document_data, **contractors_data}
-            
-            # Step 4: Process the docx template
-            doc = self._process_document(template_bytes, final_data)
-            
-            # Step 5: Remove placeholders
-            self.remove_unfilled_placeholders(doc)
-            
-            # Step 6: Upload to R2 (optional, can be disabled if not needed)
-            self.create_documento_in_r2(doc, num_kardex)
-            
-            # Step 7: Create and return the HTTP response
-            filename = f"testamento_{num_kardex}.docx"
-            return self._create_response(doc, filename, num_kardex, mode)
-            
-        except Exception as e:
-            print(f"ERROR: Failed to generate testamento document: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return JsonResponse({'error': f'Failed to generate testamento document: {str(e)}'}, status=500)
+                # Step 2: Get template from R2
+                with span('template'):
+                    template_bytes = self._get_template_from_r2(template_id)
+                
+                # Step 3: Process the docx template and remove placeholders (cached when nothing changed)
+                doc, content = render_project_document(self, template_id, template_bytes, final_data, cleanup=True)
+                
+                # Step 4: Upload to R2 (optional)
+                with span('upload'):
+                    self.create_documento_in_r2(content, num_kardex)
+                
+                # Step 5: Create and return the HTTP response
+                filename = f"testamento_{num_kardex}.docx"
+                with span('serialize'):
+                    return self._create_response(doc, filename, num_kardex, mode)
+                
+            except Exception as e:
+                trace.failed()
+                logger.exception("Failed to generate testamento document: %s", e)
+                return JsonResponse({'error': f'Failed to generate testamento document: {str(e)}'}, status=500)
+
+    @cached_document_data
+    def build_document_data(self, num_kardex: str, idtipoacto: str = None, template_id: int = None, action: str = 'generate') -> Dict[str, Any]:
+        """
+        Fetch all data using a raw SQL query mirroring the legacy script and
+        format it for the template (shared by generate and the batch generator)
+        """
+        raw_data = self._fetch_all_data_raw(num_kardex)
+        if not raw_data:
+            raise ValueError(f"No data found for kardex {num_kardex}")
+
+        document_data = self._get_document_data(raw_data)
+        contractors_data = self._get_contractors_data(raw_data)
+
+        # Combine all data sources
+        return {**document_data, **contractors_data}
 
     def _fetch_all_data_raw(self, num_kardex: str) -> dict:
+        """
+        Fetches all data as a single raw dict, mimicking the PHP script: the
+        kardex and its parties are read with two narrow queries
+        (DOCUMENT_DATA_LOADER=joined uses the original single query).
+        """
+        if use_joined_loader():
+            return self._fetch_all_data_raw_joined(num_kardex)
+        return load_testamento(num_kardex)
+
+    def _fetch_all_data_raw_joined(self, num_kardex: str) -> dict:
         """
         Executes a raw SQL query to fetch all data in a single row, mimicking the PHP script.
         """
@@ -1944,8 +1654,9 @@ class TestamentoDocumentService:
         testadores = [p for p in participants if p['condicion'].upper() in ["OTORGANTE", "TESTADOR"]]
         testigos = [p for p in participants if p['condicion'].upper() in ["TESTIGO", "TESTIGO A RUEGO"]]
 
-        print(f"DEBUG: Found {len(testadores)} testadores and {len(testigos)} testigos")
-        print(f"DEBUG: All participants: {[(p['condicion'], p['nombre_completo']) for p in participants]}")
+        logger.debug("Found %s testadores and %s testigos", len(testadores), len(testigos))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("All participants: %s", [(p['condicion'], p['nombre_completo']) for p in participants])
         
         # Process Testadores (P)
         if testadores:
@@ -2031,25 +1742,17 @@ class TestamentoDocumentService:
         """
         Get template from R2 storage - same as VehicleTransferDocumentService
         """
-        template = TplTemplate.objects.get(pktemplate=template_id)
-        s3 = get_s3_client()
-        
-        # Template path in simplified structure
-        object_key = f"rodriguez-zea/plantillas/{template.filename}"
-        
-        try:
-            response = s3.get_object(Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'), Key=object_key)
-            return response['Body'].read()
-        except Exception as e:
-            print(f"Error downloading template from R2: {e}")
-            raise
+        filename = get_template_filename(template_id)
+        template_bytes = get_template_bytes(filename)
+        if template_bytes is None:
+            raise FileNotFoundError(f"Template not found in R2: rodriguez-zea/plantillas/{filename}")
+        return template_bytes
 
     def _process_document(self, template_bytes: bytes, data: Dict[str, str]) -> Document:
         """
         Process the document template with data - SAME AS VehicleTransferDocumentService
         """
-        buffer = io.BytesIO(template_bytes)
-        doc = DocxTemplate(buffer)
+        doc = open_docx_template(template_bytes)
         doc.render(data)
         return doc
 
@@ -2058,78 +1761,19 @@ class TestamentoDocumentService:
         Remove all [E.SOMETHING] placeholders and hide {{SOMETHING}} placeholders from user.
         SAME AS VehicleTransferDocumentService
         """
-        import re
-        placeholder_pattern = re.compile(r'\[E\.[A-Z0-9_]+\]')
-        curly_placeholder_pattern = re.compile(r'\{\{[A-Z0-9_]+\}\}')
-        representation_pattern = re.compile(
-            r'EN REPRESENTACION DE\s*Y[\s.·…‥⋯⋮⋱⋰⋯—–-]*', re.IGNORECASE
-        )
-
-        # List of placeholders to keep and hide
-        keep_placeholders = ['{{NRO_ESC}}', '{{FI}}', '{{FF}}', '{{S_IN}}', '{{S_FN}}', '{{FECHA_ACT}}']
-
-        def clean_runs(runs):
-            # Remove [E.SOMETHING] placeholders and hide {{SOMETHING}} placeholders
-            for run in runs:
-                # Remove all [E.SOMETHING] placeholders
-                run.text = placeholder_pattern.sub('', run.text)
-                
-                # Hide {{SOMETHING}} placeholders by making them white
-                # BUT only if they are actually placeholders (not real values)
-                if curly_placeholder_pattern.search(run.text):
-                    # Check if this is actually a placeholder or a real value
-                    should_hide = True
-                    for placeholder in keep_placeholders:
-                        if placeholder in run.text:
-                            # If it's a placeholder we want to keep, check if it has a real value
-                            # Real values would not be exactly the placeholder text
-                            if run.text.strip() == placeholder:
-                                # This is still a placeholder, hide it
-                                run.font.color.rgb = RGBColor(255, 255, 255)  # White color
-                                print(f"DEBUG: Hiding curly placeholder in run: '{run.text}'")
-                            else:
-                                # This has a real value, don't hide it
-                                should_hide = False
-                                print(f"DEBUG: Keeping visible value in run: '{run.text}'")
-                            break
-                    
-                    # For other curly placeholders not in keep_placeholders, hide them
-                    if should_hide and not any(placeholder in run.text for placeholder in keep_placeholders):
-                        run.font.color.rgb = RGBColor(255, 255, 255)  # White color
-                        print(f"DEBUG: Hiding other curly placeholder in run: '{run.text}'")
-                
-                # Remove unwanted phrase
-                run.text = representation_pattern.sub('', run.text)
+        DocumentWalker(self._cleanup_visitor()).walk(doc)
 
-        # Clean paragraphs
-        for paragraph in doc.paragraphs:
-            clean_runs(paragraph.runs)
-        # Clean tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        clean_runs(paragraph.runs)
+    def _cleanup_visitor(self) -> PlaceholderCleanup:
+        return PlaceholderCleanup(unfilled='hide')
 
-    def create_documento_in_r2(self, doc, kardex):
+    def create_documento_in_r2(self, content, kardex):
         """
-        Upload the generated document to R2 - SAME AS VehicleTransferDocumentService
+        Queue the upload of the generated document to R2 (write-behind)
         """
         try:
-            from io import BytesIO
-            buffer = BytesIO()
-            doc.save(buffer)
-            buffer.seek(0)
-            object_key = f"rodriguez-zea/documentos/__PROY__{kardex}.docx"
-            s3 = get_s3_client()
-            s3.upload_fileobj(
-                buffer,
-                os.environ.get('CLOUDFLARE_R2_BUCKET'),
-                object_key
-            )
-            return True
+            return upload_project_document(content, kardex)
         except Exception as e:
-            print(f"Error uploading testamento document to R2: {e}")
+            logger.error("Error queuing testamento document upload to R2: %s", e)
             return False
 
     def _create_response(self, doc, filename: str, kardex: str, mode: str = "download") -> HttpResponse:
@@ -2246,55 +1890,73 @@ class GarantiasMobiliariasDocumentService:
         """
         Main method to generate garantias mobiliarias document
         """
-        try:
-            # Step 1: Fetch all data using raw SQL query mirroring the PHP script
-            raw_data = self._consulta_transferencia(num_kardex, idtipoacto, template_id)
-            if not raw_data:
-                raise ValueError(f"No data found for kardex {num_kardex}")
+        with generation(self, num_kardex) as trace:
+            try:
+                # Step 1: Fetch and format all data for the template
+                with span('sql'):
+                    final_data = self.build_document_data(num_kardex, idtipoacto, template_id, action)
 
-            # Step 2: Get template from R2
-            template_bytes = self._get_template_from_r2(template_id)
-            
-            # Step 3: Process data into the required format for the template
-            document_data = self._get_data_documento(raw_data)
-            vehiculos_data = self._get_data_vehiculos(raw_data)
-            pagos_data = self._get_data_pagos(raw_data)
-            contratantes_data = self._get_data_contratantes(raw_data)
-            escrituracion_data = self._get_data_escrituracion(raw_data)
-            
-            # Step 4: Process contratantes data and add empty placeholders
-            contratantes_processed = self._process_contratantes_data(contratantes_data)
-            articulos_contratantes = self._get_articulos_contratantes(contratantes_data)
-            
-            # Step 5: Combine all data sources
-            final_data = {}
-            final_data.update(document_data)
-            final_data.update(vehiculos_data)
-            final_data.update(pagos_data)
-            final_data.update(contratantes_processed)
-            final_data.update(articulos_contratantes)
-            final_data.update(escrituracion_data)
-            
-            # Step 6: Process the docx template
-            doc = self._process_document(template_bytes, final_data)
-            
-            # Step 7: Remove placeholders
-            self.remove_unfilled_placeholders(doc)
-            
-            # Step 8: Upload to R2 (optional)
-            self.create_documento_in_r2(doc, num_kardex)
-            
-            # Step 9: Create and return the HTTP response
-            filename = f"garantias_mobiliarias_{num_kardex}.docx"
-            return self._create_response(doc, filename, num_kardex, mode)
-            
-        except Exception as e:
-            print(f"ERROR: Failed to generate garantias mobiliarias document: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return JsonResponse({'error': f'Failed to generate garantias mobiliarias document: {str(e)}'}, status=500)
+                # Step 2: Get template from R2
+                with span('template'):
+                    template_bytes = self._get_template_from_r2(template_id)
+                
+                # Step 3: Process the docx template and remove placeholders (cached when nothing changed)
+                doc, content = render_project_document(self, template_id, template_bytes, final_data, cleanup=True)
+                
+                # Step 4: Upload to R2 (optional)
+                with span('upload'):
+                    self.create_documento_in_r2(content, num_kardex)
+                
+                # Step 5: Create and return the HTTP response
+                filename = f"garantias_mobiliarias_{num_kardex}.docx"
+                with span('serialize'):
+                    return self._create_response(doc, filename, num_kardex, mode)
+                
+            except Exception as e:
+                trace.failed()
+                logger.exception("Failed to generate garantias mobiliarias document: %s", e)
+                return JsonResponse({'error': f'Failed to generate garantias mobiliarias document: {str(e)}'}, status=500)
+
+    @cached_document_data
+    def build_document_data(self, num_kardex: str, idtipoacto: str = None, template_id: int = None, action: str = 'generate') -> Dict[str, Any]:
+        """
+        Fetch all data using raw SQL query mirroring the PHP script and format
+        it for the template (shared by generate and the batch generator)
+        """
+        raw_data = self._consulta_transferencia(num_kardex, idtipoacto, template_id)
+        if not raw_data:
+            raise ValueError(f"No data found for kardex {num_kardex}")
+
+        document_data = self._get_data_documento(raw_data)
+        vehiculos_data = self._get_data_vehiculos(raw_data)
+        pagos_data = self._get_data_pagos(raw_data)
+        contratantes_data = self._get_data_contratantes(raw_data)
+        escrituracion_data = self._get_data_escrituracion(raw_data)
+
+        # Process contratantes data and add empty placeholders
+        contratantes_processed = self._process_contratantes_data(contratantes_data)
+        articulos_contratantes = self._get_articulos_contratantes(contratantes_data)
+
+        # Combine all data sources
+        final_data = {}
+        final_data.update(document_data)
+        final_data.update(vehiculos_data)
+        final_data.update(pagos_data)
+        final_data.update(contratantes_processed)
+        final_data.update(articulos_contratantes)
+        final_data.update(escrituracion_data)
+        return final_data
 
     def _consulta_transferencia(self, num_kardex: str, idtipoacto: str, template_id: int) -> dict:
+        """
+        Raw data of the PHP consulta_transferencia function, read in stages
+        (DOCUMENT_DATA_LOADER=joined uses the original single query)
+        """
+        if use_joined_loader():
+            return self._consulta_transferencia_joined(num_kardex, idtipoacto, template_id)
+        return load_transferencia(num_kardex, idtipoacto, template_id)
+
+    def _consulta_transferencia_joined(self, num_kardex: str, idtipoacto: str, template_id: int) -> dict:
         """
         Raw SQL query that mirrors the PHP consulta_transferencia function
         """
@@ -2481,9 +2143,9 @@ class GarantiasMobiliariasDocumentService:
         # Handle None or invalid precio values
         try:
             precio = float(precio_raw) if precio_raw is not None else 0.0
-            print(f"DEBUG: precio_raw = {precio_raw}, converted to precio = {precio}")
+            logger.debug("precio_raw = %s, converted to precio = %s", precio_raw, precio)
         except (ValueError, TypeError) as e:
-            print(f"ERROR: Failed to convert precio_raw '{precio_raw}' to float: {e}")
+            logger.error("Failed to convert precio_raw '%s' to float: %s", precio_raw, e)
             precio = 0.0
             
         moneda = raw_data.get('moneda', 1)
@@ -2513,7 +2175,7 @@ class GarantiasMobiliariasDocumentService:
         try:
             precio_decimal = Decimal(str(precio))
         except Exception as e:
-            print(f"ERROR: Failed to convert precio {precio} to Decimal: {e}")
+            logger.error("Failed to convert precio %s to Decimal: %s", precio, e)
             precio_decimal = Decimal("0.00")
         
         return {
@@ -2824,24 +2486,17 @@ class GarantiasMobiliariasDocumentService:
         """
         Get template from R2 storage - same as other services
         """
-        template = TplTemplate.objects.get(pktemplate=template_id)
-        s3 = get_s3_client()
-        
-        object_key = f"rodriguez-zea/plantillas/{template.filename}"
-        
-        try:
-            response = s3.get_object(Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'), Key=object_key)
-            return response['Body'].read()
-        except Exception as e:
-            print(f"Error downloading template from R2: {e}")
-            raise
+        filename = get_template_filename(template_id)
+        template_bytes = get_template_bytes(filename)
+        if template_bytes is None:
+            raise FileNotFoundError(f"Template not found in R2: rodriguez-zea/plantillas/{filename}")
+        return template_bytes
 
     def _process_document(self, template_bytes: bytes, data: Dict[str, str]) -> Document:
         """
         Process the document template with data - same as other services
         """
-        buffer = io.BytesIO(template_bytes)
-        doc = DocxTemplate(buffer)
+        doc = open_docx_template(template_bytes)
         doc.render(data)
         return doc
 
@@ -2850,44 +2505,19 @@ class GarantiasMobiliariasDocumentService:
         Remove all unfilled {{SOMETHING}} placeholders completely.
         For Garantias Mobiliarias, we remove all unused placeholders.
         """
-        import re
-        curly_placeholder_pattern = re.compile(r'\{\{[A-Z0-9_]+\}\}')
-
-        def clean_runs(runs):
-            for run in runs:
-                # Remove all {{SOMETHING}} placeholders completely
-                if curly_placeholder_pattern.search(run.text):
-                    run.text = curly_placeholder_pattern.sub('', run.text)
+        DocumentWalker(self._cleanup_visitor()).walk(doc)
 
-        # Clean paragraphs
-        for paragraph in doc.paragraphs:
-            clean_runs(paragraph.runs)
-        # Clean tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        clean_runs(paragraph.runs)
+    def _cleanup_visitor(self) -> PlaceholderCleanup:
+        return PlaceholderCleanup(unfilled='remove_all', remove_empty_markers=False, remove_representation=False)
 
-    def create_documento_in_r2(self, doc, kardex):
+    def create_documento_in_r2(self, content, kardex):
         """
-        Upload the generated document to R2 - same as other services
+        Queue the upload of the generated document to R2 (write-behind)
         """
         try:
-            from io import BytesIO
-            buffer = BytesIO()
-            doc.save(buffer)
-            buffer.seek(0)
-            object_key = f"rodriguez-zea/documentos/__PROY__{kardex}.docx"
-            s3 = get_s3_client()
-            s3.upload_fileobj(
-                buffer,
-                os.environ.get('CLOUDFLARE_R2_BUCKET'),
-                object_key
-            )
-            return True
+            return upload_project_document(content, kardex)
         except Exception as e:
-            print(f"Error uploading garantias mobiliarias document to R2: {e}")
+            logger.error("Error queuing garantias mobiliarias document upload to R2: %s", e)
             return False
 
     def _create_response(self, doc, filename: str, kardex: str, mode: str = "download") -> HttpResponse:
@@ -2939,98 +2569,86 @@ class EscrituraPublicaDocumentService:
         """
         Main method to generate escritura publica document
         """
-        start_time = time.time()
-        print(f"PERF: Starting escritura publica document generation for kardex: {num_kardex}")
-        
-        try:
-            # Step 1: Fetch all data using raw SQL query mirroring the PHP script
-            data_start = time.time()
-            print(f"DEBUG: Querying data for kardex: {num_kardex}, idtipoacto: {idtipoacto}, template_id: {template_id}")
-            raw_data = self._consulta_escritura(num_kardex, idtipoacto, template_id)
-            if not raw_data:
-                print(f"DEBUG: No data returned from _consulta_escritura for kardex: {num_kardex}")
-                raise ValueError(f"No data found for kardex {num_kardex}")
-            data_time = time.time() - data_start
-            print(f"PERF: SQL data fetch took {data_time:.2f}s")
-
-            # Step 2: Get template from R2
-            template_start = time.time()
-            template_bytes = self._get_template_from_r2(template_id)
-            template_time = time.time() - template_start
-            print(f"PERF: Template download took {template_time:.2f}s")
-    
-            
-            # Step 3: Process data into the required format for the template
-            process_start = time.time()
-            document_data = self._get_data_documento(raw_data)
-            vehiculos_data = self._get_data_vehiculos(raw_data)
-            pagos_data = self._get_data_pagos(raw_data)
-            contratantes_data = self._get_data_contratantes(raw_data)
-            escrituracion_data = self._get_data_escrituracion(raw_data)
-            
-            # Step 4: Process contratantes data and add empty placeholders
-            contratantes_processed = self._process_contratantes_data(contratantes_data, raw_data)
-            articulos_contratantes = self._get_articulos_contratantes(contratantes_data)
-            
-            # Step 5: Combine all data sources
-            final_data = {}
-            final_data.update(document_data)
-            final_data.update(vehiculos_data)
-            final_data.update(pagos_data)
-            final_data.update(contratantes_processed)
-            final_data.update(articulos_contratantes)
-            final_data.update(escrituracion_data)
-            
+        with generation(self, num_kardex) as trace:
+            try:
+                # Step 1: Fetch all data using raw SQL query mirroring the PHP script
+                logger.debug("Querying data for kardex: %s, idtipoacto: %s, template_id: %s", num_kardex, idtipoacto, template_id)
+                with span('sql'):
+                    final_data = self.build_document_data(num_kardex, idtipoacto, template_id, action)
 
-            
-            # Handle special case for 'parte' action
-            if action == 'parte':
-                final_data['NOMBRE_ACTO'] = raw_data.get('plantilla', '')
-            
-            process_time = time.time() - process_start
-            print(f"PERF: Data processing took {process_time:.2f}s")
-            
-            # Step 6: Process the docx template
-            doc_start = time.time()
-            doc = self._process_document(template_bytes, final_data)
-            doc_time = time.time() - doc_start
-            print(f"PERF: Document template processing took {doc_time:.2f}s")
-            
-            # Step 7: Remove placeholders
-            cleanup_start = time.time()
-            self.remove_unfilled_placeholders(doc)
-            cleanup_time = time.time() - cleanup_start
-            print(f"PERF: Placeholder cleanup took {cleanup_time:.2f}s")
-            
-            # Step 8: Upload to R2 (optional)
-            upload_start = time.time()
-            upload_success = self.create_documento_in_r2(doc, num_kardex)
-            upload_time = time.time() - upload_start
-            print(f"PERF: R2 upload took {upload_time:.2f}s")
-            
-            if not upload_success:
-                print(f"WARNING: Failed to upload escritura publica document to R2 for kardex: {num_kardex}")
-            
-            # Step 9: Create and return the HTTP response
-            filename = f"escritura_publica_{num_kardex}.docx"
-            
-            total_time = time.time() - start_time
-            print(f"PERF: Total escritura publica document generation took {total_time:.2f}s")
-            
-            return self._create_response(doc, filename, num_kardex, mode)
-            
-        except Exception as e:
-            total_time = time.time() - start_time
-            print(f"PERF: Escritura publica document generation failed after {total_time:.2f}s")
-            print(f"ERROR: Failed to generate escritura publica document: {str(e)}")
-            print(f"ERROR: Exception type: {type(e).__name__}")
-            print(f"ERROR: Exception args: {e.args}")
-            import traceback
-            traceback.print_exc()
-            return JsonResponse({'error': f'Failed to generate escritura publica document: {type(e).__name__}: {str(e)}'}, status=500)
+                # Step 2: Get template from R2
+                with span('template'):
+                    template_bytes = self._get_template_from_r2(template_id)
+                
+                # Step 3: Process the docx template (substitution + placeholder cleanup in one pass)
+                doc, content = render_project_document(self, template_id, template_bytes, final_data)
+                
+                # Step 4: Upload to R2 (optional)
+                with span('upload'):
+                    upload_success = self.create_documento_in_r2(content, num_kardex)
+                
+                if not upload_success:
+                    logger.warning("Failed to upload escritura publica document to R2 for kardex: %s", num_kardex)
+                
+                # Step 5: Create and return the HTTP response
+                filename = f"escritura_publica_{num_kardex}.docx"
+                
+                with span('serialize'):
+                    return self._create_response(doc, filename, num_kardex, mode)
+                
+            except Exception as e:
+                trace.failed()
+                logger.exception("Failed to generate escritura publica document (%s): %s", type(e).__name__, e)
+                return JsonResponse({'error': f'Failed to generate escritura publica document: {type(e).__name__}: {str(e)}'}, status=500)
+
+    @cached_document_data
+    def build_document_data(self, num_kardex: str, idtipoacto: str = None, template_id: int = None, action: str = 'generate') -> Dict[str, Any]:
+        """
+        Fetch all data using raw SQL query mirroring the PHP script and format
+        it for the template (shared by generate and the batch generator)
+        """
+        raw_data = self._consulta_escritura(num_kardex, idtipoacto, template_id)
+        if not raw_data:
+            logger.debug("No data returned from _consulta_escritura for kardex: %s", num_kardex)
+            raise ValueError(f"No data found for kardex {num_kardex}")
+
+        document_data = self._get_data_documento(raw_data)
+        vehiculos_data = self._get_data_vehiculos(raw_data)
+        pagos_data = self._get_data_pagos(raw_data)
+        contratantes_data = self._get_data_contratantes(raw_data)
+        escrituracion_data = self._get_data_escrituracion(raw_data)
+
+        # Process contratantes data and add empty placeholders
+        contratantes_processed = self._process_contratantes_data(contratantes_data, raw_data)
+        articulos_contratantes = self._get_articulos_contratantes(contratantes_data)
+
+        # Combine all data sources
+        final_data = {}
+        final_data.update(document_data)
+        final_data.update(vehiculos_data)
+        final_data.update(pagos_data)
+        final_data.update(contratantes_processed)
+        final_data.update(articulos_contratantes)
+        final_data.update(escrituracion_data)
+
+        # Handle special case for 'parte' action
+        if action == 'parte':
+            final_data['NOMBRE_ACTO'] = raw_data.get('plantilla', '')
+        return final_data
 
     def _consulta_escritura(self, num_kardex: str, idtipoacto: str, template_id: int) -> dict:
-        print(f"DEBUG: _consulta_escritura called for EscrituraPublicaDocumentService")
+        """
+        Raw data of the PHP consulta_escritura function, read in stages
+        (DOCUMENT_DATA_LOADER=joined uses the original single query)
+        """
+        if use_joined_loader():
+            return self._consulta_escritura_joined(num_kardex, idtipoacto, template_id)
+        raw_data = load_escritura(num_kardex, idtipoacto, template_id)
+        logger.debug("Staged escritura data %s for kardex: %s", 'found' if raw_data else 'not found', num_kardex)
+        return raw_data
+
+    def _consulta_escritura_joined(self, num_kardex: str, idtipoacto: str, template_id: int) -> dict:
+        logger.debug("_consulta_escritura called for EscrituraPublicaDocumentService")
         """
         Raw SQL query that mirrors the PHP consulta_escritura function
         """
@@ -3153,14 +2771,14 @@ class EscrituraPublicaDocumentService:
         """
         
         with connection.cursor() as cursor:
-            print(f"DEBUG: Executing SQL query with parameters: idtipoacto={idtipoacto}, template_id={template_id}, num_kardex={num_kardex}")
+            logger.debug("Executing SQL query with parameters: idtipoacto=%s, template_id=%s, num_kardex=%s", idtipoacto, template_id, num_kardex)
             cursor.execute(query, [idtipoacto, template_id, template_id, num_kardex])
             desc = cursor.description
             row = cursor.fetchone()
             if not row:
-                print(f"DEBUG: SQL query returned no rows for kardex: {num_kardex}")
+                logger.debug("SQL query returned no rows for kardex: %s", num_kardex)
                 return None
-            print(f"DEBUG: SQL query returned data for kardex: {num_kardex}")
+            logger.debug("SQL query returned data for kardex: %s", num_kardex)
             return dict(zip([col[0] for col in desc], row))
 
     def _get_data_documento(self, raw_data: dict) -> Dict[str, str]:
@@ -3238,9 +2856,9 @@ class EscrituraPublicaDocumentService:
         # Handle None or invalid precio values
         try:
             precio = float(precio_raw) if precio_raw is not None else 0.0
-            print(f"DEBUG: precio_raw = {precio_raw}, converted to precio = {precio}")
+            logger.debug("precio_raw = %s, converted to precio = %s", precio_raw, precio)
         except (ValueError, TypeError) as e:
-            print(f"ERROR: Failed to convert precio_raw '{precio_raw}' to float: {e}")
+            logger.error("Failed to convert precio_raw '%s' to float: %s", precio_raw, e)
             precio = 0.0
             
         moneda = raw_data.get('moneda', 1)
@@ -3270,7 +2888,7 @@ class EscrituraPublicaDocumentService:
         try:
             precio_decimal = Decimal(str(precio))
         except Exception as e:
-            print(f"ERROR: Failed to convert precio {precio} to Decimal: {e}")
+            logger.error("Failed to convert precio %s to Decimal: %s", precio, e)
             precio_decimal = Decimal("0.00")
         
         return {
@@ -3812,25 +3430,12 @@ class EscrituraPublicaDocumentService:
         """
         Get template from R2 storage - simple approach without XML fixing
         """
-        template = TplTemplate.objects.get(pktemplate=template_id)
-        s3 = get_s3_client()
-        
-        object_key = f"rodriguez-zea/plantillas/{template.filename}"
-        print(f"DEBUG: Template file: {template.filename}")
-        
-        try:
-            response = s3.get_object(Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'), Key=object_key)
-            template_bytes = response['Body'].read()
-            print(f"DEBUG: Successfully downloaded template: {len(template_bytes)} bytes")
-            
-            return template_bytes
-        except Exception as e:
-            print(f"Error downloading template from R2: {e}")
-            raise
-
-
-
-
+        filename = get_template_filename(template_id)
+        logger.debug("Template file: %s", filename)
+        template_bytes = get_template_bytes(filename)
+        if template_bytes is None:
+            raise FileNotFoundError(f"Template not found in R2: rodriguez-zea/plantillas/{filename}")
+        return template_bytes
 
     def _validate_template_data(self, data: Dict[str, str]):
         """
@@ -3846,7 +3451,7 @@ class EscrituraPublicaDocumentService:
             if isinstance(value, str):
                 # Check for problematic characters or patterns
                 if '{{' in value or '}}' in value:
-                    print(f"WARNING: Key '{key}' contains template syntax: {repr(value)}")
+                    logger.warning("Key '%s' contains template syntax: %r", key, value)
                     # Clean the value to prevent template injection
                     cleaned_value = value.replace('{{', '').replace('}}', '')
                     data[key] = cleaned_value
@@ -3854,105 +3459,34 @@ class EscrituraPublicaDocumentService:
                 
                 # Check for very long values that might cause issues
                 if len(value) > 1000:
-                    print(f"WARNING: Key '{key}' has very long value ({len(value)} chars)")
+                    logger.warning("Key '%s' has very long value (%s chars)", key, len(value))
                     problematic_keys.append(key)
         
         if problematic_keys:
-            print(f"WARNING: Cleaned {len(problematic_keys)} problematic data keys: {problematic_keys}")
+            logger.warning("Cleaned %s problematic data keys: %s", len(problematic_keys), problematic_keys)
 
     def _process_document(self, template_bytes: bytes, data: Dict[str, str]) -> Document:
         """
         Process the document template with data using simple python-docx approach
         """
-        # Create document from template bytes using simple python-docx
-        buffer = io.BytesIO(template_bytes)
-        doc = Document(buffer)
-        
-        # Replace placeholders in paragraphs
-        for paragraph in doc.paragraphs:
-            for placeholder, value in data.items():
-                placeholder_text = f"{{{{{placeholder}}}}}"
-                if placeholder_text in paragraph.text:
-                    paragraph.text = paragraph.text.replace(placeholder_text, str(value))
-        
-        # Replace placeholders in tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        for placeholder, value in data.items():
-                            placeholder_text = f"{{{{{placeholder}}}}}"
-                            if placeholder_text in paragraph.text:
-                                paragraph.text = paragraph.text.replace(placeholder_text, str(value))
+        # Create document from the pre-parsed template pool
+        doc = open_document(template_bytes)
+        substitution = PlaceholderSubstitution(data)
+        
+        # Replace placeholders and clean up leftovers in a single walk over
+        # body, headers, footers, nested tables and text boxes
+        DocumentWalker(substitution.replace_in_paragraph, self._cleanup_visitor()).walk(doc)
         
         return doc
 
-    def remove_unfilled_placeholders(self, doc):
-        """
-        Remove all unfilled {{SOMETHING}} placeholders completely, except for escrituracion placeholders which should be hidden.
-        Keep and hide: {{NRO_ESC}}, {{FI}}, {{FF}}, {{S_IN}}, {{S_FN}}, {{FECHA_ACT}}
-        Remove all others: {{P_NOM_3}}, {{C_NOM_4}}, etc.
+    def create_documento_in_r2(self, content, kardex):
         """
-        import re
-        curly_placeholder_pattern = re.compile(r'\{\{[A-Z0-9_]+\}\}')
-        representation_pattern = re.compile(
-            r'EN REPRESENTACION DE\s*Y[\s.·…‥⋯⋮⋱⋰⋯—–-]*', re.IGNORECASE
-        )
-
-        # List of placeholders to keep and hide (only escrituracion placeholders)
-        keep_placeholders = ['{{NRO_ESC}}', '{{FI}}', '{{FF}}', '{{S_IN}}', '{{S_FN}}', '{{FECHA_ACT}}']
-
-        def clean_runs(runs):
-            for run in runs:
-                # Handle {{SOMETHING}} placeholders
-                if curly_placeholder_pattern.search(run.text):
-                    # Check if this contains placeholders we want to keep and hide
-                    should_hide_not_remove = False
-                    for placeholder in keep_placeholders:
-                        if placeholder in run.text:
-                            # If it's a placeholder we want to keep, check if it has a real value
-                            if run.text.strip() == placeholder:
-                                # This is still a placeholder, hide it with white color
-                                run.font.color.rgb = RGBColor(255, 255, 255)  # White color
-                                should_hide_not_remove = True
-                                break
-                    
-                    # For other curly placeholders, remove them completely
-                    if not should_hide_not_remove:
-                        run.text = curly_placeholder_pattern.sub('', run.text)
-                
-                # Remove unwanted phrase
-                run.text = representation_pattern.sub('', run.text)
-
-        # Clean paragraphs
-        for paragraph in doc.paragraphs:
-            clean_runs(paragraph.runs)
-        # Clean tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        clean_runs(paragraph.runs)
-
-    def create_documento_in_r2(self, doc, kardex):
-        """
-        Upload the generated document to R2 - same as other services
+        Queue the upload of the generated document to R2 (write-behind)
         """
         try:
-            from io import BytesIO
-            buffer = BytesIO()
-            doc.save(buffer)
-            buffer.seek(0)
-            object_key = f"rodriguez-zea/documentos/__PROY__{kardex}.docx"
-            s3 = get_s3_client()
-            s3.upload_fileobj(
-                buffer,
-                os.environ.get('CLOUDFLARE_R2_BUCKET'),
-                object_key
-            )
-            return True
+            return upload_project_document(content, kardex)
         except Exception as e:
-            print(f"Error uploading escritura publica document to R2: {e}")
+            logger.error("Error queuing escritura publica document upload to R2: %s", e)
             return False
 
     def _create_response(self, doc, filename: str, kardex: str, mode: str = "download") -> HttpResponse:
@@ -4025,48 +3559,9 @@ class EscrituraPublicaDocumentService:
         Remove all unfilled {{SOMETHING}} placeholders completely, except for escrituracion placeholders which should be hidden.
         Also clean up text formatting issues.
         """
-        import re
-        curly_placeholder_pattern = re.compile(r'\{\{[A-Z0-9_]+\}\}')
-        representation_pattern = re.compile(
-            r'EN REPRESENTACION DE\s*Y[\s.·…‥⋯⋮⋱⋰⋯—–-]*', re.IGNORECASE
-        )
-
-        # List of placeholders to keep and hide (only escrituracion placeholders)
-        keep_placeholders = ['{{NRO_ESC}}', '{{FI}}', '{{FF}}', '{{S_IN}}', '{{S_FN}}', '{{FECHA_ACT}}']
-
-        def clean_runs(runs):
-            for run in runs:
-                # Handle {{SOMETHING}} placeholders
-                if curly_placeholder_pattern.search(run.text):
-                    # Check if this contains placeholders we want to keep and hide
-                    should_hide_not_remove = False
-                    for placeholder in keep_placeholders:
-                        if placeholder in run.text:
-                            # If it's a placeholder we want to keep, check if it has a real value
-                            if run.text.strip() == placeholder:
-                                # This is still a placeholder, hide it with white color
-                                run.font.color.rgb = RGBColor(255, 255, 255)  # White color
-                                should_hide_not_remove = True
-                                break
-                    
-                    # For other curly placeholders, remove them completely
-                    if not should_hide_not_remove:
-                        run.text = curly_placeholder_pattern.sub('', run.text)
-                
-                # Remove unwanted phrase
-                run.text = representation_pattern.sub('', run.text)
-                
-                # FIXED: Only fix repeated commas - do NOT remove spaces
-                run.text = re.sub(r',\s*,+', ',', run.text)  # Fix repeated commas only
-                run.text = re.sub(r',\s*$', '', run.text)    # Remove trailing comma only
-        # Clean paragraphs
-        for paragraph in doc.paragraphs:
-            clean_runs(paragraph.runs)
-        # Clean tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        clean_runs(paragraph.runs)
+        DocumentWalker(self._cleanup_visitor()).walk(doc)
+
+    def _cleanup_visitor(self) -> PlaceholderCleanup:
+        return PlaceholderCleanup(unfilled='remove', remove_empty_markers=False, fix_commas=True)
 
 
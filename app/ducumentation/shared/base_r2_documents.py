@@ -1,24 +1,16 @@
-import boto3
-from botocore.client import Config
 from botocore.exceptions import ClientError
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
+import io
 import os
+from typing import Any, Callable, Dict, Optional
 
-_s3_client = None
-
-
-def get_s3_client():
-    global _s3_client
-    if _s3_client is None:
-        _s3_client = boto3.client(
-            's3',
-            endpoint_url=os.environ.get('CLOUDFLARE_R2_ENDPOINT'),
-            aws_access_key_id=os.environ.get('CLOUDFLARE_R2_ACCESS_KEY'),
-            aws_secret_access_key=os.environ.get('CLOUDFLARE_R2_SECRET_KEY'),
-            config=Config(signature_version='s3v4'),
-            region_name='auto',
-        )
-    return _s3_client
+from .document_uploader import is_pending_document
+from .document_stream import stream_document
+from .instrumentation import span
+from .presigned_urls import presigned_url, redirect_to_document
+from .render_cache import render_cached, upload_rendered
+from .storage import get_s3_client
+from .template_pool import open_docx_template
 
 
 class BaseR2DocumentService:
@@ -28,7 +20,72 @@ class BaseR2DocumentService:
     def _object_key_for_template(self, template_filename: str) -> str:
         return f"rodriguez-zea/plantillas/{template_filename}"
 
+    def _get_template_from_r2(self) -> Optional[bytes]:
+        """
+        Template bytes for self.template_filename via the shared template cache.
+        Returns None when the template does not exist in R2.
+        """
+        if not self.template_filename:
+            raise ValueError("template_filename must be set in child class")
+        from .template_cache import get_template_bytes
+        with span('template', self):
+            return get_template_bytes(self.template_filename)
+
+    def _render_document(self, template_bytes: bytes, context: Dict[str, Any],
+                         render: Callable[[bytes, Dict[str, Any]], Any] = None) -> io.BytesIO:
+        """
+        Render the template with `context` into a buffer. The bytes come from
+        the render cache when this template and context were rendered before.
+        `render(template_bytes, context)` returns the rendered docx (default:
+        a plain docxtpl render).
+        """
+        render = render or _render_template
+
+        def render_bytes() -> bytes:
+            with span('render', self):
+                doc = render(template_bytes, context)
+            with span('serialize', self):
+                buffer = io.BytesIO()
+                doc.save(buffer)
+            return buffer.getvalue()
+
+        return io.BytesIO(render_cached(self, self.template_filename, template_bytes, context, render_bytes))
+
+    def _save_document_to_r2(self, buffer: io.BytesIO, filename: str, wait: bool = False) -> bool:
+        """
+        Queue the document on the write-behind uploader (skipped when R2
+        already holds these exact bytes). Pass wait=True when a presigned URL
+        for it is returned right away (mode "open").
+        """
+        with span('upload', self):
+            uploaded = upload_rendered(self._object_key_for_document(filename), buffer.getvalue(), wait=wait)
+        if wait and not uploaded:
+            raise RuntimeError(f"Upload of {filename} to R2 did not complete")
+        return uploaded
+
+    def _stream_document(self, filename: str, request=None) -> HttpResponse:
+        """
+        Stream a stored document to the client (If-None-Match/Range aware when
+        the request is given). Raises ClientError 'NoSuchKey' if it is missing.
+        """
+        response = stream_document(request, self._object_key_for_document(filename), filename)
+        response['Access-Control-Allow-Origin'] = '*'
+        return response
+
+    def _redirect_to_document(self, filename: str, request=None) -> HttpResponse:
+        """
+        302 to a cached presigned URL so the bytes bypass the app (mode "redirect").
+        """
+        response = redirect_to_document(request, self._object_key_for_document(filename), filename)
+        response['Access-Control-Allow-Origin'] = '*'
+        return response
+
+    def _presigned_document_url(self, filename: str) -> str:
+        return presigned_url(self._object_key_for_document(filename))
+
     def _document_exists_in_r2(self, filename: str) -> bool:
+        if is_pending_document(self._object_key_for_document(filename)):
+            return True
         s3 = get_s3_client()
         try:
             s3.head_object(Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'), Key=self._object_key_for_document(filename))
@@ -45,4 +102,10 @@ class BaseR2DocumentService:
             payload.update(extra)
         resp = JsonResponse(payload, status=status_code)
         resp['Access-Control-Allow-Origin'] = '*'
-        return resp 
\ No newline at end of file
+        return resp
+
+
+def _render_template(template_bytes: bytes, context: Dict[str, Any]):
+    doc = open_docx_template(template_bytes)
+    doc.render(context)
+    return doc
@@ -0,0 +1,122 @@
+"""
+Set-based loading of the parties (contratantes) of a kardex.
+
+The protocol services used to resolve every party one row at a time
+(Cliente2 per contratante, Actocondicion per condition, Nacionalidades per
+person, Cliente2 again per represented principal). The loaders here fetch
+everything for a kardex with one `__in` query per table, so a kardex costs
+the same handful of queries however many parties it has; conditions,
+nationalities and ubigeo are read from the catalog cache.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from notaria.catalogs import catalog
+from notaria.models import Actocondicion, Cliente2, Contratantes, Contratantesxacto, Nacionalidades, Ubigeo
+
+
+class KardexParties:
+    """
+    Parties of one kardex plus their related rows, keyed for dict lookups.
+
+    `parties` holds Contratantes or Contratantesxacto rows, depending on the
+    loader. Nacionalidades are keyed by str(idnacionalidad) because
+    Cliente2.nacionalidad is a CharField; see nationality_key().
+    """
+    __slots__ = ('kardex', 'parties', 'parties_by_id', 'clientes', 'condiciones', 'nacionalidades', 'ubigeos')
+
+    def __init__(self, kardex: str, parties: List[Any], clientes: Dict[str, Cliente2],
+                 condiciones: Dict[str, Actocondicion], nacionalidades: Dict[str, Nacionalidades],
+                 ubigeos: Dict[str, Ubigeo]):
+        self.kardex = kardex
+        self.parties = parties
+        self.parties_by_id = {party.idcontratante: party for party in parties}
+        self.clientes = clientes
+        self.condiciones = condiciones
+        self.nacionalidades = nacionalidades
+        self.ubigeos = ubigeos
+
+    def cliente(self, idcontratante: str) -> Optional[Cliente2]:
+        return self.clientes.get(idcontratante)
+
+    def condition_name(self, idcondicion: str) -> str:
+        condicion = self.condiciones.get(idcondicion)
+        return condicion.condicion if condicion else ''
+
+    def condition_names(self, condicion_field: str) -> List[str]:
+        """
+        Names for a Contratantes.condicion value such as '001.1/012.1'.
+        """
+        names = []
+        for idcondicion in condition_ids(condicion_field):
+            if idcondicion in self.condiciones:
+                names.append(self.condiciones[idcondicion].condicion)
+        return names
+
+    def nacionalidad(self, cliente: Cliente2) -> str:
+        nacionalidad = self.nacionalidades.get(nationality_key(cliente.nacionalidad))
+        return (nacionalidad.descripcion or '') if nacionalidad else ''
+
+    def ubigeo(self, cliente: Cliente2) -> Optional[Ubigeo]:
+        return self.ubigeos.get(cliente.idubigeo) if cliente.idubigeo else None
+
+
+def condition_ids(condicion_field: Optional[str]) -> List[str]:
+    """
+    '001.1/012.1' -> ['001', '012']
+    """
+    return [condicion.split('.')[0] for condicion in (condicion_field or '').split('/') if condicion]
+
+
+def nationality_key(value: Any) -> Optional[str]:
+    """
+    Cliente2.nacionalidad as a Nacionalidades key. The column is a CharField
+    and the legacy system stores zero-padded ids ('051'); they match the
+    numeric id like the old SQL comparison did.
+    """
+    value = str(value or '').strip()
+    return str(int(value)) if value.isdigit() else None
+
+
+def _load_related(kardex: str, parties: List[Any], idcondiciones: Iterable[str], with_ubigeo: bool) -> KardexParties:
+    contratante_ids = {party.idcontratante for party in parties}
+    clientes = {c.idcontratante: c for c in Cliente2.objects.filter(idcontratante__in=contratante_ids)} if contratante_ids else {}
+
+    # Conditions, nationalities and ubigeo come from the catalog snapshots
+    idcondiciones = {idcondicion for idcondicion in idcondiciones if idcondicion}
+    condiciones = catalog(Actocondicion).subset('idcondicion', idcondiciones) if idcondiciones else {}
+
+    nacionalidad_ids = {nationality_key(c.nacionalidad) for c in clientes.values()} - {None}
+    nacionalidades = {
+        nationality_key(idnacionalidad): n
+        for idnacionalidad, n in catalog(Nacionalidades).subset('idnacionalidad', [int(i) for i in nacionalidad_ids]).items()
+    } if nacionalidad_ids else {}
+
+    ubigeos = {}
+    if with_ubigeo:
+        ubigeo_ids = {c.idubigeo for c in clientes.values() if c.idubigeo}
+        if ubigeo_ids:
+            ubigeos = catalog(Ubigeo).subset('coddis', ubigeo_ids)
+
+    return KardexParties(kardex, parties, clientes, condiciones, nacionalidades, ubigeos)
+
+
+def load_kardex_parties(kardex: str, with_ubigeo: bool = False) -> KardexParties:
+    """
+    Parties from the `contratantes` table (conditions packed in `condicion`).
+    Two queries; the catalogs are read from the cache.
+    """
+    parties = list(Contratantes.objects.filter(kardex=kardex))
+    idcondiciones = [idcondicion for party in parties for idcondicion in condition_ids(party.condicion)]
+    return _load_related(kardex, parties, idcondiciones, with_ubigeo)
+
+
+def load_act_parties(kardex: str, idtipoacto: str = None, with_ubigeo: bool = False) -> KardexParties:
+    """
+    Parties from `contratantesxacto` (one row per party and act), optionally
+    restricted to one act type. Two queries; the catalogs are read from the cache.
+    """
+    queryset = Contratantesxacto.objects.filter(kardex=kardex)
+    if idtipoacto:
+        queryset = queryset.filter(idtipoacto=idtipoacto)
+    parties = list(queryset)
+    return _load_related(kardex, parties, [party.idcondicion for party in parties], with_ubigeo)
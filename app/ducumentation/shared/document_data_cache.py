@@ -0,0 +1,154 @@
+"""
+Per-kardex cache of the assembled placeholder data.
+
+Generating a project, regenerating it and the smart merge of update-docx
+all rebuild the same placeholder dict for the same kardex with the same
+queries. The services' data methods are wrapped with `cached_document_data`,
+which keeps the dict per (service, kardex, arguments) as a compressed JSON
+blob in a bounded per-process LRU, so repeated opens of a project run one
+indexed version lookup instead of the data queries.
+
+Each kardex has a version number, shared by the web and job worker processes
+through notaria.cache_versions and read on every hit; ORM writes to the
+kardex, its parties, clients, acts, patrimoniales, vehicles and payments bump
+it (see ducumentation/signals.py), which orphans every entry of that kardex
+in every process. Writes made by the legacy system age out after
+DOCUMENT_DATA_CACHE_TTL seconds (0 disables the cache). The date is part of
+the key, so the generation date placeholders never go stale overnight.
+"""
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from notaria.cache_versions import bump_version, read_version
+
+DEFAULT_TTL_SECONDS = 900
+DEFAULT_MAX_ENTRIES = 512
+
+
+class DocumentDataCache:
+    """
+    Bounded TTL cache of placeholder dicts, with versioned invalidation per kardex.
+    """
+
+    def __init__(self, ttl: float = None, max_entries: int = None):
+        self.ttl = float(ttl if ttl is not None else os.environ.get('DOCUMENT_DATA_CACHE_TTL', DEFAULT_TTL_SECONDS))
+        self.max_entries = int(max_entries or os.environ.get('DOCUMENT_DATA_CACHE_SIZE', DEFAULT_MAX_ENTRIES))
+        self._entries: "OrderedDict[Tuple, Tuple[float, int, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'uncacheable': 0}
+
+    def get_or_build(self, kardex: str, key: Hashable, build: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        The cached dict for (kardex, key), or the result of `build()`. Every
+        call returns a fresh copy, so callers may modify it.
+        """
+        if self.ttl <= 0:
+            return build()
+
+        version = read_version(_version_name(kardex))
+        if version is None:
+            return build()
+
+        key = (kardex, key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time() and entry[1] == version:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                blob = entry[2]
+            else:
+                self.stats['misses'] += 1
+                blob = None
+        if blob is not None:
+            return _decode(blob)
+
+        data = build()
+        blob = _encode(data)
+        if blob is None:
+            self.stats['uncacheable'] += 1
+            return data
+        # A write during the build bumped the version: do not keep stale data
+        if read_version(_version_name(kardex)) != version:
+            return data
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, version, blob)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+    def invalidate(self, kardex: Optional[str] = None) -> None:
+        """
+        Drop the entries of one kardex in every process (of all kardex, in
+        this process only, when no kardex is given).
+        """
+        if kardex is not None:
+            bump_version(_version_name(kardex))
+        with self._lock:
+            if kardex is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == kardex]:
+                del self._entries[key]
+
+
+def _version_name(kardex: str) -> str:
+    return f'document_data:{kardex}'
+
+
+def _encode(data: Dict[str, Any]) -> Optional[bytes]:
+    """
+    Compact blob of a placeholder dict, or None if it does not survive a
+    JSON round trip unchanged (dates, Decimals, tuples...).
+    """
+    try:
+        text = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    except (TypeError, ValueError):
+        return None
+    if json.loads(text) != data:
+        return None
+    return zlib.compress(text.encode('utf-8'))
+
+
+def _decode(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+_document_data_cache = DocumentDataCache()
+
+
+def get_document_data_cache() -> DocumentDataCache:
+    return _document_data_cache
+
+
+def cached_document_data(method):
+    """
+    Cache a service method returning the placeholder dict of a kardex. The
+    method takes the kardex number as `num_kardex`; all its arguments are
+    part of the key.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        arguments.pop('self')
+        num_kardex = arguments.pop('num_kardex')
+        key = (type(self).__name__, method.__name__, tuple(sorted(arguments.items())), date.today().isoformat())
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        return _document_data_cache.get_or_build(num_kardex, key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
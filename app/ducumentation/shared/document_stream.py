@@ -0,0 +1,123 @@
+"""
+Streaming download of stored documents.
+
+The storage body is piped to the client in chunks, so a document is never
+held whole in Python memory. Conditional and partial requests are passed
+through to storage: `If-None-Match` is checked against the real object ETag
+(304 without a body) and `Range` becomes a ranged GET (206).
+"""
+import hashlib
+import os
+from typing import Iterator, Optional
+
+from botocore.exceptions import ClientError
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date
+
+from .document_uploader import DOCX_CONTENT_TYPE, pending_document
+from .storage import get_s3_client
+
+STREAM_CHUNK_SIZE = int(os.environ.get('DOCUMENT_STREAM_CHUNK_SIZE', 64 * 1024))
+
+
+def _parse_etags(header: Optional[str]) -> list:
+    """
+    If-None-Match -> list of ETags, quoted, without weak prefixes.
+    """
+    if not header:
+        return []
+    etags = []
+    for part in header.split(','):
+        part = part.strip()
+        if part.startswith('W/'):
+            part = part[2:]
+        if part:
+            etags.append(part if part.startswith('"') or part == '*' else f'"{part}"')
+    return etags
+
+
+def _iter_body(body, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    try:
+        while True:
+            chunk = body.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        body.close()
+
+
+def _not_modified(etag: str) -> HttpResponse:
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _document_headers(response: HttpResponse, filename: str, etag: str) -> HttpResponse:
+    response['Content-Disposition'] = f'inline; filename="{filename}"'
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    # Documents change on every regeneration; clients revalidate with the ETag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def _serve_pending(request, content: bytes, filename: str) -> HttpResponse:
+    """
+    A document still queued for upload is already in memory; serve it directly.
+    """
+    etag = f'"{hashlib.md5(content).hexdigest()}"'
+    if request is not None and etag in _parse_etags(request.headers.get('If-None-Match')):
+        return _not_modified(etag)
+    response = HttpResponse(content, content_type=DOCX_CONTENT_TYPE)
+    response['Content-Length'] = str(len(content))
+    return _document_headers(response, filename, etag)
+
+
+def stream_document(request, object_key: str, filename: str) -> HttpResponse:
+    """
+    Stream object_key from storage as filename.
+
+    Raises the storage ClientError ('NoSuchKey') when the document does not
+    exist so callers keep their own not-found handling. `request` may be None
+    (no conditional or range handling).
+    """
+    pending = pending_document(object_key)
+    if pending is not None:
+        return _serve_pending(request, pending, filename)
+
+    params = {'Bucket': os.environ.get('CLOUDFLARE_R2_BUCKET'), 'Key': object_key}
+    etags = _parse_etags(request.headers.get('If-None-Match')) if request is not None else []
+    range_header = request.headers.get('Range') if request is not None else None
+    if etags and etags[0] != '*':
+        params['IfNoneMatch'] = etags[0]
+    if range_header:
+        params['Range'] = range_header
+
+    s3 = get_s3_client()
+    try:
+        s3_response = s3.get_object(**params)
+    except ClientError as e:
+        error_code = e.response.get('Error', {}).get('Code')
+        http_status = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+        if error_code in ('304', 'NotModified') or http_status == 304:
+            return _not_modified(etags[0])
+        if error_code == 'InvalidRange' or http_status == 416:
+            response = HttpResponse(status=416)
+            response['Accept-Ranges'] = 'bytes'
+            return response
+        raise
+
+    response = StreamingHttpResponse(
+        _iter_body(s3_response['Body']),
+        content_type=DOCX_CONTENT_TYPE,
+        status=206 if s3_response.get('ContentRange') else 200,
+    )
+    if s3_response.get('ContentLength') is not None:
+        response['Content-Length'] = str(s3_response['ContentLength'])
+    if s3_response.get('ContentRange'):
+        response['Content-Range'] = s3_response['ContentRange']
+    if s3_response.get('LastModified'):
+        response['Last-Modified'] = http_date(s3_response['LastModified'].timestamp())
+    return _document_headers(response, filename, s3_response.get('ETag', ''))
@@ -0,0 +1,473 @@
+"""
+Write-behind uploader for generated documents.
+
+Services hand over the rendered bytes and return their response straight
+away; the upload to R2 runs on a bounded thread pool with retries. Every
+document is written to a local spool directory before it is queued and only
+removed once R2 has it.
+
+Each uploader spools into its own subdirectory of DOCUMENT_UPLOAD_SPOOL_DIR
+and holds an exclusive lock on it for its lifetime, so the web process and
+the job worker never touch each other's uploads. A directory whose lock can
+be taken belongs to a process that died; its uploads are adopted on start
+and on every retry sweep. The sweep also re-queues this process's own
+uploads that ran out of attempts.
+
+Until an upload lands, `pending_content()` serves the bytes so a download
+issued right after generation never sees a missing object. That only helps
+within this process: the job worker runs each job inside
+`synchronous_uploads()`, so a job is done only once its documents are in R2.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_SECONDS = 0.5
+DEFAULT_RETRY_INTERVAL_SECONDS = 60
+
+LOCK_FILE = 'owner.lock'
+
+
+class PendingUpload:
+    __slots__ = ('content', 'version', 'queued_at', 'done', 'uploaded', 'superseded')
+
+    def __init__(self, content: bytes, version: int, queued_at: float):
+        self.content = content
+        self.version = version
+        self.queued_at = queued_at
+        self.done = threading.Event()
+        self.uploaded = False
+        # Earlier entries for the same key replaced by this one; released with it
+        self.superseded = []
+
+    def release(self, uploaded: bool) -> None:
+        for entry in self.superseded + [self]:
+            entry.uploaded = uploaded
+            entry.done.set()
+
+
+class DocumentUploader:
+    """
+    Bounded write-behind queue in front of R2 put_object.
+
+    Submitting the same key again while it is still pending replaces the
+    queued content; only the latest version is guaranteed to be uploaded.
+    """
+
+    def __init__(self, spool_dir: str = None, max_workers: int = None, max_attempts: int = None,
+                 backoff: float = None, put_object: Callable[[str, bytes], None] = None,
+                 retry_interval: float = None):
+        self.spool_root = spool_dir if spool_dir is not None else os.environ.get(
+            'DOCUMENT_UPLOAD_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'notarios-uploads'))
+        self.spool_dir, self._lock_fd = _create_spool(self.spool_root)
+        self.max_workers = int(max_workers if max_workers is not None
+                               else os.environ.get('DOCUMENT_UPLOAD_WORKERS', DEFAULT_WORKERS))
+        self.max_attempts = int(max_attempts if max_attempts is not None
+                                else os.environ.get('DOCUMENT_UPLOAD_ATTEMPTS', DEFAULT_MAX_ATTEMPTS))
+        self.backoff = float(backoff if backoff is not None
+                             else os.environ.get('DOCUMENT_UPLOAD_BACKOFF', DEFAULT_BACKOFF_SECONDS))
+        self.retry_interval = float(retry_interval if retry_interval is not None
+                                    else os.environ.get('DOCUMENT_UPLOAD_RETRY_INTERVAL', DEFAULT_RETRY_INTERVAL_SECONDS))
+        self._put_object = put_object or _r2_put_object
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='r2-upload')
+        self._lock = threading.Lock()
+        self._pending: Dict[str, PendingUpload] = {}
+        self._scheduled = set()
+        self._version = 0
+        # queued_at of the last version of each key that reached R2
+        self._landed: Dict[str, float] = {}
+        self.stats = {'submitted': 0, 'uploaded': 0, 'retries': 0, 'failed': 0, 'recovered': 0}
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._stopped = threading.Event()
+        if self.retry_interval > 0:
+            threading.Thread(target=self._sweep, name='r2-upload-sweep', daemon=True).start()
+
+    def submit(self, object_key: str, content: bytes, queued_at: float = None,
+               if_newer: bool = False) -> Optional[PendingUpload]:
+        """
+        Spool and queue an upload. Returns the pending entry; call
+        `wait(object_key)` if the caller needs the object in R2 before continuing.
+
+        With if_newer=True (re-queued spool entries) nothing is queued, and
+        None is returned, when a later version of the key is pending or has
+        already landed in this process.
+        """
+        queued_at = queued_at if queued_at is not None else time.time()
+        with self._lock:
+            if if_newer:
+                current = self._pending.get(object_key)
+                if current is not None and current.queued_at >= queued_at:
+                    return None
+                if self._landed.get(object_key, 0) >= queued_at:
+                    return None
+            self._version += 1
+            entry = PendingUpload(content, self._version, queued_at)
+            previous = self._pending.get(object_key)
+            if previous is not None:
+                entry.superseded = previous.superseded + [previous]
+                previous.superseded = []
+            self._pending[object_key] = entry
+            self._write_spool(object_key, content, queued_at)
+            self.stats['submitted'] += 1
+            schedule = object_key not in self._scheduled
+            if schedule:
+                self._scheduled.add(object_key)
+        if schedule:
+            self._executor.submit(self._run, object_key)
+        return entry
+
+    def wait(self, object_key: str, timeout: float = None) -> bool:
+        """
+        Block until the pending upload for object_key (if any) is done.
+        Returns False on timeout or if the upload gave up.
+        """
+        with self._lock:
+            entry = self._pending.get(object_key)
+        if entry is None:
+            return not os.path.exists(self._spool_path(object_key))
+        return entry.done.wait(timeout) and entry.uploaded
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait for every queued upload. Returns False if any is still pending.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self._lock:
+                entries = list(self._pending.values())
+            if not entries:
+                return True
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                return False
+            entries[0].done.wait(remaining)
+
+    def is_pending(self, object_key: str) -> bool:
+        with self._lock:
+            return object_key in self._pending
+
+    def pending_content(self, object_key: str) -> Optional[bytes]:
+        """
+        Bytes for an upload that has not reached R2 yet, from memory or the spool.
+        """
+        with self._lock:
+            entry = self._pending.get(object_key)
+            if entry is not None:
+                return entry.content
+        try:
+            with open(self._spool_path(object_key), 'rb') as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    def upload_lag(self) -> float:
+        """
+        Seconds the oldest queued document has been waiting (0 when idle).
+        """
+        with self._lock:
+            if not self._pending:
+                return 0.0
+            oldest = min(entry.queued_at for entry in self._pending.values())
+        return time.time() - oldest
+
+    def metrics(self) -> Dict[str, float]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            **self.stats,
+            'pending': pending,
+            'upload_lag_seconds': self.upload_lag(),
+            'last_upload_lag_seconds': self.last_lag,
+            'max_upload_lag_seconds': self.max_lag,
+        }
+
+    def recover(self) -> int:
+        """
+        Re-queue this process's spooled uploads that gave up, and adopt the
+        spool directories of processes that are no longer running.
+        """
+        recovered = 0
+        for key, content, queued_at in self._spooled(self.spool_dir):
+            if self.submit(key, content, queued_at=queued_at, if_newer=True) is not None:
+                recovered += 1
+        for name in os.listdir(self.spool_root):
+            path = os.path.join(self.spool_root, name)
+            if path != self.spool_dir and not name.startswith('.') and os.path.isdir(path):
+                recovered += self._adopt(path)
+        self.stats['recovered'] += recovered
+        if recovered:
+            logger.debug("Re-queued %s spooled document upload(s)", recovered)
+        return recovered
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop uploading. Whatever is still spooled is left for the next
+        process to adopt.
+        """
+        self._stopped.set()
+        self._executor.shutdown(wait=wait)
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _sweep(self) -> None:
+        while not self._stopped.wait(self.retry_interval):
+            try:
+                self.recover()
+            except Exception as e:
+                logger.warning("Spool sweep of %s failed: %s", self.spool_dir, e)
+
+    def _adopt(self, path: str) -> int:
+        """
+        Take over the uploads of a dead process. A live owner holds the lock,
+        so its directory is left alone.
+        """
+        fd = _lock_spool(path)
+        if fd is None:
+            return 0
+        adopted = 0
+        try:
+            for key, content, queued_at in self._spooled(path):
+                if self.submit(key, content, queued_at=queued_at, if_newer=True) is not None:
+                    adopted += 1
+            for name in os.listdir(path):
+                try:
+                    os.remove(os.path.join(path, name))
+                except OSError:
+                    pass
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+        finally:
+            os.close(fd)
+        return adopted
+
+    @staticmethod
+    def _spooled(path: str):
+        """
+        (key, content, queued_at) of every complete upload spooled in `path`.
+        """
+        try:
+            names = os.listdir(path)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            meta_path = os.path.join(path, name)
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as fh:
+                    meta = json.load(fh)
+                with open(meta_path[:-len('.json')] + '.docx', 'rb') as fh:
+                    content = fh.read()
+            except (OSError, ValueError):
+                continue
+            yield meta['key'], content, meta.get('queued_at') or 0.0
+
+    def _run(self, object_key: str) -> None:
+        while True:
+            with self._lock:
+                entry = self._pending.get(object_key)
+                if entry is None:
+                    self._scheduled.discard(object_key)
+                    return
+            uploaded = self._upload_with_retry(object_key, entry.content)
+            with self._lock:
+                current = self._pending.get(object_key)
+                if current is not entry:
+                    # Superseded while uploading; upload the newer content
+                    continue
+                del self._pending[object_key]
+                self._scheduled.discard(object_key)
+                if uploaded:
+                    self._remove_spool(object_key)
+                    self._landed[object_key] = entry.queued_at
+            if uploaded:
+                lag = time.time() - entry.queued_at
+                self.last_lag = lag
+                self.max_lag = max(self.max_lag, lag)
+                logger.debug("R2 upload of %s landed %.2fs after generation", object_key, lag)
+            entry.release(uploaded)
+            return
+
+    def _upload_with_retry(self, object_key: str, content: bytes) -> bool:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self._put_object(object_key, content)
+                self.stats['uploaded'] += 1
+                return True
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    self.stats['failed'] += 1
+                    logger.error("Upload of %s failed after %s attempts, kept in spool: %s", object_key, attempt, e)
+                    return False
+                self.stats['retries'] += 1
+                logger.warning("Upload of %s failed (attempt %s), retrying: %s", object_key, attempt, e)
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+        return False
+
+    def _spool_path(self, object_key: str, suffix: str = '.docx') -> str:
+        return os.path.join(self.spool_dir, hashlib.sha1(object_key.encode('utf-8')).hexdigest() + suffix)
+
+    def _write_spool(self, object_key: str, content: bytes, queued_at: float) -> None:
+        for path, payload in (
+            (self._spool_path(object_key), content),
+            (self._spool_path(object_key, '.json'),
+             json.dumps({'key': object_key, 'queued_at': queued_at}).encode('utf-8')),
+        ):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as fh:
+                fh.write(payload)
+            os.replace(tmp_path, path)
+
+    def _remove_spool(self, object_key: str) -> None:
+        for suffix in ('.docx', '.json'):
+            try:
+                os.remove(self._spool_path(object_key, suffix))
+            except OSError:
+                pass
+
+
+def _create_spool(root: str) -> Tuple[str, int]:
+    """
+    Create and lock this uploader's spool directory. It is locked under a
+    hidden name first, so no other process can adopt it before it is owned.
+    """
+    name = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    staging = os.path.join(root, f".{name}")
+    os.makedirs(staging)
+    fd = _lock_spool(staging)
+    path = os.path.join(root, name)
+    os.rename(staging, path)
+    return path, fd
+
+
+def _lock_spool(path: str) -> Optional[int]:
+    """
+    Take the exclusive lock of a spool directory; None if another live
+    process holds it. The lock is released by the kernel when the owner dies.
+    """
+    fd = os.open(os.path.join(path, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _r2_put_object(object_key: str, content: bytes) -> None:
+    from .presigned_urls import invalidate_presigned_url
+    from .storage import get_s3_client
+    get_s3_client().put_object(
+        Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'),
+        Key=object_key,
+        Body=content,
+        ContentType=DOCX_CONTENT_TYPE,
+    )
+    invalidate_presigned_url(object_key)
+
+
+_uploader: Optional[DocumentUploader] = None
+_uploader_lock = threading.Lock()
+_synchronous = threading.local()
+
+
+def get_document_uploader() -> DocumentUploader:
+    """
+    Process-wide uploader; spooled uploads of dead processes are adopted on first use.
+    """
+    global _uploader
+    if _uploader is None:
+        with _uploader_lock:
+            if _uploader is None:
+                uploader = DocumentUploader()
+                _uploader = uploader
+                uploader.recover()
+    return _uploader
+
+
+def current_document_uploader() -> Optional[DocumentUploader]:
+    """
+    The process uploader if it was started, else None. Read-only paths use
+    this so that a download never starts the upload pool or adopts spools.
+    """
+    return _uploader
+
+
+def uploader_metrics() -> Dict[str, float]:
+    """
+    Metrics of the process uploader, without starting it just to report them.
+    """
+    uploader = current_document_uploader()
+    return uploader.metrics() if uploader is not None else {}
+
+
+@contextmanager
+def synchronous_uploads() -> Iterator[List[str]]:
+    """
+    Make every upload_document() of this thread wait until the document is
+    in R2. Yields the list of object keys whose upload did not complete.
+    """
+    previous = getattr(_synchronous, 'failed', None)
+    failed: List[str] = []
+    _synchronous.failed = failed
+    try:
+        yield failed
+    finally:
+        _synchronous.failed = previous
+
+
+def uploads_are_synchronous() -> bool:
+    return getattr(_synchronous, 'failed', None) is not None
+
+
+def upload_document(object_key: str, content: bytes, wait: bool = False, timeout: float = None) -> bool:
+    """
+    Queue a document upload. With wait=True (or inside synchronous_uploads),
+    block until it is in R2 (needed when a presigned URL is handed out right
+    away, or another process serves the document).
+    """
+    failed = getattr(_synchronous, 'failed', None)
+    uploader = get_document_uploader()
+    uploader.submit(object_key, content)
+    if not wait and failed is None:
+        return True
+    timeout = timeout if timeout is not None else float(os.environ.get('DOCUMENT_UPLOAD_WAIT_TIMEOUT', '30'))
+    uploaded = uploader.wait(object_key, timeout)
+    if not uploaded and failed is not None:
+        failed.append(object_key)
+    return uploaded
+
+
+def pending_document(object_key: str) -> Optional[bytes]:
+    """
+    Bytes of a document whose upload has not finished, or None.
+    """
+    uploader = current_document_uploader()
+    return uploader.pending_content(object_key) if uploader is not None else None
+
+
+def is_pending_document(object_key: str) -> bool:
+    """
+    True while a document queued in this process has not reached R2.
+    """
+    uploader = current_document_uploader()
+    return uploader is not None and uploader.is_pending(object_key)
@@ -0,0 +1,119 @@
+import re
+from typing import Callable, Iterator
+
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+
+from .placeholders import (
+    CURLY_PLACEHOLDER_PATTERN, E_PLACEHOLDER_PATTERN, REPRESENTATION_PATTERN, KEEP_PLACEHOLDERS, WHITE,
+)
+
+REPEATED_COMMA_PATTERN = re.compile(r',\s*,+')
+TRAILING_COMMA_PATTERN = re.compile(r',\s*$')
+
+
+def iter_story_parts(doc) -> Iterator:
+    """
+    The main document part followed by every header and footer part (each once,
+    even when several sections point at the same header).
+    """
+    main_part = doc.part
+    yield main_part
+    seen = set()
+    for rel in main_part.rels.values():
+        if rel.is_external or rel.reltype not in (RT.HEADER, RT.FOOTER):
+            continue
+        part = rel.target_part
+        if id(part) not in seen:
+            seen.add(id(part))
+            yield part
+
+
+def iter_paragraphs(doc) -> Iterator[Paragraph]:
+    """
+    Every paragraph of the document in a single XML traversal: body, headers,
+    footers, nested tables and text boxes.
+
+    Iterating w:p elements directly visits each table cell once; going through
+    table.rows / row.cells yields a merged cell once per grid column it spans.
+    """
+    for part in iter_story_parts(doc):
+        for p in part.element.iter(qn('w:p')):
+            yield Paragraph(p, part)
+
+
+class DocumentWalker:
+    """
+    Applies a list of paragraph visitors to every paragraph in one walk, so
+    substitution, cleanup and punctuation fixes do not each re-traverse the
+    document. A visitor is any callable taking a python-docx Paragraph.
+    """
+
+    def __init__(self, *visitors: Callable[[Paragraph], object]):
+        self.visitors = [visitor for visitor in visitors if visitor is not None]
+
+    def walk(self, doc) -> int:
+        count = 0
+        for paragraph in iter_paragraphs(doc):
+            for visitor in self.visitors:
+                visitor(paragraph)
+            count += 1
+        return count
+
+
+class PlaceholderCleanup:
+    """
+    Run-level cleanup of whatever placeholders are left after rendering.
+
+    unfilled:
+      'hide'       - unfilled {{X}} runs are colored white (KEEP_PLACEHOLDERS only
+                     when the run is exactly the placeholder)
+      'remove'     - unfilled {{X}} are deleted, except runs that are exactly one
+                     of KEEP_PLACEHOLDERS, which are hidden
+      'remove_all' - every {{X}} is deleted
+    """
+
+    def __init__(self, unfilled: str = 'hide', remove_empty_markers: bool = True,
+                 remove_representation: bool = True, fix_commas: bool = False):
+        self.unfilled = unfilled
+        self.remove_empty_markers = remove_empty_markers
+        self.remove_representation = remove_representation
+        self.fix_commas = fix_commas
+
+    def __call__(self, paragraph: Paragraph) -> None:
+        for run in paragraph.runs:
+            self.clean_run(run)
+
+    def clean_run(self, run) -> None:
+        original = run.text
+        if not original:
+            return
+        text = original
+        hide = False
+
+        if self.remove_empty_markers and '[E.' in text:
+            text = E_PLACEHOLDER_PATTERN.sub('', text)
+
+        if '{{' in text and CURLY_PLACEHOLDER_PATTERN.search(text):
+            if self.unfilled == 'hide':
+                keep = next((placeholder for placeholder in KEEP_PLACEHOLDERS if placeholder in text), None)
+                hide = keep is None or text.strip() == keep
+            elif self.unfilled == 'remove' and text.strip() in KEEP_PLACEHOLDERS:
+                hide = True
+            else:
+                text = CURLY_PLACEHOLDER_PATTERN.sub('', text)
+
+        if self.remove_representation:
+            text = REPRESENTATION_PATTERN.sub('', text)
+
+        if self.fix_commas and ',' in text:
+            text = REPEATED_COMMA_PATTERN.sub(',', text)
+            text = TRAILING_COMMA_PATTERN.sub('', text)
+
+        # Only write back when something changed: assigning run.text drops
+        # non-text children such as drawings.
+        if text != original:
+            run.text = text
+        if hide:
+            run.font.color.rgb = WHITE
@@ -0,0 +1,349 @@
+"""
+Field manifests: incremental updates of generated documents.
+
+Updating a project used to download it, render a whole new document from the
+template, align the two paragraph by paragraph and copy values across. Now
+every value inserted at generation is wrapped in a hidden bookmark (`_fldN`,
+Word keeps underscore bookmarks out of its UI) and a manifest of
+
+    placeholder -> value it was rendered with,
+                   {part: {bookmark: text between the bookmarks}}
+
+is stored inside the DOCX as a custom XML part, so it travels with the
+document (R2, render cache, batch output) and is never out of sync with it.
+
+`patch_fields` diffs fresh placeholder data against the manifest and only
+rewrites the runs inside the bookmarks of the changed fields, in the XML
+parts that contain them; every other part of the package is copied as is.
+A location whose text no longer matches the manifest was edited by hand and
+is left alone, as is a bookmark that was deleted.
+"""
+import io
+import json
+import logging
+import re
+import zipfile
+from typing import Any, Callable, Dict, List, Optional
+
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.opc.part import Part
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.oxml.parser import parse_xml
+from docx.shared import RGBColor
+from docx.text.run import Run
+from lxml import etree
+
+from .document_walker import iter_paragraphs, iter_story_parts
+from .placeholders import PlaceholderSubstitution
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PARTNAME = '/customXml/fieldManifest.xml'
+MANIFEST_NAMESPACE = 'urn:notarios-api:field-manifest'
+MANIFEST_VERSION = 1
+
+BOOKMARK_PREFIX = '_fld'
+PENDING_PREFIX = '_fldp'
+# Ids of bookmarks written before attach() numbers them; far above the ids
+# Word gives the bookmarks of a template.
+PENDING_ID_BASE = 1000000
+
+# Plain docxtpl variables ({{ KEY }}); filters, attributes and {{r ...}} tags are not fields
+TEMPLATE_FIELD_PATTERN = re.compile(r'\{\{\s*([A-Za-z0-9_]+)\s*\}\}')
+TEMPLATE_EXPRESSION_PATTERN = re.compile(r'\{[{%].*?[}%]\}')
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+
+class FieldManifest:
+    """
+    Where each placeholder value went in a generated document.
+
+    `color`/`skip_empty` are the substitution settings of the service, so a
+    patched value looks like a rendered one. `opaque` holds the keys (and
+    values) a template also uses in conditions, loops or filters: their
+    output cannot be patched in place, so a change to one of them needs a
+    full render.
+    """
+
+    def __init__(self, color: Optional[RGBColor] = None, skip_empty: bool = False):
+        self.color = color
+        self.skip_empty = skip_empty
+        self.fields: Dict[str, Dict[str, Any]] = {}
+        self.opaque: Dict[str, str] = {}
+        self._pending: Dict[str, str] = {}
+        self._values: Dict[str, str] = {}
+
+    @staticmethod
+    def normalize(value: Any) -> str:
+        return '' if value is None else str(value)
+
+    def text_for(self, key: str, value: Any) -> str:
+        """
+        Text written for `value`; with skip_empty an empty value leaves the
+        placeholder (hidden by the cleanup) in place.
+        """
+        text = self.normalize(value)
+        if not text and self.skip_empty:
+            return '{{%s}}' % key
+        return text
+
+    def wrap(self, r, key: str, value: Any):
+        """
+        Bookmark the w:r holding the value of `key`. Returns the bookmarkEnd.
+        """
+        bookmark_id = str(PENDING_ID_BASE + len(self._pending))
+        name = f'{PENDING_PREFIX}{len(self._pending)}'
+        start = OxmlElement('w:bookmarkStart')
+        start.set(qn('w:id'), bookmark_id)
+        start.set(qn('w:name'), name)
+        end = OxmlElement('w:bookmarkEnd')
+        end.set(qn('w:id'), bookmark_id)
+        r.addprevious(start)
+        r.addnext(end)
+        self._pending[name] = key
+        self._values[key] = self.normalize(value)
+        return end
+
+    def mark_template(self, doc, data: Dict[str, Any]) -> None:
+        """
+        Isolate every {{ KEY }} of a docxtpl template in its own bookmarked
+        run before rendering, so the rendered value ends up inside the bookmark.
+        """
+        marker = _TemplateFieldMarker(data, manifest=self)
+        for paragraph in iter_paragraphs(doc):
+            text = paragraph.text
+            if '{' in text:
+                for expression in TEMPLATE_EXPRESSION_PATTERN.findall(text):
+                    if not TEMPLATE_FIELD_PATTERN.fullmatch(expression):
+                        self.opaque.update(
+                            (name, self.normalize(data[name]))
+                            for name in IDENTIFIER_PATTERN.findall(expression) if name in data
+                        )
+            marker.replace_in_paragraph(paragraph)
+
+    def attach(self, doc) -> None:
+        """
+        Number the bookmarks written during the render (a template loop can
+        have copied some, a condition dropped others), record their final
+        text and store the manifest in `doc`. Call after placeholder cleanup.
+        """
+        marked = []
+        next_id = 0
+        for part in iter_story_parts(doc):
+            for start in part.element.iter(qn('w:bookmarkStart')):
+                if start.get(qn('w:name')) in self._pending:
+                    marked.append((part, start))
+                else:
+                    try:
+                        next_id = max(next_id, int(start.get(qn('w:id'))) + 1)
+                    except (TypeError, ValueError):
+                        pass
+
+        self.fields = {}
+        for index, (part, start) in enumerate(marked):
+            key = self._pending[start.get(qn('w:name'))]
+            end = _bookmark_end(start)
+            if end is None:
+                start.getparent().remove(start)
+                continue
+            name = f'{BOOKMARK_PREFIX}{index}'
+            start.set(qn('w:name'), name)
+            start.set(qn('w:id'), str(next_id + index))
+            end.set(qn('w:id'), str(next_id + index))
+            field = self.fields.setdefault(key, {'value': self._values[key], 'locations': {}})
+            field['locations'].setdefault(str(part.partname), {})[name] = _bookmark_text(start, end)
+        self._pending.clear()
+        self._store(doc)
+
+    def to_xml(self) -> bytes:
+        root = etree.Element(f'{{{MANIFEST_NAMESPACE}}}fieldManifest', nsmap={None: MANIFEST_NAMESPACE})
+        root.set('version', str(MANIFEST_VERSION))
+        root.text = json.dumps({
+            'color': str(self.color) if self.color is not None else None,
+            'skip_empty': self.skip_empty,
+            'opaque': self.opaque,
+            'fields': self.fields,
+        }, ensure_ascii=False)
+        return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+    @classmethod
+    def from_xml(cls, blob: bytes) -> Optional['FieldManifest']:
+        root = etree.fromstring(blob)
+        if root.get('version') != str(MANIFEST_VERSION):
+            return None
+        payload = json.loads(root.text or '{}')
+        color = payload.get('color')
+        manifest = cls(RGBColor.from_string(color) if color else None, payload.get('skip_empty', False))
+        manifest.fields = payload.get('fields', {})
+        manifest.opaque = payload.get('opaque', {})
+        return manifest
+
+    def _store(self, doc) -> None:
+        main_part = doc.part
+        for rel in list(main_part.rels.values()):
+            if not rel.is_external and rel.target_part.partname == MANIFEST_PARTNAME:
+                main_part.drop_rel(rel.rId)
+        part = Part(PackURI(MANIFEST_PARTNAME), 'application/xml', self.to_xml(), main_part.package)
+        main_part.relate_to(part, RT.CUSTOM_XML)
+
+
+class _TemplateFieldMarker(PlaceholderSubstitution):
+    """
+    Leaves each {{ KEY }} unchanged but in its own bookmarked run.
+    """
+    pattern = TEMPLATE_FIELD_PATTERN
+
+    @staticmethod
+    def key(match) -> str:
+        return match.group(1)
+
+    def lookup(self, match) -> Optional[str]:
+        return match.group(0) if match.group(1) in self.data else None
+
+
+def _bookmark_end(start):
+    bookmark_id = start.get(qn('w:id'))
+    for sibling in start.itersiblings():
+        if sibling.tag == qn('w:bookmarkEnd') and sibling.get(qn('w:id')) == bookmark_id:
+            return sibling
+    return None
+
+
+def _bookmark_runs(start, end) -> list:
+    runs = []
+    for sibling in start.itersiblings():
+        if sibling is end:
+            break
+        if sibling.tag == qn('w:r'):
+            runs.append(sibling)
+    return runs
+
+
+def _bookmark_text(start, end) -> str:
+    return ''.join(Run(r, None).text for r in _bookmark_runs(start, end))
+
+
+def _write_bookmark_text(start, end, text: str, color: Optional[RGBColor]):
+    """
+    Put `text` in the first run of the bookmark (keeping its formatting) and
+    drop the others. Returns the run.
+    """
+    runs = _bookmark_runs(start, end)
+    if runs:
+        r = runs[0]
+        for extra in runs[1:]:
+            extra.getparent().remove(extra)
+    else:
+        r = OxmlElement('w:r')
+        start.addnext(r)
+    run = Run(r, None)
+    run.text = text
+    if color is not None:
+        run.font.color.rgb = color
+    elif run.font.color.rgb == RGBColor(0xFF, 0xFF, 0xFF):
+        # A value replacing a hidden placeholder becomes visible
+        run.font.color.rgb = None
+    return run
+
+
+def read_field_manifest(content: bytes) -> Optional[FieldManifest]:
+    """
+    The manifest stored in a generated document, or None (documents
+    generated before manifests existed, or edited outside this app).
+    """
+    try:
+        with zipfile.ZipFile(io.BytesIO(content)) as package:
+            blob = package.read(MANIFEST_PARTNAME.lstrip('/'))
+        return FieldManifest.from_xml(blob)
+    except (KeyError, zipfile.BadZipFile, etree.XMLSyntaxError, ValueError):
+        return None
+
+
+def changed_fields(manifest: FieldManifest, data: Dict[str, Any]) -> List[str]:
+    return [
+        key for key, field in manifest.fields.items()
+        if key in data and manifest.normalize(data[key]) != field['value']
+    ]
+
+
+def changed_opaque_fields(manifest: FieldManifest, data: Dict[str, Any]) -> List[str]:
+    return [
+        key for key, value in sorted(manifest.opaque.items())
+        if key in data and manifest.normalize(data[key]) != value
+    ]
+
+
+def patch_fields(content: bytes, data: Dict[str, Any],
+                 cleanup: Optional[Callable] = None) -> Optional[Dict[str, Any]]:
+    """
+    Update the fields of a generated document whose value differs from
+    `data`, touching only their bookmarked runs. `cleanup` is the service's
+    PlaceholderCleanup, applied to each rewritten run.
+
+    Returns None when the document has no manifest or a changed key is
+    opaque (a full render is needed), otherwise
+    {'content': bytes, 'updated': [keys], 'skipped': [keys edited by hand]}.
+    """
+    manifest = read_field_manifest(content)
+    if manifest is None:
+        return None
+    opaque = changed_opaque_fields(manifest, data)
+    if opaque:
+        logger.debug("Fields used in template logic changed (%s), a full render is needed", ', '.join(opaque))
+        return None
+    changed = changed_fields(manifest, data)
+    if not changed:
+        return {'content': content, 'updated': [], 'skipped': []}
+
+    # part -> [(key, bookmark)] of the changed fields only
+    targets: Dict[str, List] = {}
+    for key in changed:
+        for partname, bookmarks in manifest.fields[key]['locations'].items():
+            targets.setdefault(partname, []).extend((key, name) for name in bookmarks)
+
+    updated, skipped = set(), set()
+    patched_parts = {}
+    with zipfile.ZipFile(io.BytesIO(content)) as package:
+        for partname, bookmarks in targets.items():
+            root = parse_xml(package.read(partname.lstrip('/')))
+            wanted = {name for _, name in bookmarks}
+            starts = {
+                start.get(qn('w:name')): start
+                for start in root.iter(qn('w:bookmarkStart'))
+                if start.get(qn('w:name')) in wanted
+            }
+            locations_changed = False
+            for key, name in bookmarks:
+                locations = manifest.fields[key]['locations'][partname]
+                start = starts.get(name)
+                end = _bookmark_end(start) if start is not None else None
+                if end is None or _bookmark_text(start, end) != locations[name]:
+                    skipped.add(key)
+                    continue
+                run = _write_bookmark_text(start, end, manifest.text_for(key, data[key]), manifest.color)
+                if cleanup is not None:
+                    cleanup.clean_run(run)
+                locations[name] = _bookmark_text(start, end)
+                updated.add(key)
+                locations_changed = True
+            if locations_changed:
+                patched_parts[partname.lstrip('/')] = etree.tostring(
+                    root, xml_declaration=True, encoding='UTF-8', standalone=True
+                )
+
+        if not patched_parts:
+            return {'content': content, 'updated': [], 'skipped': sorted(skipped)}
+
+        for key in updated:
+            manifest.fields[key]['value'] = manifest.normalize(data[key])
+        patched_parts[MANIFEST_PARTNAME.lstrip('/')] = manifest.to_xml()
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as output:
+            for item in package.infolist():
+                blob = patched_parts.get(item.filename)
+                output.writestr(item, blob if blob is not None else package.read(item.filename))
+
+    return {'content': buffer.getvalue(), 'updated': sorted(updated), 'skipped': sorted(skipped - updated)}
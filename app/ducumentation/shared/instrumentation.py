@@ -0,0 +1,133 @@
+"""
+Spans for the document generation pipeline.
+
+A generation is one root `generation(service, kardex)` block; inside it each
+step (template fetch, SQL, render, cleanup, serialize, upload) runs in a
+`span(step)`. Every span feeds the per-service histograms of the metrics
+registry (duration and SQL queries per step, served on /metrics) and is
+logged at DEBUG; the generation logs one INFO summary line. Log arguments
+are formatted by `logging` only when the level is enabled, so with
+DOCUMENT_LOG_LEVEL above DEBUG the hot paths do no string formatting.
+
+The caches and the uploader already keep counters; `register_collectors()`
+exposes them on /metrics as gauges read at scrape time.
+
+Spans outside a generation (shared helpers called from batch or
+extraprotocolar code) are labelled with the service passed to them.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, List, Optional, Tuple
+
+from core.metrics import QUERY_BUCKETS, count_queries, get_registry
+
+logger = logging.getLogger(__name__)
+
+STEPS = ('template', 'sql', 'render', 'cleanup', 'serialize', 'upload')
+
+STEP_SECONDS = get_registry().histogram(
+    'document_step_seconds', 'Duration of one document generation step.', ('service', 'step'),
+)
+STEP_QUERIES = get_registry().histogram(
+    'document_step_queries', 'SQL queries run by one document generation step.', ('service', 'step'), QUERY_BUCKETS,
+)
+GENERATION_SECONDS = get_registry().histogram(
+    'document_generation_seconds', 'End-to-end document generation time.', ('service', 'outcome'),
+)
+
+_local = threading.local()
+
+
+class Trace:
+    """
+    The steps of one generation, in order: (step, seconds, queries).
+    """
+
+    def __init__(self, service: str, kardex: Optional[str] = None):
+        self.service = service
+        self.kardex = kardex
+        self.outcome = 'ok'
+        self.steps: List[Tuple[str, float, int]] = []
+
+    def failed(self) -> None:
+        self.outcome = 'error'
+
+    def __str__(self) -> str:
+        return ', '.join(
+            f'{step} {seconds:.3f}s' + (f'/{queries}q' if queries else '')
+            for step, seconds, queries in self.steps
+        )
+
+
+def service_name(service: Any) -> str:
+    return service if isinstance(service, str) else type(service).__name__
+
+
+def current_trace() -> Optional[Trace]:
+    return getattr(_local, 'trace', None)
+
+
+@contextmanager
+def span(step: str, service: Any = None):
+    """
+    Time (and count the queries of) one pipeline step.
+    """
+    trace = current_trace()
+    if service is not None:
+        name = service_name(service)
+    else:
+        name = trace.service if trace is not None else 'unknown'
+    start = time.perf_counter()
+    with count_queries() as queries:
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            STEP_SECONDS.observe(elapsed, name, step)
+            STEP_QUERIES.observe(queries.count, name, step)
+            if trace is not None:
+                trace.steps.append((step, elapsed, queries.count))
+            logger.debug('%s %s took %.3fs (%d queries)', name, step, elapsed, queries.count)
+
+
+@contextmanager
+def generation(service: Any, kardex: Optional[str] = None):
+    """
+    Root of one document generation. Services that turn errors into a
+    response call `trace.failed()` so the outcome label is right.
+    """
+    trace = Trace(service_name(service), kardex)
+    previous = current_trace()
+    _local.trace = trace
+    start = time.perf_counter()
+    try:
+        yield trace
+    except BaseException:
+        trace.failed()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _local.trace = previous
+        GENERATION_SECONDS.observe(elapsed, trace.service, trace.outcome)
+        logger.info('%s for kardex %s: %s in %.2fs (%s)', trace.service, kardex, trace.outcome, elapsed, trace)
+
+
+def register_collectors() -> None:
+    from .document_data_cache import get_document_data_cache
+    from .document_uploader import uploader_metrics
+    from .presigned_urls import get_presigned_url_cache
+    from .render_cache import get_render_cache
+    from .template_cache import get_template_cache
+
+    registry = get_registry()
+    registry.register_collector('document_uploader', 'R2 document uploader counters.', uploader_metrics)
+    registry.register_collector('render_cache', 'Rendered document cache counters.',
+                                lambda: get_render_cache().metrics())
+    registry.register_collector('document_data_cache', 'Assembled document data cache counters.',
+                                lambda: get_document_data_cache().stats)
+    registry.register_collector('template_cache', 'Template cache counters.',
+                                lambda: get_template_cache().stats)
+    registry.register_collector('presigned_url_cache', 'Presigned URL cache counters.',
+                                lambda: get_presigned_url_cache().stats)
@@ -0,0 +1,177 @@
+import copy
+import re
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from docx.oxml.ns import qn
+from docx.shared import RGBColor
+
+# Placeholder grammar shared by every document service:
+#   {{KEY}}    - value placeholder in templates
+#   [E.KEY]    - marker for an empty/unused slot (removed during cleanup)
+PLACEHOLDER_PATTERN = re.compile(r'\{\{([A-Za-z0-9_]+)\}\}|\[E\.([A-Za-z0-9_]+)\]')
+CURLY_PLACEHOLDER_PATTERN = re.compile(r'\{\{[A-Z0-9_]+\}\}')
+E_PLACEHOLDER_PATTERN = re.compile(r'\[E\.[A-Z0-9_]+\]')
+REPRESENTATION_PATTERN = re.compile(
+    r'EN REPRESENTACION DE\s*Y[\s.·…‥⋯⋮⋱⋰⋯—–-]*', re.IGNORECASE
+)
+
+# Escrituracion placeholders that stay in the document (hidden) until the
+# escritura is numbered and signed.
+KEEP_PLACEHOLDERS = ['{{NRO_ESC}}', '{{FI}}', '{{FF}}', '{{S_IN}}', '{{S_FN}}', '{{FECHA_ACT}}']
+
+RED = RGBColor(255, 0, 0)
+WHITE = RGBColor(255, 255, 255)
+
+
+class PlaceholderSubstitution:
+    """
+    Single-pass placeholder substitution.
+
+    One regex scan per paragraph and one dict lookup per match, instead of
+    looping over every key in `data` for every paragraph and run.
+    Placeholders split across several runs (Word does this all the time)
+    are located on the joined paragraph text and mapped back to the runs,
+    so only the runs that actually contain a placeholder are rewritten and
+    the formatting of the rest is kept.
+    """
+
+    pattern = PLACEHOLDER_PATTERN
+
+    def __init__(self, data: Dict[str, Any], color: Optional[RGBColor] = None, skip_empty: bool = False,
+                 manifest=None):
+        """
+        :param data: placeholder key -> value
+        :param color: color for the inserted values (None keeps the run color)
+        :param skip_empty: leave the placeholder in place when the value is empty
+        :param manifest: FieldManifest recording where each value is inserted
+                         (every value then gets its own bookmarked run)
+        """
+        self.data = data
+        self.color = color
+        self.skip_empty = skip_empty
+        self.manifest = manifest
+
+    @staticmethod
+    def key(match) -> str:
+        return match.group(1) or match.group(2)
+
+    def lookup(self, match) -> Optional[str]:
+        key = self.key(match)
+        if key not in self.data:
+            return None
+        value = self.data[key]
+        if self.skip_empty and not value:
+            return None
+        return str(value) if value is not None else ''
+
+    def substitute_text(self, text: str) -> str:
+        """
+        Plain-string substitution (no run handling).
+        """
+        if '{{' not in text and '[E.' not in text:
+            return text
+
+        def _replace(match):
+            value = self.lookup(match)
+            return match.group(0) if value is None else value
+
+        return self.pattern.sub(_replace, text)
+
+    def replace_in_paragraph(self, paragraph) -> bool:
+        """
+        Substitute placeholders in a python-docx paragraph in place.
+        Returns True if the paragraph changed.
+        """
+        runs = paragraph.runs
+        if not runs:
+            return False
+        texts = [run.text for run in runs]
+        full_text = ''.join(texts)
+        if '{{' not in full_text and '[E.' not in full_text:
+            return False
+
+        replacements: List[Tuple[int, int, str, str]] = []
+        for match in self.pattern.finditer(full_text):
+            value = self.lookup(match)
+            if value is None and self.manifest is not None and self.key(match) in self.data:
+                # Skipped empty value: the placeholder stays, but in its own
+                # bookmarked run so an update can fill it in later
+                value = match.group(0)
+            if value is not None:
+                replacements.append((match.start(), match.end(), value, self.key(match)))
+        if not replacements:
+            return False
+
+        # Run boundaries on the joined text
+        bounds = []
+        position = 0
+        for text in texts:
+            bounds.append((position, position + len(text)))
+            position += len(text)
+        starts = [start for start, _ in bounds]
+
+        def run_at(offset: int) -> int:
+            return max(bisect_right(starts, offset) - 1, 0)
+
+        # pieces[run_index] -> list of (text, key of the value or None)
+        pieces: List[List[Tuple[str, Optional[str]]]] = [[] for _ in runs]
+
+        def add_plain(start: int, end: int):
+            while start < end:
+                index = run_at(start)
+                chunk_end = min(end, bounds[index][1])
+                pieces[index].append((full_text[start:chunk_end], None))
+                start = chunk_end
+
+        cursor = 0
+        touched = set()
+        for start, end, value, key in replacements:
+            add_plain(cursor, start)
+            owner = run_at(start)
+            pieces[owner].append((value, key))
+            touched.update(range(owner, run_at(end - 1) + 1))
+            cursor = end
+        add_plain(cursor, len(full_text))
+
+        for index in sorted(touched):
+            self._rewrite_run(runs[index], pieces[index])
+        return True
+
+    def _rewrite_run(self, run, run_pieces: List[Tuple[str, Optional[str]]]) -> None:
+        r = run._r
+        if not run_pieces:
+            r.getparent().remove(r)
+            return
+        if self.color is None and self.manifest is None:
+            run.text = ''.join(text for text, _ in run_pieces)
+            return
+
+        # Split into one run per piece so only the inserted values are colored
+        # (and bookmarked)
+        first_text, first_key = run_pieces[0]
+        rPr = r.find(qn('w:rPr'))
+        rPr = copy.deepcopy(rPr) if rPr is not None else None
+        run.text = first_text
+        anchor = self._mark_value(run, first_key)
+        for text, key in run_pieces[1:]:
+            new_r = r.makeelement(qn('w:r'), {})
+            if rPr is not None:
+                new_r.append(copy.deepcopy(rPr))
+            anchor.addnext(new_r)
+            new_run = type(run)(new_r, run._parent)
+            new_run.text = text
+            anchor = self._mark_value(new_run, key)
+
+    def _mark_value(self, run, key: Optional[str]):
+        """
+        Color and record an inserted value; returns the last element written
+        for it (the run, or its closing bookmark).
+        """
+        if key is None:
+            return run._r
+        if self.color is not None:
+            run.font.color.rgb = self.color
+        if self.manifest is not None:
+            return self.manifest.wrap(run._r, key, self.data.get(key))
+        return run._r
@@ -0,0 +1,157 @@
+"""
+Presigned storage URLs and the "redirect" delivery mode.
+
+In redirect mode a document endpoint answers with a 302 to a short-lived
+presigned URL, so the document bytes go from R2 straight to the client and
+never pass through an app worker.
+
+Signed URLs are cached per object (and ETag when known) until shortly before
+they expire. A cached URL also tells us the object existed when it was signed,
+so repeated redirects need no storage round trip at all. Uploading a new
+version of an object drops its cached URLs.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from botocore.exceptions import ClientError
+from django.http import HttpResponse, HttpResponseRedirect
+
+from .document_stream import stream_document
+from .document_uploader import is_pending_document
+from .storage import get_bucket, get_s3_client
+
+DEFAULT_URL_TTL = 3600
+DEFAULT_REFRESH_MARGIN = 300
+DEFAULT_MAX_ENTRIES = 2048
+
+
+class PresignedUrlCache:
+    """
+    LRU of presigned GET URLs keyed by (object_key, etag, filename).
+    """
+
+    def __init__(self, ttl: int = None, refresh_margin: int = None, max_entries: int = None):
+        self.ttl = int(ttl if ttl is not None else os.environ.get('PRESIGNED_URL_TTL', DEFAULT_URL_TTL))
+        self.refresh_margin = int(refresh_margin if refresh_margin is not None
+                                  else os.environ.get('PRESIGNED_URL_REFRESH_MARGIN', DEFAULT_REFRESH_MARGIN))
+        self.max_entries = int(max_entries if max_entries is not None
+                               else os.environ.get('PRESIGNED_URL_CACHE_SIZE', DEFAULT_MAX_ENTRIES))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, Optional[str], Optional[str]], Tuple[str, float]]" = OrderedDict()
+        self.stats = {'hits': 0, 'signed': 0}
+
+    def get(self, object_key: str, etag: str = None, filename: str = None) -> str:
+        cache_key = (object_key, etag, filename)
+        now = time.time()
+        with self._lock:
+            cached = self._entries.get(cache_key)
+            if cached is not None and cached[1] - self.refresh_margin > now:
+                self._entries.move_to_end(cache_key)
+                self.stats['hits'] += 1
+                return cached[0]
+
+        url = self._sign(object_key, filename)
+        with self._lock:
+            self._entries[cache_key] = (url, now + self.ttl)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.stats['signed'] += 1
+        return url
+
+    def cached(self, object_key: str, filename: str = None) -> Optional[str]:
+        """
+        A still-fresh URL for object_key (any ETag), or None.
+        """
+        now = time.time()
+        with self._lock:
+            for (key, _, name), (url, expires_at) in reversed(self._entries.items()):
+                if key == object_key and name == filename and expires_at - self.refresh_margin > now:
+                    self.stats['hits'] += 1
+                    return url
+        return None
+
+    def invalidate(self, object_key: str = None) -> None:
+        with self._lock:
+            if object_key is None:
+                self._entries.clear()
+                return
+            for cache_key in [cache_key for cache_key in self._entries if cache_key[0] == object_key]:
+                del self._entries[cache_key]
+
+    def _sign(self, object_key: str, filename: str = None) -> str:
+        params: Dict[str, str] = {
+            'Bucket': get_bucket(),
+            'Key': object_key,
+            # Every regeneration reuses the key; make the client revalidate
+            'ResponseCacheControl': 'no-cache',
+        }
+        if filename:
+            params['ResponseContentDisposition'] = f'inline; filename="{filename}"'
+        return get_s3_client().generate_presigned_url('get_object', Params=params, ExpiresIn=self.ttl)
+
+
+_url_cache: Optional[PresignedUrlCache] = None
+_url_cache_lock = threading.Lock()
+
+
+def get_presigned_url_cache() -> PresignedUrlCache:
+    global _url_cache
+    if _url_cache is None:
+        with _url_cache_lock:
+            if _url_cache is None:
+                _url_cache = PresignedUrlCache()
+    return _url_cache
+
+
+def presigned_url(object_key: str, etag: str = None, filename: str = None) -> str:
+    return get_presigned_url_cache().get(object_key, etag=etag, filename=filename)
+
+
+def invalidate_presigned_url(object_key: str = None) -> None:
+    if _url_cache is not None:
+        _url_cache.invalidate(object_key)
+
+
+def redirect_requested(request, mode: str = None) -> bool:
+    """
+    True for mode=redirect, or when DOCUMENT_DELIVERY_MODE=redirect makes it the default.
+    """
+    if mode is None and request is not None:
+        mode = request.GET.get('mode')
+    if mode:
+        return mode == 'redirect'
+    return os.environ.get('DOCUMENT_DELIVERY_MODE', 'stream') == 'redirect'
+
+
+def redirect_to_document(request, object_key: str, filename: str) -> HttpResponse:
+    """
+    302 to a presigned URL for object_key.
+
+    A document still queued for upload is not in R2 yet, so it is served from
+    memory instead. Raises ClientError 'NoSuchKey' when the document does not
+    exist, like stream_document().
+    """
+    if is_pending_document(object_key):
+        return stream_document(request, object_key, filename)
+
+    cache = get_presigned_url_cache()
+    url = cache.cached(object_key, filename)
+    if url is None:
+        try:
+            head = get_s3_client().head_object(Bucket=get_bucket(), Key=object_key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey'):
+                # HEAD reports '404'; callers handle the GET-style 'NoSuchKey'
+                raise ClientError({'Error': {'Code': 'NoSuchKey', 'Message': 'The specified key does not exist.'},
+                                   'ResponseMetadata': {'HTTPStatusCode': 404}}, 'HeadObject') from e
+            raise
+        url = cache.get(object_key, etag=head.get('ETag'), filename=filename)
+
+    response = HttpResponseRedirect(url)
+    # The URL expires; never let a shared cache keep the redirect
+    response['Cache-Control'] = 'no-store'
+    return response
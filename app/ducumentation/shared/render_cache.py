@@ -0,0 +1,190 @@
+"""
+Result cache of rendered documents.
+
+Regenerating a document whose template and data did not change produces the
+same DOCX, yet every generation rendered the template, walked it for
+placeholder cleanup, serialized it and uploaded it to R2 again. Rendered
+bytes are kept in a memory LRU keyed by a fingerprint of the service (and its
+`render_version`), the template (its R2 ETag, or a hash of the bytes) and the
+placeholder data, so an unchanged document is served without rendering.
+
+python-docx stamps the zip entries with the save time, so only a cache hit
+gives byte-identical output. `upload_rendered` uses that: when the bytes for
+an object key are the ones this process uploaded last, and R2 (or the
+upload queue) still holds them, the upload is skipped as well. R2's ETag is
+checked every time, so an object overwritten since (a merged update-docx, a
+batch run) is uploaded again.
+
+RENDER_CACHE_MAX_BYTES bounds the memory (0 disables the cache);
+`metrics()` reports hit rates.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+from .document_uploader import pending_document, upload_document, uploads_are_synchronous
+from .storage import get_s3_client
+from .template_cache import get_template_etag
+
+logger = logging.getLogger(__name__)
+
+# Bump when a change in the rendering code changes the output for the same
+# template and data, so previously rendered bytes are no longer served.
+RENDER_VERSION = 2
+
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+
+def render_fingerprint(service: Any, template_filename: str, template_bytes: bytes, data: Dict[str, Any]) -> str:
+    template_key = get_template_etag(template_filename) if template_filename else None
+    if template_key is None:
+        template_key = hashlib.sha1(template_bytes).hexdigest()
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha256()
+    for part in (
+        f"{RENDER_VERSION}:{type(service).__name__}:{getattr(service, 'render_version', 1)}",
+        f"{template_filename}:{template_key}",
+        payload,
+    ):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    Memory LRU of rendered documents by fingerprint, plus the MD5 of the last
+    document this process uploaded to each object key.
+    """
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = int(max_bytes if max_bytes is not None
+                             else os.environ.get('RENDER_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._uploaded: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'uploads': 0, 'uploads_skipped': 0}
+
+    def get(self, fingerprint: str) -> Optional[bytes]:
+        with self._lock:
+            content = self._entries.get(fingerprint)
+            if content is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(fingerprint)
+            self.stats['hits'] += 1
+            return content
+
+    def put(self, fingerprint: str, content: bytes) -> None:
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(fingerprint, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._entries[fingerprint] = content
+            self._memory_bytes += len(content)
+            while self._memory_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def render(self, fingerprint: str, render: Callable[[], bytes]) -> bytes:
+        """
+        The cached bytes for `fingerprint`, or the result of `render()`.
+        """
+        content = self.get(fingerprint)
+        if content is None:
+            content = render()
+            self.put(fingerprint, content)
+        return content
+
+    def upload(self, object_key: str, content: bytes, wait: bool = False) -> bool:
+        """
+        Queue the upload of `content` unless R2 already holds exactly these bytes.
+        """
+        md5 = hashlib.md5(content).hexdigest()
+        with self._lock:
+            unchanged = self._uploaded.get(object_key) == md5
+        if unchanged and self._stored(object_key, content, md5):
+            self.stats['uploads_skipped'] += 1
+            return True
+        self.stats['uploads'] += 1
+        with self._lock:
+            self._uploaded[object_key] = md5
+        return upload_document(object_key, content, wait=wait)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+            self._uploaded.clear()
+
+    def memory_usage(self) -> int:
+        return self._memory_bytes
+
+    def metrics(self) -> Dict[str, float]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        uploads = self.stats['uploads'] + self.stats['uploads_skipped']
+        return {
+            **self.stats,
+            'entries': len(self._entries),
+            'memory_bytes': self._memory_bytes,
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+            'upload_skip_rate': self.stats['uploads_skipped'] / uploads if uploads else 0.0,
+        }
+
+    @staticmethod
+    def _stored(object_key: str, content: bytes, md5: str) -> bool:
+        pending = pending_document(object_key)
+        if pending is not None:
+            # Still queued: only good enough when nobody waits for R2
+            return pending == content and not uploads_are_synchronous()
+        try:
+            head = get_s3_client().head_object(Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'), Key=object_key)
+        except ClientError:
+            return False
+        except Exception as e:
+            logger.warning("Could not check %s in R2, uploading again: %s", object_key, e)
+            return False
+        return head.get('ETag', '').strip('"') == md5
+
+
+_render_cache: Optional[RenderCache] = None
+_render_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> RenderCache:
+    global _render_cache
+    if _render_cache is None:
+        with _render_cache_lock:
+            if _render_cache is None:
+                _render_cache = RenderCache()
+    return _render_cache
+
+
+def render_cached(service: Any, template_filename: str, template_bytes: bytes, data: Dict[str, Any],
+                  render: Callable[[], bytes]) -> bytes:
+    """
+    Rendered bytes of `template_bytes` with `data` for `service`, from the
+    cache when nothing changed since the last render.
+    """
+    cache = get_render_cache()
+    if cache.max_bytes <= 0:
+        return render()
+    hits = cache.stats['hits']
+    content = cache.render(render_fingerprint(service, template_filename, template_bytes, data), render)
+    if cache.stats['hits'] > hits and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Served %s document from the render cache (hit rate %.0f%%)",
+                     type(service).__name__, cache.metrics()['hit_rate'] * 100)
+    return content
+
+
+def upload_rendered(object_key: str, content: bytes, wait: bool = False) -> bool:
+    return get_render_cache().upload(object_key, content, wait=wait)
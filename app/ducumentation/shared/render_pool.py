@@ -0,0 +1,52 @@
+"""
+Process pool for CPU-bound document rendering.
+
+The web process is multi-threaded (Daphne, the uploader threads, open
+database connections), so its workers are never forked: the pool uses the
+"spawn" start method and each worker sets Django up on its own before its
+first task. The pool is created once per process and reused by every batch,
+so the start-up cost is paid once rather than per request.
+
+This module imports nothing from Django at import time; it is what a
+spawned worker unpickles first.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Optional
+
+START_METHOD = os.environ.get('DOCUMENT_RENDER_START_METHOD', 'spawn')
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _init_worker(settings_module: Optional[str]) -> None:
+    if settings_module:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def get_render_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    The process-wide render pool, replaced when the worker count changes or
+    a worker died.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and (_pool_workers != workers or getattr(_pool, '_broken', False)):
+            _pool.shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=get_context(START_METHOD),
+                initializer=_init_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE'),),
+            )
+            _pool_workers = workers
+        return _pool
+
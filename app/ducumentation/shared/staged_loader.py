@@ -0,0 +1,452 @@
+"""
+Staged loading of the raw document data of a kardex.
+
+The escritura, garantía mobiliaria and testamento services used to read
+everything with one query joining ~30 tables and GROUP_CONCAT-ing the party
+columns. Parties, vehicles, patrimoniales and payments all hang off the
+kardex, so the database built parties x vehicles x patrimoniales x payments
+rows (x the acts of each represented company) before grouping them back
+into one.
+
+The loaders here read each entity with its own narrow query (one row per
+party/act, per vehicle, per patrimonial, per payment) and assemble the same
+raw dict in Python: the party columns are concatenated with the repetitions
+and separators the joined query produced, and the vehicle/patrimonial/payment
+columns take the first row, as the ungrouped columns of the joined query did.
+Column expressions are still evaluated by MySQL, in the same SQL as before.
+Unlike GROUP_CONCAT, the concatenation is not cut at group_concat_max_len.
+
+DOCUMENT_DATA_LOADER=joined switches the services back to the joined
+queries (see `manage.py benchmark_document_data`).
+"""
+import os
+from decimal import Decimal
+from itertools import groupby
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from django.db import connection
+
+
+HEADER_COLUMNS = """
+    k.idkardex as id_kardex,
+    k.kardex,
+    k.numescritura as numero_escritura,
+    k.fechaescritura as fecha_escritura,
+    k.txa_minuta as registro_escritura,
+    CURRENT_DATE() as fecha_generado,
+    k.fechaconclusion as fecha_conclusion,
+    k.numminuta as numero_minuta,
+    k.kardexconexo as kardex_conexo,
+    k.folioini as folio_inicial,
+    k.foliofin as folio_final,
+    k.papelini as papel_inicial,
+    k.papelfin as papel_final,
+"""
+
+TEMPLATE_COLUMNS = """
+    (SELECT desacto FROM tiposdeacto WHERE idtipoacto=%s) as acto,
+    (SELECT fileName FROM tpl_template WHERE pkTemplate=%s) as plantilla,
+    (SELECT urlTemplate FROM tpl_template WHERE pkTemplate=%s) as url_plantilla,
+"""
+
+HEADER_JOINS = """
+    FROM kardex as k
+    LEFT JOIN tb_abogado as abo on abo.idabogado=k.idabogado
+    LEFT JOIN usuarios as usu on usu.idusuario=k.idusuario
+    WHERE k.kardex=%s
+    ORDER BY k.idkardex
+    LIMIT 1
+"""
+
+ESCRITURA_HEADER_SQL = "SELECT" + HEADER_COLUMNS + TEMPLATE_COLUMNS + """
+    k.fechaingreso as fecha_ingreso,
+    k.responsable_new as usuario,
+    abo.razonsocial as abogado,
+    abo.matricula as matricula,
+    abo.sede_colegio as sede_colegio,
+    usu.dni as dni_usuario
+""" + HEADER_JOINS
+
+TRANSFERENCIA_HEADER_SQL = "SELECT" + HEADER_COLUMNS + TEMPLATE_COLUMNS + """
+    k.fechaingreso as fecha_ingreso,
+    k.responsable_new as usuario,
+    abo.razonsocial as abogado,
+    abo.matricula as matricula,
+    usu.dni as dni_usuario
+""" + HEADER_JOINS
+
+TESTAMENTO_HEADER_SQL = "SELECT" + HEADER_COLUMNS + """
+    k.fechaingreso as fecha_ingreso,
+    k.responsable_new as usuario,
+    abo.razonsocial as abogado,
+    abo.matricula as matricula,
+    usu.dni as dni_usuario
+""" + HEADER_JOINS
+
+# One row per party and act of the represented company (cxar); the party
+# columns repeat on each of those rows, as they did in the joined query.
+PARTY_JOINS = """
+    FROM contratantesxacto as cxa
+    LEFT JOIN actocondicion as ac ON cxa.idcondicion=ac.idcondicion
+    LEFT JOIN contratantes cn ON cxa.idcontratante = cn.idcontratante
+    LEFT JOIN cliente2 as c2 on c2.idcontratante=cxa.idcontratante
+    LEFT JOIN nacionalidades as n on n.idnacionalidad=c2.nacionalidad
+    LEFT JOIN tipodocumento as td ON td.idtipdoc = c2.idtipdoc
+    LEFT OUTER JOIN tipoestacivil as tec ON tec.idestcivil = c2.idestcivil
+    LEFT OUTER JOIN ubigeo as u ON u.coddis = c2.idubigeo
+    LEFT JOIN contratantes as cnr ON cxa.idcontratante = cnr.idcontratante
+    LEFT JOIN contratantesxacto as cxar on cxar.idcontratante=cnr.idcontratanterp
+    LEFT JOIN actocondicion as acr ON acr.idcondicion=cxar.idcondicion
+    LEFT JOIN cliente2 as cr2 on cr2.idcontratante=cnr.idcontratanterp
+    LEFT JOIN sedesregistrales as srr2 on srr2.idsedereg=cr2.idsedereg
+    LEFT JOIN tipodocumento as tdr ON tdr.idtipdoc = cr2.idtipdoc
+    LEFT OUTER JOIN ubigeo as ur ON ur.coddis = cr2.idubigeo
+    WHERE cxa.kardex=%s and (c2.tipper='N')
+    ORDER BY cxa.id, cxar.id
+"""
+
+ESCRITURA_PARTIES_SQL = """
+    SELECT cxa.id as party_id,
+        c2.idcliente as id_cliente,
+        IF(c2.conyuge='','NO',c2.conyuge) as id_conyuge,
+        cxa.idcontratante as id_contratante,
+        TRIM(CONCAT(IFNULL(c2.prinom, ''), ' ', IFNULL(c2.segnom, ''), IF(c2.segnom='','',' ') ,IFNULL(c2.apepat, ''), ' ',IFNULL(c2.apemat, ''),
+    IFNULL(c2.razonsocial, ''))) AS nombres,
+        cxa.uif as uif,
+        ac.condicion as condicion,
+        IF(n.descripcion IS NULL OR n.descripcion='','EMPRESA',n.descripcion) as nacionalidad,
+        td.destipdoc as tipo_documento,
+        c2.numdoc AS numero_documento,
+        UPPER(c2.profesion_plantilla) AS ocupacion,
+        IF(tec.desestcivil IS NULL OR tec.desestcivil='','EMPRESA',tec.desestcivil) as estado_civil,
+        IF(c2.tipper='N',c2.direccion,c2.domfiscal) as direccion,
+        IFNULL(u.codpto, '') as codigo_departamento,
+        IFNULL(u.coddis, '') as codigo_distrito,
+        IFNULL(u.codprov, '') as codigo_provincia,
+        IFNULL(IF(SUBSTRING_INDEX(c2.ubigeo_plantilla, '/', -1)='',u.nomdis,SUBSTRING_INDEX(c2.ubigeo_plantilla, '/', -1)),(IFNULL(u.nomdis, ''))) AS distrito,
+        IFNULL(u.nomprov, '') as provincia,
+        IFNULL(u.nomdpto, '') as departamento,
+        c2.sexo AS sexo,
+        c2.tipper as tipo_persona,
+        IF(cn.firma = '0', 'NO', 'SI') AS firma,
+        cn.firma as n_firma,
+        cn.tiporepresentacion AS tipo_representacion,
+        cnr.idcontratanterp as id_empresa,
+        TRIM(CONCAT(IFNULL(cr2.prinom, ''), ' ', IFNULL(cr2.segnom, ''), IF(cr2.segnom='','',' ') ,IFNULL(cr2.apepat, ''), ' ',IFNULL(cr2.apemat, ''),
+    IFNULL(cr2.razonsocial, ''))) AS nombre_empresa,
+        cr2.tipper as tipo_persona_empresa,
+        acr.condicion as condicion_empresa,
+        tdr.destipdoc as tipo_documento_empresa,
+        cr2.numdoc AS numero_documento_empresa,
+        cr2.domfiscal as domicilio_empresa,
+        ur.nomdis as distrito_empresa,
+        ur.nomprov as provincia_empresa,
+        ur.nomdpto as departamento_empresa,
+        srr2.zona_depar as oficina_registral,
+        cr2.numpartida as numero_partida
+""" + PARTY_JOINS
+
+TRANSFERENCIA_PARTIES_SQL = """
+    SELECT cxa.id as party_id,
+        cxa.idcontratante as id_contratante,
+        TRIM(CONCAT(IFNULL(c2.prinom, ''), ' ', IFNULL(c2.segnom, ''), ' ',IFNULL(c2.apepat, ''), ' ',IFNULL(c2.apemat, ''),
+    IFNULL(c2.razonsocial, ''))) AS nombres,
+        cxa.uif as uif,
+        ac.condicion as condicion,
+        IF(n.descripcion IS NULL OR n.descripcion='','EMPRESA',n.descripcion) as nacionalidad,
+        td.destipdoc as tipo_documento,
+        c2.numdoc AS numero_documento,
+        UPPER(c2.profesion_plantilla) AS ocupacion,
+        IF(tec.desestcivil IS NULL OR tec.desestcivil='','EMPRESA',tec.desestcivil) as estado_civil,
+        IF(c2.tipper='N',c2.direccion,c2.domfiscal) as direccion,
+        IFNULL(u.codpto, '') as codigo_departamento,
+        IFNULL(u.coddis, '') as codigo_distrito,
+        IFNULL(u.codprov, '') as codigo_provincia,
+        IFNULL(IF(SUBSTRING_INDEX(c2.ubigeo_plantilla, '/', -1)='',u.nomdis,SUBSTRING_INDEX(c2.ubigeo_plantilla, '/', -1)),(IFNULL(u.nomdis, ''))) AS distrito,
+        IFNULL(u.nomprov, '') as provincia,
+        IFNULL(u.nomdpto, '') as departamento,
+        c2.sexo AS sexo,
+        c2.tipper as tipo_persona,
+        IF(cn.firma = '0', 'NO', 'SI') AS firma,
+        cn.firma as n_firma,
+        cn.tiporepresentacion AS tipo_representacion,
+        cnr.idcontratanterp as id_empresa,
+        TRIM(CONCAT(IFNULL(cr2.prinom, ''), ' ', IFNULL(cr2.segnom, ''), ' ',IFNULL(cr2.apepat, ''), ' ',IFNULL(cr2.apemat, ''),
+    IFNULL(cr2.razonsocial, ''))) AS nombre_empresa,
+        cr2.tipper as tipo_persona_empresa,
+        acr.condicion as condicion_empresa,
+        tdr.destipdoc as tipo_documento_empresa,
+        cr2.numdoc AS numero_documento_empresa,
+        cr2.domfiscal as domicilio_empresa,
+        ur.nomdis as distrito_empresa,
+        ur.nomprov as provincia_empresa,
+        ur.nomdpto as departamento_empresa
+""" + PARTY_JOINS
+
+TESTAMENTO_PARTIES_SQL = """
+    SELECT cxa.id as party_id,
+        ac.condicion as condiciones,
+        TRIM(CONCAT_WS(' ', c2.prinom, c2.segnom, c2.apepat, c2.apemat)) as nombres,
+        IFNULL(n.descripcion, '') as nacionalidades,
+        IFNULL(td.destipdoc, '') as tipos_documento,
+        IFNULL(c2.numdoc, '') as numeros_documento,
+        IFNULL(c2.profesion_plantilla, '') as ocupaciones,
+        IFNULL(tec.desestcivil, '') as estados_civil,
+        c2.sexo as sexos,
+        IFNULL(c2.direccion, '') as direcciones,
+        IFNULL(u.nomdis, '') as distritos,
+        IFNULL(u.nomprov, '') as provincias,
+        IFNULL(u.nomdpto, '') as departamentos
+    FROM contratantesxacto cxa
+    LEFT JOIN cliente2 c2 ON cxa.idcontratante = c2.idcontratante
+    LEFT JOIN actocondicion ac ON cxa.idcondicion = ac.idcondicion
+    LEFT JOIN nacionalidades n ON c2.nacionalidad = n.idnacionalidad
+    LEFT JOIN tipodocumento td ON c2.idtipdoc = td.idtipdoc
+    LEFT JOIN tipoestacivil tec ON c2.idestcivil = tec.idestcivil
+    LEFT JOIN ubigeo u ON c2.idubigeo = u.coddis
+    WHERE cxa.kardex = %s AND c2.tipper = 'N'
+    ORDER BY cxa.id
+"""
+
+VEHICLES_SQL = """
+    SELECT dv.numplaca AS placa,
+        dv.marca AS marca,
+        dv.clase AS clase,
+        dv.anofab AS anio,
+        dv.numserie AS serie,
+        dv.color AS color,
+        dv.motor AS motor,
+        dv.modelo AS modelo,
+        dv.carroceria AS carroceria,
+        dv.pregistral as partida,
+        dv.fecinsc AS fecha_inscripcion,
+        dv.combustible AS combustible,
+        UPPER(sr.dessede) AS sede,
+        UPPER(sr.num_zona) AS numero_zona
+    FROM detallevehicular as dv
+    LEFT JOIN sedesregistrales as sr ON sr.idsedereg=dv.idsedereg
+    WHERE dv.kardex=%s
+    ORDER BY dv.detveh
+"""
+
+PATRIMONIALES_SQL = """
+    SELECT pat.importetrans AS precio,
+        pat.idmon AS moneda,
+        pat.exhibiomp,
+        pat.idoppago,
+        uif.descripcion AS medio_pago,
+        mon.simbolo as simbolo_moneda,
+        mon.desmon as descripcion_moneda
+    FROM patrimonial as pat
+    LEFT JOIN fpago_uif as uif ON uif.id_fpago = pat.fpago
+    LEFT JOIN monedas as mon ON mon.idmon = pat.idmon
+    WHERE pat.kardex=%s
+    ORDER BY pat.itemmp
+"""
+
+PAYMENTS_SQL = """
+    SELECT dmp.detmp,
+        mp.desmpagos as descripcion_medio_pago,
+        mp.sunat as sunat_medio_pago,
+        dmp.foperacion as fecha_operacion,
+        dmp.documentos as documentos,
+        ban.desbanco as banco
+    FROM detallemediopago as dmp
+    LEFT JOIN mediospago as mp ON dmp.codmepag = mp.codmepag
+    LEFT JOIN bancos as ban ON ban.idbancos=dmp.idbancos
+    WHERE dmp.kardex=%s
+    ORDER BY dmp.detmp
+"""
+
+# Raw dict keys in the order the joined queries returned them
+ESCRITURA_COLUMNS = (
+    'id_kardex', 'kardex', 'numero_escritura', 'fecha_escritura', 'registro_escritura', 'fecha_generado',
+    'fecha_conclusion', 'numero_minuta', 'kardex_conexo', 'folio_inicial', 'folio_final', 'papel_inicial',
+    'papel_final', 'acto', 'plantilla', 'url_plantilla', 'fecha_ingreso', 'usuario', 'abogado', 'matricula',
+    'sede_colegio', 'dni_usuario', 'id_cliente', 'id_conyuge', 'id_contratante', 'nombres', 'uif', 'condicion',
+    'nacionalidad', 'tipo_documento', 'numero_documento', 'ocupacion', 'estado_civil', 'direccion',
+    'codigo_departamento', 'codigo_distrito', 'codigo_provincia', 'distrito', 'provincia', 'departamento', 'sexo',
+    'tipo_persona', 'firma', 'n_firma', 'tipo_representacion', 'placa', 'marca', 'clase', 'anio', 'serie', 'color',
+    'motor', 'modelo', 'carroceria', 'partida', 'fecha_inscripcion', 'combustible', 'sede', 'numero_zona', 'precio',
+    'moneda', 'exhibiomp', 'idoppago', 'medio_pago', 'simbolo_moneda', 'descripcion_moneda',
+    'descripcion_medio_pago', 'sunat_medio_pago', 'id_empresa', 'nombre_empresa', 'tipo_persona_empresa',
+    'condicion_empresa', 'tipo_documento_empresa', 'numero_documento_empresa', 'domicilio_empresa',
+    'distrito_empresa', 'provincia_empresa', 'departamento_empresa', 'oficina_registral', 'numero_partida',
+    'fecha_operacion', 'documentos', 'banco',
+)
+ESCRITURA_SEPARATORS = {'direccion': ',,', 'oficina_registral': ',,'}
+
+TRANSFERENCIA_COLUMNS = tuple(
+    column for column in ESCRITURA_COLUMNS
+    if column not in (
+        'sede_colegio', 'id_cliente', 'id_conyuge', 'oficina_registral', 'numero_partida',
+        'fecha_operacion', 'documentos', 'banco',
+    )
+)
+
+TESTAMENTO_COLUMNS = (
+    'id_kardex', 'kardex', 'numero_escritura', 'fecha_escritura', 'registro_escritura', 'fecha_generado',
+    'fecha_conclusion', 'numero_minuta', 'kardex_conexo', 'folio_inicial', 'folio_final', 'papel_inicial',
+    'papel_final', 'fecha_ingreso', 'usuario', 'abogado', 'matricula', 'dni_usuario', 'condiciones', 'nombres',
+    'nacionalidades', 'tipos_documento', 'numeros_documento', 'ocupaciones', 'estados_civil', 'sexos',
+    'direcciones', 'distritos', 'provincias', 'departamentos',
+)
+
+
+def use_joined_loader() -> bool:
+    return os.environ.get('DOCUMENT_DATA_LOADER', 'staged').lower() == 'joined'
+
+
+def fetch_all(sql: str, params: Sequence[Any]) -> List[Dict[str, Any]]:
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def group_concat(values: Iterable[Any], separator: str = ',') -> Optional[str]:
+    """
+    MySQL GROUP_CONCAT: NULLs are skipped; NULL when nothing is left.
+    """
+    parts = [_as_text(value) for value in values if value is not None]
+    return separator.join(parts) if parts else None
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, Decimal):
+        return format(value, 'f')
+    return str(value)
+
+
+def repeat_parties(rows: List[Dict[str, Any]], times: int) -> List[Dict[str, Any]]:
+    """
+    Party rows in the order the joined query produced them: the rows of each
+    party (one per act of its represented company) repeated once per
+    vehicle/patrimonial/payment combination.
+    """
+    repeated = []
+    for _, party_rows in groupby(rows, key=lambda row: row['party_id']):
+        repeated.extend(list(party_rows) * times)
+    return repeated
+
+
+class KardexStages:
+    """
+    The rows of each stage query for one kardex.
+    """
+    __slots__ = ('header', 'parties', 'vehicles', 'patrimoniales', 'payments')
+
+    def __init__(self, header: Optional[Dict[str, Any]], parties: List[Dict[str, Any]],
+                 vehicles: List[Dict[str, Any]] = (), patrimoniales: List[Dict[str, Any]] = (),
+                 payments: List[Dict[str, Any]] = ()):
+        self.header = header
+        self.parties = parties
+        self.vehicles = list(vehicles)
+        self.patrimoniales = list(patrimoniales)
+        self.payments = list(payments)
+
+    @property
+    def rows_fetched(self) -> int:
+        return (1 if self.header else 0) + len(self.parties) + len(self.vehicles) + len(self.patrimoniales) + len(self.payments)
+
+    def fan_out(self, per_payment: bool) -> int:
+        """
+        Copies of each party row in the joined query: one per vehicle and
+        patrimonial and, when not grouped by payment, per payment of each
+        patrimonial (LEFT JOINs: an empty table still gives one row).
+        """
+        times = max(len(self.vehicles), 1) * max(len(self.patrimoniales), 1)
+        if per_payment and self.patrimoniales:
+            times *= max(len(self.payments), 1)
+        return times
+
+    def joined_rows(self, per_payment: bool) -> int:
+        """
+        Rows the joined query built before grouping.
+        """
+        return len(self.parties) * self.fan_out(per_payment)
+
+    def first_rows(self) -> Dict[str, Any]:
+        """
+        Vehicle, patrimonial and payment columns of the first joined row
+        (payments only join through a patrimonial).
+        """
+        values = {}
+        for rows in (self.vehicles, self.patrimoniales, self.payments if self.patrimoniales else []):
+            if rows:
+                values.update(rows[0])
+        return values
+
+
+def load_stages(num_kardex: str, header_sql: str, header_params: Sequence[Any], parties_sql: str,
+                with_assets: bool = True) -> KardexStages:
+    parties = fetch_all(parties_sql, [num_kardex])
+    if not parties:
+        # The joined queries only return kardex with a natural person party
+        return KardexStages(None, [])
+    headers = fetch_all(header_sql, [*header_params, num_kardex])
+    if not with_assets:
+        return KardexStages(headers[0] if headers else None, parties)
+    return KardexStages(
+        headers[0] if headers else None,
+        parties,
+        fetch_all(VEHICLES_SQL, [num_kardex]),
+        fetch_all(PATRIMONIALES_SQL, [num_kardex]),
+        fetch_all(PAYMENTS_SQL, [num_kardex]),
+    )
+
+
+def assemble(stages: KardexStages, columns: Sequence[str], per_payment: bool = False,
+             separators: Dict[str, str] = None, default_separator: str = ',') -> Optional[Dict[str, Any]]:
+    """
+    The raw dict of the joined query, built from the stage rows.
+    """
+    if not stages.header or not stages.parties:
+        return None
+    separators = separators or {}
+    parties = repeat_parties(stages.parties, stages.fan_out(per_payment))
+    party_columns = set(stages.parties[0]) - {'party_id'}
+
+    values = dict(stages.header)
+    values.update(stages.first_rows())
+    for column in party_columns:
+        values[column] = group_concat((row[column] for row in parties), separators.get(column, default_separator))
+    return {column: values.get(column) for column in columns}
+
+
+def load_escritura(num_kardex: str, idtipoacto: str, template_id: int, stats: Dict[str, int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Raw data of EscrituraPublicaDocumentService. The joined query grouped by
+    payment and kept the first group, so parties repeat per vehicle and
+    patrimonial only. Seven queries.
+    """
+    stages = load_stages(num_kardex, ESCRITURA_HEADER_SQL, [idtipoacto, template_id, template_id], ESCRITURA_PARTIES_SQL)
+    _record(stats, stages, per_payment=False)
+    return assemble(stages, ESCRITURA_COLUMNS, separators=ESCRITURA_SEPARATORS)
+
+
+def load_transferencia(num_kardex: str, idtipoacto: str, template_id: int, stats: Dict[str, int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Raw data of GarantiasMobiliariasDocumentService (grouped by kardex:
+    parties repeat per vehicle, patrimonial and payment). Seven queries.
+    """
+    stages = load_stages(num_kardex, TRANSFERENCIA_HEADER_SQL, [idtipoacto, template_id, template_id], TRANSFERENCIA_PARTIES_SQL)
+    _record(stats, stages, per_payment=True)
+    return assemble(stages, TRANSFERENCIA_COLUMNS, per_payment=True)
+
+
+def load_testamento(num_kardex: str, stats: Dict[str, int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Raw data of TestamentoDocumentService. Two queries.
+    """
+    stages = load_stages(num_kardex, TESTAMENTO_HEADER_SQL, [], TESTAMENTO_PARTIES_SQL, with_assets=False)
+    _record(stats, stages, per_payment=False)
+    return assemble(stages, TESTAMENTO_COLUMNS, default_separator='|')
+
+
+def _record(stats: Optional[Dict[str, int]], stages: KardexStages, per_payment: bool) -> None:
+    if stats is not None:
+        stats['rows_fetched'] = stages.rows_fetched
+        stats['joined_rows'] = stages.joined_rows(per_payment)
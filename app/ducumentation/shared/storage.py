@@ -0,0 +1,298 @@
+"""
+Single storage gateway for documents and templates.
+
+Every caller gets its client from `get_s3_client()`. The object it returns
+speaks the subset of the boto3 S3 client API the project uses (get_object,
+put_object, upload_fileobj, head_object, delete_object, head_bucket,
+generate_presigned_url, exceptions.NoSuchKey), so call sites do not change
+with the backend:
+
+  STORAGE_BACKEND=r2      Cloudflare R2 through one pooled, tuned boto3 client per process (default)
+  STORAGE_BACKEND=local   files under STORAGE_LOCAL_ROOT, for offline runs and benchmarks
+  STORAGE_BACKEND=memory  process-local dict, for tests
+
+The local and in-memory backends raise the same botocore ClientError codes
+as R2 ('NoSuchKey', '404', '304'), so error handling is exercised unchanged.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 60
+
+
+def r2_client_config() -> Config:
+    """
+    botocore config for R2: connection pool sized for the upload/batch thread
+    pools, TCP keep-alive, and adaptive retries (client-side rate limiting on throttling).
+    """
+    return Config(
+        signature_version='s3v4',
+        max_pool_connections=int(os.environ.get('R2_MAX_POOL_CONNECTIONS', DEFAULT_MAX_POOL_CONNECTIONS)),
+        tcp_keepalive=True,
+        connect_timeout=float(os.environ.get('R2_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT)),
+        read_timeout=float(os.environ.get('R2_READ_TIMEOUT', DEFAULT_READ_TIMEOUT)),
+        retries={
+            'max_attempts': int(os.environ.get('R2_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)),
+            'mode': 'adaptive',
+        },
+    )
+
+
+def create_r2_client():
+    return boto3.client(
+        's3',
+        endpoint_url=os.environ.get('CLOUDFLARE_R2_ENDPOINT'),
+        aws_access_key_id=os.environ.get('CLOUDFLARE_R2_ACCESS_KEY'),
+        aws_secret_access_key=os.environ.get('CLOUDFLARE_R2_SECRET_KEY'),
+        config=r2_client_config(),
+        region_name='auto',
+    )
+
+
+class NoSuchKey(ClientError):
+    """
+    Raised by the offline backends; mirrors client.exceptions.NoSuchKey.
+    """
+
+
+class _Exceptions:
+    NoSuchKey = NoSuchKey
+    ClientError = ClientError
+
+
+def _client_error(code: str, status: int, operation: str, message: str = '') -> ClientError:
+    error_class = NoSuchKey if code == 'NoSuchKey' else ClientError
+    return error_class({'Error': {'Code': code, 'Message': message},
+                        'ResponseMetadata': {'HTTPStatusCode': status}}, operation)
+
+
+def _etag(content: bytes) -> str:
+    return f'"{hashlib.md5(content).hexdigest()}"'
+
+
+def _parse_range(range_header: str, size: int):
+    """
+    'bytes=start-end' / 'bytes=start-' / 'bytes=-suffix' -> (start, end) inclusive.
+    """
+    unit, _, spec = range_header.partition('=')
+    start_text, _, end_text = spec.partition('-')
+    if unit.strip() != 'bytes':
+        raise ValueError(range_header)
+    if start_text == '':
+        length = int(end_text)
+        return max(size - length, 0), size - 1
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    return start, min(end, size - 1)
+
+
+class OfflineStorageClient:
+    """
+    Base for the local and in-memory backends. Subclasses implement
+    _read/_write/_delete/_stat keyed by (bucket, key).
+    """
+    exceptions = _Exceptions
+
+    def _read(self, bucket: str, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def _write(self, bucket: str, key: str, content: bytes, metadata: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _delete(self, bucket: str, key: str) -> None:
+        raise NotImplementedError
+
+    def _metadata(self, bucket: str, key: str) -> Dict[str, Any]:
+        return {}
+
+    def get_object(self, Bucket: str, Key: str, IfNoneMatch: str = None, Range: str = None, **kwargs) -> Dict[str, Any]:
+        content = self._read(Bucket, Key)
+        if content is None:
+            raise _client_error('NoSuchKey', 404, 'GetObject', 'The specified key does not exist.')
+        metadata = self._metadata(Bucket, Key)
+        etag = _etag(content)
+        if IfNoneMatch and IfNoneMatch == etag:
+            raise _client_error('304', 304, 'GetObject', 'Not Modified')
+        response = {
+            'ETag': etag,
+            'ContentType': metadata.get('ContentType', 'binary/octet-stream'),
+            'LastModified': metadata.get('LastModified'),
+            'ContentLength': len(content),
+        }
+        if Range:
+            start, end = _parse_range(Range, len(content))
+            if start >= len(content) or start > end:
+                raise _client_error('InvalidRange', 416, 'GetObject', 'The requested range is not satisfiable')
+            content = content[start:end + 1]
+            response['ContentRange'] = f"bytes {start}-{end}/{response['ContentLength']}"
+            response['ContentLength'] = len(content)
+        response['Body'] = io.BytesIO(content)
+        return response
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]:
+        content = self._read(Bucket, Key)
+        if content is None:
+            raise _client_error('404', 404, 'HeadObject', 'Not Found')
+        metadata = self._metadata(Bucket, Key)
+        return {
+            'ETag': _etag(content),
+            'ContentLength': len(content),
+            'ContentType': metadata.get('ContentType', 'binary/octet-stream'),
+            'LastModified': metadata.get('LastModified'),
+        }
+
+    def put_object(self, Bucket: str, Key: str, Body=b'', ContentType: str = None, **kwargs) -> Dict[str, Any]:
+        content = Body.read() if hasattr(Body, 'read') else bytes(Body)
+        self._write(Bucket, Key, content, {
+            'ContentType': ContentType or 'binary/octet-stream',
+            'LastModified': datetime.now(timezone.utc),
+        })
+        return {'ETag': _etag(content)}
+
+    def upload_fileobj(self, Fileobj, Bucket: str, Key: str, ExtraArgs: Dict[str, Any] = None, **kwargs) -> None:
+        self.put_object(Bucket=Bucket, Key=Key, Body=Fileobj.read(), **(ExtraArgs or {}))
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs) -> Dict[str, Any]:
+        self._delete(Bucket, Key)
+        return {}
+
+    def head_bucket(self, Bucket: str, **kwargs) -> Dict[str, Any]:
+        return {}
+
+    def generate_presigned_url(self, ClientMethod: str, Params: Dict[str, Any] = None, ExpiresIn: int = 3600, **kwargs) -> str:
+        params = Params or {}
+        base_url = os.environ.get('STORAGE_OFFLINE_BASE_URL', 'http://localhost:8000/storage')
+        expires = int(time.time()) + int(ExpiresIn)
+        return f"{base_url}/{quote(params.get('Bucket') or '')}/{quote(params.get('Key', ''))}?Expires={expires}"
+
+
+class MemoryStorageClient(OfflineStorageClient):
+    """
+    Objects kept in a dict; shared by every caller in the process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.objects: Dict[tuple, bytes] = {}
+        self.metadata: Dict[tuple, Dict[str, Any]] = {}
+
+    def _read(self, bucket, key):
+        with self._lock:
+            return self.objects.get((bucket, key))
+
+    def _write(self, bucket, key, content, metadata):
+        with self._lock:
+            self.objects[(bucket, key)] = content
+            self.metadata[(bucket, key)] = metadata
+
+    def _delete(self, bucket, key):
+        with self._lock:
+            self.objects.pop((bucket, key), None)
+            self.metadata.pop((bucket, key), None)
+
+    def _metadata(self, bucket, key):
+        with self._lock:
+            return dict(self.metadata.get((bucket, key), {}))
+
+
+class LocalStorageClient(OfflineStorageClient):
+    """
+    Objects stored as files: <root>/<bucket>/<key>.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or os.environ.get('STORAGE_LOCAL_ROOT', os.path.join(tempfile.gettempdir(), 'notarios-storage'))
+
+    def _path(self, bucket: str, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, bucket or '_', key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise _client_error('InvalidKey', 400, 'Storage', f'Invalid key: {key}')
+        return path
+
+    def _read(self, bucket, key):
+        try:
+            with open(self._path(bucket, key), 'rb') as fh:
+                return fh.read()
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+
+    def _write(self, bucket, key, content, metadata):
+        path = self._path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as fh:
+            fh.write(content)
+        os.replace(tmp_path, path)
+
+    def _delete(self, bucket, key):
+        try:
+            os.remove(self._path(bucket, key))
+        except FileNotFoundError:
+            pass
+
+    def _metadata(self, bucket, key):
+        try:
+            mtime = os.path.getmtime(self._path(bucket, key))
+        except OSError:
+            return {}
+        content_type = ('application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+                        if key.endswith('.docx') else 'binary/octet-stream')
+        return {'ContentType': content_type, 'LastModified': datetime.fromtimestamp(mtime, timezone.utc)}
+
+
+BACKENDS = {
+    'r2': create_r2_client,
+    'local': LocalStorageClient,
+    'memory': MemoryStorageClient,
+}
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    """
+    The process-wide storage client. boto3 clients are thread-safe, so one
+    instance (and one connection pool) serves every thread; a forked child
+    (process pools) builds its own instead of sharing the parent's sockets.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                backend = os.environ.get('STORAGE_BACKEND', 'r2').lower()
+                if backend not in BACKENDS:
+                    raise ValueError(f"Unknown STORAGE_BACKEND '{backend}' (expected one of {', '.join(BACKENDS)})")
+                _client = BACKENDS[backend]()
+                _client_pid = pid
+    return _client
+
+
+def set_storage_client(client) -> None:
+    """
+    Install a specific client (e.g. MemoryStorageClient() in tests); None resets to STORAGE_BACKEND.
+    """
+    global _client, _client_pid
+    with _client_lock:
+        _client = client
+        _client_pid = os.getpid() if client is not None else None
+
+
+def get_bucket() -> Optional[str]:
+    return os.environ.get('CLOUDFLARE_R2_BUCKET')
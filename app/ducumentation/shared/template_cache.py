@@ -0,0 +1,244 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from .storage import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_PREFIX = "rodriguez-zea/plantillas/"
+
+# Templates rarely change, so we only revalidate against R2 once the TTL
+# expires, and even then a conditional GET returns 304 without a body.
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_MEMORY_BYTES = 64 * 1024 * 1024
+
+
+class TemplateCacheEntry:
+    __slots__ = ('filename', 'etag', 'content', 'checked_at')
+
+    def __init__(self, filename: str, etag: str, content: bytes, checked_at: float):
+        self.filename = filename
+        self.etag = etag
+        self.content = content
+        self.checked_at = checked_at
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+
+class TemplateCache:
+    """
+    Two tier cache (memory LRU + local disk) for the R2 plantillas.
+
+    Entries are keyed by template filename and stored on disk by
+    filename hash + ETag, so a changed template never overwrites the old
+    bytes in place. Once an entry is older than the TTL it is revalidated
+    with a conditional GET (If-None-Match) instead of a full download.
+    """
+
+    def __init__(self, ttl: float = None, max_memory_bytes: int = None, cache_dir: str = None):
+        self.ttl = float(ttl if ttl is not None else os.environ.get('TEMPLATE_CACHE_TTL', DEFAULT_TTL_SECONDS))
+        self.max_memory_bytes = int(
+            max_memory_bytes if max_memory_bytes is not None
+            else os.environ.get('TEMPLATE_CACHE_MAX_BYTES', DEFAULT_MAX_MEMORY_BYTES)
+        )
+        cache_dir = cache_dir if cache_dir is not None else os.environ.get('TEMPLATE_CACHE_DIR')
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), 'notarios-plantillas')
+        self._entries: "OrderedDict[str, TemplateCacheEntry]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'revalidated': 0, 'downloads': 0, 'misses': 0}
+
+    # ---------- public API ----------
+
+    def get(self, filename: str) -> Optional[bytes]:
+        """
+        Return the template bytes for `filename`, or None if it does not exist in R2.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None:
+                self._entries.move_to_end(filename)
+                if now - entry.checked_at < self.ttl:
+                    self.stats['hits'] += 1
+                    return entry.content
+
+        if entry is None:
+            entry = self._load_from_disk(filename)
+            if entry is not None:
+                self.stats['disk_hits'] += 1
+
+        entry = self._fetch(filename, entry)
+        if entry is None:
+            self.invalidate(filename)
+            return None
+        self._store(entry)
+        return entry.content
+
+    def invalidate(self, filename: str = None) -> None:
+        with self._lock:
+            if filename is None:
+                self._entries.clear()
+                self._memory_bytes = 0
+                return
+            entry = self._entries.pop(filename, None)
+            if entry is not None:
+                self._memory_bytes -= entry.size
+
+    def etag(self, filename: str) -> Optional[str]:
+        """
+        ETag of the cached copy of `filename`, or None if it is not in memory.
+        """
+        with self._lock:
+            entry = self._entries.get(filename)
+            return entry.etag if entry is not None else None
+
+    def memory_usage(self) -> int:
+        return self._memory_bytes
+
+    # ---------- R2 ----------
+
+    def _fetch(self, filename: str, cached: Optional[TemplateCacheEntry]) -> Optional[TemplateCacheEntry]:
+        s3 = get_s3_client()
+        params = {'Bucket': os.environ.get('CLOUDFLARE_R2_BUCKET'), 'Key': f"{TEMPLATE_PREFIX}{filename}"}
+        if cached is not None and cached.etag:
+            params['IfNoneMatch'] = cached.etag
+        try:
+            response = s3.get_object(**params)
+        except ClientError as e:
+            error = e.response.get('Error', {})
+            status = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+            if cached is not None and (error.get('Code') in ('304', 'NotModified') or status == 304):
+                self.stats['revalidated'] += 1
+                cached.checked_at = time.time()
+                return cached
+            if error.get('Code') in ('404', 'NoSuchKey') or status == 404:
+                self.stats['misses'] += 1
+                return None
+            if cached is not None:
+                logger.debug("Serving stale template '%s' after R2 error: %s", filename, e)
+                return cached
+            raise
+        except BotoCoreError as e:
+            if cached is not None:
+                logger.debug("Serving stale template '%s' after R2 error: %s", filename, e)
+                return cached
+            raise
+
+        content = response['Body'].read()
+        etag = response.get('ETag') or hashlib.md5(content).hexdigest()
+        self.stats['downloads'] += 1
+        entry = TemplateCacheEntry(filename, etag, content, time.time())
+        self._write_to_disk(entry)
+        return entry
+
+    # ---------- memory tier ----------
+
+    def _store(self, entry: TemplateCacheEntry) -> None:
+        with self._lock:
+            previous = self._entries.pop(entry.filename, None)
+            if previous is not None:
+                self._memory_bytes -= previous.size
+            if entry.size > self.max_memory_bytes:
+                return
+            self._entries[entry.filename] = entry
+            self._memory_bytes += entry.size
+            while self._memory_bytes > self.max_memory_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._memory_bytes -= evicted.size
+
+    # ---------- disk tier ----------
+
+    def _disk_dir(self, filename: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(filename.encode('utf-8')).hexdigest())
+
+    def _disk_path(self, filename: str, etag: str) -> str:
+        safe_etag = ''.join(c for c in etag if c.isalnum() or c in '-_') or 'noetag'
+        return os.path.join(self._disk_dir(filename), f"{safe_etag}.docx")
+
+    def _write_to_disk(self, entry: TemplateCacheEntry) -> None:
+        try:
+            directory = self._disk_dir(entry.filename)
+            os.makedirs(directory, exist_ok=True)
+            path = self._disk_path(entry.filename, entry.etag)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as fh:
+                fh.write(entry.content)
+            os.replace(tmp_path, path)
+            with open(os.path.join(directory, 'etag'), 'w', encoding='utf-8') as fh:
+                fh.write(entry.etag)
+            for name in os.listdir(directory):
+                stale = os.path.join(directory, name)
+                if name.endswith('.docx') and stale != path:
+                    os.remove(stale)
+        except OSError as e:
+            logger.debug("Could not write template '%s' to disk cache: %s", entry.filename, e)
+
+    def _load_from_disk(self, filename: str) -> Optional[TemplateCacheEntry]:
+        directory = self._disk_dir(filename)
+        try:
+            with open(os.path.join(directory, 'etag'), encoding='utf-8') as fh:
+                etag = fh.read().strip()
+            with open(self._disk_path(filename, etag), 'rb') as fh:
+                content = fh.read()
+        except OSError:
+            return None
+        # checked_at=0 forces a conditional GET before the bytes are trusted
+        return TemplateCacheEntry(filename, etag, content, 0.0)
+
+
+_template_cache = None
+_template_cache_lock = threading.Lock()
+
+_template_filenames: Dict[int, Tuple[str, float]] = {}
+
+
+def get_template_cache() -> TemplateCache:
+    global _template_cache
+    if _template_cache is None:
+        with _template_cache_lock:
+            if _template_cache is None:
+                _template_cache = TemplateCache()
+    return _template_cache
+
+
+def get_template_bytes(filename: str) -> Optional[bytes]:
+    """
+    Cached download of `rodriguez-zea/plantillas/{filename}`. Returns None if missing.
+    """
+    return get_template_cache().get(filename)
+
+
+def get_template_etag(filename: str) -> Optional[str]:
+    return get_template_cache().etag(filename)
+
+
+def get_template_filename(template_id: int) -> str:
+    """
+    Resolve TplTemplate.filename for a template id, cached with the same TTL
+    as the template bytes. Raises TplTemplate.DoesNotExist like objects.get().
+    """
+    from notaria.models import TplTemplate
+
+    cache = get_template_cache()
+    cached = _template_filenames.get(template_id)
+    if cached is not None and time.time() - cached[1] < cache.ttl:
+        return cached[0]
+    filename = TplTemplate.objects.values_list('filename', flat=True).get(pktemplate=template_id)
+    _template_filenames[template_id] = (filename, time.time())
+    return filename
+
+
+def clear_template_cache() -> None:
+    get_template_cache().invalidate()
+    _template_filenames.clear()
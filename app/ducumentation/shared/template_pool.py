@@ -0,0 +1,137 @@
+import copy
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from docx.opc.constants import CONTENT_TYPE as CT
+from docx.opc.package import Unmarshaller
+from docx.opc.part import PartFactory, XmlPart
+from docx.opc.pkgreader import PackageReader
+from docx.oxml.parser import parse_xml
+from docx.package import Package
+from docxtpl import DocxTemplate
+
+DEFAULT_POOL_SIZE = 32
+
+# Parts no service ever writes to. They are shared between documents instead
+# of deep-copied; styles.xml alone is often most of the package XML.
+SHARED_CONTENT_TYPES = {
+    CT.WML_STYLES,
+    CT.WML_FONT_TABLE,
+    CT.WML_WEB_SETTINGS,
+}
+
+
+class CompiledTemplate:
+    """
+    A DOCX template unzipped and lxml-parsed once.
+
+    The package reader (blobs, content types, relationships) is immutable and
+    shared; every XML part is kept as a pristine element tree. new_document()
+    builds a fresh python-docx Document by deep-copying the trees a render can
+    modify (body, headers, footers, properties...) and sharing the read-only
+    ones, instead of unzipping and re-parsing the whole package.
+    """
+
+    def __init__(self, template_bytes: bytes):
+        self.size = len(template_bytes)
+        self._pkg_reader = PackageReader.from_file(io.BytesIO(template_bytes))
+        self._elements = {}
+        for partname, content_type, reltype, blob in self._pkg_reader.iter_sparts():
+            if issubclass(self._part_class(content_type, reltype), XmlPart):
+                self._elements[partname] = parse_xml(blob)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _part_class(content_type: str, reltype: str):
+        PartClass = None
+        if PartFactory.part_class_selector is not None:
+            PartClass = PartFactory.part_class_selector(content_type, reltype)
+        if PartClass is None:
+            PartClass = PartFactory._part_cls_for(content_type)
+        return PartClass
+
+    def _make_part(self, partname, content_type, reltype, blob, package):
+        PartClass = self._part_class(content_type, reltype)
+        element = self._elements.get(partname)
+        if element is None:
+            return PartClass.load(partname, content_type, blob, package)
+        if content_type not in SHARED_CONTENT_TYPES:
+            element = copy.deepcopy(element)
+        return PartClass(partname, content_type, element, package)
+
+    def new_document(self):
+        """
+        Return a new python-docx Document for this template. Only the
+        SHARED_CONTENT_TYPES parts are shared with other documents.
+        """
+        package = Package()
+        with self._lock:
+            Unmarshaller.unmarshal(self._pkg_reader, package, self._make_part)
+        return package.main_document_part.document
+
+
+class TemplatePool:
+    """
+    LRU of CompiledTemplate objects keyed by a hash of the template bytes, so a
+    template that changes in R2 (new ETag, new bytes) simply compiles a new entry.
+    """
+
+    def __init__(self, max_size: int = None):
+        self.max_size = int(max_size if max_size is not None else os.environ.get('TEMPLATE_POOL_SIZE', DEFAULT_POOL_SIZE))
+        self._templates: "OrderedDict[str, CompiledTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'compiled': 0}
+
+    def get(self, template_bytes: bytes) -> CompiledTemplate:
+        key = hashlib.sha1(template_bytes).hexdigest()
+        with self._lock:
+            compiled = self._templates.get(key)
+            if compiled is not None:
+                self._templates.move_to_end(key)
+                self.stats['hits'] += 1
+                return compiled
+
+        compiled = CompiledTemplate(template_bytes)
+        with self._lock:
+            self._templates[key] = compiled
+            self.stats['compiled'] += 1
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        return compiled
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+
+_template_pool = None
+_template_pool_lock = threading.Lock()
+
+
+def get_template_pool() -> TemplatePool:
+    global _template_pool
+    if _template_pool is None:
+        with _template_pool_lock:
+            if _template_pool is None:
+                _template_pool = TemplatePool()
+    return _template_pool
+
+
+def open_document(template_bytes: bytes):
+    """
+    Drop-in replacement for Document(io.BytesIO(template_bytes)) backed by the pool.
+    """
+    return get_template_pool().get(template_bytes).new_document()
+
+
+def open_docx_template(template_bytes: bytes) -> DocxTemplate:
+    """
+    Drop-in replacement for DocxTemplate(io.BytesIO(template_bytes)). The
+    pre-built Document is attached up front so render() skips init_docx parsing.
+    """
+    doc = DocxTemplate(io.BytesIO(template_bytes))
+    doc.docx = open_document(template_bytes)
+    return doc
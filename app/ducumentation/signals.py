@@ -0,0 +1,57 @@
+import logging
+
+from django.db.models.signals import post_delete, post_save
+
+from notaria import models
+from notaria.act_writes import rows_bulk_created
+
+from .shared.document_data_cache import get_document_data_cache
+
+logger = logging.getLogger(__name__)
+
+'''
+Drops the cached placeholder data of a kardex when the ORM writes any row
+the document services read for it: the kardex itself, its parties and their
+clients, their acts and conditions, and the patrimoniales, vehicles and
+payments. Cliente2 rows have no kardex column; each one belongs to a single
+party (same idcontratante), whose Contratantes row has it.
+'''
+
+KARDEX_MODELS = (
+    models.Kardex,
+    models.Contratantes,
+    models.Contratantesxacto,
+    models.Patrimonial,
+    models.Detallevehicular,
+    models.Detallemediopago,
+)
+
+
+def invalidate_document_data(sender, instance, **kwargs):
+    if instance.kardex:
+        get_document_data_cache().invalidate(instance.kardex)
+
+
+def invalidate_client_document_data(sender, instance, **kwargs):
+    try:
+        kardex = models.Contratantes.objects.filter(idcontratante=instance.idcontratante).values_list('kardex', flat=True).first()
+    except Exception as e:
+        logger.warning("Could not find the kardex of cliente %s, dropping all document data: %s", instance.idcontratante, e)
+        get_document_data_cache().invalidate()
+        return
+    if kardex:
+        get_document_data_cache().invalidate(kardex)
+
+
+def invalidate_bulk_document_data(sender, rows, **kwargs):
+    for kardex in {row.kardex for row in rows if getattr(row, 'kardex', None)}:
+        get_document_data_cache().invalidate(kardex)
+
+
+for kardex_model in KARDEX_MODELS:
+    post_save.connect(invalidate_document_data, sender=kardex_model, dispatch_uid=f'ducumentation_data_saved_{kardex_model._meta.label}')
+    post_delete.connect(invalidate_document_data, sender=kardex_model, dispatch_uid=f'ducumentation_data_deleted_{kardex_model._meta.label}')
+
+post_save.connect(invalidate_client_document_data, sender=models.Cliente2, dispatch_uid='ducumentation_data_cliente_saved')
+post_delete.connect(invalidate_client_document_data, sender=models.Cliente2, dispatch_uid='ducumentation_data_cliente_deleted')
+rows_bulk_created.connect(invalidate_bulk_document_data, dispatch_uid='ducumentation_data_bulk_created')
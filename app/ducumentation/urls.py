@@ -13,10 +13,10 @@ It includes the URL patterns for the Notaria app's views.
 router = routers.DefaultRouter()
 router.register('documentos', views.DocumentosGeneradosViewSet)
 router.register('extraprotocolares', views.ExtraprotocolaresViewSet, basename='extraprotocolares')
+router.register('jobs', views.DocumentJobViewSet, basename='document-jobs')
 
 from .views import download_docx
 
-print("DEBUG: urls.py loaded")
 
 urlpatterns = [
     path('upload-docx/', views.generate_document_by_tipkar, name='generate_document_by_tipkar'),
@@ -7,19 +7,21 @@ from . import models, serializers
 from notaria.models import TplTemplate, Detallevehicular, Patrimonial, Contratantes, Actocondicion, Cliente2, Nacionalidades, Kardex, Usuarios, Contratantesxacto, Ubigeo, IngresoCartas, CertDomiciliario, Libros
 from notaria.constants import MONEDAS, OPORTUNIDADES_PAGO, FORMAS_PAGO
 from notaria import pagination
-from django.http import HttpResponse
-import boto3
-from botocore.client import Config
+from django.http import HttpResponse, JsonResponse, FileResponse
+from botocore.exceptions import ClientError
 from django.conf import settings
+import logging
 import os
 from docx import Document
 import io
+import json
+import tempfile
+import zipfile
 from .constants import ROLE_LABELS, TIPO_DOCUMENTO, CIVIL_STATUS
 import re
 from datetime import datetime
 from decimal import Decimal
 from typing import Dict, Any
-from botocore.config import Config
 from datetime import datetime
 from docxtpl import DocxTemplate
 from docxcompose.properties import CustomProperties
@@ -43,13 +45,48 @@ from .extraprotocolares.cartas_notariales import CartasNotarialesDocumentService
 from .extraprotocolares.cert_domiciliarios import CertDomiciliariosDocumentService
 from .extraprotocolares.libros import LibrosDocumentService
 from notaria.models import Libros
+from .jobs import enqueue_job, JobError
+from .batch import BatchDocumentGenerator, MAX_BATCH_SIZE
+from .shared.document_uploader import is_pending_document
+from .shared.field_manifest import patch_fields
+from .shared.render_cache import upload_rendered
+from .shared.document_stream import stream_document
+from .shared.presigned_urls import redirect_requested, redirect_to_document
+from .shared.storage import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+
+def _async_requested(request) -> bool:
+    """
+    True when the client asked for queued generation (?async=1).
+    """
+    return str(request.query_params.get('async', '')).lower() in ('1', 'true', 'yes')
+
+
+def _queue_job_response(request, kind: str, params: Dict[str, Any]):
+    """
+    Enqueue a document job and answer 202 with the job id to poll.
+    """
+    user = getattr(request, 'user', None)
+    usuario = getattr(user, 'idusuario', None)
+    try:
+        job, created = enqueue_job(kind, params, usuario)
+    except JobError as e:
+        return Response({'status': 'error', 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        'status': 'queued' if created else 'already_queued',
+        'job_id': job.id,
+        'job_status': job.status,
+        'status_url': reverse('document-jobs-detail', args=[job.id]),
+    }, status=status.HTTP_202_ACCEPTED)
 
 @api_view(['GET'])
 def generate_document_by_tipkar(request):
     """
     Generate document based on tipkar (tipo kardex) from the kardex record
     """
-    print("GENERATE DOCUMENT BY TIPKAR VIEW CALLED")
+    logger.debug("GENERATE DOCUMENT BY TIPKAR VIEW CALLED")
     # Get parameters from GET request
     template_id = request.GET.get('template_id')
     kardex = request.GET.get('kardex')
@@ -84,12 +121,12 @@ def generate_document_by_tipkar(request):
         
         # Route to appropriate service based on tipkar
         if tipkar == 3:  # TRANSFERENCIAS VEHICULARES
-            print(f"DEBUG: Using VehicleTransferDocumentService for tipkar {tipkar}")
+            logger.debug("Using VehicleTransferDocumentService for tipkar %s", tipkar)
             service = VehicleTransferDocumentService()
             response = service.generate_vehicle_transfer_document(template_id, kardex, action, mode)
             return response
         elif tipkar == 2:  # ASUNTOS NO CONTENCIOSOS
-            print(f"DEBUG: Using NonContentiousDocumentService for tipkar {tipkar}")
+            logger.debug("Using NonContentiousDocumentService for tipkar %s", tipkar)
             # For non-contentious, we need idtipoacto from the request or from kardex
             idtipoacto = request.GET.get('idtipoacto')
             if not idtipoacto:
@@ -112,7 +149,7 @@ def generate_document_by_tipkar(request):
             }, status=status.HTTP_501_NOT_IMPLEMENTED)
             
     except Exception as e:
-        print(f"Error generating document: {e}")
+        logger.error("Error generating document: %s", e)
         return Response({
             'success': False,
             'message': 'Internal server error occurred'
@@ -124,7 +161,7 @@ def update_document_by_tipkar(request):
     """
     Smart update endpoint that preserves manual edits based on tipkar
     """
-    print("SMART UPDATE DOCUMENT BY TIPKAR VIEW CALLED")
+    logger.debug("SMART UPDATE DOCUMENT BY TIPKAR VIEW CALLED")
     if request.method == 'POST':
         # Get parameters
         template_id = request.POST.get('template_id')
@@ -159,11 +196,11 @@ def update_document_by_tipkar(request):
             
             # Route to appropriate update function based on tipkar
             if tipkar == 3:  # TRANSFERENCIAS VEHICULARES
-                print(f"DEBUG: Using vehicle update for tipkar {tipkar}")
+                logger.debug("Using vehicle update for tipkar %s", tipkar)
                 result = _smart_update_with_auto_discovery(template_id, kardex)
                 return Response(result)
             elif tipkar == 2:  # ASUNTOS NO CONTENCIOSOS
-                print(f"DEBUG: Using non-contentious update for tipkar {tipkar}")
+                logger.debug("Using non-contentious update for tipkar %s", tipkar)
                 # For non-contentious, we need idtipoacto from the request or from kardex
                 if request.method == 'GET':
                     idtipoacto = request.GET.get('idtipoacto')
@@ -188,7 +225,7 @@ def update_document_by_tipkar(request):
                 }, status=status.HTTP_501_NOT_IMPLEMENTED)
                 
         except Exception as e:
-            print(f"Error in smart update: {e}")
+            logger.error("Error in smart update: %s", e)
             return Response({
                 'success': False,
                 'message': 'Internal server error occurred'
@@ -201,23 +238,16 @@ def _smart_update_non_contentious_with_auto_discovery(template_id: int, kardex:
     ALWAYS preserve manual edits - automatically finds non-contentious document in R2 based on kardex
     """
     try:
-        print(f"DEBUG: Starting smart update for non-contentious kardex: {kardex}")
+        logger.debug("Starting smart update for non-contentious kardex: %s", kardex)
         
         # Step 1: Auto-discover the document filename in R2
-        s3 = boto3.client(
-            's3',
-            endpoint_url=os.environ.get('CLOUDFLARE_R2_ENDPOINT'),
-            aws_access_key_id=os.environ.get('CLOUDFLARE_R2_ACCESS_KEY'),
-            aws_secret_access_key=os.environ.get('CLOUDFLARE_R2_SECRET_KEY'),
-            config=Config(signature_version='s3v4'),
-            region_name='auto',
-        )
+        s3 = get_s3_client()
 
         # Auto-generate the filename based on kardex pattern
         filename = f"__PROY__{kardex}.docx"
         object_key = f"rodriguez-zea/documentos/{filename}"
         
-        print(f"DEBUG: Looking for non-contentious document in R2: {object_key}")
+        logger.debug("Looking for non-contentious document in R2: %s", object_key)
         
         try:
             # Download current document
@@ -226,44 +256,49 @@ def _smart_update_non_contentious_with_auto_discovery(template_id: int, kardex:
                 Key=object_key
             )
             current_doc_content = response['Body'].read()
-            print(f"DEBUG: Successfully downloaded current non-contentious document from R2 ({len(current_doc_content)} bytes)")
+            logger.debug("Successfully downloaded current non-contentious document from R2 (%s bytes)", len(current_doc_content))
             
-            # Step 2: Generate new document with updated data
-            print(f"DEBUG: Generating new non-contentious document with template_id: {template_id}")
+            # Step 2: Patch only the fields whose data changed (documents with a field manifest)
             service = NonContentiousDocumentService()
+            patch = patch_fields(current_doc_content, service.get_document_data(kardex, idtipoacto), service._cleanup_visitor())
+            if patch is not None:
+                return _incremental_update_result(patch, current_doc_content, object_key, filename, kardex)
+            
+            # Older documents: generate new document with updated data and merge
+            logger.debug("Generating new non-contentious document with template_id: %s", template_id)
             new_doc_response = service.generate_non_contentious_document(template_id, kardex, idtipoacto, 'update')
             
             if new_doc_response.status_code != 200:
-                print(f"DEBUG: Failed to generate updated non-contentious document: {new_doc_response.status_code}")
+                logger.warning("Failed to generate updated non-contentious document: %s", new_doc_response.status_code)
                 return {'error': 'Failed to generate updated non-contentious document'}
             
-            print(f"DEBUG: Successfully generated new non-contentious document ({len(new_doc_response.content)} bytes)")
+            logger.debug("Successfully generated new non-contentious document (%s bytes)", len(new_doc_response.content))
             
             # Step 3: ALWAYS merge documents to preserve manual edits
-            print(f"DEBUG: Merging non-contentious documents to preserve manual edits")
+            logger.debug("Merging non-contentious documents to preserve manual edits")
             merged_doc = _merge_documents_smart(current_doc_content, new_doc_response.content, kardex)
-            print(f"DEBUG: Successfully merged non-contentious documents ({len(merged_doc)} bytes)")
+            logger.debug("Successfully merged non-contentious documents (%s bytes)", len(merged_doc))
             
             # Step 4: Upload merged document back to R2
             from io import BytesIO
             file_obj = BytesIO(merged_doc)
             
-            print(f"DEBUG: Uploading merged non-contentious document back to R2: {object_key}")
+            logger.debug("Uploading merged non-contentious document back to R2: %s", object_key)
             s3.upload_fileobj(
                 file_obj,
                 os.environ.get('CLOUDFLARE_R2_BUCKET'),
                 object_key
             )
             
-            print(f"DEBUG: Successfully uploaded merged non-contentious document to R2")
+            logger.debug("Successfully uploaded merged non-contentious document to R2")
             return {'status': 'success', 'message': f'Non-contentious document updated successfully for kardex: {kardex}'}
             
         except Exception as e:
-            print(f"DEBUG: Error downloading non-contentious document: {e}")
+            logger.warning("Error downloading non-contentious document: %s", e)
             return {'error': f'Failed to download non-contentious document: {str(e)}'}
         
     except Exception as e:
-        print(f"DEBUG: Error preserving manual edits for non-contentious: {e}")
+        logger.warning("Error preserving manual edits for non-contentious: %s", e)
         return {'error': f'Failed to preserve manual edits for non-contentious: {str(e)}'}
 
 
@@ -272,23 +307,16 @@ def _smart_update_with_auto_discovery(template_id: int, kardex: str) -> dict:
     ALWAYS preserve manual edits - automatically finds document in R2 based on kardex
     """
     try:
-        print(f"DEBUG: Starting smart update for kardex: {kardex}")
+        logger.debug("Starting smart update for kardex: %s", kardex)
         
         # Step 1: Auto-discover the document filename in R2
-        s3 = boto3.client(
-            's3',
-            endpoint_url=os.environ.get('CLOUDFLARE_R2_ENDPOINT'),
-            aws_access_key_id=os.environ.get('CLOUDFLARE_R2_ACCESS_KEY'),
-            aws_secret_access_key=os.environ.get('CLOUDFLARE_R2_SECRET_KEY'),
-            config=Config(signature_version='s3v4'),
-            region_name='auto',
-        )
+        s3 = get_s3_client()
 
         # Auto-generate the filename based on kardex pattern
         filename = f"__PROY__{kardex}.docx"
         object_key = f"rodriguez-zea/documentos/{filename}"
         
-        print(f"DEBUG: Looking for document in R2: {object_key}")
+        logger.debug("Looking for document in R2: %s", object_key)
         
         try:
             # Download current document
@@ -297,35 +325,40 @@ def _smart_update_with_auto_discovery(template_id: int, kardex: str) -> dict:
                 Key=object_key
             )
             current_doc_content = response['Body'].read()
-            print(f"DEBUG: Successfully downloaded current document from R2 ({len(current_doc_content)} bytes)")
+            logger.debug("Successfully downloaded current document from R2 (%s bytes)", len(current_doc_content))
             
-            # Step 2: Generate new document with updated data
-            print(f"DEBUG: Generating new document with template_id: {template_id}")
+            # Step 2: Patch only the fields whose data changed (documents with a field manifest)
             service = VehicleTransferDocumentService()
+            patch = patch_fields(current_doc_content, service.get_document_data(kardex), service._cleanup_visitor())
+            if patch is not None:
+                return _incremental_update_result(patch, current_doc_content, object_key, filename, kardex)
+            
+            # Older documents: generate new document with updated data and merge
+            logger.debug("Generating new document with template_id: %s", template_id)
             new_doc_response = service.generate_vehicle_transfer_document(template_id, kardex, 'update')
             
             if new_doc_response.status_code != 200:
-                print(f"DEBUG: Failed to generate updated document: {new_doc_response.status_code}")
+                logger.warning("Failed to generate updated document: %s", new_doc_response.status_code)
                 return {'error': 'Failed to generate updated document'}
             
-            print(f"DEBUG: Successfully generated new document ({len(new_doc_response.content)} bytes)")
+            logger.debug("Successfully generated new document (%s bytes)", len(new_doc_response.content))
             
             # Step 3: ALWAYS merge documents to preserve manual edits
-            print(f"DEBUG: Merging documents to preserve manual edits")
+            logger.debug("Merging documents to preserve manual edits")
             merged_doc = _merge_documents_smart(current_doc_content, new_doc_response.content, kardex)
-            print(f"DEBUG: Successfully merged documents ({len(merged_doc)} bytes)")
+            logger.debug("Successfully merged documents (%s bytes)", len(merged_doc))
             
             # Step 4: Upload merged document back to R2
             from io import BytesIO
             file_obj = BytesIO(merged_doc)
             
-            print(f"DEBUG: Uploading merged document back to R2: {object_key}")
+            logger.debug("Uploading merged document back to R2: %s", object_key)
             s3.upload_fileobj(
                 file_obj,
                 os.environ.get('CLOUDFLARE_R2_BUCKET'),
                 object_key
             )
-            print(f"DEBUG: Successfully uploaded merged document to R2")
+            logger.debug("Successfully uploaded merged document to R2")
             
             return {
                 'status': 'success',
@@ -342,17 +375,44 @@ def _smart_update_with_auto_discovery(template_id: int, kardex: str) -> dict:
             }
             
         except s3.exceptions.NoSuchKey:
-            print(f"DEBUG: Document not found in R2: {filename}")
+            logger.debug("Document not found in R2: %s", filename)
             return {'error': f'Document not found in R2: {filename}'}
         except Exception as e:
-            print(f"DEBUG: Error downloading document: {e}")
+            logger.warning("Error downloading document: %s", e)
             return {'error': f'Failed to download document: {str(e)}'}
         
     except Exception as e:
-        print(f"DEBUG: Error preserving manual edits: {e}")
+        logger.warning("Error preserving manual edits: %s", e)
         return {'error': f'Failed to preserve manual edits: {str(e)}'}
 
 
+def _incremental_update_result(patch: dict, current_doc_content: bytes, object_key: str, filename: str, kardex: str) -> dict:
+    """
+    Store a document patched from its field manifest (only when a field
+    changed) and describe the update.
+    """
+    if patch['skipped']:
+        logger.debug("Kept manual edits of %s in %s", ', '.join(patch['skipped']), filename)
+    if patch['updated']:
+        logger.debug("Patched %s field(s) in %s: %s", len(patch['updated']), filename, ', '.join(patch['updated']))
+        if not upload_rendered(object_key, patch['content'], wait=True):
+            return {'error': f'Failed to upload updated document: {filename}'}
+    return {
+        'status': 'success',
+        'message': f"Document updated: {len(patch['updated'])} field(s) changed, manual edits preserved",
+        'filename': filename,
+        'kardex': kardex,
+        'update_type': 'incremental',
+        'updated_fields': patch['updated'],
+        'preserved_fields': patch['skipped'],
+        'debug_info': {
+            'original_size': len(current_doc_content),
+            'merged_size': len(patch['content']),
+            'r2_path': object_key
+        }
+    }
+
+
 def _merge_documents_smart(current_doc_content: bytes, new_doc_content: bytes, kardex: str) -> bytes:
     """
     ALWAYS preserve manual edits - never fall back to losing manual edits
@@ -389,7 +449,7 @@ def _merge_documents_smart(current_doc_content: bytes, new_doc_content: bytes, k
         return buffer.read()
         
     except Exception as e:
-        print(f"Error merging documents: {e}")
+        logger.error("Error merging documents: %s", e)
         # NEVER fall back to losing manual edits - return current document unchanged
         return current_doc_content
 
@@ -406,35 +466,16 @@ def _smart_update_specific_fields(current_doc, new_doc, data: dict, db_fields: s
         if field in data:
             field_mapping[field] = str(data[field])
     
-    # Debug: Print what fields we're working with
-    print(f"DEBUG: Processing fields: {field_mapping}")
-    
-    # Debug: Show all paragraphs in current document
-    print(f"DEBUG: Current document has {len(current_doc.paragraphs)} paragraphs")
-    for i, paragraph in enumerate(current_doc.paragraphs):
-        if paragraph.text.strip():
-            print(f"DEBUG: Paragraph {i}: '{paragraph.text[:200]}...'")
-    
-    # Debug: Show all tables in current document
-    print(f"DEBUG: Current document has {len(current_doc.tables)} tables")
-    for i, table in enumerate(current_doc.tables):
-        print(f"DEBUG: Table {i} has {len(table.rows)} rows")
-        for j, row in enumerate(table.rows):
-            for k, cell in enumerate(row.cells):
-                for l, paragraph in enumerate(cell.paragraphs):
-                    if paragraph.text.strip():
-                        print(f"DEBUG: Table {i}, Row {j}, Cell {k}, Paragraph {l}: '{paragraph.text[:200]}...'")
+    logger.debug("Processing fields: %s", sorted(field_mapping))
     
     # Update paragraphs
     for i, paragraph in enumerate(current_doc.paragraphs):
         if i < len(new_doc.paragraphs):
-            print(f"DEBUG: Processing paragraph {i}")
             _smart_update_paragraph(paragraph, new_doc.paragraphs[i], field_mapping)
     
     # Update tables
     for table_idx, table in enumerate(current_doc.tables):
         if table_idx < len(new_doc.tables):
-            print(f"DEBUG: Processing table {table_idx}")
             _smart_update_table(table, new_doc.tables[table_idx], field_mapping)
     
     return current_doc
@@ -461,9 +502,6 @@ def _update_based_on_template_placeholders(paragraph, template_text, field_mappi
     """
     import re
     
-    print(f"DEBUG: Current paragraph text: '{paragraph.text}'")
-    print(f"DEBUG: Template text: '{template_text}'")
-    
     # Define the placeholders we want to keep and their corresponding field names
     placeholder_mapping = {
         '{{NRO_ESC}}': 'NRO_ESC',
@@ -478,7 +516,7 @@ def _update_based_on_template_placeholders(paragraph, template_text, field_mappi
     for placeholder, field_name in placeholder_mapping.items():
         if field_name in field_mapping and field_mapping[field_name] and field_mapping[field_name].strip():
             value = field_mapping[field_name]
-            print(f"DEBUG: Processing {field_name} with value: '{value}'")
+            logger.debug("Processing %s with value: '%s'", field_name, value)
             
             # Look for the placeholder in individual runs to preserve formatting
             _update_placeholder_in_runs(paragraph, placeholder, value)
@@ -491,27 +529,25 @@ def _update_placeholder_in_runs(paragraph, placeholder, value):
     """
     Update placeholder in paragraph runs while preserving all formatting
     """
-    print(f"DEBUG: Looking for placeholder '{placeholder}' in paragraph runs")
     
     # Check if placeholder exists in any run
     placeholder_found = False
     for run in paragraph.runs:
         if placeholder in run.text:
             placeholder_found = True
-            print(f"DEBUG: Found '{placeholder}' in run: '{run.text}'")
+            logger.debug("Found '%s' in run: '%s'", placeholder, run.text)
             # Replace the placeholder while preserving the run's formatting
             run.text = run.text.replace(placeholder, value)
             # Ensure the new value is visible (black color)
             run.font.color.rgb = RGBColor(0, 0, 0)  # Black color
-            print(f"DEBUG: Updated run to: '{run.text}' with black color")
+            logger.debug("Updated run to: '%s' with black color", run.text)
             break
     
     # If placeholder not found in runs, check if it spans multiple runs
     if not placeholder_found:
-        print(f"DEBUG: Placeholder '{placeholder}' not found in individual runs, checking if it spans multiple runs")
         paragraph_text = paragraph.text
         if placeholder in paragraph_text:
-            print(f"DEBUG: Found '{placeholder}' spanning multiple runs in paragraph: '{paragraph_text[:100]}...'")
+            logger.debug("Found '%s' spanning multiple runs in paragraph: '%s...'", placeholder, paragraph_text[:100])
             # This is more complex - we need to handle placeholders that span multiple runs
             _update_placeholder_spanning_runs(paragraph, placeholder, value)
         else:
@@ -524,14 +560,14 @@ def _update_placeholder_spanning_runs(paragraph, placeholder, value):
     """
     Handle placeholders that span multiple runs by carefully reconstructing the paragraph
     """
-    print(f"DEBUG: Updating placeholder '{placeholder}' that spans multiple runs")
+    logger.debug("Updating placeholder '%s' that spans multiple runs", placeholder)
     
     # Get the original paragraph text and find the placeholder position
     original_text = paragraph.text
     placeholder_start = original_text.find(placeholder)
     
     if placeholder_start == -1:
-        print(f"DEBUG: Placeholder '{placeholder}' not found in paragraph text")
+        logger.debug("Placeholder '%s' not found in paragraph text", placeholder)
         return
     
     placeholder_end = placeholder_start + len(placeholder)
@@ -540,8 +576,8 @@ def _update_placeholder_spanning_runs(paragraph, placeholder, value):
     before_placeholder = original_text[:placeholder_start]
     after_placeholder = original_text[placeholder_end:]
     
-    print(f"DEBUG: Before placeholder: '{before_placeholder}'")
-    print(f"DEBUG: After placeholder: '{after_placeholder}'")
+    logger.debug("Before placeholder: '%s'", before_placeholder)
+    logger.debug("After placeholder: '%s'", after_placeholder)
     
     # Clear the paragraph and rebuild it with proper formatting
     paragraph.clear()
@@ -567,7 +603,7 @@ def _update_placeholder_spanning_runs(paragraph, placeholder, value):
         run.font.name = 'Calibri'
         run.font.size = Pt(11)
     
-    print(f"DEBUG: Rebuilt paragraph: '{paragraph.text}'")
+    logger.debug("Rebuilt paragraph: '%s'", paragraph.text)
 
 
 def _update_hidden_placeholders_in_runs(paragraph, field_mapping):
@@ -592,12 +628,12 @@ def _update_hidden_placeholders_in_runs(paragraph, field_mapping):
             if field_name in field_mapping and field_mapping[field_name] and field_mapping[field_name].strip():
                 value = field_mapping[field_name]
                 if placeholder in run.text:
-                    print(f"DEBUG: Found hidden placeholder {field_name} in run: '{run.text}'")
+                    logger.debug("Found hidden placeholder %s in run: '%s'", field_name, run.text)
                     # Make the run visible again and replace the placeholder
                     run.font.color.rgb = RGBColor(0, 0, 0)  # Black color
                     # Preserve the run's formatting while replacing the text
                     run.text = run.text.replace(placeholder, value)
-                    print(f"DEBUG: Updated hidden placeholder to: '{run.text}' with black color")
+                    logger.debug("Updated hidden placeholder to: '%s' with black color", run.text)
                     break
 
 
@@ -606,7 +642,6 @@ def _update_blank_field(paragraph, field_name, value):
     Update blank fields when placeholders are not found
     Preserves formatting by working with runs
     """
-    print(f"DEBUG: Looking for blank field {field_name} in paragraph: '{paragraph.text}'")
     
     # Define field labels to look for
     field_labels = {
@@ -624,7 +659,7 @@ def _update_blank_field(paragraph, field_name, value):
             start_pos = paragraph.text.find(label)
             after_label = paragraph.text[start_pos + len(label):]
             if not after_label.strip() or after_label.strip() in ['', ' ', '\t', '\n']:
-                print(f"DEBUG: Found blank {field_name} field")
+                logger.debug("Found blank %s field", field_name)
                 
                 # Find the run that contains the label and add the value after it
                 for run in paragraph.runs:
@@ -638,7 +673,7 @@ def _update_blank_field(paragraph, field_name, value):
                         run.text = f"{before_label}{label} {value}{after_label_text}"
                         # Ensure the new value is visible (black color)
                         run.font.color.rgb = RGBColor(0, 0, 0)  # Black color
-                        print(f"DEBUG: Updated run to: '{run.text[:100]}...' with black color")
+                        logger.debug("Updated run to: '%s...' with black color", run.text[:100])
                         break
 
 
@@ -652,14 +687,11 @@ def _smart_update_table(current_table, new_table, field_mapping):
             for cell_idx, cell in enumerate(row.cells):
                 if cell_idx < len(new_table.rows[row_idx].cells):
                     new_cell = new_table.rows[row_idx].cells[cell_idx]
-                    print(f"DEBUG: Processing table cell {row_idx},{cell_idx}")
                     for paragraph_idx, paragraph in enumerate(cell.paragraphs):
                         if paragraph.text.strip():  # Only update non-empty paragraphs
-                            print(f"DEBUG: Table cell {row_idx},{cell_idx} paragraph {paragraph_idx}: '{paragraph.text[:100]}...'")
                             _smart_update_paragraph(paragraph, new_cell.paragraphs[paragraph_idx] if paragraph_idx < len(new_cell.paragraphs) else paragraph, field_mapping)
                         else:
                             # Also check for placeholders in empty paragraphs
-                            print(f"DEBUG: Table cell {row_idx},{cell_idx} paragraph {paragraph_idx} is empty, checking for placeholders")
                             _update_based_on_template_placeholders(paragraph, new_cell.paragraphs[paragraph_idx].text if paragraph_idx < len(new_cell.paragraphs) else "", field_mapping)
 
 
@@ -694,7 +726,7 @@ class DocumentosGeneradosViewSet(ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='open-template')
     def open_template(self, request):
-        print(f"DEBUG: open_template")
+        logger.debug("open_template")
         template_id = request.query_params.get("template_id")
         kardex = request.query_params.get("kardex")
         action = request.query_params.get("action", "generate")
@@ -714,31 +746,38 @@ class DocumentosGeneradosViewSet(ModelViewSet):
         todayTimeDate = datetime.now().isoformat() + 'Z'
         
         # create a new instance of Documentogenerados only if it doesn't exist
-        print(f"DEBUG: kardex: {kardex}")
-        print(f"DEBUG: getting doc: ")
+        logger.debug("kardex: %s", kardex)
+        logger.debug("getting doc: ")
         documentogenerados = models.Documentogenerados.objects.filter(kardex=kardex).first()
-        print(f"DEBUG: documentogenerados: {documentogenerados}")
+        logger.debug("documentogenerados: %s", documentogenerados)
         if not documentogenerados:
             documentogenerados = models.Documentogenerados.objects.create(
                 kardex=kardex,
                 usuario=user.idusuario,
                 fecha=todayTimeDate)
-            print(f"DEBUG: creating doc: {documentogenerados}")
+            logger.debug("creating doc: %s", documentogenerados)
             try:
                 template_id = int(template_id)
             except ValueError:
                 return HttpResponse({"error": "Invalid template_id format."}, status=400)
-            print(f"DEBUG: template_id: {template_id}")
+            logger.debug("template_id: %s", template_id)
             # Get the kardex record to determine the tipkar
             kardex_obj = Kardex.objects.filter(kardex=kardex).first()
-            print(f"DEBUG: kardex_obj: {kardex_obj}")
+            logger.debug("kardex_obj: %s", kardex_obj)
             if not kardex_obj:
                 return HttpResponse({"error": f"Kardex {kardex} not found"}, status=404)
             
             tipkar = kardex_obj.idtipkar
 
+            if _async_requested(request):
+                return _queue_job_response(request, 'protocolar', {
+                    'template_id': template_id,
+                    'kardex': kardex,
+                    'idtipoacto': request.query_params.get('idtipoacto'),
+                })
+
             if tipkar == 5:
-                print(f"DEBUG: Using TestamentDocumentService for tipkar {tipkar}")
+                logger.debug("Using TestamentDocumentService for tipkar %s", tipkar)
                 service = TestamentoDocumentService()
                 if mode == "open":
                     # Return the download URL for Windows users - force HTTPS
@@ -757,7 +796,7 @@ class DocumentosGeneradosViewSet(ModelViewSet):
                     return service.generate_testamento_document(template_id, kardex, action, mode)
 
             if tipkar == 4:  # GARANTIAS MOBILIARIAS
-                print(f"DEBUG: Using GarantiasMobiliariasDocumentService for tipkar {tipkar}")
+                logger.debug("Using GarantiasMobiliariasDocumentService for tipkar %s", tipkar)
                 service = GarantiasMobiliariasDocumentService()
                 if mode == "open":
                     download_url = f"https://{request.get_host()}/docs/download/{kardex}/__PROY__{kardex}.docx"
@@ -776,7 +815,7 @@ class DocumentosGeneradosViewSet(ModelViewSet):
             
             # Route to appropriate service based on tipkar
             if tipkar == 3:  # TRANSFERENCIAS VEHICULARES
-                print(f"DEBUG: Using VehicleTransferDocumentService for tipkar {tipkar}")
+                logger.debug("Using VehicleTransferDocumentService for tipkar %s", tipkar)
                 service = VehicleTransferDocumentService()
                 if mode == "open":
                     # Return the download URL for Windows users - force HTTPS
@@ -794,7 +833,7 @@ class DocumentosGeneradosViewSet(ModelViewSet):
                 else:
                     return service.generate_vehicle_transfer_document(template_id, kardex, action, mode)
             elif tipkar == 2:  # ASUNTOS NO CONTENCIOSOS
-                print(f"DEBUG: Using NonContentiousDocumentService for tipkar {tipkar}")
+                logger.debug("Using NonContentiousDocumentService for tipkar %s", tipkar)
                 # For non-contentious, we need idtipoacto from the request or from kardex
                 idtipoacto = request.query_params.get('idtipoacto', "013")
                 if not idtipoacto:
@@ -824,7 +863,7 @@ class DocumentosGeneradosViewSet(ModelViewSet):
                     return service.generate_non_contentious_document(template_id, kardex, idtipoacto, action, mode)
 
             elif tipkar == 1:  # ESCRITURA PUBLICA
-                print(f"DEBUG: Using EscrituraPublicaDocumentService for tipkar {tipkar}")
+                logger.debug("Using EscrituraPublicaDocumentService for tipkar %s", tipkar)
                 service = EscrituraPublicaDocumentService()
                 if mode == "open":
                     # Return the download URL for Windows users - force HTTPS
@@ -876,30 +915,21 @@ class DocumentosGeneradosViewSet(ModelViewSet):
 
         # Define the object key for R2
         object_key = f"rodriguez-zea/documentos/__PROY__{kardex}.docx"
-        print(f"DEBUG: object_key: {object_key}")
+        logger.debug("object_key: %s", object_key)
         # Check if document exists in R2
-        s3 = boto3.client(
-            's3',
-            endpoint_url=os.environ.get('CLOUDFLARE_R2_ENDPOINT'),
-            aws_access_key_id=os.environ.get('CLOUDFLARE_R2_ACCESS_KEY'),
-            aws_secret_access_key=os.environ.get('CLOUDFLARE_R2_SECRET_KEY'),
-            config=Config(signature_version='s3v4'),
-            region_name='auto',
-        )
+        s3 = get_s3_client()
 
         try:
-            # Try to get the document from R2
-            print(f"DEBUG: Checking if document exists in R2: {object_key}")
-            s3_response = s3.get_object(
-                Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'),
-                Key=object_key
-            )
-            
-            # Document exists, return it
-            print(f"DEBUG: Document found in R2, returning existing document")
-            doc_content = s3_response['Body'].read()
-            
             if mode == "open":
+                # Only existence matters here; a document generated moments ago may still be queued for upload
+                if not is_pending_document(object_key):
+                    logger.debug("Checking if document exists in R2: %s", object_key)
+                    s3.head_object(
+                        Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'),
+                        Key=object_key
+                    )
+                logger.debug("Document found in R2, returning existing document")
+
                 # Return the download URL for Windows users - force HTTPS
                 download_url = f"https://{request.get_host()}/docs/download/{kardex}/__PROY__{kardex}.docx"
                 response = JsonResponse({
@@ -912,21 +942,23 @@ class DocumentosGeneradosViewSet(ModelViewSet):
                 })
                 response['Access-Control-Allow-Origin'] = '*'
                 return response
+            elif redirect_requested(request, mode):
+                # Send the client straight to R2 with a presigned URL
+                response = redirect_to_document(request, object_key, f"__PROY__{kardex}.docx")
+                logger.debug("Document found in R2, redirecting to presigned URL")
+                response['Access-Control-Allow-Origin'] = '*'
+                return response
             else:
-                # Testing mode: Download the document
-                response = HttpResponse(
-                    doc_content,
-                    content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-                )
-                response['Content-Disposition'] = f'inline; filename="__PROY__{kardex}.docx"'
-                response['Content-Length'] = str(len(doc_content))
+                # Testing mode: Stream the document
+                response = stream_document(request, object_key, f"__PROY__{kardex}.docx")
+                logger.debug("Document found in R2, returning existing document")
                 response['Access-Control-Allow-Origin'] = '*'
                 return response
             
         except Exception as e:
             # Document doesn't exist in R2, generate it
-            print(f"DEBUG: Document not found in R2: {e}")
-            print(f"DEBUG: Generating new document for kardex: {kardex}")
+            logger.debug("Document not found in R2: %s", e)
+            logger.debug("Generating new document for kardex: %s", kardex)
             
             # Get the kardex record to determine the tipkar
             kardex_obj = Kardex.objects.filter(kardex=kardex).first()
@@ -934,11 +966,18 @@ class DocumentosGeneradosViewSet(ModelViewSet):
                 return HttpResponse({"error": f"Kardex {kardex} not found"}, status=404)
             
             tipkar = kardex_obj.idtipkar
+
+            if _async_requested(request):
+                return _queue_job_response(request, 'protocolar', {
+                    'template_id': template_id,
+                    'kardex': kardex,
+                    'idtipoacto': request.query_params.get('idtipoacto'),
+                })
             
             # Route to appropriate service based on tipkar
 
             if tipkar == 5:
-                print(f"DEBUG: Using TestamentDocumentService for tipkar {tipkar}")
+                logger.debug("Using TestamentDocumentService for tipkar %s", tipkar)
                 service = TestamentoDocumentService()
                 if mode == "open":
                     # Return the download URL for Windows users - force HTTPS
@@ -957,7 +996,7 @@ class DocumentosGeneradosViewSet(ModelViewSet):
                     return service.generate_testamento_document(template_id, kardex, action, mode)
             
             if tipkar == 4:  # GARANTIAS MOBILIARIAS
-                print(f"DEBUG: Using GarantiasMobiliariasDocumentService for tipkar {tipkar}")
+                logger.debug("Using GarantiasMobiliariasDocumentService for tipkar %s", tipkar)
                 service = GarantiasMobiliariasDocumentService()
                 if mode == "open":
                     download_url = f"https://{request.get_host()}/docs/download/{kardex}/__PROY__{kardex}.docx"
@@ -975,7 +1014,7 @@ class DocumentosGeneradosViewSet(ModelViewSet):
                     return service.generate_garantias_mobiliarias_document(template_id, kardex, action, mode)
 
             if tipkar == 3:  # TRANSFERENCIAS VEHICULARES
-                print(f"DEBUG: Using VehicleTransferDocumentService for tipkar {tipkar}")
+                logger.debug("Using VehicleTransferDocumentService for tipkar %s", tipkar)
                 service = VehicleTransferDocumentService()
                 if mode == "open":
                     # Return the download URL for Windows users - force HTTPS
@@ -993,7 +1032,7 @@ class DocumentosGeneradosViewSet(ModelViewSet):
                 else:
                     return service.generate_vehicle_transfer_document(template_id, kardex, action, mode)
             elif tipkar == 2:  # ASUNTOS NO CONTENCIOSOS
-                print(f"DEBUG: Using NonContentiousDocumentService for tipkar {tipkar}")
+                logger.debug("Using NonContentiousDocumentService for tipkar %s", tipkar)
                 # For non-contentious, we need idtipoacto from the request or from kardex
                 idtipoacto = request.query_params.get('idtipoacto')
                 if not idtipoacto:
@@ -1022,7 +1061,7 @@ class DocumentosGeneradosViewSet(ModelViewSet):
                 else:
                     return service.generate_non_contentious_document(template_id, kardex, idtipoacto, action, mode)
             elif tipkar == 1:  # ESCRITURA PUBLICA
-                print(f"DEBUG: Using EscrituraPublicaDocumentService for tipkar {tipkar}")
+                logger.debug("Using EscrituraPublicaDocumentService for tipkar %s", tipkar)
                 service = EscrituraPublicaDocumentService()
                 if mode == "open":
                     # Return the download URL for Windows users - force HTTPS
@@ -1044,21 +1083,54 @@ class DocumentosGeneradosViewSet(ModelViewSet):
                     'error': f'Document generation not implemented for tipkar {tipkar}'
                 }, status=501)
 
-# Create S3 client once at module level for better performance
-_s3_client = None
-
-def get_s3_client():
-    global _s3_client
-    if _s3_client is None:
-        _s3_client = boto3.client(
-            's3',
-            endpoint_url=os.environ.get('CLOUDFLARE_R2_ENDPOINT'),
-            aws_access_key_id=os.environ.get('CLOUDFLARE_R2_ACCESS_KEY'),
-            aws_secret_access_key=os.environ.get('CLOUDFLARE_R2_SECRET_KEY'),
-            config=Config(signature_version='s3v4'),
-            region_name='auto',
-        )
-    return _s3_client
+    @action(detail=False, methods=['post'], url_path='batch')
+    def batch(self, request):
+        """
+        Generate the projects for many kardex in one request.
+        Body:
+        - items: [{kardex, template_id, idtipoacto?}, ...]  or
+          kardex: [..] with a shared template_id
+        - format: 'zip' (default) streams a ZIP with every document,
+          'json' returns per-item results
+        - upload: whether to store the documents in R2 (default true)
+        """
+        items = request.data.get('items')
+        if items is None:
+            kardex_list = request.data.get('kardex') or []
+            if isinstance(kardex_list, str):
+                kardex_list = [k.strip() for k in kardex_list.split(',') if k.strip()]
+            template_id = request.data.get('template_id')
+            items = [{'kardex': kardex, 'template_id': template_id} for kardex in kardex_list]
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'items (or kardex and template_id) are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BATCH_SIZE:
+            return Response({'error': f'A batch can have at most {MAX_BATCH_SIZE} items.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        output_format = request.data.get('format', 'zip')
+        upload = str(request.data.get('upload', True)).lower() not in ('0', 'false', 'no')
+
+        results = BatchDocumentGenerator().generate(items, upload=upload)
+
+        summary = [{key: value for key, value in result.items() if key != 'content'} for result in results]
+        if output_format == 'json':
+            return Response({
+                'total': len(summary),
+                'generated': sum(1 for result in summary if result['status'] == 'ok'),
+                'results': summary,
+            })
+
+        archive = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+        with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_STORED) as zf:
+            for result in results:
+                if result['content'] is not None:
+                    zf.writestr(result['filename'], result['content'])
+            zf.writestr('resultados.json', json.dumps(summary, ensure_ascii=False, indent=2))
+        archive.seek(0)
+
+        filename = f"documentos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        response = FileResponse(archive, as_attachment=True, filename=filename, content_type='application/zip')
+        response['Access-Control-Allow-Origin'] = '*'
+        return response
 
 @api_view(['GET'])
 # @permission_classes([IsAuthenticated])
@@ -1067,36 +1139,31 @@ def download_docx(request, kardex, kardex2):
     Secure endpoint to stream a docx file from R2 to the user.
     Only authenticated users can access. Returns 404 if not found.
     """
-    import boto3
     import os
     import time
-    from botocore.client import Config
-    from django.http import FileResponse, Http404, HttpResponse
+    from django.http import Http404, HttpResponse
     
     start_time = time.time()
 
     object_key = f"rodriguez-zea/documentos/__PROY__{kardex}.docx"
-    
+
     try:
-        s3 = get_s3_client()
-        s3_response = s3.get_object(
-            Bucket=os.environ.get('CLOUDFLARE_R2_BUCKET'),
-            Key=object_key
-        )
-        file_stream = s3_response['Body']
-        response = FileResponse(file_stream, content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
-        response['Content-Disposition'] = f'inline; filename="__PROY__{kardex}.docx"'
-        # Add caching headers for better performance
-        response['Cache-Control'] = 'public, max-age=3600'  # Cache for 1 hour
-        response['ETag'] = f'"{kardex}"'
-        
+        if redirect_requested(request):
+            # ?mode=redirect (or DOCUMENT_DELIVERY_MODE=redirect): 302 to a presigned R2 URL
+            response = redirect_to_document(request, object_key, f"__PROY__{kardex}.docx")
+        else:
+            # Serves uploads still in flight, answers If-None-Match with 304 and Range with 206
+            response = stream_document(request, object_key, f"__PROY__{kardex}.docx")
+
         # Log performance metrics
         elapsed_time = time.time() - start_time
-        print(f"DEBUG: download_docx took {elapsed_time:.2f} seconds for kardex: {kardex}")
-        
+        logger.debug("download_docx took %.2f seconds for kardex: %s (status %s)", elapsed_time, kardex, response.status_code)
+
         return response
-    except s3.exceptions.NoSuchKey:
-        raise Http404("Document not found")
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            raise Http404("Document not found")
+        return HttpResponse(f"Error: {str(e)}", status=500)
     except Exception as e:
         return HttpResponse(f"Error: {str(e)}", status=500)
 
@@ -1117,17 +1184,11 @@ def test_r2_connection(request):
             'access_key_set': bool(access_key),
             'secret_key_set': bool(secret_key),
             'bucket': bucket,
+            'storage_backend': os.environ.get('STORAGE_BACKEND', 'r2'),
         }
         
         # Test S3 client creation
-        s3 = boto3.client(
-            's3',
-            endpoint_url=endpoint_url,
-            aws_access_key_id=access_key,
-            aws_secret_access_key=secret_key,
-            config=Config(signature_version='s3v4'),
-            region_name='auto',
-        )
+        s3 = get_s3_client()
         
         # Test bucket access
         try:
@@ -1173,7 +1234,7 @@ class ExtraprotocolaresViewSet(ModelViewSet):
         """
         Generate Permiso Viaje Interior document
         """
-        print("DEBUG: ExtraprotocolaresViewSet.permiso_viaje_interior called")
+        logger.debug("ExtraprotocolaresViewSet.permiso_viaje_interior called")
         
         # Get parameters
         id_viaje = request.query_params.get('id_viaje')
@@ -1185,8 +1246,10 @@ class ExtraprotocolaresViewSet(ModelViewSet):
 
         service = PermisoViajeInteriorDocumentService()
         if action == 'retrieve':
-            return service.retrieve_document(id_viaje, mode)
+            return service.retrieve_document(id_viaje, mode, request=request)
         else:
+            if _async_requested(request):
+                return _queue_job_response(request, 'permiso-viaje-interior', {'id_viaje': id_viaje})
             return service.generate_permiso_viaje_interior_document(id_viaje, mode)
 
     @action(detail=False, methods=['get'], url_path='permiso-viaje-exterior')
@@ -1205,8 +1268,10 @@ class ExtraprotocolaresViewSet(ModelViewSet):
         
         service = PermisoViajeExteriorDocumentService()
         if action == 'retrieve':
-            return service.retrieve_document(id_viaje, mode)
+            return service.retrieve_document(id_viaje, mode, request=request)
         else:
+            if _async_requested(request):
+                return _queue_job_response(request, 'permiso-viaje-exterior', {'id_viaje': id_viaje})
             return service.generate_permiso_viaje_exterior_document(id_viaje, mode)
 
     @action(detail=False, methods=['get'], url_path='poder-fuera-registro')
@@ -1236,8 +1301,10 @@ class ExtraprotocolaresViewSet(ModelViewSet):
 
         service = PoderFueraDeRegistroDocumentService()
         if action == 'retrieve':
-            return service.retrieve_document(id_poder, filename, mode)
+            return service.retrieve_document(id_poder, filename, mode, request=request)
         else:
+            if _async_requested(request):
+                return _queue_job_response(request, 'poder-fuera-registro', {'id_poder': id_poder})
             return service.generate_poder_fuera_registro_document(id_poder, mode)
 
     @action(detail=False, methods=['get'], url_path='poder-essalud')
@@ -1266,8 +1333,10 @@ class ExtraprotocolaresViewSet(ModelViewSet):
 
         service = PoderEssaludDocumentService()
         if action == 'retrieve':
-            return service.retrieve_document(id_poder, filename, mode)
+            return service.retrieve_document(id_poder, filename, mode, request=request)
         else:
+            if _async_requested(request):
+                return _queue_job_response(request, 'poder-essalud', {'id_poder': id_poder})
             return service.generate_poder_essalud_document(id_poder, mode)
 
 
@@ -1297,8 +1366,10 @@ class ExtraprotocolaresViewSet(ModelViewSet):
 
         service = PoderPensionDocumentService()
         if action == 'retrieve':
-            return service.retrieve_document(id_poder, filename, mode)
+            return service.retrieve_document(id_poder, filename, mode, request=request)
         else:
+            if _async_requested(request):
+                return _queue_job_response(request, 'poder-onp', {'id_poder': id_poder})
             return service.generate_poder_pension_document(id_poder, mode)
 
     @action(detail=False, methods=['get'], url_path='carta-notarial')
@@ -1309,7 +1380,7 @@ class ExtraprotocolaresViewSet(ModelViewSet):
         - action=retrieve: Fetches an existing document from R2 and returns it.
         """
         id_carta = request.query_params.get('id_carta')
-        print(f"DEBUG: id_carta: {id_carta}")
+        logger.debug("id_carta: %s", id_carta)
         action = request.query_params.get('action', 'generate')
         mode = request.query_params.get('mode', 'download')
 
@@ -1318,7 +1389,7 @@ class ExtraprotocolaresViewSet(ModelViewSet):
 
         try:
             rec = IngresoCartas.objects.get(id_carta=id_carta)
-            print(f"DEBUG: rec: {rec}")
+            logger.debug("rec: %s", rec)
             num_carta = rec.num_carta
             if not num_carta:
                 return Response({'status': 'error', 'message': 'num_carta is empty for the provided id_carta'}, status=status.HTTP_400_BAD_REQUEST)
@@ -1327,8 +1398,10 @@ class ExtraprotocolaresViewSet(ModelViewSet):
 
         service = CartasNotarialesDocumentService()
         if action == 'retrieve':
-            return service.retrieve_carta_document(num_carta, mode)
+            return service.retrieve_carta_document(num_carta, mode, request=request)
         else:
+            if _async_requested(request):
+                return _queue_job_response(request, 'carta-notarial', {'id_carta': id_carta})
             return service.generate_carta_document(num_carta, mode)
 
 
@@ -1357,8 +1430,10 @@ class ExtraprotocolaresViewSet(ModelViewSet):
 
         service = CertDomiciliariosDocumentService()
         if action == 'retrieve':
-            return service.retrieve_cdom_document(num_certificado, mode)
+            return service.retrieve_cdom_document(num_certificado, mode, request=request)
         else:
+            if _async_requested(request):
+                return _queue_job_response(request, 'cert-domiciliario', {'id_domiciliario': id_domiciliario})
             return service.generate_cdom_document(num_certificado, mode)
         
     @action(detail=False, methods=['get'], url_path='libro')
@@ -1393,6 +1468,48 @@ class ExtraprotocolaresViewSet(ModelViewSet):
 
         service = LibrosDocumentService()
         if action == 'retrieve':
-            return service.retrieve_libro_document(num_libro, str(anio_libro), mode)
+            return service.retrieve_libro_document(num_libro, str(anio_libro), mode, request=request)
         else:
+            if _async_requested(request):
+                return _queue_job_response(request, 'libro', {'id_libro': id_libro, 'orientation': orientation})
             return service.generate_libro_document(num_libro, str(anio_libro), orientation, mode)
+
+
+class DocumentJobViewSet(ModelViewSet):
+    """
+    Queued document generation jobs.
+    - POST {kind, params}: enqueue (deduplicated per kardex/document), returns 202 with the job.
+    - GET /{id}/: poll status; `result` holds the generated filename/url once done.
+    """
+    queryset = models.DocumentJob.objects.all().order_by('-id')
+    serializer_class = serializers.DocumentJobSerializer
+    pagination_class = pagination.KardexPagination
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        job_status = self.request.query_params.get('status')
+        if job_status:
+            queryset = queryset.filter(status=job_status)
+        kardex = self.request.query_params.get('kardex')
+        if kardex:
+            queryset = queryset.filter(dedup_key=f'kardex:{kardex}')
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        kind = request.data.get('kind')
+        params = request.data.get('params') or {}
+        if not kind:
+            return Response({'error': 'kind is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(params, dict):
+            return Response({'error': 'params must be an object'}, status=status.HTTP_400_BAD_REQUEST)
+
+        usuario = getattr(request.user, 'idusuario', None)
+        try:
+            job, created = enqueue_job(kind, params, usuario)
+        except JobError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = self.get_serializer(job).data
+        data['created'] = created
+        return Response(data, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,114 @@
+from django.dispatch import Signal
+
+from . import models
+from .counting import get_count_cache
+
+'''
+Bulk writes of the acts of a kardex (DetalleActosKardex) and of the acts
+and conditions of each party (Contratantesxacto).
+The referenced tiposdeacto/actocondicion rows are read in one query, the new
+rows are inserted with one bulk_create and removed rows with one DELETE, so a
+kardex with many acts or parties no longer costs a round trip per item.
+bulk_create sends no post_save signals: the list count cache is invalidated
+here instead, and `rows_bulk_created` is sent for other caches to follow.
+'''
+
+# Sent with the model as sender and the inserted rows as `rows`
+rows_bulk_created = Signal()
+
+
+def split_codactos(codactos):
+    """
+    Split a kardex codactos string ('044055077') into its 3-character
+    tipo de acto ids, keeping order and repetitions.
+    """
+    codactos = codactos or ''
+    return [codactos[i:i+3] for i in range(0, len(codactos), 3)]
+
+
+def parse_conditions(condicion):
+    """
+    Parse a party condicion ('044.1/055.2/') or a list of its parts into
+    (idcondicion, item) pairs, skipping empty parts.
+    """
+    parts = condicion.split('/') if isinstance(condicion, str) else condicion
+    conditions = []
+    for part in parts:
+        if part:
+            idcondicion, item = part.split('.')
+            conditions.append((idcondicion, item))
+    return conditions
+
+
+def tipos_de_acto(idtipoactos):
+    """
+    Tiposdeacto rows by idtipoacto for all the given ids, in one query.
+    """
+    return models.Tiposdeacto.objects.in_bulk(set(idtipoactos))
+
+
+def missing(ids, found):
+    return [pk for pk in dict.fromkeys(ids) if pk not in found]
+
+
+def detalle_actos(kardex, idtipkar, idtipoactos, tipos):
+    """
+    Unsaved DetalleActosKardex rows of a kardex, one per id in `idtipoactos`.
+    tipos: the Tiposdeacto rows returned by tipos_de_acto().
+    """
+    return [
+        models.DetalleActosKardex(
+            kardex=kardex,
+            idtipoacto=idtipoacto,
+            actosunat=tipos[idtipoacto].actosunat,
+            actouif=tipos[idtipoacto].actouif,
+            idtipkar=int(idtipkar),
+            desacto=tipos[idtipoacto].desacto,
+        )
+        for idtipoacto in idtipoactos
+    ]
+
+
+def contratantesxacto_rows(kardex, idcontratante, conditions):
+    """
+    Unsaved Contratantesxacto rows of a party for (idcondicion, item) pairs.
+    Raises Actocondicion.DoesNotExist when a condition is unknown.
+    """
+    actos = models.Actocondicion.objects.in_bulk({idcondicion for idcondicion, _ in conditions})
+    not_found = missing([idcondicion for idcondicion, _ in conditions], actos)
+    if not_found:
+        raise models.Actocondicion.DoesNotExist(f"Actocondicion not found: {', '.join(not_found)}")
+
+    rows = []
+    for idcondicion, item in conditions:
+        acto_condicion = actos[idcondicion]
+        rows.append(models.Contratantesxacto(
+            idtipkar=acto_condicion.idtipoacto,
+            kardex=kardex,
+            idtipoacto=acto_condicion.idtipoacto,
+            idcontratante=idcontratante,
+            item=item,
+            idcondicion=idcondicion,
+            parte=acto_condicion.parte,
+            porcentaje='',
+            uif=acto_condicion.uif,
+            formulario=acto_condicion.formulario,
+            monto='',
+            opago='',
+            ofondo='',
+            montop=acto_condicion.montop
+        ))
+    return rows
+
+
+def bulk_insert(model, rows):
+    """
+    Insert unsaved rows with a single INSERT.
+    """
+    if not rows:
+        return []
+    created = model.objects.bulk_create(rows)
+    get_count_cache().invalidate(model)
+    rows_bulk_created.send(sender=model, rows=created)
+    return created
+
@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class NotariaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notaria'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from core.metrics import get_registry
+        from .catalogs import get_catalog_cache
+        from .counting import get_count_cache
+        from .document_lookup import get_document_lookup_cache
+
+        registry = get_registry()
+        registry.register_collector('catalog_cache', 'Catalog snapshot cache counters.',
+                                    lambda: get_catalog_cache().stats)
+        registry.register_collector('count_cache', 'List total cache counters.',
+                                    lambda: get_count_cache().stats)
+        registry.register_collector('document_lookup_cache', 'Document number lookup cache counters.',
+                                    lambda: get_document_lookup_cache().stats)
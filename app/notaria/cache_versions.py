@@ -0,0 +1,62 @@
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F
+
+from . import models
+
+'''
+Cache versions shared by every process.
+The document data, catalog and list count caches keep their data in process
+memory, but the web workers and the document job worker all write and read
+it. Each kind of cached data has a version row in notaria_cache_versions: an
+ORM write bumps it (in the writer's transaction, so a rollback leaves it
+alone), and a reader compares the version it stored with an entry against the
+row, so a write made in one process is seen by the others on their next read
+instead of after the cache TTL.
+A version that cannot be read or bumped (e.g. the table is not migrated yet)
+never blocks the request: readers bypass their cache and writers fall back to
+the TTL.
+'''
+
+
+def read_version(name):
+    """
+    Current version of `name` (0 before its first bump), or None if it
+    cannot be read.
+    """
+    versions = read_versions([name])
+    return None if versions is None else versions[0]
+
+
+def read_versions(names):
+    """
+    Versions of several names in one query, as a tuple in the given order,
+    or None if they cannot be read.
+    """
+    try:
+        # Savepoint: a failed read must not break the caller's transaction
+        with transaction.atomic():
+            versions = dict(models.CacheVersion.objects.filter(name__in=names).values_list('name', 'version'))
+    except DatabaseError as e:
+        print(f"WARNING: Could not read cache versions {', '.join(names)}: {e}")
+        return None
+    return tuple(versions.get(name, 0) for name in names)
+
+
+def bump_version(name):
+    """
+    Orphan every process's cached copy of `name`.
+    """
+    try:
+        with transaction.atomic():
+            updated = models.CacheVersion.objects.filter(name=name).update(version=F('version') + 1)
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                models.CacheVersion.objects.create(name=name, version=1)
+        except IntegrityError:
+            # Another process created it first
+            with transaction.atomic():
+                models.CacheVersion.objects.filter(name=name).update(version=F('version') + 1)
+    except DatabaseError as e:
+        print(f"WARNING: Could not bump cache version {name}: {e}")
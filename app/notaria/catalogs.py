@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from types import MappingProxyType
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import models
+from .cache_versions import bump_version, read_version
+
+'''
+Read-through cache of the catalog tables.
+Tipos de acto, conditions, nationalities, professions, ubigeo, registry
+offices and the kardex/libro types almost never change, yet every screen and
+every generated document used to query them again, often row by row.
+Each catalog is loaded whole into an immutable per-process snapshot (a tuple
+of rows plus lazily built lookup indexes). Writes through the ORM bump the
+catalog's version (see signals.py), shared by the web and job worker
+processes through notaria.cache_versions, which makes the next reader in any
+process load a fresh snapshot. Catalogs are read row by row in serializers,
+so a process re-reads a version at most every CATALOG_VERSION_CHECK_SECONDS
+(0 checks on every read). Changes made by the legacy system are picked up
+after CATALOG_CACHE_TTL seconds.
+Snapshot rows are shared between requests and must be treated as read-only.
+'''
+
+CATALOG_MODELS = (
+    models.Tiposdeacto,
+    models.Actocondicion,
+    models.Nacionalidades,
+    models.Profesiones,
+    models.Cargoprofe,
+    models.Ubigeo,
+    models.Sedesregistrales,
+    models.Tipokar,
+    models.Tipolibro,
+)
+
+
+class CatalogSnapshot:
+    """
+    All the rows of one catalog at one version.
+    """
+
+    def __init__(self, rows, version, expires_at):
+        self.rows = tuple(rows)
+        self.version = version
+        self.expires_at = expires_at
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def memo(self, key, build):
+        """
+        Value derived from this snapshot (an index, a serialized payload),
+        built once per snapshot.
+        """
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._memo:
+                self._memo[key] = build()
+            return self._memo[key]
+
+    def index(self, field):
+        """
+        Read-only {value: row} mapping over a unique field.
+        """
+        return self.memo(('index', field), lambda: MappingProxyType({getattr(row, field): row for row in self.rows}))
+
+    def group(self, field):
+        """
+        Read-only {value: (rows, ...)} mapping over a non-unique field.
+        """
+        def build():
+            groups = {}
+            for row in self.rows:
+                groups.setdefault(getattr(row, field), []).append(row)
+            return MappingProxyType({value: tuple(rows) for value, rows in groups.items()})
+        return self.memo(('group', field), build)
+
+    def get(self, field, value, default=None):
+        return self.index(field).get(value, default)
+
+    def subset(self, field, values):
+        """
+        {value: row} for the given values that exist in the catalog.
+        """
+        index = self.index(field)
+        return {value: index[value] for value in values if value in index}
+
+
+class CatalogCache:
+    """
+    Per-process catalog snapshots with versioned invalidation, keyed by model.
+    """
+
+    def __init__(self, ttl=None, version_check_interval=None):
+        self.ttl = ttl if ttl is not None else int(os.environ.get('CATALOG_CACHE_TTL', 600))
+        if version_check_interval is None:
+            version_check_interval = float(os.environ.get('CATALOG_VERSION_CHECK_SECONDS', 1))
+        self.version_check_interval = version_check_interval
+        self._snapshots = {}
+        self._checked = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'loads': 0}
+
+    def snapshot(self, model):
+        version = self._version(model)
+        with self._lock:
+            snapshot = self._snapshots.get(model)
+            if snapshot is not None and snapshot.version == version and snapshot.expires_at > time.time():
+                self.stats['hits'] += 1
+                return snapshot
+            self.stats['loads'] += 1
+
+        snapshot = CatalogSnapshot(model.objects.all(), version, time.time() + self.ttl)
+        # A write during the load bumped the version: serve it, do not keep it
+        if version is not None and read_version(_version_name(model)) == version:
+            with self._lock:
+                self._snapshots[model] = snapshot
+        return snapshot
+
+    def _version(self, model):
+        """
+        Shared version of a catalog, re-read at most every
+        version_check_interval seconds; None if it cannot be read.
+        """
+        now = time.time()
+        with self._lock:
+            checked = self._checked.get(model)
+            if checked is not None and checked[0] > now:
+                return checked[1]
+        version = read_version(_version_name(model))
+        if version is not None:
+            with self._lock:
+                self._checked[model] = (now + self.version_check_interval, version)
+        return version
+
+    def invalidate(self, model=None):
+        """
+        Drop the snapshot of one catalog in every process (of all catalogs,
+        in this process only, when no model is given).
+        """
+        if model is not None:
+            bump_version(_version_name(model))
+        with self._lock:
+            if model is None:
+                self._snapshots.clear()
+                self._checked.clear()
+                return
+            self._snapshots.pop(model, None)
+            self._checked.pop(model, None)
+
+
+def _version_name(model):
+    return f'catalog:{model._meta.label}'
+
+
+_catalog_cache = CatalogCache()
+
+
+def get_catalog_cache():
+    return _catalog_cache
+
+
+def catalog(model):
+    """
+    Current snapshot of a catalog table.
+    """
+    return _catalog_cache.snapshot(model)
+
+
+def payload_etag(payload):
+    digest = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    return '*' in candidates or any(candidate.removeprefix('W/') == etag for candidate in candidates)
+
+
+class CatalogListMixin:
+    """
+    ViewSet mixin serving `list` from the catalog snapshot, with an ETag
+    (a hash of the payload, the same in every process) and Cache-Control so
+    clients revalidate with If-None-Match and get a 304 when nothing changed.
+    """
+    catalog_max_age = None
+
+    def list(self, request, *args, **kwargs):
+        snapshot = catalog(self.get_queryset().model)
+        serializer_class = self.get_serializer_class()
+
+        def render():
+            data = serializer_class(snapshot.rows, many=True, context=self.get_serializer_context()).data
+            return data, payload_etag(data)
+
+        data, etag = snapshot.memo(('list', serializer_class), render)
+        max_age = self.catalog_max_age
+        if max_age is None:
+            max_age = int(os.environ.get('CATALOG_MAX_AGE', 60))
+        headers = {'ETag': etag, 'Cache-Control': f'private, max-age={max_age}'}
+
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data, headers=headers)
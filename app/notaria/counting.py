@@ -0,0 +1,219 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models.sql import Query
+
+from .cache_versions import bump_version, read_versions
+
+'''
+Row counts for paginated listings.
+An exact COUNT(*) over a table with hundreds of thousands of rows is the
+slowest part of a list request, and the main screens ask for the same
+totals (e.g. all kardex of one idtipkar) over and over.
+Counts are kept in a short-lived per-process cache keyed by the filtered SQL;
+any ORM write to a table the SQL reads (subqueries included, e.g. Cliente2
+and Contratantes under the kardex searches), in any process, invalidates its
+entries through the shared table versions of notaria.cache_versions. Writes
+made outside the ORM (bulk updates, the legacy system) age out after
+COUNT_CACHE_TTL seconds.
+LIST_COUNT_MODE selects how list totals are computed:
+    cached     exact counts through the cache (default)
+    estimated  table statistics for unfiltered lists, cached counts otherwise
+    exact      a COUNT(*) on every request
+'''
+
+def table_row_estimate(model, using='default'):
+    """
+    Row estimate from the table statistics, or None where the backend keeps none.
+    """
+    connection = connections[using]
+    if connection.vendor != 'mysql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def explain_row_estimate(queryset):
+    """
+    Optimizer row estimate for a queryset (MySQL EXPLAIN), or None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'mysql':
+        return None
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN {sql}", params)
+        columns = [column[0].lower() for column in cursor.description]
+        row = cursor.fetchone()
+    if not row or 'rows' not in columns:
+        return None
+    rows = row[columns.index('rows')]
+    return int(rows) if rows is not None else None
+
+
+def query_tables(query):
+    """
+    Every table a query reads: its FROM and joins, plus those of the
+    subqueries in its WHERE, annotations and combined queries.
+    """
+    tables = set()
+    pending = [query]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, Query):
+            tables.add(node.get_meta().db_table)
+            tables.update(join.table_name for join in node.alias_map.values())
+            pending.append(node.where)
+            pending.extend(node.annotations.values())
+            pending.extend(node.combined_queries)
+            continue
+        get_source_expressions = getattr(node, 'get_source_expressions', None)
+        if get_source_expressions is not None:
+            pending.extend(expression for expression in get_source_expressions() if expression is not None)
+    return tuple(sorted(tables))
+
+
+class CountCache:
+    """
+    Bounded TTL cache of COUNT(*) results. Each table has a shared version
+    number, read on every hit; invalidating a model bumps its table's
+    version, which orphans every entry whose SQL reads that table in every
+    process.
+    """
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or int(os.environ.get('COUNT_CACHE_SIZE', 1024))
+        self.ttl = ttl if ttl is not None else int(os.environ.get('COUNT_CACHE_TTL', 30))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def key(queryset):
+        query = queryset.order_by().query
+        sql, params = query.sql_with_params()
+        return query_tables(query), queryset.db, sql, tuple(params)
+
+    @staticmethod
+    def _version(tables):
+        return read_versions([_version_name(table) for table in tables])
+
+    def count(self, queryset):
+        try:
+            key = self.key(queryset)
+            hash(key)
+        except EmptyResultSet:
+            return 0
+        except TypeError:
+            # Unhashable parameters: not worth caching
+            return queryset.count()
+
+        tables = key[0]
+        version = self._version(tables)
+        if version is None:
+            return queryset.count()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time() and entry[1] == version:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[2]
+            self.stats['misses'] += 1
+
+        value = queryset.count()
+        # A write during the COUNT bumped the version: do not store a stale total
+        if self._version(tables) != version:
+            return value
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def discard(self, queryset):
+        """
+        Drop the cached total of one queryset.
+        """
+        try:
+            key = self.key(queryset)
+            hash(key)
+        except (EmptyResultSet, TypeError):
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate(self, model=None):
+        """
+        Orphan the totals reading a model's table in every process (drop
+        all totals of this process when no model is given).
+        """
+        if model is not None:
+            bump_version(_version_name(model._meta.db_table))
+            return
+        with self._lock:
+            self._entries.clear()
+
+
+def _version_name(table):
+    return f'count:{table}'
+
+
+_count_cache = CountCache()
+
+
+def get_count_cache():
+    return _count_cache
+
+
+def estimated_count(queryset):
+    """
+    Statistics-based total for an unfiltered queryset, or None.
+    """
+    if queryset.query.where:
+        return None
+    estimate = table_row_estimate(queryset.model, using=queryset.db)
+    if estimate is None:
+        estimate = explain_row_estimate(queryset)
+    return estimate
+
+
+def list_count(queryset, mode=None):
+    """
+    Total for a paginated listing, per LIST_COUNT_MODE (or `mode`).
+    Plain sequences and queryset stand-ins without a query are counted directly.
+    """
+    if not hasattr(queryset, 'query'):
+        try:
+            return queryset.count()
+        except (AttributeError, TypeError):
+            return len(queryset)
+
+    mode = (mode or os.environ.get('LIST_COUNT_MODE', 'cached')).lower()
+    if mode == 'exact':
+        return queryset.count()
+    if mode == 'estimated':
+        estimate = estimated_count(queryset)
+        if estimate is not None:
+            return estimate
+    return _count_cache.count(queryset)
+
+
+def approximate_count(queryset):
+    """
+    Estimated total for an unfiltered queryset, cached COUNT(*) otherwise.
+    """
+    return list_count(queryset, mode='estimated')
@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.db.models import Q
+
+from . import models
+from .utils import normalize_document_number
+
+'''
+Document-number (DNI/RUC/CE) lookups.
+Every Cliente2 row gets a ClienteDocumentKey with its normalized number, so a
+search can resolve an exact number (or a number typed with separators) from
+an index, try an indexed prefix next, and only then fall back to the old
+`numdoc__icontains` scan. by_dni/by_ruc know the document type and look up
+the type-prefixed `doc_key` first, so a DNI never resolves to another
+client's RUC or passport with the same digits.
+The by_dni/by_ruc actions keep their serialized answers in a small per-process
+LRU: reception looks up the same customers many times a day. Entries expire
+after DOCUMENT_LOOKUP_CACHE_TTL seconds and are dropped on client writes.
+'''
+
+
+# Tipodocumento ids
+DNI = 1
+RUC = 8
+
+
+def document_key(idtipdoc, numdoc):
+    return f'{idtipdoc or 0}:{normalize_document_number(numdoc)}'
+
+
+def index_document(cliente):
+    numdoc = normalize_document_number(cliente.numdoc)
+    if not numdoc:
+        unindex_document(cliente.idcontratante)
+        return
+    models.ClienteDocumentKey.objects.update_or_create(
+        idcontratante=cliente.idcontratante,
+        defaults={
+            'idtipdoc': cliente.idtipdoc,
+            'numdoc': numdoc,
+            'doc_key': document_key(cliente.idtipdoc, numdoc),
+        }
+    )
+
+
+def unindex_document(idcontratante):
+    models.ClienteDocumentKey.objects.filter(idcontratante=idcontratante).delete()
+
+
+def rebuild_document_index(batch_size=2000):
+    """
+    Rebuild cliente2_document_keys from cliente2. Returns the number of rows indexed.
+    """
+    models.ClienteDocumentKey.objects.all().delete()
+    rows = []
+    indexed = 0
+    clientes = models.Cliente2.objects.only('idcontratante', 'idtipdoc', 'numdoc').order_by('idcontratante')
+    for cliente in clientes.iterator(chunk_size=batch_size):
+        numdoc = normalize_document_number(cliente.numdoc)
+        if not numdoc:
+            continue
+        rows.append(models.ClienteDocumentKey(
+            idcontratante=cliente.idcontratante,
+            idtipdoc=cliente.idtipdoc,
+            numdoc=numdoc,
+            doc_key=document_key(cliente.idtipdoc, numdoc),
+        ))
+        indexed += 1
+        if len(rows) >= batch_size:
+            models.ClienteDocumentKey.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    if rows:
+        models.ClienteDocumentKey.objects.bulk_create(rows, ignore_conflicts=True)
+    return indexed
+
+
+def cliente_document_filter(document):
+    """
+    Q on Cliente2 for a document search: exact normalized match if there is
+    one, else an indexed prefix match, else the legacy substring scan.
+    DOCUMENT_SEARCH=scan always uses the substring scan.
+    """
+    if os.environ.get('DOCUMENT_SEARCH', 'index').lower() == 'scan':
+        return Q(numdoc__icontains=document)
+
+    numdoc = normalize_document_number(document)
+    if not numdoc:
+        return Q(numdoc__icontains=document)
+
+    keys = models.ClienteDocumentKey.objects
+    exact = list(keys.filter(numdoc=numdoc).values_list('idcontratante', flat=True))
+    if exact:
+        return Q(idcontratante__in=exact)
+
+    prefix = keys.filter(numdoc__startswith=numdoc)
+    if prefix.exists():
+        return Q(idcontratante__in=prefix.values('idcontratante'))
+
+    return Q(numdoc__icontains=document)
+
+
+class DocumentLookupCache:
+    """
+    Bounded LRU of serialized client lookups keyed by (model label, normalized
+    number). Only hits are cached, so a client registered right after a miss
+    is found on the next lookup.
+    """
+
+    def __init__(self, max_entries=None, ttl=None):
+        self.max_entries = max_entries or int(os.environ.get('DOCUMENT_LOOKUP_CACHE_SIZE', 512))
+        self.ttl = ttl if ttl is not None else int(os.environ.get('DOCUMENT_LOOKUP_CACHE_TTL', 300))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[2]
+
+    def set(self, key, pk, data):
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, pk, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, label=None, pk=None, numdoc=None):
+        """
+        Drop entries of one model row (by pk or by number), or everything when
+        called without arguments.
+        """
+        with self._lock:
+            if label is None:
+                self._entries.clear()
+                return
+            numdoc = normalize_document_number(numdoc) if numdoc else None
+            for key in [
+                key for key, (_, entry_pk, _) in self._entries.items()
+                if key[0] == label and (entry_pk == pk or key[1] == numdoc)
+            ]:
+                del self._entries[key]
+
+
+_lookup_cache = DocumentLookupCache()
+
+
+def get_document_lookup_cache():
+    return _lookup_cache
+
+
+def lookup_by_document(model, numdoc, serializer_class, idtipdoc=None):
+    """
+    Serialized data of the latest `model` row with this document number, or
+    None. With `idtipdoc`, a row of that document type wins (for Cliente2
+    through the indexed `doc_key`); otherwise, or when there is none, exact
+    matches on the stored number come first and for Cliente2 the normalized
+    index also finds numbers typed with separators.
+    """
+    normalized = normalize_document_number(numdoc)
+    key = (model._meta.label, normalized, idtipdoc)
+    data = _lookup_cache.get(key)
+    if data is not None:
+        return data
+
+    instance = None
+    if idtipdoc is not None and normalized:
+        if model is models.Cliente2:
+            ids = models.ClienteDocumentKey.objects.filter(doc_key=document_key(idtipdoc, normalized)).values('idcontratante')
+            instance = model.objects.filter(idcontratante__in=ids).order_by('-pk').first()
+        else:
+            instance = model.objects.filter(numdoc=numdoc, idtipdoc=idtipdoc).order_by('-pk').first()
+    if instance is None:
+        instance = model.objects.filter(numdoc=numdoc).order_by('-pk').first()
+    if instance is None and model is models.Cliente2 and normalized:
+        ids = models.ClienteDocumentKey.objects.filter(numdoc=normalized).values('idcontratante')
+        instance = model.objects.filter(idcontratante__in=ids).order_by('-pk').first()
+    if instance is None:
+        return None
+
+    data = serializer_class(instance).data
+    _lookup_cache.set(key, instance.pk, data)
+    return data
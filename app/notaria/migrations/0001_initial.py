@@ -0,0 +1,1021 @@
+# Generated by Django 5.2.1 on 2026-10-17 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Actocondicion',
+            fields=[
+                ('idcondicion', models.CharField(max_length=3, primary_key=True, serialize=False)),
+                ('idtipoacto', models.CharField(max_length=6)),
+                ('condicion', models.CharField(max_length=100)),
+                ('parte', models.CharField(blank=True, max_length=20, null=True)),
+                ('uif', models.CharField(blank=True, max_length=20, null=True)),
+                ('formulario', models.CharField(blank=True, max_length=20, null=True)),
+                ('montop', models.CharField(blank=True, max_length=20, null=True)),
+                ('totorgante', models.CharField(blank=True, max_length=2, null=True)),
+                ('condicionsisgen', models.CharField(blank=True, max_length=100, null=True)),
+                ('codconsisgen', models.CharField(blank=True, max_length=5, null=True)),
+                ('parte_generacion', models.CharField(blank=True, max_length=1, null=True)),
+            ],
+            options={
+                'db_table': 'actocondicion',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Cargoprofe',
+            fields=[
+                ('idcargoprofe', models.AutoField(primary_key=True, serialize=False)),
+                ('codcargoprofe', models.CharField(max_length=6)),
+                ('descripcrapro', models.CharField(max_length=200)),
+            ],
+            options={
+                'db_table': 'cargoprofe',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CertDomiciliario',
+            fields=[
+                ('id_domiciliario', models.AutoField(primary_key=True, serialize=False)),
+                ('num_certificado', models.CharField(blank=True, max_length=10, null=True)),
+                ('fec_ingreso', models.CharField(blank=True, max_length=20, null=True)),
+                ('num_formu', models.CharField(blank=True, max_length=30, null=True)),
+                ('nombre_solic', models.CharField(blank=True, max_length=500, null=True)),
+                ('tipdoc_solic', models.CharField(blank=True, max_length=20, null=True)),
+                ('numdoc_solic', models.CharField(blank=True, max_length=50, null=True)),
+                ('domic_solic', models.CharField(blank=True, max_length=3000, null=True)),
+                ('motivo_solic', models.CharField(blank=True, max_length=3000, null=True)),
+                ('distrito_solic', models.CharField(blank=True, max_length=50, null=True)),
+                ('texto_cuerpo', models.TextField(blank=True, null=True)),
+                ('justifi_cuerpo', models.TextField(blank=True, null=True)),
+                ('nom_testigo', models.CharField(blank=True, max_length=500, null=True)),
+                ('tdoc_testigo', models.CharField(blank=True, max_length=20, null=True)),
+                ('ndocu_testigo', models.CharField(blank=True, max_length=50, null=True)),
+                ('idestcivil', models.IntegerField(blank=True, null=True)),
+                ('sexo', models.CharField(blank=True, max_length=3, null=True)),
+                ('detprofesionc', models.TextField(blank=True, null=True)),
+                ('profesionc', models.TextField(blank=True, null=True)),
+                ('especificacion', models.CharField(blank=True, max_length=30, null=True)),
+                ('recibo_empresa', models.CharField(blank=True, max_length=200, null=True)),
+                ('fecha_ocupa', models.DateField(blank=True, null=True)),
+                ('declara_ser', models.CharField(blank=True, max_length=200, null=True)),
+                ('propietario', models.CharField(blank=True, max_length=200, null=True)),
+                ('recibido', models.CharField(blank=True, max_length=200, null=True)),
+                ('numero_recibo', models.CharField(blank=True, max_length=60, null=True)),
+                ('mes_facturado', models.CharField(blank=True, max_length=60, null=True)),
+                ('idusuario', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'cert_domiciliario',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Cliente',
+            fields=[
+                ('idcliente', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('tipper', models.CharField(blank=True, max_length=1, null=True)),
+                ('apepat', models.CharField(blank=True, max_length=100, null=True)),
+                ('apemat', models.CharField(blank=True, max_length=100, null=True)),
+                ('prinom', models.CharField(blank=True, max_length=100, null=True)),
+                ('segnom', models.CharField(blank=True, max_length=100, null=True)),
+                ('nombre', models.CharField(blank=True, max_length=1000, null=True)),
+                ('direccion', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=3000, null=True)),
+                ('idtipdoc', models.IntegerField(blank=True, null=True)),
+                ('numdoc', models.CharField(blank=True, max_length=50, null=True)),
+                ('email', models.CharField(blank=True, max_length=300, null=True)),
+                ('telfijo', models.CharField(blank=True, max_length=20, null=True)),
+                ('telcel', models.CharField(blank=True, max_length=20, null=True)),
+                ('telofi', models.CharField(blank=True, max_length=20, null=True)),
+                ('sexo', models.CharField(blank=True, max_length=1, null=True)),
+                ('idestcivil', models.IntegerField(blank=True, null=True)),
+                ('natper', models.CharField(blank=True, max_length=50, null=True)),
+                ('conyuge', models.CharField(blank=True, max_length=10, null=True)),
+                ('nacionalidad', models.CharField(blank=True, max_length=100, null=True)),
+                ('idprofesion', models.IntegerField(blank=True, null=True)),
+                ('detaprofesion', models.CharField(blank=True, max_length=1000, null=True)),
+                ('idcargoprofe', models.IntegerField(blank=True, null=True)),
+                ('profocupa', models.CharField(blank=True, max_length=1000, null=True)),
+                ('dirfer', models.CharField(blank=True, max_length=3000, null=True)),
+                ('idubigeo', models.CharField(blank=True, max_length=6, null=True)),
+                ('cumpclie', models.CharField(blank=True, max_length=15, null=True)),
+                ('fechaing', models.CharField(blank=True, max_length=10, null=True)),
+                ('razonsocial', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=3000, null=True)),
+                ('domfiscal', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=3000, null=True)),
+                ('telempresa', models.CharField(blank=True, max_length=12, null=True)),
+                ('mailempresa', models.CharField(blank=True, max_length=200, null=True)),
+                ('contacempresa', models.CharField(blank=True, max_length=1000, null=True)),
+                ('fechaconstitu', models.CharField(blank=True, max_length=12, null=True)),
+                ('idsedereg', models.IntegerField(blank=True, null=True)),
+                ('numregistro', models.CharField(blank=True, max_length=50, null=True)),
+                ('numpartida', models.CharField(blank=True, max_length=50, null=True)),
+                ('actmunicipal', models.CharField(blank=True, max_length=3000, null=True)),
+                ('tipocli', models.CharField(blank=True, max_length=1, null=True)),
+                ('impeingre', models.CharField(blank=True, max_length=10, null=True)),
+                ('impnumof', models.CharField(blank=True, max_length=50, null=True)),
+                ('impeorigen', models.CharField(blank=True, max_length=3000, null=True)),
+                ('impentidad', models.CharField(blank=True, max_length=3000, null=True)),
+                ('impremite', models.CharField(blank=True, max_length=3000, null=True)),
+                ('impmotivo', models.CharField(blank=True, max_length=3000, null=True)),
+                ('residente', models.CharField(blank=True, max_length=2, null=True)),
+                ('docpaisemi', models.CharField(blank=True, max_length=100, null=True)),
+                ('partidaconyuge', models.CharField(blank=True, max_length=15, null=True)),
+                ('separaciondebienes', models.CharField(blank=True, max_length=1, null=True)),
+                ('idsedeconyuge', models.CharField(blank=True, max_length=11, null=True)),
+                ('numdoc_plantilla', models.CharField(blank=True, max_length=11, null=True)),
+                ('profesion_plantilla', models.CharField(blank=True, max_length=200, null=True)),
+                ('ubigeo_plantilla', models.CharField(blank=True, max_length=100, null=True)),
+            ],
+            options={
+                'db_table': 'cliente',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Cliente2',
+            fields=[
+                ('idcontratante', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('idcliente', models.CharField(max_length=10)),
+                ('tipper', models.CharField(max_length=1)),
+                ('apepat', models.CharField(blank=True, max_length=100, null=True)),
+                ('apemat', models.CharField(blank=True, max_length=100, null=True)),
+                ('prinom', models.CharField(blank=True, max_length=100, null=True)),
+                ('segnom', models.CharField(blank=True, max_length=100, null=True)),
+                ('nombre', models.CharField(blank=True, max_length=1000, null=True)),
+                ('direccion', models.CharField(blank=True, max_length=3000, null=True)),
+                ('idtipdoc', models.IntegerField()),
+                ('numdoc', models.CharField(max_length=50)),
+                ('email', models.CharField(blank=True, max_length=300, null=True)),
+                ('telfijo', models.CharField(blank=True, max_length=20, null=True)),
+                ('telcel', models.CharField(blank=True, max_length=20, null=True)),
+                ('telofi', models.CharField(blank=True, max_length=20, null=True)),
+                ('sexo', models.CharField(blank=True, max_length=1, null=True)),
+                ('idestcivil', models.IntegerField()),
+                ('natper', models.CharField(blank=True, max_length=50, null=True)),
+                ('conyuge', models.CharField(blank=True, max_length=10, null=True)),
+                ('nacionalidad', models.CharField(blank=True, max_length=100, null=True)),
+                ('idprofesion', models.IntegerField(blank=True, null=True)),
+                ('detaprofesion', models.CharField(blank=True, max_length=1000, null=True)),
+                ('idcargoprofe', models.IntegerField(blank=True, null=True)),
+                ('profocupa', models.CharField(blank=True, max_length=1000, null=True)),
+                ('dirfer', models.CharField(blank=True, max_length=300, null=True)),
+                ('idubigeo', models.CharField(max_length=6)),
+                ('cumpclie', models.CharField(max_length=15)),
+                ('fechaing', models.CharField(blank=True, max_length=10, null=True)),
+                ('razonsocial', models.CharField(blank=True, max_length=3000, null=True)),
+                ('domfiscal', models.CharField(blank=True, max_length=3000, null=True)),
+                ('telempresa', models.CharField(blank=True, max_length=12, null=True)),
+                ('mailempresa', models.CharField(blank=True, max_length=200, null=True)),
+                ('contacempresa', models.CharField(blank=True, max_length=3000, null=True)),
+                ('fechaconstitu', models.CharField(blank=True, max_length=12, null=True)),
+                ('idsedereg', models.IntegerField()),
+                ('numregistro', models.CharField(blank=True, max_length=50, null=True)),
+                ('numpartida', models.CharField(blank=True, max_length=50, null=True)),
+                ('actmunicipal', models.CharField(blank=True, max_length=3000, null=True)),
+                ('tipocli', models.CharField(blank=True, max_length=1, null=True)),
+                ('impeingre', models.CharField(blank=True, max_length=10, null=True)),
+                ('impnumof', models.CharField(blank=True, max_length=50, null=True)),
+                ('impeorigen', models.CharField(blank=True, max_length=3000, null=True)),
+                ('impentidad', models.CharField(blank=True, max_length=3000, null=True)),
+                ('impremite', models.CharField(blank=True, max_length=3000, null=True)),
+                ('impmotivo', models.CharField(blank=True, max_length=3000, null=True)),
+                ('residente', models.CharField(max_length=2)),
+                ('docpaisemi', models.CharField(blank=True, max_length=100, null=True)),
+                ('partidaconyuge', models.CharField(blank=True, max_length=15, null=True)),
+                ('separaciondebienes', models.CharField(blank=True, max_length=1, null=True)),
+                ('idsedeconyuge', models.CharField(blank=True, max_length=11, null=True)),
+                ('profesion_plantilla', models.CharField(blank=True, max_length=200, null=True)),
+                ('ubigeo_plantilla', models.CharField(blank=True, max_length=100, null=True)),
+            ],
+            options={
+                'db_table': 'cliente2',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Contratantes',
+            fields=[
+                ('idcontratante', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('idtipkar', models.IntegerField()),
+                ('kardex', models.CharField(blank=True, max_length=30, null=True)),
+                ('condicion', models.CharField(max_length=100)),
+                ('firma', models.CharField(max_length=3)),
+                ('fechafirma', models.CharField(blank=True, max_length=10, null=True)),
+                ('resfirma', models.IntegerField()),
+                ('tiporepresentacion', models.CharField(max_length=2)),
+                ('idcontratanterp', models.CharField(blank=True, max_length=3000, null=True)),
+                ('idsedereg', models.CharField(blank=True, max_length=3, null=True)),
+                ('numpartida', models.CharField(blank=True, max_length=50, null=True)),
+                ('facultades', models.CharField(max_length=500)),
+                ('indice', models.CharField(max_length=3)),
+                ('visita', models.CharField(max_length=3)),
+                ('inscrito', models.CharField(blank=True, max_length=1, null=True)),
+                ('plantilla', models.CharField(blank=True, max_length=3, null=True)),
+            ],
+            options={
+                'db_table': 'contratantes',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Contratantesxacto',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('idtipkar', models.IntegerField()),
+                ('kardex', models.CharField(blank=True, max_length=30, null=True)),
+                ('idtipoacto', models.CharField(max_length=6)),
+                ('idcontratante', models.CharField(max_length=10)),
+                ('item', models.IntegerField()),
+                ('idcondicion', models.CharField(max_length=3)),
+                ('parte', models.CharField(max_length=3)),
+                ('porcentaje', models.CharField(max_length=50)),
+                ('uif', models.CharField(max_length=5)),
+                ('formulario', models.CharField(max_length=2)),
+                ('monto', models.CharField(max_length=100)),
+                ('opago', models.CharField(max_length=2)),
+                ('ofondo', models.CharField(max_length=300)),
+                ('montop', models.CharField(max_length=2)),
+            ],
+            options={
+                'db_table': 'contratantesxacto',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='DetalleActosKardex',
+            fields=[
+                ('item', models.AutoField(primary_key=True, serialize=False)),
+                ('kardex', models.CharField(blank=True, max_length=30, null=True)),
+                ('idtipoacto', models.CharField(max_length=6)),
+                ('actosunat', models.CharField(max_length=3)),
+                ('actouif', models.CharField(max_length=3)),
+                ('idtipkar', models.IntegerField()),
+                ('desacto', models.CharField(max_length=500)),
+            ],
+            options={
+                'db_table': 'detalle_actos_kardex',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Detallebienes',
+            fields=[
+                ('detbien', models.AutoField(primary_key=True, serialize=False)),
+                ('itemmp', models.CharField(max_length=6)),
+                ('kardex', models.CharField(blank=True, max_length=30, null=True)),
+                ('idtipacto', models.CharField(blank=True, max_length=10, null=True)),
+                ('tipob', models.CharField(max_length=100)),
+                ('idtipbien', models.IntegerField()),
+                ('coddis', models.CharField(max_length=6)),
+                ('fechaconst', models.CharField(blank=True, max_length=12, null=True)),
+                ('oespecific', models.CharField(blank=True, max_length=200, null=True)),
+                ('smaquiequipo', models.CharField(blank=True, max_length=200, null=True)),
+                ('tpsm', models.CharField(blank=True, max_length=3, null=True)),
+                ('npsm', models.CharField(blank=True, max_length=200, null=True)),
+                ('pregistral', models.CharField(blank=True, max_length=50, null=True)),
+                ('idsedereg', models.CharField(blank=True, max_length=50, null=True)),
+            ],
+            options={
+                'db_table': 'detallebienes',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Detallemediopago',
+            fields=[
+                ('detmp', models.AutoField(primary_key=True, serialize=False)),
+                ('itemmp', models.CharField(blank=True, max_length=6, null=True)),
+                ('kardex', models.CharField(blank=True, max_length=30, null=True)),
+                ('tipacto', models.CharField(blank=True, max_length=10, null=True)),
+                ('codmepag', models.IntegerField(blank=True, null=True)),
+                ('fpago', models.CharField(blank=True, max_length=10, null=True)),
+                ('idbancos', models.IntegerField(blank=True, null=True)),
+                ('importemp', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('idmon', models.CharField(blank=True, max_length=10, null=True)),
+                ('foperacion', models.CharField(blank=True, max_length=12, null=True)),
+                ('documentos', models.CharField(blank=True, max_length=500, null=True)),
+            ],
+            options={
+                'db_table': 'detallemediopago',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Detallevehicular',
+            fields=[
+                ('detveh', models.AutoField(primary_key=True, serialize=False)),
+                ('kardex', models.CharField(blank=True, max_length=30, null=True)),
+                ('idtipacto', models.CharField(blank=True, max_length=20, null=True)),
+                ('idplaca', models.CharField(max_length=3)),
+                ('numplaca', models.CharField(max_length=50)),
+                ('clase', models.CharField(blank=True, max_length=50, null=True)),
+                ('marca', models.CharField(blank=True, max_length=100, null=True)),
+                ('anofab', models.CharField(blank=True, max_length=30, null=True)),
+                ('modelo', models.CharField(blank=True, max_length=100, null=True)),
+                ('combustible', models.CharField(blank=True, max_length=100, null=True)),
+                ('carroceria', models.CharField(blank=True, max_length=100, null=True)),
+                ('fecinsc', models.CharField(blank=True, max_length=30, null=True)),
+                ('color', models.CharField(blank=True, max_length=100, null=True)),
+                ('motor', models.CharField(blank=True, max_length=100, null=True)),
+                ('numcil', models.CharField(blank=True, max_length=3, null=True)),
+                ('numserie', models.CharField(blank=True, max_length=30, null=True)),
+                ('numrueda', models.CharField(blank=True, max_length=3, null=True)),
+                ('idmon', models.CharField(blank=True, max_length=5, null=True)),
+                ('precio', models.DecimalField(blank=True, decimal_places=2, max_digits=16, null=True)),
+                ('codmepag', models.CharField(blank=True, max_length=4, null=True)),
+                ('pregistral', models.CharField(blank=True, max_length=100, null=True)),
+                ('idsedereg', models.CharField(blank=True, max_length=100, null=True)),
+            ],
+            options={
+                'db_table': 'detallevehicular',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='IngresoCartas',
+            fields=[
+                ('id_carta', models.AutoField(primary_key=True, serialize=False)),
+                ('num_carta', models.CharField(db_collation='utf8_general_ci', max_length=10)),
+                ('fec_ingreso', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=20, null=True)),
+                ('id_remitente', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=20, null=True)),
+                ('nom_remitente', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=800, null=True)),
+                ('dir_remitente', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=3000, null=True)),
+                ('telf_remitente', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=500, null=True)),
+                ('nom_destinatario', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=500, null=True)),
+                ('dir_destinatario', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=3000, null=True)),
+                ('zona_destinatario', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=10, null=True)),
+                ('costo', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=50, null=True)),
+                ('id_encargado', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=800, null=True)),
+                ('des_encargado', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=500, null=True)),
+                ('fec_entrega', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=20, null=True)),
+                ('hora_entrega', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=20, null=True)),
+                ('emple_entrega', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=500, null=True)),
+                ('conte_carta', models.TextField(blank=True, db_collation='utf8_general_ci', null=True)),
+                ('nom_regogio', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=800, null=True)),
+                ('doc_recogio', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=50, null=True)),
+                ('fec_recogio', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=20, null=True)),
+                ('fact_recogio', models.CharField(blank=True, db_collation='utf8_general_ci', max_length=500, null=True)),
+                ('dni_destinatario', models.CharField(blank=True, max_length=30, null=True)),
+                ('recepcion', models.CharField(blank=True, max_length=250, null=True)),
+                ('firmo', models.CharField(blank=True, max_length=2, null=True)),
+            ],
+            options={
+                'db_table': 'ingreso_cartas',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='IngresoPoderes',
+            fields=[
+                ('id_poder', models.AutoField(primary_key=True, serialize=False)),
+                ('num_kardex', models.CharField(blank=True, max_length=30, null=True)),
+                ('nom_recep', models.CharField(blank=True, max_length=1000, null=True)),
+                ('hora_recep', models.CharField(blank=True, max_length=20, null=True)),
+                ('id_asunto', models.CharField(blank=True, max_length=10, null=True)),
+                ('fec_ingreso', models.CharField(blank=True, max_length=30, null=True)),
+                ('referencia', models.CharField(blank=True, max_length=1000, null=True)),
+                ('nom_comuni', models.CharField(blank=True, max_length=500, null=True)),
+                ('telf_comuni', models.CharField(blank=True, max_length=500, null=True)),
+                ('email_comuni', models.CharField(blank=True, max_length=500, null=True)),
+                ('documento', models.CharField(blank=True, max_length=50, null=True)),
+                ('id_respon', models.CharField(blank=True, max_length=30, null=True)),
+                ('des_respon', models.CharField(blank=True, max_length=1000, null=True)),
+                ('doc_presen', models.CharField(blank=True, max_length=50, null=True)),
+                ('fec_ofre', models.CharField(blank=True, max_length=30, null=True)),
+                ('hora_ofre', models.CharField(blank=True, max_length=30, null=True)),
+                ('num_formu', models.CharField(blank=True, max_length=30, null=True)),
+                ('fec_crono', models.CharField(blank=True, max_length=30, null=True)),
+                ('swt_est', models.CharField(blank=True, max_length=5, null=True)),
+            ],
+            options={
+                'db_table': 'ingreso_poderes',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Kardex',
+            fields=[
+                ('idkardex', models.AutoField(primary_key=True, serialize=False)),
+                ('kardex', models.CharField(blank=True, max_length=30, null=True)),
+                ('idtipkar', models.IntegerField()),
+                ('kardexconexo', models.CharField(max_length=8)),
+                ('fechaingreso', models.CharField(max_length=10)),
+                ('horaingreso', models.CharField(max_length=10)),
+                ('referencia', models.CharField(blank=True, max_length=3000, null=True)),
+                ('codactos', models.CharField(max_length=50)),
+                ('contrato', models.CharField(max_length=3000)),
+                ('idusuario', models.IntegerField()),
+                ('responsable', models.IntegerField()),
+                ('observacion', models.CharField(max_length=8000)),
+                ('documentos', models.CharField(max_length=8000)),
+                ('fechacalificado', models.CharField(max_length=10)),
+                ('fechainstrumento', models.CharField(max_length=10)),
+                ('fechaconclusion', models.CharField(max_length=10)),
+                ('numinstrmento', models.CharField(blank=True, max_length=30, null=True)),
+                ('folioini', models.CharField(blank=True, max_length=30, null=True)),
+                ('folioinivta', models.CharField(blank=True, max_length=30, null=True)),
+                ('foliofin', models.CharField(blank=True, max_length=30, null=True)),
+                ('foliofinvta', models.CharField(blank=True, max_length=30, null=True)),
+                ('papelini', models.CharField(blank=True, max_length=30, null=True)),
+                ('papelinivta', models.CharField(blank=True, max_length=30, null=True)),
+                ('papelfin', models.CharField(blank=True, max_length=30, null=True)),
+                ('papelfinvta', models.CharField(blank=True, max_length=30, null=True)),
+                ('comunica1', models.CharField(max_length=3000)),
+                ('contacto', models.CharField(max_length=3000)),
+                ('telecontacto', models.CharField(max_length=50)),
+                ('mailcontacto', models.CharField(max_length=200)),
+                ('retenido', models.IntegerField()),
+                ('desistido', models.IntegerField()),
+                ('autorizado', models.IntegerField()),
+                ('idrecogio', models.IntegerField()),
+                ('pagado', models.IntegerField()),
+                ('visita', models.IntegerField()),
+                ('dregistral', models.CharField(max_length=30)),
+                ('dnotarial', models.CharField(max_length=30)),
+                ('idnotario', models.IntegerField()),
+                ('numminuta', models.CharField(max_length=100)),
+                ('numescritura', models.CharField(blank=True, max_length=100, null=True)),
+                ('fechaescritura', models.CharField(blank=True, max_length=10, null=True)),
+                ('insertos', models.CharField(blank=True, max_length=6000, null=True)),
+                ('direc_contacto', models.CharField(blank=True, max_length=3000, null=True)),
+                ('txa_minuta', models.CharField(blank=True, max_length=30, null=True)),
+                ('idabogado', models.CharField(blank=True, max_length=10, null=True)),
+                ('responsable_new', models.CharField(blank=True, max_length=3000, null=True)),
+                ('fechaminuta', models.CharField(blank=True, max_length=15, null=True)),
+                ('ob_nota', models.CharField(blank=True, max_length=6000, null=True)),
+                ('ins_espec', models.CharField(blank=True, max_length=6000, null=True)),
+                ('recepcion', models.CharField(blank=True, max_length=30, null=True)),
+                ('funcionario_new', models.CharField(blank=True, max_length=3000, null=True)),
+                ('nc', models.CharField(blank=True, max_length=30, null=True)),
+                ('fecha_modificacion', models.CharField(blank=True, max_length=10, null=True)),
+                ('idpresentante', models.IntegerField(blank=True, db_column='idPresentante', null=True)),
+                ('papeltrasladoini', models.CharField(blank=True, db_column='papelTrasladoIni', max_length=30, null=True)),
+                ('papeltrasladofin', models.CharField(blank=True, db_column='papelTrasladoFin', max_length=30, null=True)),
+                ('fktemplate', models.IntegerField(blank=True, db_column='fkTemplate', null=True)),
+                ('estado_sisgen', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'kardex',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Legalizacion',
+            fields=[
+                ('idlegalizacion', models.AutoField(db_column='idLegalizacion', primary_key=True, serialize=False)),
+                ('fechaingreso', models.DateField(db_column='fechaIngreso')),
+                ('direccioncertificado', models.CharField(db_column='direccionCertificado', max_length=250)),
+                ('documento', models.TextField()),
+                ('dni', models.CharField(blank=True, max_length=11, null=True)),
+            ],
+            options={
+                'db_table': 'legalizacion',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Libros',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numlibro', models.CharField(max_length=10)),
+                ('ano', models.CharField(max_length=4)),
+                ('fecing', models.DateField()),
+                ('tipper', models.CharField(blank=True, max_length=1, null=True)),
+                ('apepat', models.CharField(blank=True, max_length=1000, null=True)),
+                ('apemat', models.CharField(blank=True, max_length=1000, null=True)),
+                ('prinom', models.CharField(blank=True, max_length=1000, null=True)),
+                ('segnom', models.CharField(blank=True, max_length=1000, null=True)),
+                ('ruc', models.CharField(blank=True, max_length=11, null=True)),
+                ('domicilio', models.CharField(blank=True, max_length=2000, null=True)),
+                ('coddis', models.CharField(blank=True, max_length=6, null=True)),
+                ('empresa', models.CharField(blank=True, max_length=5000, null=True)),
+                ('domfiscal', models.CharField(blank=True, max_length=3000, null=True)),
+                ('idtiplib', models.IntegerField(blank=True, null=True)),
+                ('descritiplib', models.CharField(blank=True, max_length=3000, null=True)),
+                ('idlegal', models.IntegerField(blank=True, null=True)),
+                ('folio', models.CharField(blank=True, max_length=20, null=True)),
+                ('idtipfol', models.IntegerField(blank=True, null=True)),
+                ('detalle', models.CharField(blank=True, max_length=3000, null=True)),
+                ('idnotario', models.IntegerField(blank=True, null=True)),
+                ('solicitante', models.CharField(blank=True, max_length=3000, null=True)),
+                ('comentario', models.CharField(blank=True, max_length=3000, null=True)),
+                ('feclegal', models.CharField(blank=True, max_length=12, null=True)),
+                ('comentario2', models.CharField(blank=True, max_length=3000, null=True)),
+                ('dni', models.CharField(blank=True, max_length=11, null=True)),
+                ('idusuario', models.IntegerField(blank=True, null=True)),
+                ('idnlibro', models.IntegerField(blank=True, null=True)),
+                ('codclie', models.CharField(blank=True, max_length=10, null=True)),
+                ('flag', models.IntegerField(blank=True, null=True)),
+                ('numdoc_plantilla', models.CharField(blank=True, max_length=11, null=True)),
+                ('estadosisgen', models.IntegerField(blank=True, db_column='estadoSisgen', null=True)),
+            ],
+            options={
+                'db_table': 'libros',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Nacionalidades',
+            fields=[
+                ('idnacionalidad', models.AutoField(primary_key=True, serialize=False)),
+                ('codnacion', models.CharField(blank=True, max_length=10, null=True)),
+                ('desnacionalidad', models.CharField(max_length=200)),
+                ('descripcion', models.CharField(blank=True, max_length=500, null=True)),
+            ],
+            options={
+                'db_table': 'nacionalidades',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Nlibro',
+            fields=[
+                ('idnlibro', models.AutoField(primary_key=True, serialize=False)),
+                ('desnlibro', models.CharField(max_length=300)),
+                ('numlibro', models.CharField(blank=True, max_length=3, null=True)),
+            ],
+            options={
+                'db_table': 'nlibro',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Patrimonial',
+            fields=[
+                ('itemmp', models.CharField(max_length=6, primary_key=True, serialize=False)),
+                ('kardex', models.CharField(blank=True, max_length=30, null=True)),
+                ('idtipoacto', models.CharField(max_length=6)),
+                ('nminuta', models.CharField(max_length=30)),
+                ('idmon', models.IntegerField()),
+                ('tipocambio', models.CharField(blank=True, max_length=10, null=True)),
+                ('importetrans', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('exhibiomp', models.CharField(max_length=2)),
+                ('presgistral', models.CharField(blank=True, max_length=50, null=True)),
+                ('nregistral', models.CharField(blank=True, max_length=50, null=True)),
+                ('idsedereg', models.CharField(max_length=3)),
+                ('fpago', models.CharField(max_length=3)),
+                ('idoppago', models.CharField(max_length=5)),
+                ('ofondos', models.CharField(blank=True, max_length=150, null=True)),
+                ('item', models.IntegerField()),
+                ('des_idoppago', models.CharField(blank=True, max_length=50, null=True)),
+            ],
+            options={
+                'db_table': 'patrimonial',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PermisosUsuarios',
+            fields=[
+                ('idusuario', models.CharField(max_length=9, primary_key=True, serialize=False)),
+                ('kardex', models.CharField(blank=True, max_length=30, null=True)),
+                ('newkar', models.CharField(blank=True, max_length=1, null=True)),
+                ('editkar', models.CharField(blank=True, max_length=1, null=True)),
+                ('protesto', models.CharField(blank=True, max_length=1, null=True)),
+                ('newprot', models.CharField(blank=True, max_length=1, null=True)),
+                ('editprot', models.CharField(blank=True, max_length=1, null=True)),
+                ('pviaje', models.CharField(blank=True, max_length=1, null=True)),
+                ('newvia', models.CharField(blank=True, max_length=1, null=True)),
+                ('editvia', models.CharField(blank=True, max_length=1, null=True)),
+                ('poder', models.CharField(blank=True, max_length=1, null=True)),
+                ('newpod', models.CharField(blank=True, max_length=1, null=True)),
+                ('editpod', models.CharField(blank=True, max_length=1, null=True)),
+                ('cartas', models.CharField(blank=True, max_length=1, null=True)),
+                ('newcar', models.CharField(blank=True, max_length=1, null=True)),
+                ('editcar', models.CharField(blank=True, max_length=1, null=True)),
+                ('libros', models.CharField(blank=True, max_length=1, null=True)),
+                ('newlib', models.CharField(blank=True, max_length=1, null=True)),
+                ('editlib', models.CharField(blank=True, max_length=1, null=True)),
+                ('capaz', models.CharField(blank=True, max_length=1, null=True)),
+                ('newcap', models.CharField(blank=True, max_length=1, null=True)),
+                ('editcap', models.CharField(blank=True, max_length=1, null=True)),
+                ('incapaz', models.CharField(blank=True, max_length=1, null=True)),
+                ('newinca', models.CharField(blank=True, max_length=1, null=True)),
+                ('editinca', models.CharField(blank=True, max_length=1, null=True)),
+                ('domiciliario', models.CharField(blank=True, max_length=1, null=True)),
+                ('newdom', models.CharField(blank=True, max_length=1, null=True)),
+                ('editdom', models.CharField(blank=True, max_length=1, null=True)),
+                ('caracteristicas', models.CharField(blank=True, max_length=1, null=True)),
+                ('newcarac', models.CharField(blank=True, max_length=1, null=True)),
+                ('editcarac', models.CharField(blank=True, max_length=1, null=True)),
+                ('indicronoep', models.CharField(blank=True, max_length=1, null=True)),
+                ('indicrononc', models.CharField(blank=True, max_length=1, null=True)),
+                ('indicronotv', models.CharField(blank=True, max_length=1, null=True)),
+                ('indicronogm', models.CharField(blank=True, max_length=1, null=True)),
+                ('indicronotest', models.CharField(blank=True, max_length=1, null=True)),
+                ('indicronoprot', models.CharField(blank=True, max_length=1, null=True)),
+                ('infocamacome', models.CharField(blank=True, max_length=1, null=True)),
+                ('indicronocar', models.CharField(blank=True, max_length=1, null=True)),
+                ('indicronolib', models.CharField(blank=True, max_length=1, null=True)),
+                ('indicronovia', models.CharField(blank=True, max_length=1, null=True)),
+                ('indicronopod', models.CharField(blank=True, max_length=1, null=True)),
+                ('indicronocapaz', models.CharField(blank=True, max_length=1, null=True)),
+                ('indicronoincapaz', models.CharField(blank=True, max_length=1, null=True)),
+                ('alfaep', models.CharField(blank=True, max_length=1, null=True)),
+                ('alfagm', models.CharField(blank=True, max_length=1, null=True)),
+                ('alfanc', models.CharField(blank=True, max_length=1, null=True)),
+                ('alfatv', models.CharField(blank=True, max_length=1, null=True)),
+                ('alfatesta', models.CharField(blank=True, max_length=1, null=True)),
+                ('pdtep', models.CharField(blank=True, max_length=1, null=True)),
+                ('pdtgm', models.CharField(blank=True, max_length=1, null=True)),
+                ('pdtveh', models.CharField(blank=True, max_length=1, null=True)),
+                ('pdtlib', models.CharField(blank=True, max_length=1, null=True)),
+                ('ro', models.CharField(blank=True, max_length=1, null=True)),
+                ('reportuif', models.CharField(blank=True, max_length=1, null=True)),
+                ('reportpendfirma', models.CharField(blank=True, max_length=1, null=True)),
+                ('emicompro', models.CharField(blank=True, max_length=1, null=True)),
+                ('anucompro', models.CharField(blank=True, max_length=1, null=True)),
+                ('cancelcompro', models.CharField(blank=True, max_length=1, null=True)),
+                ('reportcomproemi', models.CharField(blank=True, max_length=1, null=True)),
+                ('pendpago', models.CharField(blank=True, max_length=1, null=True)),
+                ('cancelados', models.CharField(blank=True, max_length=1, null=True)),
+                ('manteusu', models.CharField(blank=True, max_length=1, null=True)),
+                ('permiusu', models.CharField(blank=True, max_length=1, null=True)),
+                ('tipoacto', models.CharField(blank=True, max_length=1, null=True)),
+                ('mantecondi', models.CharField(blank=True, max_length=1, null=True)),
+                ('manteclie', models.CharField(blank=True, max_length=1, null=True)),
+                ('manteimpe', models.CharField(blank=True, max_length=1, null=True)),
+                ('sellocartas', models.CharField(blank=True, max_length=1, null=True)),
+                ('helpprot', models.CharField(blank=True, max_length=1, null=True)),
+                ('contpod', models.CharField(blank=True, max_length=1, null=True)),
+                ('manteservi', models.CharField(blank=True, max_length=1, null=True)),
+                ('asignaregis', models.CharField(blank=True, max_length=1, null=True)),
+                ('tipo_cambio', models.CharField(blank=True, max_length=1, null=True)),
+                ('seriescaja', models.CharField(blank=True, max_length=1, null=True)),
+                ('datonot', models.CharField(blank=True, max_length=1, null=True)),
+                ('editdatonot', models.CharField(blank=True, max_length=1, null=True)),
+                ('regserver', models.CharField(blank=True, max_length=1, null=True)),
+                ('editserver', models.CharField(blank=True, max_length=1, null=True)),
+                ('mant_abogado', models.CharField(blank=True, max_length=1, null=True)),
+                ('backup', models.CharField(blank=True, max_length=1, null=True)),
+                ('egreso', models.CharField(blank=True, max_length=1, null=True)),
+                ('sisgen', models.CharField(blank=True, max_length=1, null=True)),
+                ('userresponsable', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'permisos_usuarios',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PermiViaje',
+            fields=[
+                ('id_viaje', models.AutoField(primary_key=True, serialize=False)),
+                ('num_kardex', models.CharField(blank=True, max_length=30, null=True)),
+                ('asunto', models.CharField(blank=True, max_length=1000, null=True)),
+                ('fec_ingreso', models.DateField(blank=True, null=True)),
+                ('nom_recep', models.CharField(blank=True, max_length=1000, null=True)),
+                ('hora_recep', models.CharField(blank=True, max_length=30, null=True)),
+                ('referencia', models.CharField(blank=True, max_length=3000, null=True)),
+                ('nom_comu', models.CharField(blank=True, max_length=500, null=True)),
+                ('tel_comu', models.CharField(blank=True, max_length=500, null=True)),
+                ('email_comu', models.CharField(blank=True, max_length=500, null=True)),
+                ('documento', models.CharField(blank=True, max_length=500, null=True)),
+                ('num_crono', models.CharField(blank=True, max_length=50, null=True)),
+                ('fecha_crono', models.DateField(blank=True, null=True)),
+                ('num_formu', models.CharField(blank=True, max_length=30, null=True)),
+                ('lugar_formu', models.CharField(blank=True, max_length=3000, null=True)),
+                ('observacion', models.TextField(blank=True, null=True)),
+                ('swt_est', models.CharField(blank=True, max_length=5, null=True)),
+                ('partida_e', models.CharField(blank=True, max_length=200, null=True)),
+                ('sede_regis', models.CharField(blank=True, max_length=200, null=True)),
+                ('qr', models.IntegerField(blank=True, null=True)),
+                ('via', models.CharField(blank=True, max_length=60, null=True)),
+                ('fecha_desde', models.DateField(blank=True, null=True)),
+                ('fecha_hasta', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'permi_viaje',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PoderesContratantes',
+            fields=[
+                ('id_poder', models.IntegerField(blank=True, null=True)),
+                ('id_contrata', models.AutoField(primary_key=True, serialize=False)),
+                ('c_codcontrat', models.CharField(blank=True, max_length=30, null=True)),
+                ('c_descontrat', models.CharField(blank=True, max_length=200, null=True)),
+                ('c_fircontrat', models.CharField(blank=True, max_length=30, null=True)),
+                ('c_condicontrat', models.CharField(blank=True, max_length=30, null=True)),
+                ('codi_asegurado', models.CharField(blank=True, max_length=30, null=True)),
+                ('codi_testigo', models.CharField(blank=True, max_length=30, null=True)),
+                ('tip_incapacidad', models.CharField(blank=True, max_length=30, null=True)),
+            ],
+            options={
+                'db_table': 'poderes_contratantes',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PoderesFuerareg',
+            fields=[
+                ('id_poder', models.IntegerField(blank=True, null=True)),
+                ('id_fuerareg', models.AutoField(primary_key=True, serialize=False)),
+                ('id_tipo', models.CharField(blank=True, max_length=10, null=True)),
+                ('f_fecha', models.CharField(blank=True, max_length=20, null=True)),
+                ('f_plazopoder', models.CharField(blank=True, max_length=100, null=True)),
+                ('f_fecotor', models.CharField(blank=True, max_length=100, null=True)),
+                ('f_fecvcto', models.CharField(blank=True, max_length=100, null=True)),
+                ('f_solicita', models.TextField(blank=True, null=True)),
+                ('f_observ', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'poderes_fuerareg',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PoderesPension',
+            fields=[
+                ('id_poder', models.IntegerField(blank=True, null=True)),
+                ('id_pension', models.AutoField(primary_key=True, serialize=False)),
+                ('p_crono', models.CharField(blank=True, max_length=50, null=True)),
+                ('p_fecha', models.CharField(blank=True, max_length=30, null=True)),
+                ('p_numformu', models.CharField(blank=True, max_length=30, null=True)),
+                ('p_domicilio', models.CharField(blank=True, max_length=500, null=True)),
+                ('p_pension', models.CharField(blank=True, max_length=500, null=True)),
+                ('p_mespension', models.CharField(blank=True, max_length=500, null=True)),
+                ('p_anopension', models.CharField(blank=True, max_length=500, null=True)),
+                ('p_plazopoder', models.CharField(blank=True, max_length=500, null=True)),
+                ('p_fecotor', models.CharField(blank=True, max_length=30, null=True)),
+                ('p_fecvcto', models.CharField(blank=True, max_length=30, null=True)),
+                ('p_presauto', models.CharField(blank=True, max_length=1000, null=True)),
+                ('p_observ', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'poderes_pension',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Predios',
+            fields=[
+                ('id_predio', models.AutoField(primary_key=True, serialize=False)),
+                ('tipo', models.CharField(max_length=20)),
+                ('tipo_zona', models.CharField(blank=True, max_length=6, null=True)),
+                ('zona', models.CharField(blank=True, max_length=200, null=True)),
+                ('denominacion', models.CharField(blank=True, max_length=200, null=True)),
+                ('tipo_via', models.CharField(blank=True, max_length=60, null=True)),
+                ('nombre_via', models.CharField(blank=True, max_length=60, null=True)),
+                ('numero', models.CharField(blank=True, max_length=10, null=True)),
+                ('manzana', models.CharField(blank=True, max_length=10, null=True)),
+                ('lote', models.CharField(blank=True, max_length=10, null=True)),
+                ('kardex', models.CharField(blank=True, max_length=20, null=True)),
+                ('fecha_registro', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'predios',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Profesiones',
+            fields=[
+                ('idprofesion', models.AutoField(primary_key=True, serialize=False)),
+                ('codprof', models.CharField(max_length=3)),
+                ('desprofesion', models.CharField(max_length=200)),
+            ],
+            options={
+                'db_table': 'profesiones',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Representantes',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('idcontratante', models.CharField(blank=True, max_length=15, null=True)),
+                ('kardex', models.CharField(blank=True, max_length=15, null=True)),
+                ('idtipoacto', models.CharField(blank=True, max_length=15, null=True)),
+                ('facultades', models.CharField(blank=True, max_length=150, null=True)),
+                ('inscrito', models.CharField(blank=True, max_length=50, null=True)),
+                ('sede_registral', models.CharField(blank=True, max_length=15, null=True)),
+                ('partida', models.CharField(blank=True, max_length=50, null=True)),
+                ('idcontratante_r', models.CharField(blank=True, max_length=15, null=True)),
+                ('id_ro_repre', models.CharField(blank=True, max_length=50, null=True)),
+                ('ido', models.CharField(blank=True, db_column='idO', max_length=5, null=True)),
+                ('odb', models.CharField(blank=True, db_column='odB', max_length=5, null=True)),
+            ],
+            options={
+                'db_table': 'representantes',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Sedesregistrales',
+            fields=[
+                ('idsedereg', models.CharField(max_length=3, primary_key=True, serialize=False)),
+                ('dessede', models.CharField(max_length=50)),
+                ('num_zona', models.CharField(blank=True, max_length=10, null=True)),
+                ('zona_depar', models.CharField(blank=True, max_length=50, null=True)),
+            ],
+            options={
+                'db_table': 'sedesregistrales',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TbAbogado',
+            fields=[
+                ('idabogado', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('razonsocial', models.CharField(blank=True, max_length=1000, null=True)),
+                ('direccion', models.CharField(blank=True, max_length=3000, null=True)),
+                ('distrito', models.CharField(blank=True, max_length=3000, null=True)),
+                ('documento', models.CharField(blank=True, max_length=11, null=True)),
+                ('telefono', models.CharField(blank=True, max_length=100, null=True)),
+                ('matricula', models.CharField(blank=True, max_length=50, null=True)),
+                ('fax', models.CharField(blank=True, max_length=100, null=True)),
+                ('sede_colegio', models.CharField(blank=True, max_length=1000, null=True)),
+            ],
+            options={
+                'db_table': 'tb_abogado',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Tipodocumento',
+            fields=[
+                ('idtipdoc', models.AutoField(primary_key=True, serialize=False)),
+                ('codtipdoc', models.CharField(max_length=3)),
+                ('destipdoc', models.CharField(max_length=50)),
+                ('td_abrev', models.CharField(blank=True, max_length=10, null=True)),
+                ('sunat', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'tipodocumento',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Tipoestacivil',
+            fields=[
+                ('idestcivil', models.AutoField(primary_key=True, serialize=False)),
+                ('codestcivil', models.CharField(max_length=2)),
+                ('desestcivil', models.CharField(max_length=50)),
+            ],
+            options={
+                'db_table': 'tipoestacivil',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Tipofolio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idtipfol', models.IntegerField()),
+                ('destipfol', models.CharField(max_length=50)),
+            ],
+            options={
+                'db_table': 'tipofolio',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Tipokar',
+            fields=[
+                ('idtipkar', models.IntegerField(primary_key=True, serialize=False)),
+                ('nomtipkar', models.CharField(max_length=50)),
+                ('tipkar', models.CharField(max_length=1)),
+            ],
+            options={
+                'db_table': 'tipokar',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Tipolibro',
+            fields=[
+                ('idtiplib', models.IntegerField(primary_key=True, serialize=False)),
+                ('coddlib', models.CharField(max_length=2)),
+                ('destiplib', models.CharField(max_length=50)),
+            ],
+            options={
+                'db_table': 'tipolibro',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Tiposdeacto',
+            fields=[
+                ('idtipoacto', models.CharField(max_length=6, primary_key=True, serialize=False)),
+                ('actosunat', models.CharField(blank=True, max_length=25, null=True)),
+                ('actouif', models.CharField(blank=True, max_length=25, null=True)),
+                ('idtipkar', models.IntegerField()),
+                ('desacto', models.CharField(max_length=300)),
+                ('umbral', models.IntegerField(blank=True, null=True)),
+                ('impuestos', models.IntegerField(blank=True, null=True)),
+                ('idcalnot', models.IntegerField(blank=True, null=True)),
+                ('idecalreg', models.IntegerField(blank=True, null=True)),
+                ('idmodelo', models.IntegerField(blank=True, null=True)),
+                ('rol_part', models.CharField(blank=True, max_length=10, null=True)),
+                ('cod_ancert', models.CharField(blank=True, max_length=5, null=True)),
+                ('tipoplantilla_default', models.CharField(blank=True, max_length=1, null=True)),
+            ],
+            options={
+                'db_table': 'tiposdeacto',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TplTemplate',
+            fields=[
+                ('pktemplate', models.AutoField(db_column='pkTemplate', primary_key=True, serialize=False)),
+                ('nametemplate', models.CharField(blank=True, db_column='nameTemplate', max_length=250, null=True)),
+                ('fktypekardex', models.IntegerField(blank=True, db_column='fkTypeKardex', null=True)),
+                ('codeacts', models.CharField(blank=True, db_column='codeActs', max_length=50, null=True)),
+                ('contract', models.CharField(blank=True, max_length=3000, null=True)),
+                ('urltemplate', models.CharField(blank=True, db_column='urlTemplate', max_length=250, null=True)),
+                ('filename', models.CharField(blank=True, db_column='fileName', max_length=250, null=True)),
+                ('registrationdate', models.DateTimeField(blank=True, db_column='registrationDate', null=True)),
+                ('statusregister', models.IntegerField(blank=True, db_column='statusRegister', null=True)),
+            ],
+            options={
+                'db_table': 'tpl_template',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Ubigeo',
+            fields=[
+                ('coddis', models.CharField(db_collation='latin1_swedish_ci', max_length=6, primary_key=True, serialize=False)),
+                ('nomdis', models.CharField(db_collation='latin1_swedish_ci', max_length=50)),
+                ('nomprov', models.CharField(db_collation='latin1_swedish_ci', max_length=50)),
+                ('nomdpto', models.CharField(db_collation='latin1_swedish_ci', max_length=50)),
+                ('coddist', models.CharField(db_collation='latin1_swedish_ci', max_length=2)),
+                ('codprov', models.CharField(db_collation='latin1_swedish_ci', max_length=2)),
+                ('codpto', models.CharField(db_collation='latin1_swedish_ci', max_length=2)),
+            ],
+            options={
+                'db_table': 'ubigeo',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Usuarios',
+            fields=[
+                ('idusuario', models.AutoField(primary_key=True, serialize=False)),
+                ('loginusuario', models.CharField(max_length=50)),
+                ('password', models.CharField(max_length=50)),
+                ('apepat', models.CharField(max_length=100)),
+                ('apemat', models.CharField(max_length=100)),
+                ('prinom', models.CharField(max_length=100)),
+                ('segnom', models.CharField(max_length=100)),
+                ('fecnac', models.CharField(max_length=10)),
+                ('estado', models.IntegerField()),
+                ('domicilio', models.CharField(max_length=100)),
+                ('idubigeo', models.IntegerField()),
+                ('telefono', models.CharField(max_length=30)),
+                ('idcargo', models.IntegerField()),
+                ('dni', models.CharField(blank=True, max_length=8, null=True)),
+            ],
+            options={
+                'db_table': 'usuarios',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ViajeContratantes',
+            fields=[
+                ('id_viaje', models.IntegerField(blank=True, null=True)),
+                ('id_contratante', models.AutoField(primary_key=True, serialize=False)),
+                ('c_codcontrat', models.CharField(blank=True, max_length=30, null=True)),
+                ('c_descontrat', models.CharField(blank=True, max_length=2000, null=True)),
+                ('c_fircontrat', models.CharField(blank=True, max_length=20, null=True)),
+                ('c_condicontrat', models.CharField(blank=True, max_length=30, null=True)),
+                ('edad', models.CharField(blank=True, max_length=10, null=True)),
+                ('condi_edad', models.CharField(blank=True, max_length=10, null=True)),
+                ('codi_testigo', models.CharField(blank=True, max_length=2000, null=True)),
+                ('tip_incapacidad', models.CharField(blank=True, max_length=2000, null=True)),
+                ('codi_podera', models.CharField(blank=True, max_length=100, null=True)),
+                ('partida_e', models.CharField(blank=True, max_length=2000, null=True)),
+                ('sede_regis', models.CharField(blank=True, max_length=2000, null=True)),
+            ],
+            options={
+                'db_table': 'viaje_contratantes',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ClienteNameToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idcontratante', models.CharField(db_index=True, max_length=10)),
+                ('token', models.CharField(max_length=100)),
+            ],
+            options={
+                'db_table': 'cliente2_name_tokens',
+                'constraints': [models.UniqueConstraint(fields=('token', 'idcontratante'), name='cliente2_name_token_unique')],
+            },
+        ),
+    ]
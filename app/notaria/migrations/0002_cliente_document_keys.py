@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-17 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notaria', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClienteDocumentKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idcontratante', models.CharField(max_length=10, unique=True)),
+                ('idtipdoc', models.IntegerField(blank=True, null=True)),
+                ('numdoc', models.CharField(db_index=True, max_length=50)),
+                ('doc_key', models.CharField(db_index=True, max_length=60)),
+            ],
+            options={
+                'db_table': 'cliente2_document_keys',
+            },
+        ),
+    ]
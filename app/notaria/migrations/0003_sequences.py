@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-17 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notaria', '0002_cliente_document_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('series', models.CharField(max_length=60)),
+                ('period', models.CharField(blank=True, default='', max_length=10)),
+                ('last_value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'notaria_sequences',
+                'constraints': [models.UniqueConstraint(fields=('series', 'period'), name='notaria_sequence_unique')],
+            },
+        ),
+    ]
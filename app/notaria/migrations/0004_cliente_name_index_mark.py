@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-17 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notaria', '0003_sequences'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClienteNameIndexMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('high_water', models.CharField(max_length=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'cliente2_name_index_mark',
+            },
+        ),
+    ]
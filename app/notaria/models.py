@@ -410,6 +410,85 @@ class Cliente2(models.Model):
         db_table = 'cliente2'
 
 
+class ClienteNameToken(models.Model):
+    """
+    Inverted index over Cliente2 names, maintained by notaria.search.
+    One row per normalized name token (see utils.search_tokens) and client.
+    """
+
+    idcontratante = models.CharField(max_length=10, db_index=True)
+    token = models.CharField(max_length=100)
+
+    class Meta:
+        db_table = 'cliente2_name_tokens'
+        constraints = [
+            models.UniqueConstraint(fields=['token', 'idcontratante'], name='cliente2_name_token_unique'),
+        ]
+
+
+class ClienteNameIndexMark(models.Model):
+    """
+    High-water mark of the name index: every Cliente2 row with an
+    idcontratante up to `high_water` was indexed by a rebuild or catch-up.
+    Rows above it may have been written by the legacy system, which does not
+    go through the ORM signals.
+    """
+
+    high_water = models.CharField(max_length=10)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'cliente2_name_index_mark'
+
+
+class ClienteDocumentKey(models.Model):
+    """
+    Normalized document number of each Cliente2 row, maintained by
+    notaria.document_lookup. `doc_key` is the type-prefixed form ('1:40123456').
+    """
+
+    idcontratante = models.CharField(max_length=10, unique=True)
+    idtipdoc = models.IntegerField(blank=True, null=True)
+    numdoc = models.CharField(max_length=50, db_index=True)
+    doc_key = models.CharField(max_length=60, db_index=True)
+
+    class Meta:
+        db_table = 'cliente2_document_keys'
+
+
+class Sequence(models.Model):
+    """
+    Last value handed out for a correlative series (e.g. num_carta) in a
+    period (a year, or '' for series that never reset). Allocated by
+    notaria.sequences under a row lock.
+    """
+
+    series = models.CharField(max_length=60)
+    period = models.CharField(max_length=10, blank=True, default='')
+    last_value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'notaria_sequences'
+        constraints = [
+            models.UniqueConstraint(fields=['series', 'period'], name='notaria_sequence_unique'),
+        ]
+
+
+class CacheVersion(models.Model):
+    """
+    Version of one kind of data kept in process memory (the placeholder data
+    of a kardex, a catalog table), shared by the web and job worker
+    processes. Bumped by notaria.cache_versions on every ORM write.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'notaria_cache_versions'
+
+
 class Tiposdeacto(models.Model):
     idtipoacto = models.CharField(primary_key=True, max_length=6)
     actosunat = models.CharField(max_length=25, blank=True, null=True)
@@ -0,0 +1,129 @@
+from collections import defaultdict
+
+from django.db.models import Sum
+from rest_framework.exceptions import NotFound
+
+from . import models
+from .counting import get_count_cache
+from .document_lookup import cliente_document_filter
+from .search import cliente_name_filter
+
+'''
+Page enrichment for Kardex and Patrimonial listings.
+KardexSerializer needs the user, contratantes and clientes of every kardex it
+renders, PatrimonialSerializer the payment totals of every patrimonial. These
+helpers load them for the current page only, with one query per related
+table, instead of for the whole matching queryset or once per row.
+'''
+
+
+def paginate_once(view, request, queryset):
+    """
+    Paginate a queryset with a single COUNT query.
+    Returns (page, total); page is None when nothing matches, so callers
+    do not need a separate exists() round trip. A zero total is confirmed
+    with exists(), since a cached count may predate a write the cache has
+    not seen (another process, the legacy system).
+
+    With a `cursor` parameter on a keyset-ordered queryset no COUNT runs:
+    the page is None only when the first page is empty, and total is the
+    estimate requested with `with_count` (None otherwise).
+    """
+    paginator = view.paginator
+    try:
+        page = paginator.paginate_queryset(queryset, request, view=view)
+    except NotFound:
+        # Out-of-range page: an empty result keeps its legacy empty answer
+        if not queryset.exists():
+            return None, 0
+        raise
+    if getattr(paginator, 'keyset', None) is not None:
+        first_page = not request.query_params.get(paginator.cursor_query_param)
+        return (None if first_page and not page else page), paginator.estimated_count
+    total = paginator.page.paginator.count
+    if not total:
+        if not queryset.exists():
+            return None, 0
+        # Stale zero: count again
+        get_count_cache().discard(queryset)
+        page = paginator.paginate_queryset(queryset, request, view=view)
+        total = paginator.page.paginator.count
+    return page, total
+
+
+def kardex_page_context(kardex_page, cliente_filter=None):
+    """
+    Serializer context (usuarios_map, contratantes_map, clientes_map) for
+    the kardex on one page. With cliente_filter (a Q on Cliente2), only the
+    matching parties are listed, as in the search actions.
+    """
+    kardex_page = list(kardex_page or [])
+    user_ids = {obj.idusuario for obj in kardex_page if obj.idusuario is not None}
+    kardex_ids = {obj.kardex for obj in kardex_page if obj.kardex}
+
+    usuarios_map = {
+        u.idusuario: u
+        for u in models.Usuarios.objects.filter(idusuario__in=user_ids)
+    } if user_ids else {}
+
+    contratantes = list(models.Contratantes.objects.filter(
+        kardex__in=kardex_ids
+    ).values('idcontratante', 'kardex')) if kardex_ids else []
+
+    clientes_map = {}
+    contratante_ids = {c['idcontratante'] for c in contratantes}
+    if contratante_ids:
+        clientes = models.Cliente2.objects.filter(idcontratante__in=contratante_ids)
+        if cliente_filter is not None:
+            clientes = clientes.filter(cliente_filter)
+        clientes_map = {
+            c['idcontratante']: c
+            for c in clientes.values('idcontratante', 'idcliente', 'nombre', 'numdoc', 'razonsocial')
+        }
+
+    contratantes_map = defaultdict(list)
+    for c in contratantes:
+        if c['idcontratante'] in clientes_map:
+            contratantes_map[c['kardex']].append(c['idcontratante'])
+
+    return {
+        'usuarios_map': usuarios_map,
+        'contratantes_map': contratantes_map,
+        'clientes_map': clientes_map,
+    }
+
+
+def patrimonial_page_context(patrimonial_page):
+    """
+    Serializer context (medios_pago_sums) for the patrimoniales on one page:
+    the Detallemediopago totals per itemmp, as one grouped SUM query.
+    """
+    itemmps = {obj.itemmp for obj in patrimonial_page or []}
+    medios_pago_sums = {
+        row['itemmp']: row['total']
+        for row in models.Detallemediopago.objects.filter(
+            itemmp__in=itemmps
+        ).values('itemmp').annotate(total=Sum('importemp'))
+    } if itemmps else {}
+    return {'medios_pago_sums': medios_pago_sums}
+
+
+def kardex_for_clientes(cliente_filter, idtipkar):
+    """
+    Kardex with at least one party matching cliente_filter, as a single
+    query with subqueries (nothing is materialized in Python).
+    """
+    matching = models.Cliente2.objects.filter(cliente_filter).values('idcontratante')
+    kardex_ids = models.Contratantes.objects.filter(idcontratante__in=matching).values('kardex')
+    return models.Kardex.objects.filter(
+        kardex__in=kardex_ids,
+        idtipkar=idtipkar
+    ).order_by('-fechaingreso')
+
+
+def name_filter(name):
+    return cliente_name_filter(name)
+
+
+def document_filter(document):
+    return cliente_document_filter(document)
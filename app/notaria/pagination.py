@@ -1,4 +1,16 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator as DjangoPaginator
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .counting import approximate_count, list_count
 
 """
 Pagination for the Notaria app.
@@ -6,13 +18,146 @@ This file defines the pagination for the Notaria app.
 """
 
 
+class CountCachingPaginator(DjangoPaginator):
+    """
+    Django paginator whose total goes through notaria.counting (cached or
+    estimated per LIST_COUNT_MODE) instead of a COUNT(*) per request.
+    """
+
+    @cached_property
+    def count(self):
+        return list_count(self.object_list)
+
+
 class KardexPagination(PageNumberPagination):
     """
     Pagination class for the Kardex viewset.
     This class defines the pagination for the Kardex viewset.
-    It uses page number pagination.
+    It uses page number pagination by default; requests carrying a `cursor`
+    parameter (empty for the first page) get keyset pagination instead.
     """
     page_size = 10
     page_query_param = 'page'
     page_size_query_param = 'page_size'
     max_page_size = 100
+    django_paginator_class = CountCachingPaginator
+
+    cursor_query_param = 'cursor'
+    count_query_param = 'with_count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.cursor_query_param in request.query_params:
+            self.keyset = KeysetPage.for_queryset(queryset)
+        if self.keyset is None:
+            # Not ordered by a unique column (e.g. search by fechaingreso): page numbers
+            return super().paginate_queryset(queryset, request, view=view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        rows = self.keyset.fetch(queryset, cursor, self.page_size)
+
+        self.estimated_count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.estimated_count = approximate_count(queryset)
+        return rows
+
+    def get_paginated_response(self, data):
+        if getattr(self, 'keyset', None) is None:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.estimated_count),
+            ('next', self.get_cursor_link(self.keyset.next_cursor)),
+            ('previous', self.get_cursor_link(self.keyset.previous_cursor)),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count']['nullable'] = True
+        return response_schema
+
+    def get_cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(cursor))
+
+    @staticmethod
+    def encode_cursor(cursor):
+        value, reverse = cursor
+        payload = json.dumps({'v': value, 'r': int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(encoded):
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            return payload['v'], bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound('Invalid cursor')
+
+
+class KeysetPage:
+    """
+    One keyset page over a queryset ordered by a single unique column, such
+    as the descending primary keys of the list endpoints ('-idkardex',
+    '-id_viaje', ...). Pages are read with `WHERE key < last` instead of
+    OFFSET, so deep pages cost the same as the first one.
+    """
+
+    def __init__(self, field, descending):
+        self.field = field
+        self.descending = descending
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    @classmethod
+    def for_queryset(cls, queryset):
+        ordering = getattr(queryset.query, 'order_by', None) or queryset.model._meta.ordering
+        if len(ordering) != 1:
+            return None
+        name = ordering[0]
+        field_name = name.lstrip('-')
+        try:
+            field = queryset.model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            if field_name != 'pk':
+                return None
+            field = queryset.model._meta.pk
+        if not field.unique:
+            return None
+        return cls(field.attname, name.startswith('-'))
+
+    def fetch(self, queryset, cursor, page_size):
+        """
+        Rows of the page after (or, for a reverse cursor, before) the cursor
+        value. One query; page_size + 1 rows are read to detect a further page.
+        """
+        value, reverse = cursor if cursor else (None, False)
+        # Walking backwards over a descending list means ascending order
+        ascending = self.descending == reverse
+        if value is not None:
+            lookup = 'gt' if ascending else 'lt'
+            queryset = queryset.filter(**{f'{self.field}__{lookup}': value})
+        queryset = queryset.order_by(self.field if ascending else f'-{self.field}')
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        first = getattr(rows[0], self.field) if rows else None
+        last = getattr(rows[-1], self.field) if rows else None
+        if reverse:
+            self.previous_cursor = (first, True) if has_more else None
+            self.next_cursor = (last, False) if rows else None
+        else:
+            self.next_cursor = (last, False) if has_more else None
+            self.previous_cursor = (first, True) if value is not None and rows else None
+        return rows
@@ -0,0 +1,180 @@
+import os
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Max, Q, Sum, Value, When
+
+from . import models
+from .utils import search_tokens
+
+'''
+Name search over Cliente2.
+The by_name lookups used to scan cliente2 with five `icontains` filters, which
+no index can serve. Names are tokenized here (upper case, accents folded,
+abbreviations normalized) into ClienteNameToken rows; a search matches every
+query token as a token prefix and ranks exact token hits first.
+The index follows Cliente2 writes through the signals in notaria.signals;
+`manage.py rebuild_cliente_search_index` fills it for existing rows.
+Set CLIENTE_NAME_SEARCH=scan to fall back to the old icontains filters.
+
+The legacy system writes cliente2 without going through the signals. A
+rebuild or catch-up records the highest idcontratante it indexed
+(ClienteNameIndexMark); rows above that mark are searched with the old
+icontains filters, so they are found before they are indexed.
+`rebuild_cliente_search_index --catch-up` indexes them and moves the mark.
+'''
+
+NAME_FIELDS = ('prinom', 'segnom', 'apepat', 'apemat', 'nombre', 'razonsocial')
+
+
+def cliente_tokens(cliente):
+    return search_tokens(*(getattr(cliente, field, None) for field in NAME_FIELDS))
+
+
+def index_cliente(cliente):
+    """
+    Bring the tokens of one client in line with its current names.
+    Only the difference is written.
+    """
+    tokens = set(cliente_tokens(cliente))
+    existing = models.ClienteNameToken.objects.filter(idcontratante=cliente.idcontratante)
+    current = set(existing.values_list('token', flat=True))
+
+    with transaction.atomic():
+        stale = current - tokens
+        if stale:
+            existing.filter(token__in=stale).delete()
+        new = tokens - current
+        if new:
+            models.ClienteNameToken.objects.bulk_create(
+                [models.ClienteNameToken(idcontratante=cliente.idcontratante, token=token) for token in new],
+                ignore_conflicts=True
+            )
+
+
+def unindex_cliente(idcontratante):
+    models.ClienteNameToken.objects.filter(idcontratante=idcontratante).delete()
+
+
+def index_high_water():
+    """
+    Highest idcontratante covered by the index, or None if it was never built.
+    """
+    return models.ClienteNameIndexMark.objects.values_list('high_water', flat=True).first()
+
+
+def _set_high_water(idcontratante):
+    if idcontratante is None:
+        return
+    updated = models.ClienteNameIndexMark.objects.update(high_water=idcontratante)
+    if not updated:
+        models.ClienteNameIndexMark.objects.create(high_water=idcontratante)
+
+
+def rebuild_index(batch_size=2000):
+    """
+    Rebuild the whole index from cliente2. Returns the number of clients indexed.
+    """
+    # Rows written while the rebuild runs stay above the mark until a catch-up
+    high_water = models.Cliente2.objects.aggregate(high_water=Max('idcontratante'))['high_water']
+    models.ClienteNameToken.objects.all().delete()
+    indexed = 0
+    rows = []
+    clientes = models.Cliente2.objects.only('idcontratante', *NAME_FIELDS).order_by('idcontratante')
+    for cliente in clientes.iterator(chunk_size=batch_size):
+        rows.extend(
+            models.ClienteNameToken(idcontratante=cliente.idcontratante, token=token)
+            for token in cliente_tokens(cliente)
+        )
+        indexed += 1
+        if len(rows) >= batch_size:
+            models.ClienteNameToken.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    if rows:
+        models.ClienteNameToken.objects.bulk_create(rows, ignore_conflicts=True)
+    _set_high_water(high_water)
+    return indexed
+
+
+def catch_up_index(batch_size=2000):
+    """
+    Index the cliente2 rows above the high-water mark and move the mark.
+    Returns the number of clients indexed.
+    """
+    high_water = index_high_water()
+    if high_water is None:
+        return rebuild_index(batch_size=batch_size)
+    indexed = 0
+    clientes = (
+        models.Cliente2.objects.filter(idcontratante__gt=high_water)
+        .only('idcontratante', *NAME_FIELDS).order_by('idcontratante')
+    )
+    for cliente in clientes.iterator(chunk_size=batch_size):
+        index_cliente(cliente)
+        high_water = cliente.idcontratante
+        indexed += 1
+    _set_high_water(high_water)
+    return indexed
+
+
+def search_contratantes(query):
+    """
+    idcontratante values whose names contain every token of `query` as a
+    token prefix, best matches first (exact token hits outrank prefix hits).
+    Returns a values queryset, usable as a subquery.
+    """
+    tokens = search_tokens(query)
+    if not tokens:
+        return models.ClienteNameToken.objects.none().values('idcontratante')
+
+    prefix_match = Q()
+    for token in tokens:
+        prefix_match |= Q(token__startswith=token)
+
+    matched = {
+        f'match_{i}': Max(Case(When(token__startswith=token, then=Value(1)), default=Value(0),
+                               output_field=IntegerField()))
+        for i, token in enumerate(tokens)
+    }
+    return (
+        models.ClienteNameToken.objects
+        .filter(prefix_match)
+        .values('idcontratante')
+        .annotate(
+            score=Sum(Case(When(token__in=tokens, then=Value(2)), default=Value(1), output_field=IntegerField())),
+            **matched
+        )
+        .filter(**{name: 1 for name in matched})
+        .order_by('-score', 'idcontratante')
+    )
+
+
+def legacy_name_filter(name):
+    return (
+        Q(nombre__icontains=name) |
+        Q(apepat__icontains=name) |
+        Q(apemat__icontains=name) |
+        Q(prinom__icontains=name) |
+        Q(segnom__icontains=name)
+    )
+
+
+def cliente_name_filter(name):
+    """
+    Q on Cliente2 for a name search, served by the token index unless
+    CLIENTE_NAME_SEARCH=scan.
+
+    Indexed clients match when every query token is a prefix of one of their
+    name tokens ('PERE JOS' finds 'PEREZ DIAZ JOSE'); clients above the
+    high-water mark, and every client before the index is first built,
+    match the old way, when a name field contains the whole query.
+    """
+    if os.environ.get('CLIENTE_NAME_SEARCH', 'index').lower() == 'scan':
+        return legacy_name_filter(name)
+    high_water = index_high_water()
+    if high_water is None:
+        return legacy_name_filter(name)
+    unindexed = models.Cliente2.objects.filter(Q(idcontratante__gt=high_water) & legacy_name_filter(name))
+    return (
+        Q(idcontratante__in=search_contratantes(name).values('idcontratante')) |
+        Q(idcontratante__in=unindexed.values('idcontratante'))
+    )
@@ -0,0 +1,199 @@
+from django.db import IntegrityError, transaction
+from django.db import models as django_models
+from django.db.models import F
+from django.db.models.functions import Cast, Substr
+
+from . import models
+
+'''
+Correlative number allocation.
+Each series (kardex per abbreviation, num_formu, num_carta, ...) keeps its last
+value in one notaria_sequences row per period. A number is taken by locking
+that row (SELECT ... FOR UPDATE) and incrementing it, so concurrent reception
+desks never get the same number and no table scan is needed.
+Every allocation also reads the last value used in the table (an indexed
+lookup of the latest record) under the same row lock, so records created
+outside this API (the legacy system, manual fixes) never lead to a duplicate
+number. When called inside the caller's transaction, a rollback also returns
+the number, so failed creates leave no gaps. `manage.py sync_sequences`
+realigns the series with the tables, e.g. after records are deleted.
+'''
+
+
+def allocate(series, period='', seed=None, count=1, floor=None):
+    """
+    Reserve `count` consecutive values of a series and return the first one.
+    seed: callable giving the last value already used, called when the
+    series/period row does not exist yet.
+    floor: callable giving the last value used by other writers, checked on
+    every allocation (only for cheap, indexed lookups).
+    """
+    period = str(period or '')
+    with transaction.atomic():
+        row = _locked_row(series, period)
+        if row is None:
+            row = _create_row(series, period, _call_seed(seed))
+
+        last_value = row.last_value
+        if floor is not None:
+            last_value = max(last_value, _call_seed(floor))
+
+        models.Sequence.objects.filter(pk=row.pk).update(last_value=last_value + count)
+        return last_value + 1
+
+
+def allocate_block(series, period='', seed=None, count=1, floor=None):
+    """
+    Reserve a block of values (for bulk inserts); returns them as a range.
+    """
+    first = allocate(series, period, seed=seed, count=count, floor=floor)
+    return range(first, first + count)
+
+
+def reset(series, period, last_value):
+    """
+    Set the last used value of a series/period (used by sync_sequences).
+    """
+    period = str(period or '')
+    updated = models.Sequence.objects.filter(series=series, period=period).update(last_value=last_value)
+    if not updated:
+        models.Sequence.objects.create(series=series, period=period, last_value=last_value)
+
+
+def _locked_row(series, period):
+    return models.Sequence.objects.select_for_update().filter(series=series, period=period).first()
+
+
+def _create_row(series, period, last_value):
+    try:
+        with transaction.atomic():
+            return models.Sequence.objects.create(series=series, period=period, last_value=last_value)
+    except IntegrityError:
+        # Another request created it first: wait for its lock
+        return _locked_row(series, period)
+
+
+def _call_seed(seed):
+    # A failing seed must not leave a row starting from 0: errors propagate
+    return int(seed() or 0) if seed is not None else 0
+
+
+# Floors: the last value already used in the tables, computed as the create
+# views used to compute it.
+
+def last_correlative_of_year(model, field, pk_field, year):
+    """
+    Last 'YYYYNNNNNN' correlative of `year`, or 0 when the latest record is
+    from an earlier year.
+    """
+    last_record = model.objects.filter(
+        **{f'{field}__isnull': False}
+    ).exclude(**{field: ''}).order_by(f'-{pk_field}').first()
+    value = getattr(last_record, field, None) if last_record else None
+    if value and value.startswith(str(year)):
+        return int(value[-6:])
+    return 0
+
+
+def last_number(model, field, pk_field, digits=None):
+    """
+    Last plain correlative of a field (the last `digits` characters if given).
+    """
+    last_record = model.objects.filter(
+        **{f'{field}__isnull': False}
+    ).exclude(**{field: ''}).order_by(f'-{pk_field}').first()
+    value = getattr(last_record, field, None) if last_record else None
+    if not value:
+        return 0
+    return int(value[-digits:] if digits else value)
+
+
+def last_kardex_number(idtipkar, abreviatura, anio):
+    """
+    Highest numeric part of the kardex numbers ('KAR123-2025') of a type and year.
+    """
+    last_kardex = models.Kardex.objects.filter(
+        idtipkar=idtipkar,
+        fechaingreso__endswith=anio,
+        kardex__startswith=abreviatura
+    ).annotate(
+        numeric_part=Cast(Substr(F('kardex'), len(abreviatura) + 1, 4), output_field=django_models.IntegerField())
+    ).order_by('-numeric_part').first()
+    if not last_kardex or not last_kardex.kardex:
+        return 0
+    try:
+        return int("".join(filter(str.isdigit, last_kardex.kardex.split("-")[0])))
+    except ValueError:
+        return 0
+
+
+def last_id(model, id_field):
+    last_instance = model.objects.order_by(f'-{id_field}').first()
+    last = getattr(last_instance, id_field, '0') if last_instance else '0'
+    return int(last) if str(last).isdigit() else 0
+
+
+KARDEX_ABBREVIATIONS = {
+    "1": "KAR",  # ESCRITURAS PUBLICAS
+    "2": "NCT",  # ASUNTOS NO CONTENCIOSOS
+    "3": "ACT",  # TRANSFERENCIAS VEHICULARES
+    "4": "GAM",  # GARANTIAS MOBILIARIAS
+    "5": "TES",  # TESTAMENTOS
+}
+
+# series -> (model, field, pk field): 'YYYYNNNNNN' numbers that restart every year
+YEARLY_CORRELATIVES = {
+    'permi_viaje.num_kardex': (models.PermiViaje, 'num_kardex', 'id_viaje'),
+    'ingreso_poderes.num_kardex': (models.IngresoPoderes, 'num_kardex', 'id_poder'),
+    'ingreso_cartas.num_carta': (models.IngresoCartas, 'num_carta', 'id_carta'),
+    'cert_domiciliario.num_certificado': (models.CertDomiciliario, 'num_certificado', 'id_domiciliario'),
+}
+
+# series -> (model, field, pk field, digits): numbers that never restart
+GLOBAL_CORRELATIVES = {
+    'permi_viaje.num_formu': (models.PermiViaje, 'num_formu', 'id_viaje', None),
+    'ingreso_poderes.num_formu': (models.IngresoPoderes, 'num_formu', 'id_poder', None),
+    'libros.numlibro': (models.Libros, 'numlibro', 'id', 6),
+}
+
+
+def next_yearly_correlative(series, year):
+    model, field, pk_field = YEARLY_CORRELATIVES[series]
+    return allocate(series, year, floor=lambda: last_correlative_of_year(model, field, pk_field, year))
+
+
+def next_global_correlative(series):
+    model, field, pk_field, digits = GLOBAL_CORRELATIVES[series]
+    return allocate(series, floor=lambda: last_number(model, field, pk_field, digits))
+
+
+def next_kardex_number(idtipkar, abreviatura, anio):
+    return allocate(f'kardex.{abreviatura}', anio, floor=lambda: last_kardex_number(idtipkar, abreviatura, anio))
+
+
+def next_id(model, id_field):
+    """
+    Next numeric string id of a legacy table. The table's highest id (a
+    primary-key lookup) is checked on every call, as other systems insert
+    into these tables too.
+    """
+    return allocate(f'{model._meta.db_table}.{id_field}', floor=lambda: last_id(model, id_field))
+
+
+def sync_sequences(year):
+    """
+    Realign every correlative series with the records in the tables.
+    Returns {(series, period): last_value}.
+    """
+    synced = {}
+    year = str(year)
+    for series, (model, field, pk_field) in YEARLY_CORRELATIVES.items():
+        synced[(series, year)] = last_correlative_of_year(model, field, pk_field, year)
+    for series, (model, field, pk_field, digits) in GLOBAL_CORRELATIVES.items():
+        synced[(series, '')] = last_number(model, field, pk_field, digits)
+    for idtipkar, abreviatura in KARDEX_ABBREVIATIONS.items():
+        synced[(f'kardex.{abreviatura}', year)] = last_kardex_number(idtipkar, abreviatura, year)
+
+    for (series, period), last_value in synced.items():
+        reset(series, period, last_value)
+    return synced
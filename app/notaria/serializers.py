@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from . import models
 from django.db import IntegrityError
+from django.db.models import Sum
 from .constants import MONEDAS
+from .catalogs import catalog
 
 '''
 Serializers for the Notaria app.
@@ -260,8 +262,11 @@ class ContratantesKardexSerializer(serializers.ModelSerializer):
         return ''
     
     def get_condicion_str(self, obj):
-        condicion_map = self.context.get('condicion_map', {})
-        condicion = condicion_map.get(obj.condicion.split('.')[0])
+        idcondicion = obj.condicion.split('.')[0]
+        if 'condicion_map' not in self.context:
+            condicion = catalog(models.Actocondicion).get('idcondicion', idcondicion)
+            return condicion.condicion if condicion else ''
+        condicion = self.context['condicion_map'].get(idcondicion)
         if condicion:
             return (
                 f"{condicion['condicion']}"
@@ -574,9 +579,16 @@ class PatrimonialSerializer(serializers.ModelSerializer):
     def get_medios_pago_sum(self, obj):
         """
         Returns the sum of medios de pago for the Patrimonial instance.
+        Listings pass the totals of the whole page in `medios_pago_sums`.
         """
-        medios_pago = models.Detallemediopago.objects.filter(itemmp=obj.itemmp)
-        return sum(medio.importemp for medio in medios_pago)
+        medios_pago_sums = self.context.get('medios_pago_sums')
+        if medios_pago_sums is None:
+            total = models.Detallemediopago.objects.filter(
+                itemmp=obj.itemmp
+            ).aggregate(total=Sum('importemp'))['total']
+        else:
+            total = medios_pago_sums.get(obj.itemmp)
+        return total or 0
 
     
 class DetallevehicularSerializer(serializers.ModelSerializer):
@@ -0,0 +1,60 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import models
+from .catalogs import CATALOG_MODELS, get_catalog_cache
+from .counting import get_count_cache
+from .document_lookup import get_document_lookup_cache, index_document, unindex_document
+from .search import index_cliente, unindex_cliente
+
+'''
+Keeps the Cliente2 name and document indexes (ClienteNameToken,
+ClienteDocumentKey) and the document lookup cache in step with ORM writes,
+and drops cached list counts and catalog snapshots of any model that is
+written.
+Index failures are logged and never block the client write itself; a
+`rebuild_cliente_search_index` run repairs any drift.
+'''
+
+
+@receiver(post_save, sender=models.Cliente2, dispatch_uid='notaria_index_cliente')
+def cliente_saved(sender, instance, **kwargs):
+    get_document_lookup_cache().invalidate(sender._meta.label, instance.pk, instance.numdoc)
+    try:
+        index_cliente(instance)
+        index_document(instance)
+    except Exception as e:
+        print(f"WARNING: Could not index cliente {instance.idcontratante}: {e}")
+
+
+@receiver(post_delete, sender=models.Cliente2, dispatch_uid='notaria_unindex_cliente')
+def cliente_deleted(sender, instance, **kwargs):
+    get_document_lookup_cache().invalidate(sender._meta.label, instance.pk, instance.numdoc)
+    try:
+        unindex_cliente(instance.idcontratante)
+        unindex_document(instance.idcontratante)
+    except Exception as e:
+        print(f"WARNING: Could not unindex cliente {instance.idcontratante}: {e}")
+
+
+@receiver(post_save, sender=models.Cliente, dispatch_uid='notaria_cliente_saved')
+@receiver(post_delete, sender=models.Cliente, dispatch_uid='notaria_cliente_deleted')
+def cliente_legacy_changed(sender, instance, **kwargs):
+    get_document_lookup_cache().invalidate(sender._meta.label, instance.pk, instance.numdoc)
+
+
+@receiver(post_save, dispatch_uid='notaria_invalidate_counts_saved')
+@receiver(post_delete, dispatch_uid='notaria_invalidate_counts_deleted')
+def invalidate_counts(sender, **kwargs):
+    # Version rows and the migration recorder are never listed
+    if sender is not models.CacheVersion and sender._meta.app_label != 'migrations':
+        get_count_cache().invalidate(sender)
+
+
+def invalidate_catalog(sender, **kwargs):
+    get_catalog_cache().invalidate(sender)
+
+
+for catalog_model in CATALOG_MODELS:
+    post_save.connect(invalidate_catalog, sender=catalog_model, dispatch_uid=f'notaria_catalog_saved_{catalog_model._meta.label}')
+    post_delete.connect(invalidate_catalog, sender=catalog_model, dispatch_uid=f'notaria_catalog_deleted_{catalog_model._meta.label}')
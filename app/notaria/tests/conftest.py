@@ -1,7 +1,12 @@
 import pytest
 from model_bakery import baker
 from rest_framework.test import APIClient
+from core.metrics import get_registry
 from notaria import models
+from notaria.catalogs import get_catalog_cache
+from notaria.counting import get_count_cache
+from ducumentation.shared.document_data_cache import get_document_data_cache
+from ducumentation.shared.render_cache import get_render_cache
 
 @pytest.fixture
 def api_client():
@@ -43,6 +48,41 @@ def enable_db_access_for_all_tests(transactional_db):
     for model in unmanaged_models:
         model._meta.managed = False
 
+@pytest.fixture(autouse=True)
+def clear_count_cache():
+    """Cached list totals must not leak between tests."""
+    get_count_cache().invalidate()
+    yield
+    get_count_cache().invalidate()
+
+@pytest.fixture(autouse=True)
+def clear_catalog_cache():
+    """Catalog snapshots must not leak between tests."""
+    get_catalog_cache().invalidate()
+    yield
+    get_catalog_cache().invalidate()
+
+@pytest.fixture(autouse=True)
+def clear_document_data_cache():
+    """Cached placeholder data must not leak between tests."""
+    get_document_data_cache().invalidate()
+    yield
+    get_document_data_cache().invalidate()
+
+@pytest.fixture(autouse=True)
+def clear_render_cache():
+    """Rendered documents must not leak between tests."""
+    get_render_cache().invalidate()
+    yield
+    get_render_cache().invalidate()
+
+@pytest.fixture(autouse=True)
+def clear_metrics():
+    """Observed histograms must not leak between tests."""
+    get_registry().clear()
+    yield
+    get_registry().clear()
+
 @pytest.fixture
 def sample_usuario():
     """Fixture to create a sample Usuario for testing."""
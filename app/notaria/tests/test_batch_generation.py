@@ -0,0 +1,184 @@
+import io
+import json
+import zipfile
+
+import pytest
+from docx import Document
+from rest_framework import status
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from ducumentation.batch import BatchDocumentGenerator
+from ducumentation.shared.render_pool import get_render_pool
+
+
+def _template_bytes(text: str = "PROYECTO {{P_NOM_1}}") -> bytes:
+    doc = Document()
+    doc.add_paragraph(text)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+KARDEX_ROWS = [
+    ('ESC1-2025', 1, '001'),
+    ('ESC2-2025', 1, '001'),
+    ('NC1-2025', 2, ''),
+    ('XX1-2025', 9, ''),
+]
+
+
+@pytest.fixture
+def batch_env():
+    """Patch the DB routing, template fetch, data builders and uploads used by a batch."""
+    with patch('ducumentation.batch.Kardex') as mock_kardex, \
+            patch('ducumentation.batch.get_template_filename', side_effect=lambda template_id: f"{template_id}.docx") as mock_filename, \
+            patch('ducumentation.batch.get_template_bytes', return_value=_template_bytes()) as mock_bytes, \
+            patch('ducumentation.batch.upload_rendered', return_value=True) as mock_upload, \
+            patch('ducumentation.services.EscrituraPublicaDocumentService.build_document_data',
+                  side_effect=lambda kardex, *args, **kwargs: {'P_NOM_1': f'CLIENTE {kardex}'}) as mock_data:
+        mock_kardex.objects.filter.return_value.values_list.return_value = KARDEX_ROWS
+        yield {
+            'kardex': mock_kardex,
+            'filename': mock_filename,
+            'bytes': mock_bytes,
+            'upload': mock_upload,
+            'data': mock_data,
+        }
+
+
+@pytest.mark.django_db
+class TestBatchDocumentGenerator:
+    """Test cases for batch generation of protocolar documents."""
+
+    def _generate(self, items, **kwargs):
+        generator = BatchDocumentGenerator(render_workers=1, io_workers=2, data_workers=1)
+        return {result['kardex']: result for result in generator.generate(items, **kwargs)}
+
+    def test_renders_and_uploads_each_kardex(self, batch_env):
+        results = self._generate([
+            {'kardex': 'ESC1-2025', 'template_id': 7},
+            {'kardex': 'ESC2-2025', 'template_id': 7},
+        ])
+
+        assert results['ESC1-2025']['status'] == 'ok'
+        rendered = Document(io.BytesIO(results['ESC1-2025']['content']))
+        assert rendered.paragraphs[-1].text == "PROYECTO CLIENTE ESC1-2025"
+        assert results['ESC2-2025']['uploaded'] is True
+        assert batch_env['upload'].call_count == 2
+        object_key, content = batch_env['upload'].call_args_list[0].args
+        assert object_key.startswith('rodriguez-zea/documentos/__PROY__')
+        assert batch_env['upload'].call_args_list[0].kwargs == {'wait': True}
+
+    def test_routing_and_templates_are_fetched_once(self, batch_env):
+        self._generate([
+            {'kardex': 'ESC1-2025', 'template_id': 7},
+            {'kardex': 'ESC2-2025', 'template_id': 7},
+            {'kardex': 'ESC1-2025', 'template_id': 7},
+        ])
+
+        assert batch_env['kardex'].objects.filter.call_count == 1
+        assert batch_env['bytes'].call_count == 1
+        assert batch_env['data'].call_count == 2
+
+    def test_per_item_errors_do_not_abort_the_batch(self, batch_env):
+        results = self._generate([
+            {'kardex': 'ESC1-2025', 'template_id': 7},
+            {'kardex': 'NC1-2025', 'template_id': 7},
+            {'kardex': 'XX1-2025', 'template_id': 7},
+            {'kardex': 'MISSING', 'template_id': 7},
+            {'kardex': 'ESC2-2025', 'template_id': 'abc'},
+        ], upload=False)
+
+        assert results['ESC1-2025']['status'] == 'ok'
+        assert 'idtipoacto' in results['NC1-2025']['error']
+        assert 'tipkar 9' in results['XX1-2025']['error']
+        assert 'not found' in results['MISSING']['error']
+        assert results['ESC2-2025']['error'] == 'Invalid template_id format.'
+        batch_env['upload'].assert_not_called()
+
+    def test_missing_template_fails_its_group(self, batch_env):
+        batch_env['bytes'].return_value = None
+
+        results = self._generate([{'kardex': 'ESC1-2025', 'template_id': 7}])
+
+        assert results['ESC1-2025']['status'] == 'error'
+        assert 'Template 7' in results['ESC1-2025']['error']
+
+    def test_process_pool_renders_like_inline(self, batch_env):
+        generator = BatchDocumentGenerator(render_workers=2, io_workers=2, data_workers=1)
+        results = generator.generate([
+            {'kardex': 'ESC1-2025', 'template_id': 7},
+            {'kardex': 'ESC2-2025', 'template_id': 7},
+        ], upload=False)
+
+        texts = sorted(Document(io.BytesIO(result['content'])).paragraphs[-1].text for result in results)
+        assert texts == ["PROYECTO CLIENTE ESC1-2025", "PROYECTO CLIENTE ESC2-2025"]
+
+    def test_render_pool_is_spawned_once(self, batch_env):
+        generator = BatchDocumentGenerator(render_workers=2, io_workers=2, data_workers=1)
+        items = [{'kardex': 'ESC1-2025', 'template_id': 7}, {'kardex': 'ESC2-2025', 'template_id': 7}]
+
+        generator.generate(items, upload=False)
+        pool = get_render_pool(2)
+        generator.generate(items, upload=False)
+
+        assert get_render_pool(2) is pool
+        assert pool._mp_context.get_start_method() == 'spawn'
+
+    def test_failed_upload_is_reported(self, batch_env):
+        batch_env['upload'].return_value = False
+
+        results = self._generate([{'kardex': 'ESC1-2025', 'template_id': 7}])
+
+        assert results['ESC1-2025']['status'] == 'ok'
+        assert results['ESC1-2025']['uploaded'] is False
+
+
+@pytest.mark.django_db
+class TestBatchEndpoint:
+    """Test cases for POST /docs/documentos/batch/."""
+
+    url = '/docs/documentos/batch/'
+
+    def setup_method(self):
+        self.api_client = APIClient()
+
+    @patch('ducumentation.views.BatchDocumentGenerator')
+    def test_zip_response(self, mock_generator):
+        mock_generator.return_value.generate.return_value = [
+            {'kardex': 'ESC1-2025', 'status': 'ok', 'filename': '__PROY__ESC1-2025.docx', 'content': b'docx', 'error': None},
+            {'kardex': 'MISSING', 'status': 'error', 'filename': '__PROY__MISSING.docx', 'content': None, 'error': 'Kardex MISSING not found'},
+        ]
+
+        response = self.api_client.post(self.url, {'kardex': ['ESC1-2025', 'MISSING'], 'template_id': 7}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/zip'
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        assert sorted(archive.namelist()) == ['__PROY__ESC1-2025.docx', 'resultados.json']
+        manifest = json.loads(archive.read('resultados.json'))
+        assert manifest[1]['error'] == 'Kardex MISSING not found'
+        mock_generator.return_value.generate.assert_called_once_with(
+            [{'kardex': 'ESC1-2025', 'template_id': 7}, {'kardex': 'MISSING', 'template_id': 7}], upload=True)
+
+    @patch('ducumentation.views.BatchDocumentGenerator')
+    def test_json_response(self, mock_generator):
+        mock_generator.return_value.generate.return_value = [
+            {'kardex': 'ESC1-2025', 'status': 'ok', 'content': b'docx'},
+        ]
+
+        response = self.api_client.post(self.url, {
+            'items': [{'kardex': 'ESC1-2025', 'template_id': 7}], 'format': 'json', 'upload': False,
+        }, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['generated'] == 1
+        assert 'content' not in response.data['results'][0]
+        mock_generator.return_value.generate.assert_called_once_with(
+            [{'kardex': 'ESC1-2025', 'template_id': 7}], upload=False)
+
+    def test_requires_items(self):
+        response = self.api_client.post(self.url, {}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
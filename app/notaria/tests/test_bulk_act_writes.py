@@ -0,0 +1,124 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from notaria import act_writes, models
+
+
+def _tipo(idtipoacto):
+    return SimpleNamespace(idtipoacto=idtipoacto, actosunat='01', actouif='U', desacto=f'ACTO {idtipoacto}')
+
+
+class TestActWrites:
+    """Test cases for the bulk act write helpers."""
+
+    def test_parse_conditions(self):
+        assert act_writes.parse_conditions('044.1/055.2/') == [('044', '1'), ('055', '2')]
+        assert act_writes.parse_conditions(['', '066.3']) == [('066', '3')]
+        assert act_writes.split_codactos('044055044') == ['044', '055', '044']
+
+    @patch('notaria.models.Actocondicion.objects')
+    def test_contratantesxacto_rows_in_one_query(self, mock_actocondicion):
+        acto = SimpleNamespace(idtipoacto='044', parte='1', uif='U', formulario='F', montop='M')
+        mock_actocondicion.in_bulk.return_value = {'044': acto, '055': acto}
+
+        rows = act_writes.contratantesxacto_rows('KAR1-2025', '0000000001', [('044', '1'), ('055', '2')])
+
+        mock_actocondicion.in_bulk.assert_called_once_with({'044', '055'})
+        assert [(row.idcondicion, row.item, row.idtipoacto) for row in rows] == [('044', '1', '044'), ('055', '2', '044')]
+
+    @patch('notaria.models.Actocondicion.objects')
+    def test_unknown_condition_raises(self, mock_actocondicion):
+        mock_actocondicion.in_bulk.return_value = {}
+
+        with pytest.raises(models.Actocondicion.DoesNotExist):
+            act_writes.contratantesxacto_rows('KAR1-2025', '0000000001', [('999', '1')])
+
+
+@pytest.mark.django_db
+class TestKardexActWrites:
+    """Kardex create/update write their detalle actos in bulk."""
+
+    url = '/api/kardex/'
+
+    def setup_method(self):
+        self.api_client = APIClient()
+
+    @patch('notaria.models.DetalleActosKardex.objects')
+    @patch('notaria.models.Tiposdeacto.objects')
+    @patch('notaria.sequences.next_kardex_number', return_value=7)
+    @patch('notaria.views.KardexViewSet.perform_create')
+    @patch('notaria.views.KardexViewSet.get_serializer')
+    def test_create_inserts_detalles_at_once(self, mock_get_serializer, mock_perform_create, mock_next,
+                                             mock_tipos, mock_detalles):
+        mock_get_serializer.return_value = MagicMock(data={'kardex': 'KAR7-2025'})
+        mock_tipos.in_bulk.return_value = {'044': _tipo('044'), '055': _tipo('055')}
+
+        response = self.api_client.post(self.url, {
+            'idtipkar': 1, 'fechaingreso': '15/01/2025', 'codactos': '044055044'
+        }, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        mock_tipos.in_bulk.assert_called_once()
+        rows = mock_detalles.bulk_create.call_args[0][0]
+        assert [(row.kardex, row.idtipoacto) for row in rows] == [
+            ('KAR7-2025', '044'), ('KAR7-2025', '055'), ('KAR7-2025', '044')
+        ]
+        mock_detalles.create.assert_not_called()
+
+    @patch('notaria.models.DetalleActosKardex.objects')
+    @patch('notaria.models.Tiposdeacto.objects')
+    @patch('notaria.sequences.next_kardex_number')
+    def test_unknown_tipo_takes_no_number(self, mock_next, mock_tipos, mock_detalles):
+        mock_tipos.in_bulk.return_value = {'044': _tipo('044')}
+
+        response = self.api_client.post(self.url, {
+            'idtipkar': 1, 'fechaingreso': '15/01/2025', 'codactos': '044999'
+        }, format='json')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        mock_next.assert_not_called()
+        mock_detalles.bulk_create.assert_not_called()
+
+    @patch('rest_framework.mixins.UpdateModelMixin.update', return_value=Response({}))
+    @patch('notaria.models.Patrimonial.objects')
+    @patch('notaria.models.Contratantesxacto.objects')
+    @patch('notaria.models.DetalleActosKardex.objects')
+    @patch('notaria.models.Tiposdeacto.objects')
+    @patch('notaria.views.KardexViewSet.get_object')
+    def test_update_diffs_in_single_statements(self, mock_get_object, mock_tipos, mock_detalles,
+                                               mock_contratantesxacto, mock_patrimonial, mock_update):
+        mock_get_object.return_value = SimpleNamespace(kardex='KAR7-2025', idtipkar='1', codactos='044055066')
+        mock_tipos.in_bulk.side_effect = lambda ids: {pk: _tipo(pk) for pk in ids}
+        mock_contratantesxacto.filter.return_value.exists.return_value = False
+        mock_patrimonial.filter.return_value.exists.return_value = False
+
+        response = self.api_client.patch(f'{self.url}1/', {'codactos': '044077088'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        mock_tipos.in_bulk.assert_called_once()
+        mock_detalles.filter.assert_called_once_with(kardex='KAR7-2025', idtipoacto__in={'055', '066'})
+        mock_detalles.filter.return_value.delete.assert_called_once()
+        rows = mock_detalles.bulk_create.call_args[0][0]
+        assert [row.idtipoacto for row in rows] == ['077', '088']
+
+    @patch('rest_framework.mixins.UpdateModelMixin.update', return_value=Response({}))
+    @patch('notaria.models.Patrimonial.objects')
+    @patch('notaria.models.Contratantesxacto.objects')
+    @patch('notaria.models.DetalleActosKardex.objects')
+    @patch('notaria.models.Tiposdeacto.objects')
+    @patch('notaria.views.KardexViewSet.get_object')
+    def test_update_blocked_by_contratantes(self, mock_get_object, mock_tipos, mock_detalles,
+                                            mock_contratantesxacto, mock_patrimonial, mock_update):
+        mock_get_object.return_value = SimpleNamespace(kardex='KAR7-2025', idtipkar='1', codactos='044055')
+        mock_tipos.in_bulk.side_effect = lambda ids: {pk: _tipo(pk) for pk in ids}
+        mock_contratantesxacto.filter.return_value.exists.return_value = True
+
+        response = self.api_client.patch(f'{self.url}1/', {'codactos': '044'}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        mock_detalles.filter.assert_not_called()
+        mock_update.assert_not_called()
@@ -0,0 +1,129 @@
+import time
+from unittest.mock import patch
+
+from django.db.models.signals import post_save
+from rest_framework import status
+
+from notaria import models
+from notaria.catalogs import CatalogCache, catalog, get_catalog_cache
+
+
+def _ubigeos(*names):
+    return [
+        models.Ubigeo(coddis=f'15010{i}', nomdis=name, nomprov='LIMA', nomdpto='LIMA', coddist=f'0{i}', codprov='01', codpto='15')
+        for i, name in enumerate(names, start=1)
+    ]
+
+
+class TestCatalogCache:
+    """Test cases for the catalog snapshots."""
+
+    @patch('notaria.models.Ubigeo.objects')
+    def test_snapshot_is_loaded_once(self, mock_objects):
+        mock_objects.all.return_value = _ubigeos('LIMA', 'ANCON')
+
+        first = catalog(models.Ubigeo)
+        second = catalog(models.Ubigeo)
+
+        assert first is second
+        assert mock_objects.all.call_count == 1
+        assert first.get('coddis', '150102').nomdis == 'ANCON'
+        assert first.subset('coddis', {'150101', '999999'}).keys() == {'150101'}
+
+    @patch('notaria.models.Ubigeo.objects')
+    def test_orm_write_bumps_version(self, mock_objects):
+        mock_objects.all.return_value = _ubigeos('LIMA')
+        old = catalog(models.Ubigeo)
+
+        post_save.send(sender=models.Ubigeo, instance=old.rows[0], created=False)
+        mock_objects.all.return_value = _ubigeos('LIMA', 'ANCON')
+
+        assert len(catalog(models.Ubigeo).rows) == 2
+        assert old.version < catalog(models.Ubigeo).version
+
+    @patch('notaria.models.Ubigeo.objects')
+    def test_ttl_expiry(self, mock_objects):
+        mock_objects.all.return_value = _ubigeos('LIMA')
+        cache = CatalogCache(ttl=600)
+        cache.snapshot(models.Ubigeo)
+        with patch('notaria.catalogs.time.time', return_value=10 ** 10):
+            cache.snapshot(models.Ubigeo)
+
+        assert cache.stats == {'hits': 0, 'loads': 2}
+
+    @patch('notaria.models.Ubigeo.objects')
+    def test_write_in_another_process_is_seen(self, mock_objects):
+        mock_objects.all.return_value = _ubigeos('LIMA')
+        worker, web = CatalogCache(version_check_interval=0), CatalogCache(version_check_interval=0)
+        worker.snapshot(models.Ubigeo)
+
+        # Only the shared version row links the two caches
+        web.invalidate(models.Ubigeo)
+        mock_objects.all.return_value = _ubigeos('LIMA', 'ANCON')
+
+        assert len(worker.snapshot(models.Ubigeo).rows) == 2
+        assert worker.stats == {'hits': 0, 'loads': 2}
+
+    @patch('notaria.models.Ubigeo.objects')
+    def test_version_is_checked_once_per_interval(self, mock_objects):
+        mock_objects.all.return_value = _ubigeos('LIMA')
+        worker, web = CatalogCache(version_check_interval=60), CatalogCache(version_check_interval=60)
+        worker.snapshot(models.Ubigeo)
+        web.invalidate(models.Ubigeo)
+
+        with patch('notaria.catalogs.read_version') as mock_read:
+            worker.snapshot(models.Ubigeo)
+            mock_read.assert_not_called()
+        with patch('notaria.catalogs.time.time', return_value=time.time() + 61):
+            worker.snapshot(models.Ubigeo)
+
+        assert worker.stats == {'hits': 1, 'loads': 2}
+
+    @patch('notaria.models.Actocondicion.objects')
+    def test_group_by_tipoacto(self, mock_objects, api_client):
+        mock_objects.all.return_value = [
+            models.Actocondicion(idcondicion='001', idtipoacto='044', condicion='VENDEDOR'),
+            models.Actocondicion(idcondicion='002', idtipoacto='044', condicion='COMPRADOR'),
+            models.Actocondicion(idcondicion='003', idtipoacto='055', condicion='DONANTE'),
+        ]
+
+        response = api_client.get('/api/actocondicion/by_tipoacto/', {'tipoacto': '044'})
+        missing = api_client.get('/api/actocondicion/by_tipoacto/', {'tipoacto': '999'})
+
+        assert [row['condicion'] for row in response.data] == ['VENDEDOR', 'COMPRADOR']
+        assert missing.data == {}
+        mock_objects.filter.assert_not_called()
+
+
+class TestCatalogListEndpoints:
+    """Catalog lists are served from the snapshot with ETag revalidation."""
+
+    url = '/api/ubigeos/'
+
+    @patch('notaria.models.Ubigeo.objects')
+    def test_etag_and_not_modified(self, mock_objects, api_client):
+        mock_objects.all.return_value = _ubigeos('LIMA', 'ANCON')
+
+        response = api_client.get(self.url)
+        etag = response['ETag']
+        cached = api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [row['nomdis'] for row in response.data] == ['LIMA', 'ANCON']
+        assert 'max-age=' in response['Cache-Control']
+        assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+        assert cached['ETag'] == etag
+        assert mock_objects.all.call_count == 1
+
+    @patch('notaria.models.Ubigeo.objects')
+    def test_etag_changes_after_write(self, mock_objects, api_client):
+        mock_objects.all.return_value = _ubigeos('LIMA')
+        etag = api_client.get(self.url)['ETag']
+
+        mock_objects.all.return_value = _ubigeos('LIMA', 'ANCON')
+        get_catalog_cache().invalidate(models.Ubigeo)
+        response = api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        assert len(response.data) == 2
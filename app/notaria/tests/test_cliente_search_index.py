@@ -0,0 +1,139 @@
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+from model_bakery import baker
+from unittest.mock import patch
+
+from notaria import models
+from notaria.search import (
+    catch_up_index, cliente_name_filter, index_cliente, index_high_water, search_contratantes, unindex_cliente,
+)
+from notaria.utils import search_tokens
+
+
+def _cliente(idcontratante, prinom=None, segnom=None, apepat=None, apemat=None, nombre=None, razonsocial=None):
+    return SimpleNamespace(idcontratante=idcontratante, prinom=prinom, segnom=segnom, apepat=apepat,
+                           apemat=apemat, nombre=nombre, razonsocial=razonsocial)
+
+
+@pytest.fixture
+def indexed(db):
+    for cliente in (
+        _cliente('0000000001', 'JOSÉ', 'LUIS', 'PÉREZ', 'DÍAZ', nombre='PÉREZ DÍAZ JOSÉ LUIS'),
+        _cliente('0000000002', 'ANA', None, 'PEREYRA', 'RUIZ', nombre='PEREYRA RUIZ ANA'),
+        _cliente('0000000003', razonsocial='INVERSIONES PEREZ S.A.C.'),
+        _cliente('0000000004', 'JUAN', None, 'LOPEZ', 'DIAZ', nombre='LOPEZ DIAZ JUAN'),
+    ):
+        index_cliente(cliente)
+    models.ClienteNameIndexMark.objects.create(high_water='0000000004')
+
+
+@pytest.fixture
+def cliente2_table():
+    """cliente2 is unmanaged: create it for the test."""
+    with connection.schema_editor() as editor:
+        editor.create_model(models.Cliente2)
+    yield
+    with connection.schema_editor() as editor:
+        editor.delete_model(models.Cliente2)
+
+
+def _legacy_cliente(idcontratante, nombre):
+    """A cliente2 row written by the legacy system: saved without the index signals."""
+    with patch('notaria.signals.index_cliente'):
+        return baker.make(models.Cliente2, idcontratante=idcontratante, nombre=nombre, apepat=nombre.split()[0])
+
+
+class TestSearchTokens:
+    """Test cases for name tokenization."""
+
+    def test_folds_case_accents_and_punctuation(self):
+        assert search_tokens('José  Pérez-Díaz') == ['JOSE', 'PEREZ', 'DIAZ']
+
+    def test_joins_parts_and_skips_empty(self):
+        assert search_tokens('ANA', None, '', 'ruiz', 'Ana') == ['ANA', 'RUIZ']
+        assert search_tokens(None) == []
+
+
+class TestClienteNameIndex:
+    """Test cases for the Cliente2 token index."""
+
+    def test_prefix_search_requires_every_token(self, indexed):
+        assert list(search_contratantes('perez jo').values_list('idcontratante', flat=True)) == ['0000000001']
+        assert set(search_contratantes('diaz').values_list('idcontratante', flat=True)) == {'0000000001', '0000000004'}
+
+    def test_exact_tokens_rank_before_prefixes(self, indexed):
+        ranked = list(search_contratantes('PEREZ').values_list('idcontratante', flat=True))
+
+        # PEREZ is an exact token of 1 and 3; PEREYRA does not start with PEREZ
+        assert ranked[:2] == ['0000000001', '0000000003']
+        assert '0000000002' not in ranked
+        assert list(search_contratantes('PERE').values_list('idcontratante', flat=True)) == [
+            '0000000001', '0000000002', '0000000003']
+
+    def test_reindex_replaces_changed_tokens(self, indexed):
+        index_cliente(_cliente('0000000004', 'JUAN', None, 'LOPEZ', 'QUISPE'))
+
+        tokens = set(models.ClienteNameToken.objects.filter(idcontratante='0000000004').values_list('token', flat=True))
+        assert tokens == {'JUAN', 'LOPEZ', 'QUISPE'}
+
+        unindex_cliente('0000000004')
+        assert not models.ClienteNameToken.objects.filter(idcontratante='0000000004').exists()
+
+    def test_blank_query_matches_nothing(self, indexed):
+        assert list(search_contratantes('  -- ')) == []
+
+    def test_filter_uses_index_subquery(self, indexed):
+        sql = str(models.Cliente2.objects.filter(cliente_name_filter('perez')).query)
+
+        assert 'cliente2_name_tokens' in sql
+        assert 'LIKE' in sql
+
+    def test_clients_above_high_water_mark_match_by_substring(self, indexed, cliente2_table):
+        _legacy_cliente('0000000005', 'PEREZOSO QUISPE MARIA')
+        _legacy_cliente('0000000006', 'QUISPE MAMANI ROSA')
+
+        matches = models.Cliente2.objects.filter(cliente_name_filter('REZOSO')).values_list('idcontratante', flat=True)
+
+        assert list(matches) == ['0000000005']
+
+    def test_unbuilt_index_falls_back_to_scan(self):
+        assert index_high_water() is None
+        sql = str(models.Cliente2.objects.filter(cliente_name_filter('perez')).query)
+
+        assert 'cliente2_name_tokens' not in sql
+
+    def test_catch_up_indexes_new_clients_and_moves_mark(self, indexed, cliente2_table):
+        _legacy_cliente('0000000005', 'PEREZOSO QUISPE MARIA')
+
+        assert catch_up_index() == 1
+        assert index_high_water() == '0000000005'
+        assert list(search_contratantes('quispe').values_list('idcontratante', flat=True)) == ['0000000005']
+        assert catch_up_index() == 0
+
+    def test_scan_mode_keeps_legacy_filter(self):
+        with patch.dict('os.environ', {'CLIENTE_NAME_SEARCH': 'scan'}):
+            sql = str(models.Cliente2.objects.filter(cliente_name_filter('perez')).query)
+
+        assert 'cliente2_name_tokens' not in sql
+
+
+class TestClienteSearchAction:
+    """Test cases for /api/cliente2/by_name/."""
+
+    def test_returns_ranked_clientes(self, indexed, api_client):
+        rows = {
+            '0000000001': models.Cliente2(idcontratante='0000000001', idcliente='1', tipper='N', nombre='PEREZ DIAZ JOSE LUIS',
+                                          idtipdoc=1, numdoc='40000001', idestcivil=1, idubigeo='150101', cumpclie='',
+                                          idsedereg=1, residente='1'),
+        }
+        with patch('notaria.views.models.Cliente2.objects.in_bulk', return_value=rows) as mock_in_bulk:
+            response = api_client.get('/api/cliente2/by_name/', {'name': 'perez jose'})
+
+        assert response.status_code == 200
+        mock_in_bulk.assert_called_once_with(['0000000001'])
+        assert response.data['results'][0]['idcontratante'] == '0000000001'
+
+    def test_requires_name(self, api_client):
+        assert api_client.get('/api/cliente2/by_name/').status_code == 400
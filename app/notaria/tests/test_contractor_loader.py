@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import patch
+
+from ducumentation.services import VehicleTransferDocumentService
+from ducumentation.shared.contractor_loader import condition_ids, load_act_parties, load_kardex_parties
+
+
+def _cliente(idcontratante, tipper='N', **fields):
+    values = {
+        'idcontratante': idcontratante, 'tipper': tipper, 'prinom': 'JUAN', 'segnom': 'CARLOS',
+        'apepat': f'PEREZ{idcontratante}', 'apemat': 'LOPEZ', 'razonsocial': None, 'domfiscal': None,
+        'sexo': 'M', 'nacionalidad': '1', 'detaprofesion': 'INGENIERO', 'idestcivil': None, 'idtipdoc': 1,
+        'numdoc': f'4000000{idcontratante}', 'direccion': 'AV. LIMA 123', 'numpartida': None, 'idubigeo': '150101',
+    }
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+@pytest.fixture
+def party_tables():
+    """Twelve parties: ten sellers, one buyer company and its representative."""
+    contratantes = [SimpleNamespace(idcontratante=str(i), condicion='001.1/', idcontratanterp=None) for i in range(1, 11)]
+    contratantes.append(SimpleNamespace(idcontratante='11', condicion='002.1', idcontratanterp=None))
+    contratantes.append(SimpleNamespace(idcontratante='12', condicion='003.1', idcontratanterp='11'))
+    clientes = [_cliente(c.idcontratante) for c in contratantes]
+    clientes[10] = _cliente('11', tipper='J', razonsocial='AUTOS SAC', domfiscal='AV. ARICA 1', numdoc='20123456789')
+    condiciones = [
+        SimpleNamespace(idcondicion='001', condicion='VENDEDOR'),
+        SimpleNamespace(idcondicion='002', condicion='COMPRADOR'),
+        SimpleNamespace(idcondicion='003', condicion='REPRESENTANTE'),
+    ]
+    with patch('ducumentation.shared.contractor_loader.Contratantes') as mock_contratantes, \
+            patch('ducumentation.shared.contractor_loader.Cliente2') as mock_cliente2, \
+            patch('ducumentation.shared.contractor_loader.Actocondicion') as mock_condicion, \
+            patch('ducumentation.shared.contractor_loader.Nacionalidades') as mock_nacionalidades, \
+            patch('ducumentation.shared.contractor_loader.Ubigeo') as mock_ubigeo:
+        mock_contratantes.objects.filter.return_value = contratantes
+        mock_cliente2.objects.filter.return_value = clientes
+        mock_condicion.objects.all.return_value = condiciones
+        mock_nacionalidades.objects.all.return_value = [SimpleNamespace(idnacionalidad=1, descripcion='PERUANA')]
+        mock_ubigeo.objects.all.return_value = []
+        yield {
+            'contratantes': mock_contratantes,
+            'cliente2': mock_cliente2,
+            'condicion': mock_condicion,
+            'nacionalidades': mock_nacionalidades,
+            'ubigeo': mock_ubigeo,
+        }
+
+
+class TestContractorLoader:
+    """Test cases for the set-based party loader."""
+
+    def test_condition_ids(self):
+        assert condition_ids('001.1/012.2/') == ['001', '012']
+        assert condition_ids(None) == []
+
+    def test_one_query_per_table(self, party_tables):
+        parties = load_kardex_parties('K1-2025')
+
+        for name in ('contratantes', 'cliente2'):
+            assert party_tables[name].objects.filter.call_count == 1
+        for name in ('condicion', 'nacionalidades'):
+            assert party_tables[name].objects.all.call_count == 1
+        party_tables['ubigeo'].objects.all.assert_not_called()
+        assert len(parties.parties) == 12
+        assert parties.condition_names('001.1/003.1') == ['VENDEDOR', 'REPRESENTANTE']
+        assert parties.nacionalidad(parties.cliente('1')) == 'PERUANA'
+
+    def test_zero_padded_nationality_resolves(self, party_tables):
+        party_tables['cliente2'].objects.filter.return_value[0].nacionalidad = ' 001'
+        party_tables['cliente2'].objects.filter.return_value[1].nacionalidad = 'PERUANA'
+
+        parties = load_kardex_parties('K1-2025')
+
+        assert parties.nacionalidad(parties.cliente('1')) == 'PERUANA'
+        assert parties.nacionalidad(parties.cliente('2')) == ''
+
+    def test_catalogs_are_read_once(self, party_tables):
+        load_kardex_parties('K1-2025')
+        parties = load_kardex_parties('K2-2025')
+
+        assert party_tables['cliente2'].objects.filter.call_count == 2
+        assert party_tables['condicion'].objects.all.call_count == 1
+        assert party_tables['nacionalidades'].objects.all.call_count == 1
+        assert parties.condition_name('002') == 'COMPRADOR'
+
+    def test_act_parties_filter_by_act_type(self):
+        with patch('ducumentation.shared.contractor_loader.Contratantesxacto') as mock_cxa:
+            mock_cxa.objects.filter.return_value.filter.return_value = []
+            parties = load_act_parties('K1-2025', idtipoacto='001')
+
+        mock_cxa.objects.filter.return_value.filter.assert_called_once_with(idtipoacto='001')
+        assert parties.parties == []
+
+
+class TestVehicleContractors:
+    """Vehicle transfer contractors come from the bulk loader."""
+
+    def test_query_count_is_independent_of_party_count(self, party_tables):
+        data = VehicleTransferDocumentService()._get_contractors_data('K1-2025')
+
+        assert party_tables['cliente2'].objects.filter.call_count == 1
+        assert data['P_NOM_1'].startswith('JUAN CARLOS PEREZ1 LOPEZ')
+        assert data['P_NACIONALIDAD_1'].startswith('PERUANO')
+        assert 'P_NOM_10' in data
+
+    def test_representative_names_principal(self, party_tables):
+        data = VehicleTransferDocumentService()._get_contractors_data('K1-2025')
+
+        names = ' '.join(str(value) for key, value in data.items() if key.startswith('C_NOM'))
+        assert 'PEREZ12 LOPEZ, EN REPRESENTACION DE AUTOS SAC' in names
@@ -59,7 +59,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_acto.uif = "UIF001"
         mock_acto.formulario = "F1"
         mock_acto.montop = "M1"
-        mock_actocondicion.get.return_value = mock_acto
+        mock_actocondicion.in_bulk.side_effect = lambda ids: dict.fromkeys(ids, mock_acto)
         
         # Mock serializer
         mock_serializer = MagicMock()
@@ -68,7 +68,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_get_serializer.return_value = mock_serializer
         
         # Mock Contratantesxacto creation
-        mock_contratantesxacto.create.return_value = MagicMock()
+        mock_contratantesxacto.bulk_create.return_value = []
         
         data = self.valid_data.copy()
         data["condicion"] = "044.1/055.2/"
@@ -100,7 +100,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_acto.uif = "UIF002"
         mock_acto.formulario = "F2"
         mock_acto.montop = "M2"
-        mock_actocondicion.get.return_value = mock_acto
+        mock_actocondicion.in_bulk.side_effect = lambda ids: dict.fromkeys(ids, mock_acto)
         
         # Mock serializer
         mock_serializer = MagicMock()
@@ -109,7 +109,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_get_serializer.return_value = mock_serializer
         
         # Mock Contratantesxacto creation
-        mock_contratantesxacto.create.return_value = MagicMock()
+        mock_contratantesxacto.bulk_create.return_value = []
         
         data = self.valid_data.copy()
         data["condicion"] = "044.1/055.2/"  # Added new condition
@@ -117,8 +117,8 @@ class TestContratantesViewSetUpdate(APITestCase):
         response = self.api_client.put(f"{self.url}0000147215/", data, format='json')
         
         assert response.status_code == status.HTTP_200_OK
-        # Verify Contratantesxacto.create was called for the new condition
-        mock_contratantesxacto.create.assert_called_once()
+        # Verify Contratantesxacto.bulk_create was called for the new condition
+        mock_contratantesxacto.bulk_create.assert_called_once()
 
     @patch('notaria.models.Contratantes.objects')
     @patch('notaria.models.Actocondicion.objects')
@@ -176,7 +176,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_acto.uif = "UIF003"
         mock_acto.formulario = "F3"
         mock_acto.montop = "M3"
-        mock_actocondicion.get.return_value = mock_acto
+        mock_actocondicion.in_bulk.side_effect = lambda ids: dict.fromkeys(ids, mock_acto)
         
         # Mock serializer
         mock_serializer = MagicMock()
@@ -185,7 +185,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_get_serializer.return_value = mock_serializer
         
         # Mock Contratantesxacto operations
-        mock_contratantesxacto.create.return_value = MagicMock()
+        mock_contratantesxacto.bulk_create.return_value = []
         mock_filter = MagicMock()
         mock_contratantesxacto.filter.return_value = mock_filter
         
@@ -196,7 +196,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         
         assert response.status_code == status.HTTP_200_OK
         # Verify both create and delete operations
-        mock_contratantesxacto.create.assert_called_once()
+        mock_contratantesxacto.bulk_create.assert_called_once()
         mock_filter.delete.assert_called()
 
     # ========== EDGE CASES ==========
@@ -223,7 +223,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_acto.uif = "UIF002"
         mock_acto.formulario = "F2"
         mock_acto.montop = "M2"
-        mock_actocondicion.get.return_value = mock_acto
+        mock_actocondicion.in_bulk.side_effect = lambda ids: dict.fromkeys(ids, mock_acto)
         
         # Mock serializer
         mock_serializer = MagicMock()
@@ -232,7 +232,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_get_serializer.return_value = mock_serializer
         
         # Mock Contratantesxacto creation
-        mock_contratantesxacto.create.return_value = MagicMock()
+        mock_contratantesxacto.bulk_create.return_value = []
         
         data = self.valid_data.copy()
         data["condicion"] = "055.2"  # Single condition without slash
@@ -303,7 +303,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         
         assert response.status_code == status.HTTP_200_OK
         # Verify no Contratantesxacto operations
-        mock_contratantesxacto.create.assert_not_called()
+        mock_contratantesxacto.bulk_create.assert_not_called()
         mock_contratantesxacto.filter.assert_not_called()
 
     # ========== ERROR HANDLING TESTS ==========
@@ -324,7 +324,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         
         # Mock Actocondicion.DoesNotExist
         from django.core.exceptions import ObjectDoesNotExist
-        mock_actocondicion.get.side_effect = ObjectDoesNotExist()
+        mock_actocondicion.in_bulk.return_value = {}
         
         data = self.valid_data.copy()
         data["condicion"] = "999.1/"  # Invalid condition
@@ -393,7 +393,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_acto.uif = "UIF001"
         mock_acto.formulario = "F1"
         mock_acto.montop = "M1"
-        mock_actocondicion.get.return_value = mock_acto
+        mock_actocondicion.in_bulk.side_effect = lambda ids: dict.fromkeys(ids, mock_acto)
         
         # Mock serializer
         mock_serializer = MagicMock()
@@ -402,7 +402,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_get_serializer.return_value = mock_serializer
         
         # Mock Contratantesxacto operations
-        mock_contratantesxacto.create.return_value = MagicMock()
+        mock_contratantesxacto.bulk_create.return_value = []
         mock_filter = MagicMock()
         mock_contratantesxacto.filter.return_value = mock_filter
         
@@ -435,7 +435,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_acto.uif = "UIF004"
         mock_acto.formulario = "F4"
         mock_acto.montop = "M4"
-        mock_actocondicion.get.return_value = mock_acto
+        mock_actocondicion.in_bulk.side_effect = lambda ids: dict.fromkeys(ids, mock_acto)
         
         # Mock serializer
         mock_serializer = MagicMock()
@@ -444,7 +444,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_get_serializer.return_value = mock_serializer
         
         # Mock Contratantesxacto operations
-        mock_contratantesxacto.create.return_value = MagicMock()
+        mock_contratantesxacto.bulk_create.return_value = []
         mock_filter = MagicMock()
         mock_contratantesxacto.filter.return_value = mock_filter
         
@@ -543,7 +543,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_acto.uif = "UIF005"
         mock_acto.formulario = "F5"
         mock_acto.montop = "M5"
-        mock_actocondicion.get.return_value = mock_acto
+        mock_actocondicion.in_bulk.side_effect = lambda ids: dict.fromkeys(ids, mock_acto)
         
         # Mock serializer
         mock_serializer = MagicMock()
@@ -552,7 +552,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_get_serializer.return_value = mock_serializer
         
         # Mock Contratantesxacto operations
-        mock_contratantesxacto.create.return_value = MagicMock()
+        mock_contratantesxacto.bulk_create.return_value = []
         mock_filter = MagicMock()
         mock_contratantesxacto.filter.return_value = mock_filter
         
@@ -563,7 +563,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         
         assert response.status_code == status.HTTP_200_OK
         # Verify create was called for new condition
-        mock_contratantesxacto.create.assert_called_once()
+        mock_contratantesxacto.bulk_create.assert_called_once()
         # Verify delete was called for removed conditions
         mock_filter.delete.assert_called()
 
@@ -581,6 +581,7 @@ class TestContratantesViewSetUpdate(APITestCase):
         mock_instance.condicion = "044.1/"
         mock_instance.kardex = "KAR1-2024"
         mock_get_object.return_value = mock_instance
+        mock_actocondicion.in_bulk.side_effect = lambda ids: dict.fromkeys(ids, MagicMock(idtipoacto="055"))
         
         # Mock serializer
         mock_serializer = MagicMock()
@@ -0,0 +1,116 @@
+import pytest
+from unittest.mock import patch
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from notaria import models
+from notaria.counting import CountCache, get_count_cache, list_count, query_tables
+from notaria.pagination import KardexPagination
+
+factory = APIRequestFactory()
+
+
+@pytest.fixture
+def tokens(db):
+    models.ClienteNameToken.objects.bulk_create(
+        [models.ClienteNameToken(idcontratante=f'{i:010d}', token='PAR' if i % 2 else 'IMPAR') for i in range(1, 21)]
+    )
+    return models.ClienteNameToken.objects.all().order_by('-id')
+
+
+def _count_queries(callback):
+    with CaptureQueriesContext(connection) as queries:
+        result = callback()
+    return result, [q['sql'] for q in queries if 'COUNT(' in q['sql'].upper()]
+
+
+class TestCountCache:
+    """Test cases for cached list totals."""
+
+    def test_repeated_filtered_count_is_cached(self, tokens):
+        first, first_counts = _count_queries(lambda: list_count(tokens.filter(token='PAR')))
+        second, second_counts = _count_queries(lambda: list_count(tokens.filter(token='PAR')))
+
+        assert first == second == 10
+        assert len(first_counts) == 1
+        assert second_counts == []
+
+    def test_filters_are_cached_separately(self, tokens):
+        assert list_count(tokens.filter(token='PAR')) == 10
+        assert list_count(tokens.filter(token='IMPAR')) == 10
+        assert list_count(tokens.filter(token='NADA')) == 0
+        assert list_count(tokens.none()) == 0
+
+    def test_orm_write_invalidates_model(self, tokens):
+        list_count(tokens.filter(token='PAR'))
+        models.ClienteNameToken.objects.create(idcontratante='0000000099', token='PAR')
+
+        assert list_count(tokens.filter(token='PAR')) == 11
+
+    def test_write_to_subquery_table_invalidates(self, tokens):
+        marks = models.ClienteNameIndexMark.objects.values('high_water')
+        by_mark = tokens.filter(idcontratante__in=marks)
+        assert list_count(by_mark) == 0
+
+        models.ClienteNameIndexMark.objects.create(high_water='0000000003')
+
+        assert list_count(by_mark) == 1
+
+    def test_query_tables_include_subqueries(self):
+        matching = models.Cliente2.objects.filter(nombre__contains='PEREZ').values('idcontratante')
+        kardex_ids = models.Contratantes.objects.filter(idcontratante__in=matching).values('kardex')
+        queryset = models.Kardex.objects.filter(kardex__in=kardex_ids)
+
+        assert query_tables(queryset.query) == ('cliente2', 'contratantes', 'kardex')
+
+    def test_write_in_another_process_is_seen(self, tokens):
+        worker, web = CountCache(ttl=30), CountCache(ttl=30)
+        worker.count(tokens.filter(token='PAR'))
+        # update() sends no signal: only the shared version row links the two caches
+        models.ClienteNameToken.objects.filter(idcontratante='0000000001').update(token='X')
+        web.invalidate(models.ClienteNameToken)
+
+        assert worker.count(tokens.filter(token='PAR')) == 9
+        assert worker.stats == {'hits': 0, 'misses': 2}
+
+    def test_ttl_expiry(self, tokens):
+        cache = CountCache(ttl=30)
+        cache.count(tokens)
+        models.ClienteNameToken.objects.filter(id=tokens.first().id).update(token='X')
+        with patch('notaria.counting.time.time', return_value=10 ** 10):
+            cache.count(tokens)
+
+        assert cache.stats == {'hits': 0, 'misses': 2}
+
+    def test_exact_mode_skips_cache(self, tokens):
+        with patch.dict('os.environ', {'LIST_COUNT_MODE': 'exact'}):
+            list_count(tokens)
+            _, counts = _count_queries(lambda: list_count(tokens))
+
+        assert len(counts) == 1
+
+    def test_estimated_mode_for_unfiltered_lists(self, tokens):
+        with patch.dict('os.environ', {'LIST_COUNT_MODE': 'estimated'}), \
+                patch('notaria.counting.table_row_estimate', return_value=5000):
+            assert list_count(tokens) == 5000
+            assert list_count(tokens.filter(token='PAR')) == 10
+
+
+class TestPaginatedCount:
+    """Page-number pagination reads its total through the cache."""
+
+    def test_second_page_request_runs_no_count(self, tokens):
+        def paginate(page):
+            paginator = KardexPagination()
+            paginator.paginate_queryset(tokens.filter(token='PAR'), Request(factory.get('/', {'page': page, 'page_size': 5})))
+            return paginator.page.paginator.count
+
+        first, first_counts = _count_queries(lambda: paginate(1))
+        second, second_counts = _count_queries(lambda: paginate(2))
+
+        assert first == second == 10
+        assert len(first_counts) == 1
+        assert second_counts == []
+        assert get_count_cache().stats['hits'] >= 1
@@ -0,0 +1,170 @@
+import pytest
+from datetime import date
+from unittest.mock import patch
+
+from django.db import connection
+from model_bakery import baker
+
+from ducumentation.shared.document_data_cache import DocumentDataCache, cached_document_data, get_document_data_cache
+from notaria import models
+from notaria.act_writes import bulk_insert
+
+
+KARDEX_TABLES = (models.Kardex, models.Contratantes, models.Contratantesxacto, models.Cliente2)
+
+
+@pytest.fixture
+def kardex_tables():
+    """The kardex tables are unmanaged: create them for the test."""
+    with connection.schema_editor() as editor:
+        for model in KARDEX_TABLES:
+            editor.create_model(model)
+    yield
+    with connection.schema_editor() as editor:
+        for model in reversed(KARDEX_TABLES):
+            editor.delete_model(model)
+
+
+class CountingService:
+    """Stand-in document service counting how often the data is built."""
+
+    def __init__(self):
+        self.builds = 0
+
+    @cached_document_data
+    def build_document_data(self, num_kardex, idtipoacto=None, template_id=None, action='generate'):
+        self.builds += 1
+        return {'KARDEX': num_kardex, 'TEMPLATE': template_id, 'ACTION': action}
+
+
+class TestDocumentDataCache:
+    """Test cases for the per-kardex placeholder data cache."""
+
+    def test_repeated_builds_are_served_from_cache(self):
+        service = CountingService()
+
+        first = service.build_document_data('KAR1-2024', '044', 3)
+        first['KARDEX'] = 'EDITED'
+        second = service.build_document_data('KAR1-2024', idtipoacto='044', template_id=3)
+
+        assert service.builds == 1
+        assert second == {'KARDEX': 'KAR1-2024', 'TEMPLATE': 3, 'ACTION': 'generate'}
+
+    def test_arguments_are_part_of_the_key(self):
+        service = CountingService()
+
+        service.build_document_data('KAR1-2024', '044', 3)
+        service.build_document_data('KAR1-2024', '044', 3, 'parte')
+        service.build_document_data('KAR2-2024', '044', 3)
+
+        assert service.builds == 3
+
+    def test_invalidate_one_kardex(self):
+        service = CountingService()
+        service.build_document_data('KAR1-2024', '044', 3)
+        service.build_document_data('KAR2-2024', '044', 3)
+
+        get_document_data_cache().invalidate('KAR1-2024')
+        service.build_document_data('KAR1-2024', '044', 3)
+        service.build_document_data('KAR2-2024', '044', 3)
+
+        assert service.builds == 3
+
+    def test_values_that_do_not_round_trip_are_not_cached(self):
+        cache = DocumentDataCache(ttl=60)
+        data = {'FECHA': date(2024, 1, 1)}
+
+        assert cache.get_or_build('KAR1-2024', 'key', lambda: data) is data
+        assert cache.get_or_build('KAR1-2024', 'key', lambda: {'FECHA': None}) == {'FECHA': None}
+        assert cache.stats['uncacheable'] == 1
+
+    def test_zero_ttl_disables_the_cache(self):
+        cache = DocumentDataCache(ttl=0)
+
+        cache.get_or_build('KAR1-2024', 'key', lambda: {'A': '1'})
+
+        assert cache.get_or_build('KAR1-2024', 'key', lambda: {'A': '2'}) == {'A': '2'}
+
+    def test_write_in_another_process_is_seen(self):
+        worker, web = DocumentDataCache(ttl=60), DocumentDataCache(ttl=60)
+        worker.get_or_build('KAR1-2024', 'key', lambda: {'A': '1'})
+
+        # Only the shared version row links the two caches
+        web.invalidate('KAR1-2024')
+
+        assert worker.get_or_build('KAR1-2024', 'key', lambda: {'A': '2'}) == {'A': '2'}
+        assert worker.get_or_build('KAR2-2024', 'key', lambda: {'B': '1'}) == {'B': '1'}
+
+    def test_write_during_build_is_not_kept(self):
+        worker, web = DocumentDataCache(ttl=60), DocumentDataCache(ttl=60)
+
+        def build():
+            web.invalidate('KAR1-2024')
+            return {'A': 'stale'}
+
+        assert worker.get_or_build('KAR1-2024', 'key', build) == {'A': 'stale'}
+        assert worker.get_or_build('KAR1-2024', 'key', lambda: {'A': 'fresh'}) == {'A': 'fresh'}
+
+    def test_unreadable_version_bypasses_the_cache(self):
+        cache = DocumentDataCache(ttl=60)
+
+        with patch('ducumentation.shared.document_data_cache.read_version', return_value=None):
+            cache.get_or_build('KAR1-2024', 'key', lambda: {'A': '1'})
+            assert cache.get_or_build('KAR1-2024', 'key', lambda: {'A': '2'}) == {'A': '2'}
+
+    def test_lru_bound(self):
+        cache = DocumentDataCache(ttl=60, max_entries=2)
+        for kardex in ('KAR1-2024', 'KAR2-2024', 'KAR3-2024'):
+            cache.get_or_build(kardex, 'key', lambda: {'A': kardex})
+
+        assert cache.get_or_build('KAR1-2024', 'key', lambda: {'A': 'rebuilt'}) == {'A': 'rebuilt'}
+
+
+class TestDocumentDataInvalidation:
+    """ORM writes drop the cached data of their kardex."""
+
+    def _cached(self, service, kardex='KAR1-2024'):
+        service.build_document_data(kardex, '044', 3)
+        return service.builds
+
+    def test_kardex_save(self, kardex_tables):
+        kardex = baker.make(models.Kardex, kardex='KAR1-2024')
+        service = CountingService()
+        self._cached(service)
+
+        kardex.contrato = 'Updated'
+        kardex.save()
+
+        assert self._cached(service) == 2
+
+    def test_party_acts_written_in_bulk(self, kardex_tables):
+        service = CountingService()
+        self._cached(service)
+        self._cached(service, 'KAR2-2024')
+
+        bulk_insert(models.Contratantesxacto, [baker.prepare(models.Contratantesxacto, kardex='KAR1-2024')])
+
+        assert self._cached(service) == 3
+        assert self._cached(service, 'KAR2-2024') == 3
+
+    def test_cliente_save_uses_its_party_kardex(self, kardex_tables):
+        baker.make(models.Contratantes, idcontratante='1001', kardex='KAR1-2024')
+        cliente = baker.make(models.Cliente2, idcontratante='1001', numdoc='12345678')
+        service = CountingService()
+        self._cached(service)
+        self._cached(service, 'KAR2-2024')
+
+        cliente.numdoc = '87654321'
+        cliente.save()
+
+        assert self._cached(service) == 3
+        assert self._cached(service, 'KAR2-2024') == 3
+
+    def test_party_delete(self, kardex_tables):
+        contratante = baker.make(models.Contratantes, idcontratante='1001', kardex='KAR1-2024')
+        service = CountingService()
+        self._cached(service)
+
+        contratante.delete()
+
+        assert self._cached(service) == 2
@@ -0,0 +1,187 @@
+import pytest
+from datetime import timedelta
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from unittest.mock import patch, MagicMock
+
+from ducumentation.jobs import claim_next_job, enqueue_job, requeue_stale_jobs, run_job, JobError
+from ducumentation.models import DocumentJob
+from ducumentation.shared.document_uploader import upload_document
+
+
+@pytest.mark.django_db
+class TestDocumentJobQueue:
+    """Test cases for the DB-backed document generation queue."""
+
+    def test_concurrent_requests_for_same_document_share_a_job(self):
+        first, created = enqueue_job('protocolar', {'template_id': 1, 'kardex': 'KAR1-2025'})
+        second, created_again = enqueue_job('protocolar', {'template_id': '1', 'kardex': 'KAR1-2025'})
+
+        assert created and not created_again
+        assert first.id == second.id
+        assert DocumentJob.objects.count() == 1
+
+    def test_other_template_gets_its_own_job(self):
+        first, _ = enqueue_job('protocolar', {'template_id': 1, 'kardex': 'KAR1-2025'})
+        other_template, created = enqueue_job('protocolar', {'template_id': 2, 'kardex': 'KAR1-2025'})
+        other_act, created_for_act = enqueue_job(
+            'protocolar', {'template_id': 1, 'kardex': 'KAR1-2025', 'idtipoacto': '044'})
+
+        assert created and created_for_act
+        assert len({first.id, other_template.id, other_act.id}) == 3
+
+    def test_stale_jobs_are_requeued(self):
+        job, _ = enqueue_job('libro', {'id_libro': 7})
+        own, _ = enqueue_job('libro', {'id_libro': 8})
+        claim_next_job()
+        claim_next_job()
+        DocumentJob.objects.update(started_at=timezone.now() - timedelta(hours=1))
+
+        assert requeue_stale_jobs(600, exclude_ids=[own.id]) == 1
+
+        job.refresh_from_db()
+        own.refresh_from_db()
+        assert job.status == DocumentJob.STATUS_PENDING
+        assert own.status == DocumentJob.STATUS_RUNNING
+
+    def test_job_failing_every_attempt_releases_its_document(self):
+        job, _ = enqueue_job('libro', {'id_libro': 7})
+        claim_next_job()
+        DocumentJob.objects.update(started_at=timezone.now() - timedelta(hours=1), attempts=3)
+
+        assert requeue_stale_jobs(600) == 0
+
+        job.refresh_from_db()
+        assert job.status == DocumentJob.STATUS_FAILED
+        assert job.active_key is None
+        assert enqueue_job('libro', {'id_libro': 7})[1]
+
+    def test_finished_job_does_not_block_a_new_one(self):
+        job, _ = enqueue_job('protocolar', {'template_id': 1, 'kardex': 'KAR1-2025'})
+        claim_next_job()
+        with patch.dict('ducumentation.jobs.JOB_KINDS', {'protocolar': (lambda params: HttpResponse(status=200), 'kardex')}):
+            run_job(DocumentJob.objects.get(pk=job.id))
+
+        new_job, created = enqueue_job('protocolar', {'template_id': 1, 'kardex': 'KAR1-2025'})
+
+        assert created
+        assert new_job.id != job.id
+
+    def test_unknown_kind_and_missing_params_are_rejected(self):
+        with pytest.raises(JobError):
+            enqueue_job('nope', {'kardex': 'X'})
+        with pytest.raises(JobError):
+            enqueue_job('permiso-viaje-interior', {})
+
+    def test_claim_marks_job_running(self):
+        job, _ = enqueue_job('libro', {'id_libro': 7})
+
+        claimed = claim_next_job()
+
+        assert claimed.id == job.id
+        assert claimed.status == DocumentJob.STATUS_RUNNING
+        assert claimed.attempts == 1
+        assert claim_next_job() is None
+
+    @patch('ducumentation.jobs.Kardex')
+    @patch('ducumentation.jobs.VehicleTransferDocumentService')
+    def test_run_job_routes_by_tipkar_and_stores_result(self, mock_service, mock_kardex):
+        mock_kardex.objects.filter.return_value.first.return_value = MagicMock(idtipkar=3, codactos='')
+        mock_service.return_value.generate_vehicle_transfer_document.return_value = JsonResponse({
+            'status': 'success', 'mode': 'open', 'filename': '__PROY__KAR2-2025.docx',
+        })
+        enqueue_job('protocolar', {'template_id': '5', 'kardex': 'KAR2-2025'})
+
+        job = run_job(claim_next_job())
+
+        mock_service.return_value.generate_vehicle_transfer_document.assert_called_once_with(
+            5, 'KAR2-2025', 'generate', 'open')
+        assert job.status == DocumentJob.STATUS_DONE
+        assert job.result['filename'] == '__PROY__KAR2-2025.docx'
+        assert job.active_key is None
+
+    @patch('ducumentation.shared.document_uploader.get_document_uploader')
+    def test_job_waits_for_its_upload(self, mock_get_uploader):
+        uploader = mock_get_uploader.return_value
+        uploader.wait.return_value = True
+
+        def handler(params):
+            upload_document('rodriguez-zea/documentos/__PROY__KAR1-2025.docx', b'docx')
+            return JsonResponse({'status': 'success', 'mode': 'open'})
+
+        enqueue_job('protocolar', {'template_id': 1, 'kardex': 'KAR1-2025'})
+        with patch.dict('ducumentation.jobs.JOB_KINDS', {'protocolar': (handler, 'kardex')}):
+            job = run_job(claim_next_job())
+
+        uploader.wait.assert_called_once()
+        assert job.status == DocumentJob.STATUS_DONE
+
+    @patch('ducumentation.shared.document_uploader.get_document_uploader')
+    def test_failed_upload_fails_the_job(self, mock_get_uploader):
+        mock_get_uploader.return_value.wait.return_value = False
+
+        def handler(params):
+            # Services log upload failures and still answer 200
+            upload_document('rodriguez-zea/documentos/__PROY__KAR1-2025.docx', b'docx')
+            return JsonResponse({'status': 'success', 'mode': 'open'})
+
+        enqueue_job('protocolar', {'template_id': 1, 'kardex': 'KAR1-2025'})
+        with patch.dict('ducumentation.jobs.JOB_KINDS', {'protocolar': (handler, 'kardex')}):
+            job = run_job(claim_next_job())
+
+        assert job.status == DocumentJob.STATUS_FAILED
+        assert '__PROY__KAR1-2025.docx' in job.error
+        assert job.active_key is None
+
+    @patch('ducumentation.jobs.Kardex')
+    def test_run_job_records_failure(self, mock_kardex):
+        mock_kardex.objects.filter.return_value.first.return_value = None
+        enqueue_job('protocolar', {'template_id': 1, 'kardex': 'MISSING'})
+
+        job = run_job(claim_next_job())
+
+        assert job.status == DocumentJob.STATUS_FAILED
+        assert 'not found' in job.error
+        assert job.finished_at is not None
+
+
+@pytest.mark.django_db
+class TestDocumentJobEndpoints:
+    """Test cases for the job status endpoint and the async view parameter."""
+
+    def setup_method(self):
+        self.api_client = APIClient()
+
+    def test_create_and_poll_job(self):
+        response = self.api_client.post('/docs/jobs/', {
+            'kind': 'permiso-viaje-exterior', 'params': {'id_viaje': 3},
+        }, format='json')
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['created'] is True
+
+        detail = self.api_client.get(f"/docs/jobs/{response.data['id']}/")
+        assert detail.status_code == status.HTTP_200_OK
+        assert detail.data['status'] == DocumentJob.STATUS_PENDING
+        assert detail.data['dedup_key'] == 'permiso-viaje-exterior:3'
+
+    def test_create_rejects_unknown_kind(self):
+        response = self.api_client.post('/docs/jobs/', {'kind': 'nope', 'params': {}}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    @patch('ducumentation.views.PermisoViajeInteriorDocumentService')
+    def test_async_param_queues_instead_of_generating(self, mock_service):
+        url = '/docs/extraprotocolares/permiso-viaje-interior/'
+
+        first = self.api_client.get(url, {'id_viaje': 9, 'async': '1'})
+        second = self.api_client.get(url, {'id_viaje': 9, 'async': '1'})
+
+        assert first.status_code == status.HTTP_202_ACCEPTED
+        assert first.data['status'] == 'queued'
+        assert second.data['status'] == 'already_queued'
+        assert second.data['job_id'] == first.data['job_id']
+        assert first.data['status_url'] == f"/docs/jobs/{first.data['job_id']}/"
+        mock_service.return_value.generate_permiso_viaje_interior_document.assert_not_called()
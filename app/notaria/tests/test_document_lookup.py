@@ -0,0 +1,152 @@
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+from model_bakery import baker
+from unittest.mock import MagicMock, patch
+
+from notaria import models
+from notaria.document_lookup import (
+    DNI, RUC, DocumentLookupCache, cliente_document_filter, get_document_lookup_cache, index_document, lookup_by_document,
+)
+from notaria.signals import cliente_saved
+from notaria.utils import normalize_document_number
+
+
+def _cliente(idcontratante, numdoc, idtipdoc=1):
+    return SimpleNamespace(idcontratante=idcontratante, numdoc=numdoc, idtipdoc=idtipdoc)
+
+
+@pytest.fixture
+def document_keys(db):
+    index_document(_cliente('0000000001', '40123456'))
+    index_document(_cliente('0000000002', '40123456789', idtipdoc=8))
+    index_document(_cliente('0000000003', '20.601.234.567', idtipdoc=8))
+
+
+@pytest.fixture
+def lookup_cache():
+    get_document_lookup_cache().invalidate()
+    yield get_document_lookup_cache()
+    get_document_lookup_cache().invalidate()
+
+
+def _model(label, instance):
+    model = MagicMock()
+    model._meta.label = label
+    model.objects.filter.return_value.order_by.return_value.first.return_value = instance
+    return model
+
+
+class TestDocumentFilter:
+    """Test cases for the document-number search filter."""
+
+    def test_normalization(self):
+        assert normalize_document_number(' 40.123-456 ') == '40123456'
+        assert normalize_document_number('ce 00123') == 'CE00123'
+        assert normalize_document_number(None) == ''
+
+    def test_exact_match_short_circuits(self, document_keys):
+        assert cliente_document_filter('40123456').children == [('idcontratante__in', ['0000000001'])]
+        assert models.ClienteDocumentKey.objects.get(idcontratante='0000000003').doc_key == '8:20601234567'
+
+    def test_prefix_before_substring(self, document_keys):
+        sql = str(models.Cliente2.objects.filter(cliente_document_filter('4012')).query)
+
+        assert 'cliente2_document_keys' in sql
+        assert cliente_document_filter('2345').children == [('numdoc__icontains', '2345')]
+
+    def test_reindex_replaces_number(self, document_keys):
+        index_document(_cliente('0000000001', '70000001'))
+        index_document(_cliente('0000000002', ''))
+
+        assert models.ClienteDocumentKey.objects.get(idcontratante='0000000001').numdoc == '70000001'
+        assert not models.ClienteDocumentKey.objects.filter(idcontratante='0000000002').exists()
+
+
+class TestDocumentLookupCache:
+    """Test cases for the DNI/RUC lookup LRU."""
+
+    def test_repeated_lookup_hits_cache(self, lookup_cache):
+        model = _model('notaria.Cliente', SimpleNamespace(pk='1', numdoc='40123456'))
+        serializer = MagicMock(side_effect=lambda instance: SimpleNamespace(data={'numdoc': instance.numdoc}))
+
+        first = lookup_by_document(model, '40123456', serializer)
+        second = lookup_by_document(model, '40.123.456', serializer)
+
+        assert first == second == {'numdoc': '40123456'}
+        assert model.objects.filter.call_count == 1
+        assert lookup_cache.stats['hits'] == 1
+
+    def test_misses_are_not_cached(self, lookup_cache):
+        model = _model('notaria.Cliente', None)
+
+        assert lookup_by_document(model, '999', MagicMock()) is None
+        assert lookup_by_document(model, '999', MagicMock()) is None
+        assert model.objects.filter.call_count == 2
+
+    def test_lru_and_ttl_bounds(self):
+        cache = DocumentLookupCache(max_entries=2, ttl=60)
+        for number in ('1', '2', '3'):
+            cache.set(('notaria.Cliente', number), number, {'numdoc': number})
+
+        assert cache.get(('notaria.Cliente', '1')) is None
+        with patch('notaria.document_lookup.time.time', return_value=10 ** 10):
+            assert cache.get(('notaria.Cliente', '3')) is None
+
+    def test_client_write_invalidates_entry(self, lookup_cache):
+        lookup_cache.set(('notaria.Cliente2', '40123456'), '0000000001', {'numdoc': '40123456'})
+        lookup_cache.set(('notaria.Cliente2', '70000001'), '0000000009', {'numdoc': '70000001'})
+
+        with patch('notaria.signals.index_cliente'), patch('notaria.signals.index_document'):
+            cliente_saved(models.Cliente2, models.Cliente2(idcontratante='0000000001', numdoc='50000000'))
+
+        assert lookup_cache.get(('notaria.Cliente2', '40123456')) is None
+        assert lookup_cache.get(('notaria.Cliente2', '70000001')) == {'numdoc': '70000001'}
+
+
+@pytest.fixture
+def cliente2_table():
+    """cliente2 is unmanaged: create it for the test."""
+    with connection.schema_editor() as editor:
+        editor.create_model(models.Cliente2)
+    yield
+    with connection.schema_editor() as editor:
+        editor.delete_model(models.Cliente2)
+
+
+class TestTypedLookup:
+    """by_dni / by_ruc resolve the type-prefixed doc_key first."""
+
+    def test_document_type_wins_over_newer_row(self, cliente2_table, lookup_cache):
+        baker.make(models.Cliente2, idcontratante='0000000001', idtipdoc=DNI, numdoc='40123456')
+        baker.make(models.Cliente2, idcontratante='0000000002', idtipdoc=5, numdoc='40123456')
+        serializer = MagicMock(side_effect=lambda instance: SimpleNamespace(data={'id': instance.idcontratante}))
+
+        assert lookup_by_document(models.Cliente2, '40.123.456', serializer, idtipdoc=DNI) == {'id': '0000000001'}
+        assert lookup_by_document(models.Cliente2, '40123456', serializer) == {'id': '0000000002'}
+
+    def test_falls_back_to_number_without_type_match(self, cliente2_table, lookup_cache):
+        baker.make(models.Cliente2, idcontratante='0000000001', idtipdoc=9, numdoc='20601234567')
+        serializer = MagicMock(side_effect=lambda instance: SimpleNamespace(data={'id': instance.idcontratante}))
+
+        assert lookup_by_document(models.Cliente2, '20601234567', serializer, idtipdoc=RUC) == {'id': '0000000001'}
+
+
+class TestByDniActions:
+    """by_dni / by_ruc answer from the lookup helper."""
+
+    def test_by_dni_returns_empty_when_unknown(self, api_client):
+        with patch('notaria.views.lookup_by_document', return_value=None) as mock_lookup:
+            response = api_client.get('/api/cliente2/by_dni/', {'dni': '40123456'})
+
+        assert response.status_code == 200
+        assert response.data == {}
+        assert mock_lookup.call_args.args[1] == '40123456'
+        assert mock_lookup.call_args.kwargs == {'idtipdoc': DNI}
+
+    def test_by_ruc_returns_cached_data(self, api_client):
+        with patch('notaria.views.lookup_by_document', return_value={'numdoc': '20601234567'}):
+            response = api_client.get('/api/cliente/by_ruc/', {'ruc': '20601234567'})
+
+        assert response.data == {'numdoc': '20601234567'}
@@ -0,0 +1,82 @@
+import os
+
+import pytest
+from unittest.mock import patch
+
+from ducumentation.extraprotocolares.libros import LibrosDocumentService
+from ducumentation.shared.storage import MemoryStorageClient, set_storage_client
+
+DOCUMENT = b'PK' + b'0123456789' * 100
+URL = '/docs/download/K1-2025/__PROY__K1-2025.docx'
+
+
+@pytest.fixture
+def storage():
+    client = MemoryStorageClient()
+    client.put_object(Bucket='notaria', Key='rodriguez-zea/documentos/__PROY__K1-2025.docx', Body=DOCUMENT)
+    client.put_object(Bucket='notaria', Key='rodriguez-zea/documentos/__LIBRO__7-2025.docx', Body=DOCUMENT)
+    set_storage_client(client)
+    with patch.dict(os.environ, {'CLOUDFLARE_R2_BUCKET': 'notaria'}), \
+            patch('ducumentation.shared.document_stream.pending_document', return_value=None):
+        yield client
+    set_storage_client(None)
+
+
+class TestDocumentStreaming:
+    """Test cases for streaming downloads with conditional and range requests."""
+
+    def test_download_streams_with_real_etag(self, storage, api_client):
+        response = api_client.get(URL)
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert b''.join(response.streaming_content) == DOCUMENT
+        assert response['Content-Length'] == str(len(DOCUMENT))
+        assert response['ETag'] == storage.head_object(Bucket='notaria', Key='rodriguez-zea/documentos/__PROY__K1-2025.docx')['ETag']
+        assert response['Accept-Ranges'] == 'bytes'
+
+    def test_matching_if_none_match_returns_304(self, storage, api_client):
+        etag = api_client.get(URL)['ETag']
+
+        response = api_client.get(URL, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert response.content == b''
+
+    def test_stale_if_none_match_returns_document(self, storage, api_client):
+        response = api_client.get(URL, HTTP_IF_NONE_MATCH='"stale"')
+
+        assert response.status_code == 200
+        assert b''.join(response.streaming_content) == DOCUMENT
+
+    def test_range_returns_partial_content(self, storage, api_client):
+        response = api_client.get(URL, HTTP_RANGE='bytes=0-9')
+
+        assert response.status_code == 206
+        assert b''.join(response.streaming_content) == DOCUMENT[:10]
+        assert response['Content-Range'] == f'bytes 0-9/{len(DOCUMENT)}'
+        assert response['Content-Length'] == '10'
+
+    def test_unsatisfiable_range_returns_416(self, storage, api_client):
+        response = api_client.get(URL, HTTP_RANGE=f'bytes={len(DOCUMENT) + 10}-')
+
+        assert response.status_code == 416
+
+    def test_missing_document_returns_404(self, storage, api_client):
+        response = api_client.get('/docs/download/NOPE-2025/__PROY__NOPE-2025.docx')
+
+        assert response.status_code == 404
+
+    def test_extraprotocolar_retrieve_streams(self, storage):
+        response = LibrosDocumentService().retrieve_libro_document('7', '2025')
+
+        assert response.status_code == 200
+        assert b''.join(response.streaming_content) == DOCUMENT
+        assert response['Content-Disposition'] == 'inline; filename="__LIBRO__7-2025.docx"'
+        assert response['Access-Control-Allow-Origin'] == '*'
+
+    def test_extraprotocolar_retrieve_missing_returns_404(self, storage):
+        response = LibrosDocumentService().retrieve_libro_document('8', '2025')
+
+        assert response.status_code == 404
@@ -0,0 +1,167 @@
+import io
+import os
+import threading
+import time
+
+from unittest.mock import patch
+
+from ducumentation.shared.base_r2_documents import BaseR2DocumentService
+from ducumentation.shared.document_uploader import LOCK_FILE, DocumentUploader
+
+
+class FakeR2:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.objects = {}
+        self.calls = 0
+
+    def put_object(self, key, content):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("R2 unavailable")
+        self.objects[key] = content
+
+
+def _uploader(tmp_path, r2, **kwargs):
+    kwargs.setdefault('backoff', 0)
+    kwargs.setdefault('retry_interval', 0)
+    return DocumentUploader(spool_dir=str(tmp_path), max_workers=2, put_object=r2.put_object, **kwargs)
+
+
+class TestDocumentUploader:
+    """Test cases for the write-behind R2 uploader."""
+
+    def test_upload_happens_in_background_and_clears_spool(self, tmp_path):
+        r2 = FakeR2()
+        uploader = _uploader(tmp_path, r2)
+
+        uploader.submit('documentos/a.docx', b'A')
+
+        assert uploader.flush(timeout=5)
+        assert r2.objects == {'documentos/a.docx': b'A'}
+        assert os.listdir(uploader.spool_dir) == [LOCK_FILE]
+        assert uploader.metrics()['uploaded'] == 1
+        assert uploader.metrics()['pending'] == 0
+
+    def test_transient_failures_are_retried(self, tmp_path):
+        r2 = FakeR2(failures=2)
+        uploader = _uploader(tmp_path, r2, max_attempts=3)
+
+        uploader.submit('documentos/a.docx', b'A')
+
+        assert uploader.wait('documentos/a.docx', timeout=5)
+        assert r2.calls == 3
+        assert uploader.stats['retries'] == 2
+
+    def test_failed_upload_stays_spooled_and_is_recovered(self, tmp_path):
+        uploader = _uploader(tmp_path, FakeR2(failures=10), max_attempts=2)
+        uploader.submit('documentos/a.docx', b'A')
+
+        assert not uploader.wait('documentos/a.docx', timeout=5)
+        assert uploader.pending_content('documentos/a.docx') == b'A'
+
+        # The owner dies; the next process adopts its spool directory
+        uploader.shutdown()
+        r2 = FakeR2()
+        restarted = _uploader(tmp_path, r2)
+        assert restarted.recover() == 1
+        assert restarted.flush(timeout=5)
+        assert r2.objects == {'documentos/a.docx': b'A'}
+        assert restarted.pending_content('documentos/a.docx') is None
+        assert not os.path.exists(uploader.spool_dir)
+
+    def test_spool_of_a_live_process_is_not_adopted(self, tmp_path):
+        owner = _uploader(tmp_path, FakeR2(failures=10), max_attempts=1)
+        owner.submit('documentos/a.docx', b'A')
+        assert not owner.wait('documentos/a.docx', timeout=5)
+
+        r2 = FakeR2()
+        other = _uploader(tmp_path, r2)
+
+        assert other.recover() == 0
+        assert r2.calls == 0
+        assert owner.pending_content('documentos/a.docx') == b'A'
+
+    def test_failed_upload_is_retried_by_the_sweep(self, tmp_path):
+        r2 = FakeR2(failures=2)
+        uploader = _uploader(tmp_path, r2, max_attempts=2, retry_interval=0.05)
+
+        uploader.submit('documentos/a.docx', b'A')
+
+        assert not uploader.wait('documentos/a.docx', timeout=5)
+        deadline = time.time() + 5
+        while 'documentos/a.docx' not in r2.objects and time.time() < deadline:
+            time.sleep(0.01)
+        assert uploader.flush(timeout=5)
+        assert r2.objects == {'documentos/a.docx': b'A'}
+        assert uploader.pending_content('documentos/a.docx') is None
+        uploader.shutdown()
+
+    def test_spooled_version_older_than_a_landed_one_is_dropped(self, tmp_path):
+        dead = _uploader(tmp_path, FakeR2(failures=10), max_attempts=1)
+        dead.submit('documentos/a.docx', b'OLD', queued_at=100.0)
+        assert not dead.wait('documentos/a.docx', timeout=5)
+        dead.shutdown()
+
+        r2 = FakeR2()
+        uploader = _uploader(tmp_path, r2)
+        uploader.submit('documentos/a.docx', b'NEW', queued_at=200.0)
+        assert uploader.flush(timeout=5)
+
+        assert uploader.recover() == 0
+        assert r2.objects == {'documentos/a.docx': b'NEW'}
+
+    def test_pending_content_is_served_until_upload_lands(self, tmp_path):
+        release = threading.Event()
+        r2 = FakeR2()
+
+        def slow_put(key, content):
+            release.wait(5)
+            r2.put_object(key, content)
+
+        uploader = DocumentUploader(spool_dir=str(tmp_path), max_workers=1, backoff=0, put_object=slow_put, retry_interval=0)
+        uploader.submit('documentos/a.docx', b'A')
+
+        assert uploader.is_pending('documentos/a.docx')
+        assert uploader.pending_content('documentos/a.docx') == b'A'
+        assert uploader.upload_lag() >= 0
+        release.set()
+        assert uploader.flush(timeout=5)
+
+    def test_resubmitted_key_uploads_latest_content(self, tmp_path):
+        started, release = threading.Event(), threading.Event()
+        r2 = FakeR2()
+
+        def blocking_put(key, content):
+            started.set()
+            release.wait(5)
+            r2.put_object(key, content)
+
+        uploader = DocumentUploader(spool_dir=str(tmp_path), max_workers=2, backoff=0, put_object=blocking_put, retry_interval=0)
+        first = uploader.submit('documentos/a.docx', b'V1')
+        started.wait(5)
+        uploader.submit('documentos/a.docx', b'V2')
+        release.set()
+
+        assert uploader.flush(timeout=5)
+        assert r2.objects['documentos/a.docx'] == b'V2'
+        assert first.done.is_set() and first.uploaded
+
+
+class TestServicesUseUploader:
+    """Extraprotocolares services queue their documents instead of blocking on R2."""
+
+    @patch('ducumentation.shared.render_cache.upload_document', return_value=True)
+    def test_save_document_to_r2_queues_bytes(self, mock_upload):
+        BaseR2DocumentService()._save_document_to_r2(io.BytesIO(b'DOCX'), '__CARTA__1.docx')
+
+        mock_upload.assert_called_once_with('rodriguez-zea/documentos/__CARTA__1.docx', b'DOCX', wait=False)
+
+    @patch('ducumentation.shared.document_stream.pending_document', return_value=b'DOCX')
+    def test_download_serves_pending_upload(self, mock_pending, api_client):
+        response = api_client.get('/docs/download/K1-2025/__PROY__K1-2025.docx')
+
+        assert response.status_code == 200
+        assert response.content == b'DOCX'
+        mock_pending.assert_called_once_with('rodriguez-zea/documentos/__PROY__K1-2025.docx')
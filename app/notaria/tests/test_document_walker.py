@@ -0,0 +1,89 @@
+from docx import Document
+from docx.oxml import parse_xml
+
+from ducumentation.shared.document_walker import DocumentWalker, PlaceholderCleanup, iter_paragraphs
+from ducumentation.shared.placeholders import PlaceholderSubstitution, WHITE
+
+TEXTBOX_PARAGRAPH = (
+    '<w:p xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    ' xmlns:v="urn:schemas-microsoft-com:vml">'
+    '<w:r><w:pict><v:shape><v:textbox><w:txbxContent>'
+    '<w:p><w:r><w:t>CAJA {{NOMBRE}}</w:t></w:r></w:p>'
+    '</w:txbxContent></v:textbox></v:shape></w:pict></w:r>'
+    '</w:p>'
+)
+
+
+def _document():
+    doc = Document()
+    doc.sections[0].header.paragraphs[0].text = "CABECERA {{NOMBRE}}"
+    doc.sections[0].footer.paragraphs[0].text = "PIE {{NOMBRE}}"
+    doc.add_paragraph("CUERPO {{NOMBRE}}")
+
+    table = doc.add_table(rows=1, cols=3)
+    merged = table.cell(0, 0).merge(table.cell(0, 1))
+    merged.paragraphs[0].text = "COMBINADA {{NOMBRE}}"
+    nested = table.cell(0, 2).add_table(rows=1, cols=1)
+    nested.cell(0, 0).paragraphs[0].text = "ANIDADA {{NOMBRE}}"
+
+    doc.element.body.insert(len(doc.element.body) - 1, parse_xml(TEXTBOX_PARAGRAPH))
+    return doc
+
+
+class TestDocumentWalker:
+    """Test cases for the single-traversal document walker."""
+
+    def test_visits_headers_footers_nested_tables_and_text_boxes(self):
+        texts = [paragraph.text for paragraph in iter_paragraphs(_document())]
+
+        for expected in ("CUERPO", "CABECERA", "PIE", "ANIDADA", "CAJA"):
+            assert any(text.startswith(expected) for text in texts), expected
+
+    def test_merged_cell_is_visited_once(self):
+        texts = [paragraph.text for paragraph in iter_paragraphs(_document())]
+
+        assert texts.count("COMBINADA {{NOMBRE}}") == 1
+
+    def test_substitution_reaches_every_story(self):
+        doc = _document()
+        substitution = PlaceholderSubstitution({'NOMBRE': 'ANA'})
+
+        DocumentWalker(substitution.replace_in_paragraph).walk(doc)
+
+        assert not any('{{NOMBRE}}' in paragraph.text for paragraph in iter_paragraphs(doc))
+        assert doc.sections[0].header.paragraphs[0].text == "CABECERA ANA"
+        assert doc.sections[0].footer.paragraphs[0].text == "PIE ANA"
+
+
+class TestPlaceholderCleanup:
+    """Test cases for the cleanup visitor used by remove_unfilled_placeholders."""
+
+    def _paragraph(self, text):
+        return Document().add_paragraph(text)
+
+    def test_hide_mode_removes_markers_and_hides_placeholders(self):
+        paragraph = self._paragraph("[E.P_NOM_2]{{P_NOM_3}}")
+
+        PlaceholderCleanup(unfilled='hide')(paragraph)
+
+        assert paragraph.text == "{{P_NOM_3}}"
+        assert paragraph.runs[0].font.color.rgb == WHITE
+
+    def test_remove_mode_keeps_escrituracion_placeholders_hidden(self):
+        removed = self._paragraph("A {{P_NOM_3}}, , B,")
+        kept = self._paragraph("{{NRO_ESC}}")
+
+        cleanup = PlaceholderCleanup(unfilled='remove', remove_empty_markers=False, fix_commas=True)
+        cleanup(removed)
+        cleanup(kept)
+
+        assert removed.text == "A , B"
+        assert kept.text == "{{NRO_ESC}}"
+        assert kept.runs[0].font.color.rgb == WHITE
+
+    def test_representation_phrase_is_removed(self):
+        paragraph = self._paragraph("FIRMA EN REPRESENTACION DE Y... FIN")
+
+        PlaceholderCleanup()(paragraph)
+
+        assert paragraph.text == "FIRMA FIN"
@@ -0,0 +1,182 @@
+import io
+import zipfile
+from unittest.mock import MagicMock, patch
+
+from docx import Document
+from docx.oxml.ns import qn
+
+from ducumentation import views
+from ducumentation.services import NonContentiousDocumentService, VehicleTransferDocumentService, process_project_document
+from ducumentation.shared.field_manifest import patch_fields, read_field_manifest
+from ducumentation.shared.placeholders import RED, WHITE
+
+
+def _template_bytes(*paragraphs) -> bytes:
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _generate(service, template: bytes, data: dict, cleanup: bool = False) -> bytes:
+    doc = process_project_document(service, template, data, cleanup)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _texts(content: bytes):
+    return [paragraph.text for paragraph in Document(io.BytesIO(content)).paragraphs]
+
+
+def _edit(content: bytes, index: int, old: str, new: str) -> bytes:
+    """Simulate a manual edit in Word: change the text of one run."""
+    doc = Document(io.BytesIO(content))
+    for run in doc.paragraphs[index].runs:
+        if run.text == old:
+            run.text = new
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+NON_CONTENTIOUS_DATA = {'P_NOM_1': 'ANA', 'P_DOC_1': '123', 'NRO_ESC': '{{NRO_ESC}}', 'P_OCUPACION_1': ''}
+
+
+class TestFieldManifest:
+    """Generated documents carry a manifest of where each value went."""
+
+    def test_values_are_bookmarked_and_recorded(self):
+        content = _generate(NonContentiousDocumentService(), _template_bytes(
+            "SOLICITANTE {{P_NOM_1}} DNI {{P_DOC_1}}", "ACTA {{NRO_ESC}}",
+        ), NON_CONTENTIOUS_DATA)
+
+        manifest = read_field_manifest(content)
+
+        assert _texts(content)[-2:] == ["SOLICITANTE ANA DNI 123", "ACTA {{NRO_ESC}}"]
+        assert manifest.color == RED and manifest.skip_empty
+        assert manifest.fields['P_NOM_1']['value'] == 'ANA'
+        assert list(manifest.fields['P_NOM_1']['locations']['/word/document.xml'].values()) == ['ANA']
+        body = Document(io.BytesIO(content)).element.body
+        names = [start.get(qn('w:name')) for start in body.iter(qn('w:bookmarkStart'))]
+        assert len(names) == 3 and all(name.startswith('_fld') for name in names)
+
+    def test_document_without_manifest_is_not_patched(self):
+        assert patch_fields(_template_bytes("SOLICITANTE ANA"), {'P_NOM_1': 'LUIS'}) is None
+
+
+class TestPatchFields:
+    """Updates rewrite only the bookmarked runs of the changed fields."""
+
+    def _content(self):
+        return _generate(NonContentiousDocumentService(), _template_bytes(
+            "SOLICITANTE {{P_NOM_1}} DNI {{P_DOC_1}}", "ACTA {{NRO_ESC}} OCUPACION {{P_OCUPACION_1}}",
+        ), NON_CONTENTIOUS_DATA)
+
+    def test_only_changed_fields_are_patched(self):
+        content = _edit(self._content(), -2, 'SOLICITANTE ', 'LA SOLICITANTE ')
+
+        result = patch_fields(content, {**NON_CONTENTIOUS_DATA, 'P_DOC_1': '999'})
+
+        assert result['updated'] == ['P_DOC_1']
+        assert _texts(result['content'])[-2] == "LA SOLICITANTE ANA DNI 999"
+        assert read_field_manifest(result['content']).fields['P_DOC_1']['value'] == '999'
+
+    def test_unchanged_data_returns_the_same_bytes(self):
+        content = self._content()
+
+        result = patch_fields(content, dict(NON_CONTENTIOUS_DATA))
+
+        assert result['content'] is content
+        assert result['updated'] == []
+
+    def test_only_touched_parts_are_rewritten(self):
+        content = self._content()
+
+        result = patch_fields(content, {**NON_CONTENTIOUS_DATA, 'P_NOM_1': 'LUIS'})
+
+        with zipfile.ZipFile(io.BytesIO(content)) as before, zipfile.ZipFile(io.BytesIO(result['content'])) as after:
+            changed = [name for name in before.namelist() if before.read(name) != after.read(name)]
+        assert sorted(changed) == ['customXml/fieldManifest.xml', 'word/document.xml']
+
+    def test_manual_edit_of_a_field_is_preserved(self):
+        content = _edit(self._content(), -2, 'ANA', 'ANA MARIA')
+
+        result = patch_fields(content, {**NON_CONTENTIOUS_DATA, 'P_NOM_1': 'LUIS'})
+
+        assert result['updated'] == []
+        assert result['skipped'] == ['P_NOM_1']
+        assert _texts(result['content'])[-2] == "SOLICITANTE ANA MARIA DNI 123"
+
+    def test_hidden_placeholder_is_filled_and_shown(self):
+        service = NonContentiousDocumentService()
+        content = self._content()
+
+        result = patch_fields(content, {**NON_CONTENTIOUS_DATA, 'NRO_ESC': '1520', 'P_OCUPACION_1': 'ABOGADA'},
+                              service._cleanup_visitor())
+
+        assert result['updated'] == ['NRO_ESC', 'P_OCUPACION_1']
+        paragraph = Document(io.BytesIO(result['content'])).paragraphs[-1]
+        assert paragraph.text == "ACTA 1520 OCUPACION ABOGADA"
+        assert [run.font.color.rgb for run in paragraph.runs if run.text in ('1520', 'ABOGADA')] == [RED, RED]
+
+    def test_emptied_value_is_hidden_again(self):
+        service = NonContentiousDocumentService()
+        content = patch_fields(self._content(), {**NON_CONTENTIOUS_DATA, 'NRO_ESC': '1520'},
+                               service._cleanup_visitor())['content']
+
+        result = patch_fields(content, dict(NON_CONTENTIOUS_DATA), service._cleanup_visitor())
+
+        paragraph = Document(io.BytesIO(result['content'])).paragraphs[-1]
+        hidden = [run for run in paragraph.runs if run.text == '{{NRO_ESC}}']
+        assert result['updated'] == ['NRO_ESC']
+        assert hidden and hidden[0].font.color.rgb == WHITE
+
+
+class TestTemplateFields:
+    """docxtpl templates mark their plain variables before rendering."""
+
+    def test_plain_variables_are_patched(self):
+        service = VehicleTransferDocumentService()
+        content = _generate(service, _template_bytes("PLACA {{ PLACA }} MARCA {{MARCA}}"),
+                            {'PLACA': 'ABC-123', 'MARCA': 'TOYOTA'}, cleanup=True)
+
+        result = patch_fields(content, {'PLACA': 'XYZ-987', 'MARCA': 'TOYOTA'}, service._cleanup_visitor())
+
+        assert _texts(result['content'])[-1] == "PLACA XYZ-987 MARCA TOYOTA"
+        assert result['updated'] == ['PLACA']
+
+    def test_change_in_template_logic_needs_a_full_render(self):
+        service = VehicleTransferDocumentService()
+        content = _generate(service, _template_bytes("PLACA {{ PLACA }}{% if MONEDA == 'S' %} SOLES{% endif %}"),
+                            {'PLACA': 'ABC-123', 'MONEDA': 'S'}, cleanup=True)
+
+        assert _texts(content)[-1] == "PLACA ABC-123 SOLES"
+        assert patch_fields(content, {'PLACA': 'XYZ-987', 'MONEDA': 'S'})['updated'] == ['PLACA']
+        assert patch_fields(content, {'PLACA': 'ABC-123', 'MONEDA': 'D'}) is None
+
+
+class TestSmartUpdateView:
+    """The update endpoint patches stored documents instead of regenerating them."""
+
+    @patch('ducumentation.views.upload_rendered', return_value=True)
+    @patch('ducumentation.views.get_s3_client')
+    def test_vehicle_update_patches_stored_document(self, mock_s3_client, mock_upload):
+        service = VehicleTransferDocumentService()
+        stored = _generate(service, _template_bytes("PLACA {{ PLACA }}"), {'PLACA': 'ABC-123'}, cleanup=True)
+        s3 = MagicMock()
+        s3.get_object.return_value = {'Body': io.BytesIO(stored)}
+        mock_s3_client.return_value = s3
+
+        with patch.object(VehicleTransferDocumentService, 'get_document_data', return_value={'PLACA': 'XYZ-987'}), \
+                patch.object(VehicleTransferDocumentService, 'generate_vehicle_transfer_document') as mock_generate:
+            result = views._smart_update_with_auto_discovery(1, 'KAR3-2024')
+
+        assert result['update_type'] == 'incremental'
+        assert result['updated_fields'] == ['PLACA']
+        mock_generate.assert_not_called()
+        object_key, content = mock_upload.call_args[0]
+        assert object_key == 'rodriguez-zea/documentos/__PROY__KAR3-2024.docx'
+        assert _texts(content)[-1] == "PLACA XYZ-987"
@@ -0,0 +1,129 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from model_bakery import baker
+
+from core.metrics import Histogram, count_queries
+from core.models import User
+from ducumentation.shared.instrumentation import GENERATION_SECONDS, STEP_QUERIES, STEP_SECONDS, generation, span
+from ducumentation.shared.render_cache import get_render_cache
+
+
+class TestHistogram:
+    """Histograms render in the Prometheus text format."""
+
+    def test_render(self):
+        histogram = Histogram('step_seconds', 'Step duration.', ('step',), buckets=(0.1, 1))
+        histogram.observe(0.05, 'render')
+        histogram.observe(0.5, 'render')
+
+        assert histogram.render() == [
+            '# HELP step_seconds Step duration.',
+            '# TYPE step_seconds histogram',
+            'step_seconds_bucket{step="render",le="0.1"} 1',
+            'step_seconds_bucket{step="render",le="1"} 2',
+            'step_seconds_bucket{step="render",le="+Inf"} 2',
+            'step_seconds_sum{step="render"} 0.55',
+            'step_seconds_count{step="render"} 2',
+        ]
+
+    def test_label_count_is_checked(self):
+        with pytest.raises(ValueError):
+            Histogram('step_seconds', 'Step duration.', ('step',)).observe(1)
+
+
+class TestSpans:
+    """Generation steps feed the per-service histograms."""
+
+    def test_steps_are_timed_and_queries_counted(self):
+        with generation('EscrituraPublicaDocumentService', 'KAR1-2024') as trace:
+            with span('sql'):
+                list(User.objects.all())
+                User.objects.exists()
+            with span('render'):
+                pass
+
+        assert [(step, queries) for step, _, queries in trace.steps] == [('sql', 2), ('render', 0)]
+        assert STEP_QUERIES.total('EscrituraPublicaDocumentService', 'sql') == 2
+        assert STEP_SECONDS.count('EscrituraPublicaDocumentService', 'render') == 1
+        assert GENERATION_SECONDS.count('EscrituraPublicaDocumentService', 'ok') == 1
+
+    def test_failed_generation_is_labelled(self):
+        with pytest.raises(RuntimeError):
+            with generation('TestamentoDocumentService'):
+                with span('template'):
+                    raise RuntimeError('template missing')
+
+        assert GENERATION_SECONDS.count('TestamentoDocumentService', 'error') == 1
+        assert STEP_SECONDS.count('TestamentoDocumentService', 'template') == 1
+
+    def test_span_outside_generation_uses_given_service(self):
+        with span('upload', 'LibrosDocumentService'):
+            pass
+
+        assert STEP_SECONDS.count('LibrosDocumentService', 'upload') == 1
+
+    def test_count_queries(self):
+        with count_queries() as queries:
+            User.objects.exists()
+
+        assert queries.count == 1
+
+
+@pytest.fixture
+def metrics_client(api_client):
+    """Client sending the scraper's bearer token."""
+    with patch.dict('os.environ', {'METRICS_TOKEN': 's3cret'}):
+        api_client.credentials(HTTP_AUTHORIZATION='Bearer s3cret')
+        yield api_client
+        api_client.credentials()
+
+
+class TestMetricsEndpoint:
+    """Test cases for /metrics."""
+
+    def test_histograms_and_collectors_are_served(self, metrics_client):
+        with generation('VehicleTransferDocumentService', 'KAR3-2024'):
+            with span('render'):
+                pass
+        with patch.dict(get_render_cache().stats, {'hits': 3}):
+            response = metrics_client.get('/metrics')
+        body = response.content.decode()
+
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        assert 'document_step_seconds_count{service="VehicleTransferDocumentService",step="render"} 1' in body
+        assert 'document_generation_seconds_count{service="VehicleTransferDocumentService",outcome="ok"} 1' in body
+        assert '# TYPE render_cache_hits gauge\nrender_cache_hits 3' in body
+        assert 'catalog_cache_loads ' in body
+
+    def test_token_is_required_when_configured(self, api_client):
+        with patch.dict('os.environ', {'METRICS_TOKEN': 's3cret'}):
+            denied = api_client.get('/metrics')
+            allowed = api_client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+
+        assert denied.status_code == 401
+        assert allowed.status_code == 200
+
+    def test_hidden_without_a_token(self, api_client):
+        with patch.dict('os.environ'):
+            os.environ.pop('METRICS_TOKEN', None)
+            response = api_client.get('/metrics')
+
+        assert response.status_code == 404
+
+
+class TestQueryCountMiddleware:
+    """Every response reports its SQL query count."""
+
+    def test_query_count_header_and_histogram(self, api_client):
+        api_client.force_authenticate(baker.make(User))
+
+        response = api_client.get('/auth/users/')
+        with patch.dict('os.environ', {'METRICS_TOKEN': 's3cret'}):
+            metrics = api_client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret').content.decode()
+
+        assert int(response['X-Query-Count']) >= 1
+        assert 'http_request_queries_count{view="user-list"} 1' in metrics
+        assert 'view="metrics"' not in metrics
@@ -0,0 +1,219 @@
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import patch
+from django.db import connection
+
+from notaria import models
+from notaria.page_enrichment import kardex_page_context, name_filter
+
+
+class FakeKardexQuerySet(list):
+    """List standing in for an ordered Kardex queryset; records COUNT/EXISTS calls."""
+    ordered = True
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.count_calls = 0
+        self.exists_calls = 0
+
+    def count(self):
+        self.count_calls += 1
+        return len(self)
+
+    def exists(self):
+        self.exists_calls += 1
+        return bool(self)
+
+
+def _kardex(number, idusuario=1):
+    return models.Kardex(idkardex=number, kardex=f'KAR{number}-2025', idusuario=idusuario, idtipkar=1, fechaingreso='01/01/2025')
+
+
+@pytest.fixture
+def related_tables():
+    """Usuarios, Contratantes and Cliente2 as seen by the enrichment helpers."""
+    with patch('notaria.page_enrichment.models') as mock_models:
+        mock_models.Usuarios.objects.filter.return_value = [
+            SimpleNamespace(idusuario=1, prinom='ANA', segnom='', apepat='RUIZ', apemat='DIAZ'),
+        ]
+        mock_models.Contratantes.objects.filter.return_value.values.return_value = [
+            {'idcontratante': '0000000001', 'kardex': 'KAR1-2025'},
+            {'idcontratante': '0000000002', 'kardex': 'KAR1-2025'},
+            {'idcontratante': '0000000003', 'kardex': 'KAR2-2025'},
+        ]
+        clientes = mock_models.Cliente2.objects.filter.return_value
+        clientes.filter.return_value.values.return_value = [
+            {'idcontratante': '0000000002', 'idcliente': '2', 'nombre': 'PEREZ JUAN', 'numdoc': '4000', 'razonsocial': None},
+        ]
+        clientes.values.return_value = [
+            {'idcontratante': '0000000001', 'idcliente': '1', 'nombre': None, 'numdoc': '2010', 'razonsocial': 'AUTOS SAC'},
+            {'idcontratante': '0000000002', 'idcliente': '2', 'nombre': 'PEREZ JUAN', 'numdoc': '4000', 'razonsocial': None},
+        ]
+        yield mock_models
+
+
+class TestKardexPageContext:
+    """Test cases for page-only serializer enrichment."""
+
+    def test_loads_related_rows_for_page_only(self, related_tables):
+        context = kardex_page_context([_kardex(1), _kardex(2)])
+
+        related_tables.Usuarios.objects.filter.assert_called_once_with(idusuario__in={1})
+        related_tables.Contratantes.objects.filter.assert_called_once_with(kardex__in={'KAR1-2025', 'KAR2-2025'})
+        related_tables.Cliente2.objects.filter.assert_called_once_with(
+            idcontratante__in={'0000000001', '0000000002', '0000000003'})
+        assert context['contratantes_map']['KAR1-2025'] == ['0000000001', '0000000002']
+        # No Cliente2 row, so not listed
+        assert 'KAR2-2025' not in context['contratantes_map']
+
+    def test_search_filter_keeps_only_matching_parties(self, related_tables):
+        context = kardex_page_context([_kardex(1)], name_filter('PEREZ'))
+
+        assert context['contratantes_map']['KAR1-2025'] == ['0000000002']
+        assert list(context['clientes_map']) == ['0000000002']
+
+    def test_empty_page_runs_no_queries(self, related_tables):
+        context = kardex_page_context([])
+
+        related_tables.Usuarios.objects.filter.assert_not_called()
+        related_tables.Contratantes.objects.filter.assert_not_called()
+        assert context['clientes_map'] == {}
+
+
+class TestKardexSearchActions:
+    """Test cases for by_name / by_document / kardex_by_correlative."""
+
+    url = '/api/kardex/'
+
+    def test_by_name_paginates_with_one_count(self, related_tables, api_client):
+        kardex_qs = FakeKardexQuerySet([_kardex(1), _kardex(2)])
+
+        with patch('notaria.views.kardex_for_clientes', return_value=kardex_qs) as mock_search:
+            response = api_client.get(f'{self.url}by_name/', {'name': 'PEREZ', 'idtipkar': 1})
+
+        assert response.status_code == 200
+        assert response.data['count'] == 2
+        assert response.data['results'][0]['cliente'] == 'PEREZ JUAN'
+        assert response.data['results'][0]['usuario'] == 'ANA  RUIZ DIAZ'
+        assert kardex_qs.count_calls == 1
+        assert kardex_qs.exists_calls == 0
+        assert mock_search.call_args.args[1] == '1'
+
+    def test_cached_zero_is_confirmed(self, related_tables, api_client):
+        kardex_qs = FakeKardexQuerySet([_kardex(1)])
+
+        with patch('notaria.views.kardex_for_clientes', return_value=kardex_qs), \
+                patch('notaria.pagination.list_count', side_effect=[0, 1]), \
+                patch('notaria.page_enrichment.get_count_cache') as mock_cache:
+            response = api_client.get(f'{self.url}by_name/', {'name': 'PEREZ', 'idtipkar': 1})
+
+        assert response.status_code == 200
+        assert response.data['count'] == 1
+        assert kardex_qs.exists_calls == 1
+        mock_cache.return_value.discard.assert_called_once_with(kardex_qs)
+
+    def test_by_document_unknown_document_returns_404(self, api_client):
+        with patch('notaria.views.kardex_for_clientes', return_value=FakeKardexQuerySet()), \
+                patch('notaria.views.models') as mock_models:
+            mock_models.Cliente2.objects.filter.return_value.exists.return_value = False
+            response = api_client.get(f'{self.url}by_document/', {'document': '999', 'idtipkar': 1})
+
+        assert response.status_code == 404
+
+    def test_by_document_without_kardex_returns_empty(self, api_client):
+        with patch('notaria.views.kardex_for_clientes', return_value=FakeKardexQuerySet()), \
+                patch('notaria.views.models') as mock_models:
+            mock_models.Cliente2.objects.filter.return_value.exists.return_value = True
+            response = api_client.get(f'{self.url}by_document/', {'document': '4000', 'idtipkar': 1})
+
+        assert response.status_code == 200
+        assert response.data == {}
+
+    def test_search_requires_parameter(self, api_client):
+        assert api_client.get(f'{self.url}by_name/').status_code == 400
+        assert api_client.get(f'{self.url}kardex_by_correlative/').status_code == 400
+
+
+
+@pytest.fixture
+def kardex_table():
+    """Kardex is unmanaged: create it with three ACT kardex for the test."""
+    with connection.schema_editor() as editor:
+        editor.create_model(models.Kardex)
+    try:
+        for number in (1, 2, 3):
+            row = _kardex(number)
+            row.kardex = f'ACT{number}-2025'
+            for field in models.Kardex._meta.concrete_fields:
+                if getattr(row, field.attname) is None and not field.null:
+                    setattr(row, field.attname, 0 if field.get_internal_type() == 'IntegerField' else '')
+            row.save()
+        yield models.Kardex.objects.all()
+    finally:
+        with connection.schema_editor() as editor:
+            editor.delete_model(models.Kardex)
+
+
+class TestKardexSearchCursor:
+    """Test cases for the search actions called with a `cursor` parameter."""
+
+    url = '/api/kardex/'
+
+    def test_kardex_by_correlative_with_cursor(self, kardex_table, related_tables, api_client):
+        params = {'correlative': 'ACT', 'idtipkar': 1, 'cursor': '', 'page_size': 2}
+        response = api_client.get(f'{self.url}kardex_by_correlative/', params)
+
+        assert response.status_code == 200
+        assert [row['idkardex'] for row in response.data['results']] == [3, 2]
+        assert response.data['count'] is None
+        assert response.data['previous'] is None
+
+        params['cursor'] = response.data['next'].split('cursor=')[1].split('&')[0]
+        response = api_client.get(f'{self.url}kardex_by_correlative/', params)
+
+        assert response.status_code == 200
+        assert [row['idkardex'] for row in response.data['results']] == [1]
+        assert response.data['next'] is None
+
+    def test_kardex_by_correlative_with_cursor_and_no_match(self, kardex_table, api_client):
+        response = api_client.get(
+            f'{self.url}kardex_by_correlative/', {'correlative': 'ZZZ', 'idtipkar': 1, 'cursor': ''})
+
+        assert response.status_code == 200
+        assert response.data == {}
+
+    def test_by_name_with_cursor(self, kardex_table, related_tables, api_client):
+        # Ordered by fechaingreso, which is not unique: page numbers with a count
+        with patch('notaria.views.kardex_for_clientes', return_value=kardex_table.order_by('-fechaingreso')):
+            response = api_client.get(f'{self.url}by_name/', {'name': 'PEREZ', 'idtipkar': 1, 'cursor': ''})
+
+        assert response.status_code == 200
+        assert response.data['count'] == 3
+
+    def test_by_name_with_cursor_and_no_match(self, kardex_table, api_client):
+        with patch('notaria.views.kardex_for_clientes', return_value=kardex_table.none().order_by('-fechaingreso')), \
+                patch('notaria.views.models') as mock_models:
+            mock_models.Cliente2.objects.filter.return_value.exists.return_value = False
+            response = api_client.get(f'{self.url}by_name/', {'name': 'NADIE', 'idtipkar': 1, 'cursor': ''})
+
+        assert response.status_code == 404
+
+    def test_by_document_with_cursor(self, kardex_table, related_tables, api_client):
+        kardex_qs = kardex_table.filter(idkardex=2).order_by('-fechaingreso')
+        with patch('notaria.views.kardex_for_clientes', return_value=kardex_qs):
+            response = api_client.get(f'{self.url}by_document/', {'document': '4000', 'idtipkar': 1, 'cursor': ''})
+
+        assert response.status_code == 200
+        assert response.data['count'] == 1
+        assert response.data['results'][0]['kardex'] == 'ACT2-2025'
+
+    def test_by_document_keyset_order_with_cursor(self, kardex_table, related_tables, api_client):
+        kardex_qs = kardex_table.order_by('-idkardex')
+        with patch('notaria.views.kardex_for_clientes', return_value=kardex_qs):
+            response = api_client.get(
+                f'{self.url}by_document/', {'document': '4000', 'idtipkar': 1, 'cursor': '', 'with_count': 1})
+
+        assert response.status_code == 200
+        assert response.data['count'] == 3
+        assert len(response.data['results']) == 3
@@ -0,0 +1,103 @@
+import pytest
+from unittest.mock import patch
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from notaria import models
+from notaria.counting import approximate_count
+from notaria.pagination import KardexPagination, KeysetPage
+
+factory = APIRequestFactory()
+
+
+@pytest.fixture
+def rows(db):
+    models.ClienteNameToken.objects.bulk_create(
+        [models.ClienteNameToken(idcontratante=f'{i:010d}', token=f'T{i}') for i in range(1, 26)]
+    )
+    return models.ClienteNameToken.objects.all().order_by('-id')
+
+
+def _paginate(queryset, params):
+    paginator = KardexPagination()
+    request = Request(factory.get('/api/rows/', params))
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator, page, paginator.get_paginated_response([row.token for row in page]).data
+
+
+def _cursor(url):
+    return url.split('cursor=')[1].split('&')[0]
+
+
+class TestKeysetPagination:
+    """Test cases for cursor pagination on descending primary keys."""
+
+    def test_first_page_and_next_cursor(self, rows):
+        _, _, data = _paginate(rows, {'cursor': ''})
+
+        assert data['results'] == [f'T{i}' for i in range(25, 15, -1)]
+        assert data['previous'] is None
+        assert data['count'] is None
+        assert 'cursor=' in data['next']
+
+    def test_walks_forward_and_back(self, rows):
+        _, _, first = _paginate(rows, {'cursor': ''})
+        _, _, second = _paginate(rows, {'cursor': _cursor(first['next'])})
+        _, _, third = _paginate(rows, {'cursor': _cursor(second['next'])})
+        _, _, back = _paginate(rows, {'cursor': _cursor(third['previous'])})
+
+        assert second['results'] == [f'T{i}' for i in range(15, 5, -1)]
+        assert third['results'] == [f'T{i}' for i in range(5, 0, -1)]
+        assert third['next'] is None
+        assert back['results'] == second['results']
+
+    def test_deep_page_uses_no_offset_or_count(self, rows):
+        _, _, first = _paginate(rows, {'cursor': ''})
+
+        with CaptureQueriesContext(connection) as queries:
+            _paginate(rows, {'cursor': _cursor(first['next'])})
+
+        assert len(queries) == 1
+        assert 'OFFSET' not in queries[0]['sql'].upper()
+        assert 'COUNT' not in queries[0]['sql'].upper()
+
+    def test_optional_count(self, rows):
+        _, _, data = _paginate(rows.filter(id__gt=0), {'cursor': '', 'with_count': 'true'})
+
+        assert data['count'] == 25
+
+    def test_page_numbers_without_cursor(self, rows):
+        paginator, _, data = _paginate(rows, {'page': 2})
+
+        assert paginator.keyset is None
+        assert data['count'] == 25
+        assert data['results'][0] == 'T15'
+
+    def test_non_unique_ordering_keeps_page_numbers(self, rows):
+        assert KeysetPage.for_queryset(rows.order_by('-token')) is None
+        assert KeysetPage.for_queryset(models.Kardex.objects.order_by('-idkardex')).field == 'idkardex'
+
+        paginator, _, data = _paginate(rows.order_by('-idcontratante', 'id'), {'cursor': ''})
+        assert paginator.keyset is None
+        assert data['count'] == 25
+
+    def test_invalid_cursor_is_404(self, rows):
+        with pytest.raises(NotFound):
+            _paginate(rows, {'cursor': 'not-a-cursor'})
+
+
+class TestApproximateCount:
+    """Test cases for list totals."""
+
+    def test_unfiltered_uses_table_stats(self, rows):
+        with patch('notaria.counting.table_row_estimate', return_value=1000) as mock_estimate:
+            assert approximate_count(rows) == 1000
+            assert approximate_count(rows.filter(token='T1')) == 1
+
+        mock_estimate.assert_called_once()
+
+    def test_falls_back_to_count_without_stats(self, rows):
+        assert approximate_count(rows) == 25
@@ -0,0 +1,67 @@
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from notaria import models
+from notaria.serializers import PatrimonialSerializer
+
+
+@pytest.fixture
+def patrimonial_tables():
+    """Patrimonial and Detallemediopago are unmanaged: create them for the test."""
+    with connection.schema_editor() as editor:
+        editor.create_model(models.Patrimonial)
+        editor.create_model(models.Detallemediopago)
+    yield
+    with connection.schema_editor() as editor:
+        editor.delete_model(models.Detallemediopago)
+        editor.delete_model(models.Patrimonial)
+
+
+def _patrimoniales(count, kardex='KAR1-2025', start=1):
+    for i in range(start, start + count):
+        itemmp = f'{i:06d}'
+        models.Patrimonial.objects.create(
+            itemmp=itemmp, kardex=kardex, idtipoacto='044', nminuta='1', idmon=1, importetrans=Decimal('1000'),
+            exhibiomp='SI', idsedereg='01', fpago='1', idoppago='1', item=1
+        )
+        for amount in (Decimal('100.50'), Decimal('200')):
+            models.Detallemediopago.objects.create(itemmp=itemmp, kardex=kardex, importemp=amount * i)
+
+
+class TestMediosPagoSum:
+    """Payment totals are loaded with one grouped query per page."""
+
+    url = '/api/patrimonial/'
+
+    def _queries(self, api_client, path, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(path, params)
+        assert response.status_code == 200
+        return response, len(queries)
+
+    def test_list_query_count_is_constant(self, patrimonial_tables, api_client):
+        _patrimoniales(2)
+        _, few = self._queries(api_client, self.url, {'page_size': 20})
+        _patrimoniales(12, kardex='KAR2-2025', start=3)
+        response, many = self._queries(api_client, self.url, {'page_size': 20})
+
+        assert few == many
+        totals = {row['itemmp']: row['medios_pago_sum'] for row in response.data['results']}
+        assert totals['000003'] == pytest.approx(901.5)
+
+    def test_by_kardex_query_count_is_constant(self, patrimonial_tables, api_client):
+        _patrimoniales(2)
+        _, few = self._queries(api_client, f'{self.url}by_kardex/', {'kardex': 'KAR1-2025'})
+        _patrimoniales(10, start=3)
+        response, many = self._queries(api_client, f'{self.url}by_kardex/', {'kardex': 'KAR1-2025'})
+
+        assert few == many == 2
+        assert [row['medios_pago_sum'] for row in response.data][:2] == [pytest.approx(300.5), pytest.approx(601)]
+
+    def test_single_record_without_payments(self, patrimonial_tables):
+        _patrimoniales(1)
+        models.Detallemediopago.objects.all().delete()
+
+        assert PatrimonialSerializer(models.Patrimonial.objects.get()).data['medios_pago_sum'] == 0
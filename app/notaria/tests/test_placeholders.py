@@ -0,0 +1,88 @@
+import io
+
+from docx import Document
+
+from ducumentation.services import NonContentiousDocumentService, EscrituraPublicaDocumentService
+from ducumentation.shared.placeholders import PlaceholderSubstitution, RED
+
+
+def _paragraph(*run_texts):
+    doc = Document()
+    paragraph = doc.add_paragraph()
+    for text in run_texts:
+        paragraph.add_run(text)
+    return paragraph
+
+
+def _template_bytes(*paragraphs) -> bytes:
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    table = doc.add_table(rows=1, cols=1)
+    table.cell(0, 0).text = "{{C_NOM_1}}"
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+class TestPlaceholderSubstitution:
+    """Test cases for the single-pass placeholder engine."""
+
+    def test_replaces_both_grammars_in_one_pass(self):
+        substitution = PlaceholderSubstitution({'NOMBRE': 'JUAN', 'DOC': '12345678'})
+
+        assert substitution.substitute_text("{{NOMBRE}} con [E.DOC]") == "JUAN con 12345678"
+
+    def test_unknown_keys_are_left_untouched(self):
+        substitution = PlaceholderSubstitution({'NOMBRE': 'JUAN'})
+
+        assert substitution.substitute_text("{{OTRO}} {{NOMBRE}}") == "{{OTRO}} JUAN"
+
+    def test_inserted_values_are_not_substituted_again(self):
+        substitution = PlaceholderSubstitution({'A': '{{B}}', 'B': 'X'})
+
+        assert substitution.substitute_text("{{A}}") == "{{B}}"
+
+    def test_placeholder_spanning_runs_keeps_formatting(self):
+        paragraph = _paragraph("Hola {{NOM", "BRE}}, fin")
+        paragraph.runs[0].bold = True
+
+        changed = PlaceholderSubstitution({'NOMBRE': 'JUAN'}, color=RED).replace_in_paragraph(paragraph)
+
+        assert changed
+        assert paragraph.text == "Hola JUAN, fin"
+        runs = paragraph.runs
+        assert [run.text for run in runs] == ["Hola ", "JUAN", ", fin"]
+        assert runs[0].bold and runs[1].bold
+        assert runs[1].font.color.rgb == RED
+        assert runs[0].font.color.rgb is None
+
+    def test_skip_empty_keeps_placeholder(self):
+        paragraph = _paragraph("A {{VACIO}} B")
+
+        changed = PlaceholderSubstitution({'VACIO': ''}, skip_empty=True).replace_in_paragraph(paragraph)
+
+        assert not changed
+        assert paragraph.text == "A {{VACIO}} B"
+
+
+class TestServicesUseSubstitution:
+    """The python-docx based services substitute through the shared engine."""
+
+    def test_non_contentious_process_document(self):
+        service = NonContentiousDocumentService()
+        doc = service._process_document(_template_bytes("SOLICITANTE {{P_NOM_1}} {{P_DOC_1}}"), {
+            'P_NOM_1': 'ANA', 'P_DOC_1': '', 'C_NOM_1': 'LUIS',
+        })
+
+        assert doc.paragraphs[-1].text == "SOLICITANTE ANA {{P_DOC_1}}"
+        assert doc.tables[0].cell(0, 0).text == "LUIS"
+
+    def test_escritura_process_document(self):
+        service = EscrituraPublicaDocumentService()
+        doc = service._process_document(_template_bytes("COMPARECE {{P_NOM_1}}{{P_DOC_1}}"), {
+            'P_NOM_1': 'ANA', 'P_DOC_1': '', 'C_NOM_1': 'LUIS',
+        })
+
+        assert doc.paragraphs[-1].text == "COMPARECE ANA"
+        assert doc.tables[0].cell(0, 0).text == "LUIS"
@@ -0,0 +1,120 @@
+import os
+
+import pytest
+from unittest.mock import patch
+
+from ducumentation.extraprotocolares.libros import LibrosDocumentService
+from ducumentation.shared.presigned_urls import PresignedUrlCache, get_presigned_url_cache
+from ducumentation.shared.storage import MemoryStorageClient, set_storage_client
+
+URL = '/docs/download/K1-2025/__PROY__K1-2025.docx'
+
+
+@pytest.fixture
+def storage():
+    client = MemoryStorageClient()
+    client.put_object(Bucket='notaria', Key='rodriguez-zea/documentos/__PROY__K1-2025.docx', Body=b'DOCX')
+    client.put_object(Bucket='notaria', Key='rodriguez-zea/documentos/__LIBRO__7-2025.docx', Body=b'LIBRO')
+    set_storage_client(client)
+    get_presigned_url_cache().invalidate()
+    with patch.dict(os.environ, {'CLOUDFLARE_R2_BUCKET': 'notaria'}):
+        yield client
+    get_presigned_url_cache().invalidate()
+    set_storage_client(None)
+
+
+class TestPresignedUrlCache:
+    """Test cases for the presigned URL cache."""
+
+    def test_urls_are_reused_until_near_expiry(self, storage):
+        cache = PresignedUrlCache(ttl=3600, refresh_margin=300)
+
+        with patch.object(storage, 'generate_presigned_url', wraps=storage.generate_presigned_url) as mock_sign:
+            first = cache.get('rodriguez-zea/documentos/a.docx', etag='"1"')
+            second = cache.get('rodriguez-zea/documentos/a.docx', etag='"1"')
+            with patch('ducumentation.shared.presigned_urls.time.time', return_value=10 ** 10):
+                cache.get('rodriguez-zea/documentos/a.docx', etag='"1"')
+
+        assert first == second
+        assert mock_sign.call_count == 2
+        assert cache.stats == {'hits': 1, 'signed': 2}
+
+    def test_new_etag_or_invalidation_signs_again(self, storage):
+        cache = PresignedUrlCache()
+
+        cache.get('rodriguez-zea/documentos/a.docx', etag='"1"')
+        cache.get('rodriguez-zea/documentos/a.docx', etag='"2"')
+        cache.invalidate('rodriguez-zea/documentos/a.docx')
+
+        assert cache.cached('rodriguez-zea/documentos/a.docx') is None
+        assert cache.stats['signed'] == 2
+
+    def test_cache_is_bounded(self, storage):
+        cache = PresignedUrlCache(max_entries=2)
+
+        for name in ('a', 'b', 'c'):
+            cache.get(f'rodriguez-zea/documentos/{name}.docx')
+
+        assert cache.cached('rodriguez-zea/documentos/a.docx') is None
+        assert cache.cached('rodriguez-zea/documentos/c.docx') is not None
+
+
+class TestRedirectMode:
+    """Test cases for mode=redirect on the document endpoints."""
+
+    def test_download_redirects_to_presigned_url(self, storage, api_client):
+        response = api_client.get(URL, {'mode': 'redirect'})
+
+        assert response.status_code == 302
+        assert 'rodriguez-zea/documentos/__PROY__K1-2025.docx' in response['Location']
+        assert response['Cache-Control'] == 'no-store'
+
+    def test_repeated_redirects_skip_storage(self, storage, api_client):
+        api_client.get(URL, {'mode': 'redirect'})
+
+        with patch.object(storage, 'head_object') as mock_head:
+            response = api_client.get(URL, {'mode': 'redirect'})
+
+        assert response.status_code == 302
+        mock_head.assert_not_called()
+
+    def test_delivery_mode_setting_makes_redirect_the_default(self, storage, api_client):
+        with patch.dict(os.environ, {'DOCUMENT_DELIVERY_MODE': 'redirect'}):
+            response = api_client.get(URL)
+
+        assert response.status_code == 302
+
+    def test_pending_upload_is_served_instead_of_redirect(self, storage, api_client):
+        with patch('ducumentation.shared.presigned_urls.is_pending_document', return_value=True), \
+                patch('ducumentation.shared.document_stream.pending_document', return_value=b'NEW'):
+            response = api_client.get(URL, {'mode': 'redirect'})
+
+        assert response.status_code == 200
+        assert response.content == b'NEW'
+
+    @patch('ducumentation.shared.document_uploader._uploader', None)
+    @patch('ducumentation.shared.document_uploader.DocumentUploader')
+    def test_downloads_do_not_start_the_uploader(self, mock_uploader_class, storage, api_client):
+        redirected = api_client.get(URL, {'mode': 'redirect'})
+        streamed = api_client.get(URL)
+
+        assert redirected.status_code == 302
+        assert streamed.status_code == 200
+        mock_uploader_class.assert_not_called()
+
+    def test_missing_document_returns_404(self, storage, api_client):
+        response = api_client.get('/docs/download/NOPE-2025/__PROY__NOPE-2025.docx', {'mode': 'redirect'})
+
+        assert response.status_code == 404
+
+    def test_extraprotocolar_retrieve_redirects(self, storage):
+        response = LibrosDocumentService().retrieve_libro_document('7', '2025', mode='redirect')
+
+        assert response.status_code == 302
+        assert '__LIBRO__7-2025.docx' in response['Location']
+        assert response['Access-Control-Allow-Origin'] == '*'
+
+    def test_extraprotocolar_retrieve_missing_returns_404(self, storage):
+        response = LibrosDocumentService().retrieve_libro_document('8', '2025', mode='redirect')
+
+        assert response.status_code == 404
@@ -0,0 +1,158 @@
+import hashlib
+import io
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+from docx import Document
+
+from ducumentation.services import render_project_document
+from ducumentation.shared.base_r2_documents import BaseR2DocumentService
+from ducumentation.shared.document_uploader import synchronous_uploads
+from ducumentation.shared.render_cache import RenderCache, get_render_cache, render_fingerprint
+
+
+def _template_bytes(text='CARTA {{ NOMBRE }}') -> bytes:
+    doc = Document()
+    doc.add_paragraph(text)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+class CartaService(BaseR2DocumentService):
+    template_filename = 'CARTA.docx'
+
+
+class ProjectService:
+    """Stand-in protocolar service counting renders."""
+
+    def __init__(self):
+        self.renders = 0
+
+    def _process_document(self, template_bytes, data):
+        self.renders += 1
+        doc = Document(io.BytesIO(template_bytes))
+        doc.add_paragraph(data['NOMBRE'])
+        return doc
+
+    def remove_unfilled_placeholders(self, doc):
+        pass
+
+
+@pytest.fixture
+def s3_client():
+    client = MagicMock()
+    with patch('ducumentation.shared.render_cache.get_s3_client', return_value=client):
+        yield client
+
+
+class TestRenderFingerprint:
+    """The fingerprint covers the service, the template and the data."""
+
+    def test_same_inputs_same_fingerprint(self):
+        template = _template_bytes()
+        first = render_fingerprint(CartaService(), 'CARTA.docx', template, {'NOMBRE': 'ANA', 'DNI': '1'})
+        second = render_fingerprint(CartaService(), 'CARTA.docx', template, {'DNI': '1', 'NOMBRE': 'ANA'})
+
+        assert first == second
+
+    def test_any_change_changes_fingerprint(self):
+        template = _template_bytes()
+        base = render_fingerprint(CartaService(), 'CARTA.docx', template, {'NOMBRE': 'ANA'})
+
+        assert render_fingerprint(CartaService(), 'CARTA.docx', template, {'NOMBRE': 'LUIS'}) != base
+        assert render_fingerprint(CartaService(), 'CARTA.docx', _template_bytes('OTRA {{ NOMBRE }}'), {'NOMBRE': 'ANA'}) != base
+        assert render_fingerprint(ProjectService(), 'CARTA.docx', template, {'NOMBRE': 'ANA'}) != base
+
+    @patch('ducumentation.shared.render_cache.get_template_etag', return_value='"v2"')
+    def test_template_etag_is_used_when_cached(self, mock_etag):
+        template = _template_bytes()
+        first = render_fingerprint(CartaService(), 'CARTA.docx', template, {})
+        mock_etag.return_value = '"v3"'
+
+        assert render_fingerprint(CartaService(), 'CARTA.docx', template, {}) != first
+
+
+class TestRenderCache:
+    """Test cases for the rendered document cache."""
+
+    def test_memory_bound(self):
+        cache = RenderCache(max_bytes=10)
+        cache.put('a', b'123456')
+        cache.put('b', b'123456')
+
+        assert cache.get('a') is None
+        assert cache.get('b') == b'123456'
+        assert cache.memory_usage() == 6
+
+    def test_render_document_is_served_from_cache(self):
+        service = CartaService()
+        render = MagicMock(side_effect=lambda template_bytes, context: Document(io.BytesIO(template_bytes)))
+        template = _template_bytes()
+
+        first = service._render_document(template, {'NOMBRE': 'ANA'}, render).getvalue()
+        second = service._render_document(template, {'NOMBRE': 'ANA'}, render).getvalue()
+        service._render_document(template, {'NOMBRE': 'LUIS'}, render)
+
+        assert first == second
+        assert render.call_count == 2
+        assert get_render_cache().metrics()['hit_rate'] == pytest.approx(1 / 3)
+
+    def test_default_render_fills_template(self):
+        content = CartaService()._render_document(_template_bytes(), {'NOMBRE': 'ANA'}).getvalue()
+
+        assert Document(io.BytesIO(content)).paragraphs[0].text == 'CARTA ANA'
+
+    @patch('ducumentation.shared.render_cache.upload_document', return_value=True)
+    def test_unchanged_upload_is_skipped(self, mock_upload, s3_client):
+        s3_client.head_object.return_value = {'ETag': f'"{hashlib.md5(b"DOCX").hexdigest()}"'}
+        cache = get_render_cache()
+
+        cache.upload('documentos/a.docx', b'DOCX')
+        cache.upload('documentos/a.docx', b'DOCX')
+        cache.upload('documentos/a.docx', b'DOCX-2')
+
+        assert mock_upload.call_count == 2
+        assert cache.stats['uploads_skipped'] == 1
+
+    @patch('ducumentation.shared.render_cache.upload_document', return_value=True)
+    def test_overwritten_or_missing_object_is_uploaded_again(self, mock_upload, s3_client):
+        cache = get_render_cache()
+        cache.upload('documentos/a.docx', b'DOCX')
+
+        s3_client.head_object.return_value = {'ETag': '"merged-by-update-docx"'}
+        cache.upload('documentos/a.docx', b'DOCX')
+        s3_client.head_object.side_effect = ClientError({'Error': {'Code': '404'}}, 'HeadObject')
+        cache.upload('documentos/a.docx', b'DOCX')
+
+        assert mock_upload.call_count == 3
+
+    @patch('ducumentation.shared.render_cache.pending_document', return_value=b'DOCX')
+    @patch('ducumentation.shared.render_cache.upload_document', return_value=True)
+    def test_queued_upload_is_not_skipped_inside_a_job(self, mock_upload, mock_pending, s3_client):
+        cache = get_render_cache()
+        cache.upload('documentos/a.docx', b'DOCX')
+        cache.upload('documentos/a.docx', b'DOCX')
+        assert mock_upload.call_count == 1
+
+        with synchronous_uploads():
+            cache.upload('documentos/a.docx', b'DOCX')
+
+        assert mock_upload.call_count == 2
+
+
+class TestProjectRender:
+    """Protocolar services reopen cached bytes instead of rendering again."""
+
+    @patch('ducumentation.services.get_template_filename', return_value='PROYECTO.docx')
+    def test_second_render_reuses_bytes(self, mock_filename):
+        service = ProjectService()
+        template = _template_bytes('PROYECTO')
+
+        _, first = render_project_document(service, 7, template, {'NOMBRE': 'ANA'})
+        doc, second = render_project_document(service, 7, template, {'NOMBRE': 'ANA'})
+
+        assert service.renders == 1
+        assert first == second
+        assert [p.text for p in doc.paragraphs] == ['PROYECTO', 'ANA']
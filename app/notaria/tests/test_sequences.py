@@ -0,0 +1,98 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from notaria import models, sequences
+from notaria.utils import generate_new_id
+
+
+class TestAllocator:
+    """Test cases for the correlative sequence allocator."""
+
+    def test_seed_runs_once_per_series_and_period(self, db):
+        seed = MagicMock(return_value=41)
+
+        assert sequences.allocate('test.series', '2025', seed=seed) == 42
+        assert sequences.allocate('test.series', '2025', seed=seed) == 43
+        assert sequences.allocate('test.series', '2026', seed=MagicMock(return_value=0)) == 1
+
+        seed.assert_called_once()
+        assert models.Sequence.objects.get(series='test.series', period='2025').last_value == 43
+
+    def test_block_allocation(self, db):
+        block = sequences.allocate_block('test.block', count=5)
+
+        assert list(block) == [1, 2, 3, 4, 5]
+        assert sequences.allocate('test.block') == 6
+
+    def test_floor_catches_up_with_other_writers(self, db):
+        sequences.allocate('test.ids', floor=lambda: 10)
+
+        assert sequences.allocate('test.ids', floor=lambda: 100) == 101
+        assert sequences.allocate('test.ids', floor=lambda: 50) == 102
+
+    def test_failed_seed_creates_no_row(self, db):
+        def broken_seed():
+            raise RuntimeError('Database error')
+
+        with pytest.raises(RuntimeError):
+            sequences.allocate('test.broken', seed=broken_seed)
+
+        assert not models.Sequence.objects.filter(series='test.broken').exists()
+
+    def test_sync_resets_series(self, db):
+        sequences.allocate('ingreso_cartas.num_carta', '2025', seed=lambda: 500)
+
+        with patch.object(sequences, 'last_correlative_of_year', return_value=7), \
+                patch.object(sequences, 'last_number', return_value=3), \
+                patch.object(sequences, 'last_kardex_number', return_value=12):
+            synced = sequences.sync_sequences(2025)
+
+        assert synced[('ingreso_cartas.num_carta', '2025')] == 7
+        assert synced[('kardex.KAR', '2025')] == 12
+        assert sequences.allocate('ingreso_cartas.num_carta', '2025') == 8
+
+
+class TestCorrelativeViews:
+    """Create views take their numbers from the sequences."""
+
+    @patch('notaria.models.IngresoCartas.objects')
+    def test_consecutive_creates(self, mock_objects, db):
+        last_record = MagicMock(num_carta='2025000041')
+        mock_objects.filter.return_value.exclude.return_value.order_by.return_value.first.return_value = last_record
+
+        first = sequences.next_yearly_correlative('ingreso_cartas.num_carta', 2025)
+        second = sequences.next_yearly_correlative('ingreso_cartas.num_carta', 2025)
+
+        assert (first, second) == (42, 43)
+
+    @patch('notaria.models.IngresoCartas.objects')
+    def test_records_written_outside_the_api_are_skipped(self, mock_objects, db):
+        latest = mock_objects.filter.return_value.exclude.return_value.order_by.return_value.first
+        latest.return_value = MagicMock(num_carta='2025000041')
+        assert sequences.next_yearly_correlative('ingreso_cartas.num_carta', 2025) == 42
+
+        # The legacy system inserts cartas 43 to 60
+        latest.return_value = MagicMock(num_carta='2025000060')
+
+        assert sequences.next_yearly_correlative('ingreso_cartas.num_carta', 2025) == 61
+
+    def test_every_series_checks_its_table(self, db):
+        with patch.object(sequences, 'last_number', return_value=5):
+            assert sequences.next_global_correlative('libros.numlibro') == 6
+        with patch.object(sequences, 'last_number', return_value=20):
+            assert sequences.next_global_correlative('libros.numlibro') == 21
+
+    def test_kardex_numbers_per_type_and_year(self, db):
+        with patch.object(sequences, 'last_kardex_number', return_value=99) as mock_floor:
+            assert sequences.next_kardex_number('1', 'KAR', '2025') == 100
+            assert sequences.next_kardex_number('1', 'KAR', '2025') == 101
+            assert sequences.next_kardex_number('5', 'TES', '2025') == 100
+
+        assert mock_floor.call_count == 3
+
+    def test_generate_new_id_is_padded_and_distinct(self, db):
+        with patch('notaria.models.Patrimonial.objects') as mock_objects:
+            mock_objects.order_by.return_value.first.return_value = MagicMock(itemmp='000009')
+            ids = [generate_new_id(models.Patrimonial, 'itemmp', 6) for _ in range(2)]
+
+        assert ids == ['000010', '000011']
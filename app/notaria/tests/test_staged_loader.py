@@ -0,0 +1,129 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from ducumentation import services
+from ducumentation.shared import staged_loader
+from ducumentation.shared.staged_loader import group_concat, load_escritura, load_testamento, load_transferencia
+
+
+HEADER = {'id_kardex': 7, 'kardex': 'KAR1-2025', 'numero_escritura': '100', 'acto': 'COMPRAVENTA'}
+
+
+def _party(party_id, nombres, empresa=None, **extra):
+    return {'party_id': party_id, 'nombres': nombres, 'nombre_empresa': empresa, 'direccion': f'AV {nombres}', **extra}
+
+
+def _stages(parties, vehicles=(), patrimoniales=(), payments=()):
+    """fetch_all side effect returning the given rows for each stage query."""
+    results = {
+        staged_loader.ESCRITURA_PARTIES_SQL: parties,
+        staged_loader.TRANSFERENCIA_PARTIES_SQL: parties,
+        staged_loader.TESTAMENTO_PARTIES_SQL: parties,
+        staged_loader.ESCRITURA_HEADER_SQL: [HEADER],
+        staged_loader.TRANSFERENCIA_HEADER_SQL: [HEADER],
+        staged_loader.TESTAMENTO_HEADER_SQL: [HEADER],
+        staged_loader.VEHICLES_SQL: list(vehicles),
+        staged_loader.PATRIMONIALES_SQL: list(patrimoniales),
+        staged_loader.PAYMENTS_SQL: list(payments),
+    }
+    return lambda sql, params: results[sql]
+
+
+class TestGroupConcat:
+    """GROUP_CONCAT semantics of the Python concatenation."""
+
+    def test_nulls_are_skipped(self):
+        assert group_concat(['A', None, 'B']) == 'A,B'
+        assert group_concat([None, None]) is None
+        assert group_concat([]) is None
+
+    def test_values_are_rendered_as_mysql_text(self):
+        assert group_concat([Decimal('1500.00'), 3, b'X'], '|') == '1500.00|3|X'
+
+
+class TestStagedLoader:
+    """The staged loaders rebuild the raw dict of the joined queries."""
+
+    parties = [_party(1, 'ANA'), _party(2, 'LUIS', 'ACME SAC'), _party(2, 'LUIS', 'ACME SAC')]
+    vehicles = [{'placa': 'ABC-123', 'marca': 'TOYOTA'}, {'placa': 'XYZ-999', 'marca': 'KIA'}]
+    patrimoniales = [{'precio': Decimal('1000'), 'moneda': 1}]
+    payments = [{'detmp': 1, 'banco': 'BCP', 'documentos': 'OP-1'}, {'detmp': 2, 'banco': 'BBVA', 'documentos': 'OP-2'}]
+
+    @patch('ducumentation.shared.staged_loader.fetch_all')
+    def test_escritura_repeats_parties_per_vehicle(self, mock_fetch):
+        mock_fetch.side_effect = _stages(self.parties, self.vehicles, self.patrimoniales, self.payments)
+        stats = {}
+
+        data = load_escritura('KAR1-2025', '044', 3, stats)
+
+        assert data['nombres'] == 'ANA,ANA,LUIS,LUIS,LUIS,LUIS'
+        assert data['nombre_empresa'] == 'ACME SAC,ACME SAC,ACME SAC,ACME SAC'
+        assert data['direccion'] == 'AV ANA,,AV ANA,,AV LUIS,,AV LUIS,,AV LUIS,,AV LUIS'
+        assert (data['placa'], data['precio'], data['banco']) == ('ABC-123', Decimal('1000'), 'BCP')
+        assert list(data) == list(staged_loader.ESCRITURA_COLUMNS)
+        assert stats == {'rows_fetched': 9, 'joined_rows': 6}
+        assert mock_fetch.call_count == 5
+
+    @patch('ducumentation.shared.staged_loader.fetch_all')
+    def test_transferencia_repeats_parties_per_payment(self, mock_fetch):
+        mock_fetch.side_effect = _stages(self.parties, self.vehicles, self.patrimoniales, self.payments)
+        stats = {}
+
+        data = load_transferencia('KAR1-2025', '044', 3, stats)
+
+        assert data['nombres'] == ','.join(['ANA'] * 4 + ['LUIS'] * 8)
+        assert 'banco' not in data
+        assert stats == {'rows_fetched': 9, 'joined_rows': 12}
+
+    @patch('ducumentation.shared.staged_loader.fetch_all')
+    def test_payments_need_a_patrimonial(self, mock_fetch):
+        mock_fetch.side_effect = _stages(self.parties[:1], payments=self.payments)
+
+        data = load_transferencia('KAR1-2025', '044', 3)
+
+        assert data['nombres'] == 'ANA'
+        assert data['descripcion_medio_pago'] is None
+
+    @patch('ducumentation.shared.staged_loader.fetch_all')
+    def test_testamento_uses_pipe_separator(self, mock_fetch):
+        mock_fetch.side_effect = _stages([
+            {'party_id': 1, 'nombres': 'ANA', 'sexos': 'F'},
+            {'party_id': 2, 'nombres': 'LUIS', 'sexos': None},
+        ])
+
+        data = load_testamento('KAR1-2025')
+
+        assert (data['nombres'], data['sexos'], data['kardex']) == ('ANA|LUIS', 'F', 'KAR1-2025')
+        assert mock_fetch.call_count == 2
+
+    @patch('ducumentation.shared.staged_loader.fetch_all')
+    def test_no_parties_returns_none(self, mock_fetch):
+        mock_fetch.side_effect = _stages([])
+
+        assert load_escritura('KAR1-2025', '044', 3) is None
+        assert mock_fetch.call_count == 1
+
+
+class TestLoaderSelection:
+    """DOCUMENT_DATA_LOADER picks the staged or the joined queries."""
+
+    @patch('ducumentation.services.load_escritura', return_value={'kardex': 'KAR1-2025'})
+    @patch.object(services.EscrituraPublicaDocumentService, '_consulta_escritura_joined')
+    def test_staged_by_default(self, mock_joined, mock_staged, monkeypatch):
+        monkeypatch.delenv('DOCUMENT_DATA_LOADER', raising=False)
+
+        data = services.EscrituraPublicaDocumentService()._consulta_escritura('KAR1-2025', '044', 3)
+
+        assert data == {'kardex': 'KAR1-2025'}
+        mock_staged.assert_called_once_with('KAR1-2025', '044', 3)
+        mock_joined.assert_not_called()
+
+    @patch('ducumentation.services.load_testamento')
+    @patch.object(services.TestamentoDocumentService, '_fetch_all_data_raw_joined', return_value={'kardex': 'KAR1-2025'})
+    def test_joined_when_configured(self, mock_joined, mock_staged, monkeypatch):
+        monkeypatch.setenv('DOCUMENT_DATA_LOADER', 'joined')
+
+        data = services.TestamentoDocumentService()._fetch_all_data_raw('KAR1-2025')
+
+        assert data == {'kardex': 'KAR1-2025'}
+        mock_staged.assert_not_called()
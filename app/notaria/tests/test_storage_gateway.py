@@ -0,0 +1,143 @@
+import io
+import os
+
+import pytest
+from botocore.exceptions import ClientError
+from unittest.mock import patch
+
+from ducumentation.shared.storage import (
+    LocalStorageClient, MemoryStorageClient, get_s3_client, r2_client_config, set_storage_client,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_storage_client():
+    set_storage_client(None)
+    yield
+    set_storage_client(None)
+
+
+class TestStorageGateway:
+    """Test cases for the shared storage client."""
+
+    def test_r2_client_is_created_once_per_process(self):
+        with patch.dict(os.environ, {'STORAGE_BACKEND': 'r2'}), \
+                patch('ducumentation.shared.storage.boto3.client') as mock_client:
+            first = get_s3_client()
+            second = get_s3_client()
+
+        assert first is second
+        assert mock_client.call_count == 1
+
+    def test_r2_client_is_recreated_after_fork(self):
+        with patch.dict(os.environ, {'STORAGE_BACKEND': 'r2'}), \
+                patch('ducumentation.shared.storage.boto3.client') as mock_client:
+            get_s3_client()
+            with patch('ducumentation.shared.storage.os.getpid', return_value=-1):
+                get_s3_client()
+
+        assert mock_client.call_count == 2
+
+    def test_r2_config_is_pooled_with_adaptive_retries(self):
+        with patch.dict(os.environ, {'R2_MAX_POOL_CONNECTIONS': '64', 'R2_MAX_ATTEMPTS': '3'}):
+            config = r2_client_config()
+
+        assert config.max_pool_connections == 64
+        assert config.tcp_keepalive is True
+        assert config.retries == {'max_attempts': 3, 'mode': 'adaptive'}
+
+    def test_backend_selected_from_environment(self):
+        with patch.dict(os.environ, {'STORAGE_BACKEND': 'memory'}):
+            assert isinstance(get_s3_client(), MemoryStorageClient)
+
+    def test_unknown_backend_is_rejected(self):
+        with patch.dict(os.environ, {'STORAGE_BACKEND': 'ftp'}):
+            with pytest.raises(ValueError):
+                get_s3_client()
+
+    def test_callers_share_the_gateway_client(self):
+        from ducumentation import views
+        from ducumentation.shared import base_r2_documents
+
+        client = MemoryStorageClient()
+        set_storage_client(client)
+
+        assert views.get_s3_client() is client
+        assert base_r2_documents.get_s3_client() is client
+
+
+@pytest.fixture(params=['memory', 'local'])
+def offline_client(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryStorageClient()
+    return LocalStorageClient(root=str(tmp_path))
+
+
+class TestOfflineBackends:
+    """Test cases for the in-memory and local filesystem backends."""
+
+    def test_put_and_get_round_trip(self, offline_client):
+        offline_client.put_object(Bucket='b', Key='docs/a.docx', Body=b'contenido', ContentType='text/plain')
+
+        response = offline_client.get_object(Bucket='b', Key='docs/a.docx')
+
+        assert response['Body'].read() == b'contenido'
+        assert response['ContentLength'] == 9
+        assert response['ETag'].startswith('"')
+
+    def test_missing_key_raises_no_such_key(self, offline_client):
+        with pytest.raises(offline_client.exceptions.NoSuchKey):
+            offline_client.get_object(Bucket='b', Key='missing.docx')
+        with pytest.raises(ClientError) as excinfo:
+            offline_client.head_object(Bucket='b', Key='missing.docx')
+        assert excinfo.value.response['Error']['Code'] == '404'
+
+    def test_if_none_match_returns_304(self, offline_client):
+        etag = offline_client.put_object(Bucket='b', Key='t.docx', Body=b'plantilla')['ETag']
+
+        with pytest.raises(ClientError) as excinfo:
+            offline_client.get_object(Bucket='b', Key='t.docx', IfNoneMatch=etag)
+
+        assert excinfo.value.response['Error']['Code'] == '304'
+
+    def test_range_requests(self, offline_client):
+        offline_client.put_object(Bucket='b', Key='r.docx', Body=b'0123456789')
+
+        response = offline_client.get_object(Bucket='b', Key='r.docx', Range='bytes=2-5')
+        suffix = offline_client.get_object(Bucket='b', Key='r.docx', Range='bytes=-3')
+
+        assert response['Body'].read() == b'2345'
+        assert response['ContentRange'] == 'bytes 2-5/10'
+        assert suffix['Body'].read() == b'789'
+
+    def test_upload_fileobj_and_delete(self, offline_client):
+        offline_client.upload_fileobj(io.BytesIO(b'merged'), 'b', 'm.docx')
+        assert offline_client.head_object(Bucket='b', Key='m.docx')['ContentLength'] == 6
+
+        offline_client.delete_object(Bucket='b', Key='m.docx')
+
+        with pytest.raises(offline_client.exceptions.NoSuchKey):
+            offline_client.get_object(Bucket='b', Key='m.docx')
+
+    def test_local_backend_rejects_keys_outside_root(self, tmp_path):
+        client = LocalStorageClient(root=str(tmp_path))
+
+        with pytest.raises(ClientError):
+            client.put_object(Bucket='b', Key='../../etc/passwd', Body=b'x')
+
+
+class TestGatewayIntegration:
+    """Test cases for services running against the in-memory backend."""
+
+    def test_template_cache_reads_through_the_gateway(self):
+        from ducumentation.shared import template_cache
+
+        client = MemoryStorageClient()
+        client.put_object(Bucket='notaria', Key='rodriguez-zea/plantillas/gateway-test.docx', Body=b'plantilla')
+        set_storage_client(client)
+
+        with patch.dict(os.environ, {'CLOUDFLARE_R2_BUCKET': 'notaria'}):
+            template_cache.get_template_cache().invalidate('gateway-test.docx')
+            content = template_cache.get_template_bytes('gateway-test.docx')
+
+        assert content == b'plantilla'
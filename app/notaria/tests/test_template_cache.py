@@ -0,0 +1,93 @@
+import io
+from unittest.mock import patch, MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from ducumentation.shared.template_cache import TemplateCache
+
+
+def _s3_response(content: bytes, etag: str):
+    return {'Body': io.BytesIO(content), 'ETag': etag}
+
+
+def _client_error(code: str, status: int):
+    return ClientError({'Error': {'Code': code}, 'ResponseMetadata': {'HTTPStatusCode': status}}, 'GetObject')
+
+
+@pytest.fixture
+def s3_client():
+    client = MagicMock()
+    with patch('ducumentation.shared.template_cache.get_s3_client', return_value=client):
+        yield client
+
+
+class TestTemplateCache:
+    """Test cases for the shared R2 template cache."""
+
+    def test_memory_hit_skips_r2(self, s3_client, tmp_path):
+        s3_client.get_object.return_value = _s3_response(b'docx-bytes', '"abc"')
+        cache = TemplateCache(ttl=300, cache_dir=str(tmp_path))
+
+        assert cache.get('PLANTILLA.docx') == b'docx-bytes'
+        assert cache.get('PLANTILLA.docx') == b'docx-bytes'
+
+        assert s3_client.get_object.call_count == 1
+        assert cache.stats['hits'] == 1
+
+    def test_etag_of_cached_template(self, s3_client, tmp_path):
+        s3_client.get_object.return_value = _s3_response(b'docx-bytes', '"abc"')
+        cache = TemplateCache(ttl=300, cache_dir=str(tmp_path))
+
+        assert cache.etag('PLANTILLA.docx') is None
+        cache.get('PLANTILLA.docx')
+        assert cache.etag('PLANTILLA.docx') == '"abc"'
+
+    def test_expired_entry_revalidates_with_conditional_get(self, s3_client, tmp_path):
+        s3_client.get_object.return_value = _s3_response(b'docx-bytes', '"abc"')
+        cache = TemplateCache(ttl=0, cache_dir=str(tmp_path))
+        cache.get('PLANTILLA.docx')
+
+        s3_client.get_object.side_effect = _client_error('304', 304)
+        assert cache.get('PLANTILLA.docx') == b'docx-bytes'
+
+        _, kwargs = s3_client.get_object.call_args
+        assert kwargs['IfNoneMatch'] == '"abc"'
+        assert cache.stats['revalidated'] == 1
+
+    def test_changed_template_is_downloaded_again(self, s3_client, tmp_path):
+        s3_client.get_object.return_value = _s3_response(b'v1', '"v1"')
+        cache = TemplateCache(ttl=0, cache_dir=str(tmp_path))
+        cache.get('PLANTILLA.docx')
+
+        s3_client.get_object.return_value = _s3_response(b'v2', '"v2"')
+        assert cache.get('PLANTILLA.docx') == b'v2'
+
+    def test_disk_tier_survives_new_instance(self, s3_client, tmp_path):
+        s3_client.get_object.return_value = _s3_response(b'docx-bytes', '"abc"')
+        TemplateCache(ttl=300, cache_dir=str(tmp_path)).get('PLANTILLA.docx')
+
+        s3_client.get_object.side_effect = _client_error('304', 304)
+        cache = TemplateCache(ttl=300, cache_dir=str(tmp_path))
+
+        assert cache.get('PLANTILLA.docx') == b'docx-bytes'
+        assert cache.stats['disk_hits'] == 1
+        assert cache.stats['downloads'] == 0
+
+    def test_missing_template_returns_none(self, s3_client, tmp_path):
+        s3_client.get_object.side_effect = _client_error('NoSuchKey', 404)
+        cache = TemplateCache(cache_dir=str(tmp_path))
+
+        assert cache.get('NO EXISTE.docx') is None
+
+    def test_memory_tier_is_bounded_by_bytes(self, s3_client, tmp_path):
+        s3_client.get_object.side_effect = [
+            _s3_response(b'a' * 60, '"a"'),
+            _s3_response(b'b' * 60, '"b"'),
+        ]
+        cache = TemplateCache(ttl=300, max_memory_bytes=100, cache_dir=str(tmp_path))
+        cache.get('A.docx')
+        cache.get('B.docx')
+
+        assert cache.memory_usage() == 60
+        assert 'A.docx' not in cache._entries
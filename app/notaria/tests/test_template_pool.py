@@ -0,0 +1,55 @@
+import io
+
+from docx import Document
+
+from ducumentation.shared.template_pool import TemplatePool, open_docx_template
+
+
+def _template_bytes(text: str = "HOLA {{NOMBRE}}") -> bytes:
+    doc = Document()
+    doc.sections[0].header.paragraphs[0].text = "{{NRO_ESC}}"
+    doc.add_paragraph(text)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+class TestTemplatePool:
+    """Test cases for the pre-parsed template pool."""
+
+    def test_documents_from_pool_are_independent(self):
+        compiled = TemplatePool().get(_template_bytes())
+
+        first = compiled.new_document()
+        second = compiled.new_document()
+        first.paragraphs[-1].text = "CAMBIADO"
+
+        assert second.paragraphs[-1].text == "HOLA {{NOMBRE}}"
+        assert compiled.new_document().paragraphs[-1].text == "HOLA {{NOMBRE}}"
+
+    def test_same_bytes_compile_once(self):
+        pool = TemplatePool()
+        template_bytes = _template_bytes()
+
+        assert pool.get(template_bytes) is pool.get(template_bytes)
+        assert pool.stats == {'hits': 1, 'compiled': 1}
+
+    def test_pool_is_bounded(self):
+        pool = TemplatePool(max_size=1)
+        uno, dos = _template_bytes("UNO"), _template_bytes("DOS")
+        first = pool.get(uno)
+        pool.get(dos)
+
+        assert pool.get(uno) is not first
+        assert pool.stats['compiled'] == 3
+
+    def test_pooled_docx_template_renders_like_parsed(self):
+        template_bytes = _template_bytes()
+        doc = open_docx_template(template_bytes)
+        doc.render({'NOMBRE': 'JUAN', 'NRO_ESC': '123'})
+        buffer = io.BytesIO()
+        doc.save(buffer)
+
+        rendered = Document(io.BytesIO(buffer.getvalue()))
+        assert rendered.paragraphs[-1].text == "HOLA JUAN"
+        assert rendered.sections[0].header.paragraphs[0].text == "123"
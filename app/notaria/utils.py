@@ -1,13 +1,14 @@
+import re
+import unicodedata
+
+
 def generate_new_id(model, id_field='id', fill=10):
     """
     Generate a new 10-digit ID for the given model based on the given field.
+    Taken from the model's sequence, so concurrent requests get distinct IDs.
     """
-    last_instance = model.objects.order_by(f'-{id_field}').first()
-    if last_instance:
-        last_id = getattr(last_instance, id_field, '0')
-        if last_id.isdigit():
-            return str(int(last_id) + 1).zfill(fill)
-    return '0000000001'
+    from .sequences import next_id
+    return str(next_id(model, id_field)).zfill(fill)
 
 def normalize_name_for_search(name):
     """
@@ -37,4 +38,29 @@ def normalize_name_for_search(name):
     for old, new in replacements.items():
         normalized = normalized.replace(old, new)
     
-    return normalized
\ No newline at end of file
+    return normalized
+
+def search_tokens(*parts):
+    """
+    Accent- and case-folded name tokens for the Cliente2 name index.
+    'José  Pérez-Díaz' -> ['JOSE', 'PEREZ', 'DIAZ'] (order kept, duplicates removed).
+    """
+    text = ' '.join(str(part) for part in parts if part)
+    normalized = normalize_name_for_search(text.upper())
+    folded = ''.join(
+        char for char in unicodedata.normalize('NFKD', normalized)
+        if not unicodedata.combining(char)
+    )
+    tokens = []
+    for token in re.split(r'[^0-9A-Z]+', folded):
+        if token and token not in tokens:
+            tokens.append(token[:100])
+    return tokens
+
+
+def normalize_document_number(numdoc):
+    """
+    Canonical form of a document number for lookups: upper case, separators removed.
+    ' 40.123-456 ' -> '40123456', 'ce 00123' -> 'CE00123'
+    """
+    return re.sub(r'[^0-9A-Z]', '', str(numdoc or '').upper())[:50]
@@ -6,12 +6,19 @@ from . import pagination
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q, Max, F, Func, Value
-from django.db.models.functions import Cast, Substr
-from django.db import models as django_models
 from django.db import transaction
 
 from collections import defaultdict
+from . import act_writes
+from .catalogs import CatalogListMixin, catalog
+from . import sequences
 from . import utils
+from .page_enrichment import (
+    kardex_page_context, kardex_for_clientes, paginate_once, name_filter, document_filter,
+    patrimonial_page_context,
+)
+from .document_lookup import DNI, RUC, lookup_by_document
+from .search import search_contratantes
 from datetime import datetime
 
 
@@ -64,39 +71,8 @@ class KardexViewSet(ModelViewSet):
         """
         page_kardex = self.paginate_queryset(self.get_queryset())
 
-        user_ids = set(obj.idusuario for obj in page_kardex)
-        kardex_ids = set(obj.kardex for obj in page_kardex)
-
-        usuarios_map = {
-            u.idusuario: u
-            for u in models.Usuarios.objects.filter(idusuario__in=user_ids)
-        }
-
-        contratantes = models.Contratantes.objects.filter(
-            kardex__in=kardex_ids
-        ).values('idcontratante', 'kardex')
-
-        contratantes_map = defaultdict(list)
-
-        for c in contratantes:
-            contratantes_map[c['kardex']].append(c['idcontratante'])
-        contratante_ids = set(c['idcontratante'] for c in contratantes)
-
-        clientes_map = {
-            c['idcontratante']: c
-            for c in models.Cliente2.objects.filter(
-                idcontratante__in=contratante_ids
-            ).values(
-                'idcontratante', 'nombre', 'numdoc', 'razonsocial'
-            )
-        }
-
-        # Pass context manually to serializer if needed
-        serializer = self.get_serializer(page_kardex, many=True, context={
-            'usuarios_map': usuarios_map,
-            'contratantes_map': contratantes_map,
-            'clientes_map': clientes_map,
-        })
+        # Users, contratantes and clientes for this page only
+        serializer = self.get_serializer(page_kardex, many=True, context=kardex_page_context(page_kardex))
 
         return self.get_paginated_response(serializer.data)
     
@@ -107,70 +83,56 @@ class KardexViewSet(ModelViewSet):
         """
         instance = self.get_object()
         data = request.data
-        codactos = data.get('codactos', '')
-        id_tipo_actos_array = [codactos[i:i+3] for i in range(0, len(codactos), 3)]
+        id_tipo_actos_array = act_writes.split_codactos(data.get('codactos', ''))
         set_data = set(id_tipo_actos_array)
-        id_tipo_actos_array_instance =  [ instance.codactos[i:i+3] for i in range(0, len( instance.codactos), 3)]
-        set_instance = set(id_tipo_actos_array_instance)
+        set_instance = set(act_writes.split_codactos(instance.codactos))
 
         only_in_set_data = set_data - set_instance
         only_in_set_conditions = set_instance - set_data
+        if not only_in_set_data and not only_in_set_conditions:
+            return super().update(request, *args, **kwargs)
 
-        for id_tipo_acto in only_in_set_conditions:
-            try:
-                tipo_acto = models.Tiposdeacto.objects.get(idtipoacto=id_tipo_acto)
-            except tipo_acto.DoesNotExist:
-                return Response(
-                    {"error": "Tipo de acto no encontrado."},
-                    status=404
-                )
-            
-            # Check if there are any contratantes using this tipo_acto
+        # Removed and added tipos de acto in one query
+        tipos = act_writes.tipos_de_acto(only_in_set_data | only_in_set_conditions)
+        if act_writes.missing(only_in_set_data | only_in_set_conditions, tipos):
+            return Response(
+                {"error": "Tipo de acto no encontrado."},
+                status=404
+            )
+
+        if only_in_set_conditions:
+            # Check if there are any contratantes using the removed tipos de acto
             if models.Contratantesxacto.objects.filter(
                 kardex=instance.kardex,
-                idtipoacto=id_tipo_acto
+                idtipoacto__in=only_in_set_conditions
             ).exists():
                 return Response(
                     {"error": "No se puede eliminar el tipo de acto porque hay contratantes asociados."},
                     status=400
                 )
 
-            # chec if there any patrimonial records using this tipo_acto
+            # chec if there any patrimonial records using the removed tipos de acto
             if models.Patrimonial.objects.filter(
                 kardex=instance.kardex,
-                idtipoacto=id_tipo_acto
+                idtipoacto__in=only_in_set_conditions
             ).exists():
                 return Response(
                     {"error": "No se puede eliminar el tipo de acto porque hay patrimoniales asociados."},
                     status=400
                 )
 
-            # If no contratantes are using this tipo_acto, delete the detalle acto
+            # If no contratantes are using them, delete the detalle actos
             models.DetalleActosKardex.objects.filter(
                 kardex=instance.kardex,
-                idtipoacto=id_tipo_acto
+                idtipoacto__in=only_in_set_conditions
             ).delete()
 
-        for id_tipo_acto in only_in_set_data:
-            try:
-                tipo_acto = models.Tiposdeacto.objects.get(idtipoacto=id_tipo_acto)
-            except models.Tiposdeacto.DoesNotExist:
-                return Response(
-                    {"error": "Tipo de acto no encontrado."},
-                    status=404
-                )
-            
-            detalle_data = {
-                "kardex": instance.kardex,
-                "idtipoacto": id_tipo_acto,
-                "actosunat": tipo_acto.actosunat,
-                "actouif": tipo_acto.actouif,
-                "idtipkar": int(instance.idtipkar),
-                "desacto": tipo_acto.desacto,
-            }
-
-            models.DetalleActosKardex.objects.create(**detalle_data)
-        
+        added = [id_tipo_acto for id_tipo_acto in dict.fromkeys(id_tipo_actos_array) if id_tipo_acto in only_in_set_data]
+        act_writes.bulk_insert(
+            models.DetalleActosKardex,
+            act_writes.detalle_actos(instance.kardex, instance.idtipkar, added, tipos)
+        )
+
         return super().update(request, *args, **kwargs)
 
     @transaction.atomic
@@ -194,36 +156,22 @@ class KardexViewSet(ModelViewSet):
             return Response({"error": "Invalid fechaingreso format"}, status=400)
 
         # Get abbreviation based on tipoescritura
-        abreviatura_map = {
-            "1": "KAR",  # ESCRITURAS PUBLICAS
-            "2": "NCT",  # ASUNTOS NO CONTENCIOSOS
-            "3": "ACT",  # TRANSFERENCIAS VEHICULARES
-            "4": "GAM",  # GARANTIAS MOBILIARIAS
-            "5": "TES",  # TESTAMENTOS
-        }
-        abreviatura = abreviatura_map.get(str(idtipkar))
+        abreviatura = sequences.KARDEX_ABBREVIATIONS.get(str(idtipkar))
         if not abreviatura:
             return Response({"error": "Invalid tipoescritura"}, status=400)
 
-        # Query the last Kardex number for the given idtipkar and year
-        last_kardex = models.Kardex.objects.filter(
-            idtipkar=idtipkar,
-            fechaingreso__endswith=anio,  # Match the year in fechaingreso
-            kardex__startswith=abreviatura
-        ).annotate(
-            numeric_part=Cast(Substr(F('kardex'), len(abreviatura) + 1, 4), output_field=django_models.IntegerField())
-        ).order_by('-numeric_part').first()
-
-        # # Extract the numeric part of the last Kardex number
-        if last_kardex and last_kardex.kardex:
-            try:
-                numeric_part = int("".join(filter(str.isdigit, last_kardex.kardex.split("-")[0])))
-            except ValueError:
-                numeric_part = 0
-        else:
-            numeric_part = 0  # Start from 0 if no Kardex exists
-        # # Increment the numeric part and generate the new Kardex number
-        new_kardex_number = f"{abreviatura}{numeric_part + 1}-{anio}"
+        # Resolve the tipos de acto before taking a number
+        id_tipo_actos_array = act_writes.split_codactos(idtipoactos)
+        tipos = act_writes.tipos_de_acto(id_tipo_actos_array)
+        if act_writes.missing(id_tipo_actos_array, tipos):
+            return Response(
+                {"error": "Tipo de acto no encontrado."},
+                status=404
+            )
+
+        # Next number of the type/year sequence (row-locked until this transaction ends)
+        numeric_part = sequences.next_kardex_number(idtipkar, abreviatura, anio)
+        new_kardex_number = f"{abreviatura}{numeric_part}-{anio}"
         
         # # Save the new Kardex record
 
@@ -232,26 +180,10 @@ class KardexViewSet(ModelViewSet):
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
 
-        id_tipo_actos_array = [idtipoactos[i:i+3] for i in range(0, len(idtipoactos), 3)]
-        for idtipoacto in id_tipo_actos_array:
-            try:
-                tipo_acto = models.Tiposdeacto.objects.get(idtipoacto=idtipoacto)
-            except models.Tiposdeacto.DoesNotExist:
-                return Response(
-                    {"error": "Tipo de acto no encontrado."},
-                    status=404
-                )
-            
-            detalle_data = {
-                "kardex": new_kardex_number,
-                "idtipoacto": idtipoacto,
-                "actosunat": tipo_acto.actosunat,
-                "actouif": tipo_acto.actouif,
-                "idtipkar": int(idtipkar),
-                "desacto": tipo_acto.desacto,
-            }
-
-            models.DetalleActosKardex.objects.create(**detalle_data)
+        act_writes.bulk_insert(
+            models.DetalleActosKardex,
+            act_writes.detalle_actos(new_kardex_number, idtipkar, id_tipo_actos_array, tipos)
+        )
 
         return Response(serializer.data, status=201)
 
@@ -275,48 +207,16 @@ class KardexViewSet(ModelViewSet):
         kardex_qs = models.Kardex.objects.filter(
             kardex__startswith=correlative,
             idtipkar=idtipkar
-        )
+        ).order_by('-idkardex')
 
-        if not kardex_qs.exists():
+        # One COUNT decides both emptiness and pagination
+        paginated_kardex, _ = paginate_once(self, request, kardex_qs)
+        if paginated_kardex is None:
             return Response({}, status=200)
 
-        paginator = self.paginator
-        paginated_kardex = paginator.paginate_queryset(kardex_qs, request)
-
-        # Order by fechaingreso
-
-        # Prepare optimized data maps (same as in list)
-        user_ids = set(obj.idusuario for obj in kardex_qs)
-        kardex_ids = set(obj.kardex for obj in kardex_qs)
-
-        usuarios_map = {
-            u.idusuario: u
-            for u in models.Usuarios.objects.filter(idusuario__in=user_ids)
-        }
-
-        contratantes = models.Contratantes.objects.filter(
-            kardex__in=kardex_ids
-        ).values('idcontratante', 'kardex')
-
-        contratantes_map = defaultdict(list)
-
-        for c in contratantes:
-            contratantes_map[c['kardex']].append(c['idcontratante'])
-        print('contratantes_map:', contratantes_map)
-        contratante_ids = set(c['idcontratante'] for c in contratantes)
-
-        clientes_map = {
-            c['idcontratante']: c
-            for c in models.Cliente2.objects.filter(idcontratante__in=contratante_ids)
-            .values('idcontratante', 'idcliente', 'nombre')
-        }
-
-        # Pass context manually
-        serializer = serializers.KardexSerializer(paginated_kardex, many=True, context={
-            'usuarios_map': usuarios_map,
-            'contratantes_map': contratantes_map,
-            'clientes_map': clientes_map,
-        })
+        serializer = serializers.KardexSerializer(
+            paginated_kardex, many=True, context=kardex_page_context(paginated_kardex)
+        )
 
         return self.get_paginated_response(serializer.data)
 
@@ -324,6 +224,12 @@ class KardexViewSet(ModelViewSet):
     def by_name(self, request):
         """
         Get Kardex records by name.
+
+        Clients are matched through the name token index: every word of
+        `name` must start one of the client's names, in any order ('PERE
+        JOS' finds 'PEREZ DIAZ JOSE LUIS'), accents and case ignored. This
+        replaced the old substring match; clients written after the last
+        index catch-up still match by substring (see notaria.search).
         """
         name = request.query_params.get('name')
         idtipkar = self.request.query_params.get('idtipkar')
@@ -333,56 +239,23 @@ class KardexViewSet(ModelViewSet):
                 status=400
             )
 
-        cliente = models.Cliente2.objects.filter(
-            Q(nombre__icontains=name) |
-            Q(apepat__icontains=name) |
-            Q(apemat__icontains=name) |
-            Q(prinom__icontains=name) |
-            Q(segnom__icontains=name)
-        ).values('idcontratante', 'idcliente', 'nombre', 'numdoc')
-
-        clientes_map = {c['idcontratante']: c for c in cliente}
-
-        if not cliente.exists():
-            return Response(
-                {"error": "No records found for the given name."},
-                status=404
-            )
-
-        contratantes_ids = [c["idcontratante"] for c in cliente]
-        contratantes = models.Contratantes.objects.filter(
-            idcontratante__in=contratantes_ids
-        ).values('idcontratante', 'kardex')
+        cliente_filter = name_filter(name)
+        kardex_qs = kardex_for_clientes(cliente_filter, idtipkar)
 
-        contratantes_map = defaultdict(list)
-
-        for c in contratantes:
-            contratantes_map[c['kardex']].append(c['idcontratante'])
-
-        kardex_ids = [c['kardex'] for c in contratantes]
-        kardex_qs = models.Kardex.objects.filter(
-            kardex__in=kardex_ids,
-            idtipkar=idtipkar
-        ).order_by('-fechaingreso')
-
-        if not kardex_qs.exists():
+        # One COUNT decides both emptiness and pagination
+        paginated_kardex, _ = paginate_once(self, request, kardex_qs)
+        if paginated_kardex is None:
+            if not models.Cliente2.objects.filter(cliente_filter).exists():
+                return Response(
+                    {"error": "No records found for the given name."},
+                    status=404
+                )
             return Response({}, status=200)
 
-        paginator = self.paginator
-        paginated_kardex = paginator.paginate_queryset(kardex_qs, request)
-
-        user_ids = set(obj.idusuario for obj in kardex_qs)
-
-        usuarios_map = {
-            u.idusuario: u
-            for u in models.Usuarios.objects.filter(idusuario__in=user_ids)
-        }
-
-        serializer = serializers.KardexSerializer(paginated_kardex, many=True, context={
-            'usuarios_map': usuarios_map,
-            'contratantes_map': contratantes_map,
-            'clientes_map': clientes_map,
-        })
+        # Only the matching parties of the kardex on this page
+        serializer = serializers.KardexSerializer(
+            paginated_kardex, many=True, context=kardex_page_context(paginated_kardex, cliente_filter)
+        )
 
         return self.get_paginated_response(serializer.data)
 
@@ -399,57 +272,23 @@ class KardexViewSet(ModelViewSet):
                 status=400
             )
         
-        cliente = models.Cliente2.objects.filter(
-            numdoc__icontains=document
-        ).values('idcontratante', 'idcliente', 'nombre')
-        # clientes_map = defaultdict(list)
-        # for c in cliente:
-        #     clientes_map[c['idcontratante']].append(c)
-        clientes_map = {c['idcontratante']: c for c in cliente}
-
-        if not cliente.exists():
-            return Response(
-                {"error": "No records found for the given name."},
-                status=404
-            )
-        
-        contratantes_ids = [c["idcontratante"] for c in cliente]
+        cliente_filter = document_filter(document)
+        kardex_qs = kardex_for_clientes(cliente_filter, idtipkar)
 
-        contratantes = models.Contratantes.objects.filter(
-            idcontratante__in=contratantes_ids
-        ).values('idcontratante', 'kardex')
-
-        contratantes_map = defaultdict(list)
-
-        for c in contratantes:
-            contratantes_map[c['kardex']].append(c['idcontratante'])
-
-        print('contratantes_map:', contratantes_map)
-
-        kardex_ids = [c['kardex'] for c in contratantes]
-        kardex_qs = models.Kardex.objects.filter(
-            kardex__in=kardex_ids,
-            idtipkar=idtipkar
-        ).order_by('-fechaingreso')
-
-        if not kardex_qs.exists():
+        # One COUNT decides both emptiness and pagination
+        paginated_kardex, _ = paginate_once(self, request, kardex_qs)
+        if paginated_kardex is None:
+            if not models.Cliente2.objects.filter(cliente_filter).exists():
+                return Response(
+                    {"error": "No records found for the given name."},
+                    status=404
+                )
             return Response({}, status=200)
 
-        paginator = self.paginator
-        paginated_kardex = paginator.paginate_queryset(kardex_qs, request)
-
-        user_ids = set(obj.idusuario for obj in kardex_qs)
-
-        usuarios_map = {
-            u.idusuario: u
-            for u in models.Usuarios.objects.filter(idusuario__in=user_ids)
-        }
-
-        serializer = serializers.KardexSerializer(paginated_kardex, many=True, context={
-            'usuarios_map': usuarios_map,
-            'contratantes_map': contratantes_map,
-            'clientes_map': clientes_map,
-        })
+        # Only the matching parties of the kardex on this page
+        serializer = serializers.KardexSerializer(
+            paginated_kardex, many=True, context=kardex_page_context(paginated_kardex, cliente_filter)
+        )
 
         return self.get_paginated_response(serializer.data)
 
@@ -513,7 +352,7 @@ class KardexViewSet(ModelViewSet):
         return self.get_paginated_response(serializer.data)
 
 
-class TipoKarViewSet(ModelViewSet):
+class TipoKarViewSet(CatalogListMixin, ModelViewSet):
     """
     ViewSet for the TipoKar model.
     """
@@ -568,42 +407,22 @@ class ContratantesViewSet(ModelViewSet):
         set_conditions = set(conditions)
 
         # Check if the conditions in the data are already in the instance
-        only_in_set_data = set_data - set_conditions
-
-        for condition in only_in_set_data:
-
-            if condition:
-                idcondicion, item = condition.split('.')
-                acto_condicion = models.Actocondicion.objects.get(idcondicion=idcondicion)
-                models.Contratantesxacto.objects.create(
-                    idtipkar=acto_condicion.idtipoacto,
-                    kardex=data.get('kardex'),
-                    idtipoacto=acto_condicion.idtipoacto,
-                    idcontratante=instance.idcontratante,
-                    item=item,
-                    idcondicion=idcondicion,
-                    parte=acto_condicion.parte,
-                    porcentaje='',
-                    uif=acto_condicion.uif,
-                    formulario=acto_condicion.formulario,
-                    monto='',
-                    opago='',
-                    ofondo='',
-                    montop=acto_condicion.montop
-                )
+        only_in_set_data = [condition for condition in dict.fromkeys(data_conditions) if condition not in set_conditions]
+        added = act_writes.parse_conditions(only_in_set_data)
+        if added:
+            act_writes.bulk_insert(
+                models.Contratantesxacto,
+                act_writes.contratantesxacto_rows(data.get('kardex'), instance.idcontratante, added)
+            )
 
-        only_in_set_conditions = set_conditions - set_data
-        for condition in only_in_set_conditions:
-            if condition:
-                idcondicion, item = condition.split('.')
-                print('removing contratantexacto for condition:', condition)
-                # If the condition is in the instance but not in the data, delete it
-                models.Contratantesxacto.objects.filter(
-                    idcontratante=instance.idcontratante,
-                    idcondicion=idcondicion,
-                    kardex=instance.kardex,
-                    # item=instance.item
-                ).delete()
+        # If a condition is in the instance but not in the data, delete it
+        removed = act_writes.parse_conditions(set_conditions - set_data)
+        if removed:
+            models.Contratantesxacto.objects.filter(
+                idcontratante=instance.idcontratante,
+                idcondicion__in={idcondicion for idcondicion, _ in removed},
+                kardex=instance.kardex,
+            ).delete()
 
         # conditions_formatted_array = []
         # for single_condition in  data.get('condicion').split('/'):
@@ -663,27 +482,12 @@ class ContratantesViewSet(ModelViewSet):
                 idcontratante = utils.generate_new_id(models.Contratantes, 'idcontratante')
                 idcliente2 = utils.generate_new_id(models.Cliente2, 'idcliente')
 
-                conditions = data.get('condicion').split('/')
-                for condition in conditions:
-                    if condition:
-                        idcondicion, item = condition.split('.')
-                        acto_condicion = models.Actocondicion.objects.get(idcondicion=idcondicion)
-                        models.Contratantesxacto.objects.create(
-                            idtipkar=acto_condicion.idtipoacto,
-                            kardex=data.get('kardex'),
-                            idtipoacto=acto_condicion.idtipoacto,
-                            idcontratante=idcontratante,
-                            item=item,
-                            idcondicion=idcondicion,
-                            parte=acto_condicion.parte,
-                            porcentaje='',
-                            uif=acto_condicion.uif,
-                            formulario=acto_condicion.formulario,
-                            monto='',
-                            opago='',
-                            ofondo='',
-                            montop=acto_condicion.montop
-                        )              
+                act_writes.bulk_insert(
+                    models.Contratantesxacto,
+                    act_writes.contratantesxacto_rows(
+                        data.get('kardex'), idcontratante, act_writes.parse_conditions(data.get('condicion'))
+                    )
+                )
 
                 # Check orphan
                 if models.Cliente2.objects.filter(idcontratante=idcontratante).exists():
@@ -782,10 +586,10 @@ class ContratantesViewSet(ModelViewSet):
         )
 
         condicion_map = {
-            c['idcondicion']: c
-            for c in models.Actocondicion.objects.filter(
-                idcondicion__in=contratantes_tipoactos
-            ).values('idcondicion', 'condicion')
+            idcondicion: {'idcondicion': idcondicion, 'condicion': c.condicion}
+            for idcondicion, c in catalog(models.Actocondicion).subset(
+                'idcondicion', contratantes_tipoactos
+            ).items()
         }
 
         clientes_map = {
@@ -849,12 +653,11 @@ class ClienteViewSet(ModelViewSet):
                 status=400
             )
 
-        clientes = models.Cliente.objects.filter(numdoc=dni)
-        if not clientes.exists():
+        data = lookup_by_document(models.Cliente, dni, serializers.ClienteSerializer, idtipdoc=DNI)
+        if data is None:
             return Response({}, status=200)
 
-        serializer = serializers.ClienteSerializer(clientes[len(clientes) - 1])
-        return Response(serializer.data)
+        return Response(data)
 
     @action(detail=False, methods=['get'])
     def by_ruc(self, request):
@@ -868,12 +671,11 @@ class ClienteViewSet(ModelViewSet):
                 status=400
             )
 
-        clientes = models.Cliente.objects.filter(numdoc=ruc)
-        if not clientes.exists():
+        data = lookup_by_document(models.Cliente, ruc, serializers.ClienteSerializer, idtipdoc=RUC)
+        if data is None:
             return Response({}, status=200)
 
-        serializer = serializers.ClienteSerializer(clientes[len(clientes) - 1])
-        return Response(serializer.data)
+        return Response(data)
 
 
 class Cliente2ViewSet(ModelViewSet):
@@ -901,12 +703,35 @@ class Cliente2ViewSet(ModelViewSet):
                 status=400
             )
 
-        clientes = models.Cliente2.objects.filter(numdoc=dni)
-        if not clientes.exists():
+        data = lookup_by_document(models.Cliente2, dni, serializers.Cliente2Serializer, idtipdoc=DNI)
+        if data is None:
             return Response({}, status=200)
 
-        serializer = serializers.Cliente2Serializer(clientes[len(clientes) - 1])
-        return Response(serializer.data)
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def by_name(self, request):
+        """
+        Search Cliente2 records by name through the token index, best matches first.
+        """
+        name = request.query_params.get('name', '').strip()
+        if not name:
+            return Response(
+                {"error": "name parameter is required."},
+                status=400
+            )
+
+        ranked = search_contratantes(name)
+        page = self.paginate_queryset(ranked)
+        ids = [row['idcontratante'] for row in (page if page is not None else ranked)]
+        clientes = models.Cliente2.objects.in_bulk(ids)
+        data = [
+            serializers.Cliente2Serializer(clientes[idcontratante]).data
+            for idcontratante in ids if idcontratante in clientes
+        ]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
 
     @action(detail=False, methods=['get'])
     def by_contratante(self, request):
@@ -925,7 +750,7 @@ class Cliente2ViewSet(ModelViewSet):
         serializer = serializers.Cliente2Serializer(cliente)
         return Response(serializer.data)
 
-class TiposDeActosViewSet(ModelViewSet):
+class TiposDeActosViewSet(CatalogListMixin, ModelViewSet):
     """
     ViewSet for the TiposDeActos model.
     """
@@ -933,7 +758,7 @@ class TiposDeActosViewSet(ModelViewSet):
     serializer_class = serializers.TiposDeActosSerializer
 
 
-class ActoCondicionViewSet(ModelViewSet):
+class ActoCondicionViewSet(CatalogListMixin, ModelViewSet):
     """
     ViewSet for the ActoCondicion model.
     """
@@ -953,11 +778,9 @@ class ActoCondicionViewSet(ModelViewSet):
                 status=400
             )
 
-        acto_condiciones = models.Actocondicion.objects.filter(
-            idtipoacto=tipoacto
-        )
+        acto_condiciones = catalog(models.Actocondicion).group('idtipoacto').get(tipoacto)
 
-        if not acto_condiciones.exists():
+        if not acto_condiciones:
             return Response({}, status=200)
 
         serializer = serializers.ActoCondicionSerializer(acto_condiciones, many=True)
@@ -1011,7 +834,7 @@ class TbAbogadoViewSet(ModelViewSet):
     serializer_class = serializers.TbAbogadoSerializer
 
 
-class NacionalidadesViewSet(ModelViewSet):
+class NacionalidadesViewSet(CatalogListMixin, ModelViewSet):
     """
     ViewSet for the Nacionalidades model.
     """
@@ -1019,7 +842,7 @@ class NacionalidadesViewSet(ModelViewSet):
     serializer_class = serializers.NacionalidadesSerializer
 
 
-class ProfesionesViewSet(ModelViewSet):
+class ProfesionesViewSet(CatalogListMixin, ModelViewSet):
     """
     ViewSet for the Profesiones model.
     """
@@ -1027,7 +850,7 @@ class ProfesionesViewSet(ModelViewSet):
     serializer_class = serializers.ProfesionesSerializer
 
 
-class CargoprofeViewSet(ModelViewSet):
+class CargoprofeViewSet(CatalogListMixin, ModelViewSet):
     """
     ViewSet for the Cargoprofe model.
     """
@@ -1035,7 +858,7 @@ class CargoprofeViewSet(ModelViewSet):
     serializer_class = serializers.CargoprofeSerializer
 
 
-class UbigeoViewSet(ModelViewSet):
+class UbigeoViewSet(CatalogListMixin, ModelViewSet):
     """
     ViewSet for the Ubigeo model.
     """
@@ -1043,7 +866,7 @@ class UbigeoViewSet(ModelViewSet):
     serializer_class = serializers.UbigeoSerializer
     # pagination_class = pagination.KardexPagination
 
-class SedesRegistralesViewSet(ModelViewSet):
+class SedesRegistralesViewSet(CatalogListMixin, ModelViewSet):
     """
     ViewSet for the SedesRegistrales model.
     """
@@ -1068,6 +891,19 @@ class PatrimonialViewSet(ModelViewSet):
     serializer_class = serializers.PatrimonialSerializer
     pagination_class = pagination.KardexPagination
 
+    def list(self, request, *args, **kwargs):
+        """
+        List Patrimonial records with their payment totals loaded per page.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+
+        serializer = self.get_serializer(rows, many=True, context=patrimonial_page_context(rows))
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
     def update(self, request, *args, **kwargs):
         """ Update a Patrimonial record.
         This method will ensure that the itemmp field is not modified.
@@ -1150,11 +986,13 @@ class PatrimonialViewSet(ModelViewSet):
                 status=400
             )
         
-        patrimonial = models.Patrimonial.objects.filter(kardex=kardex)
-        if not patrimonial.exists():
+        patrimonial = list(models.Patrimonial.objects.filter(kardex=kardex))
+        if not patrimonial:
             return Response([], status=200)
 
-        serializer = serializers.PatrimonialSerializer(patrimonial, many=True)
+        serializer = serializers.PatrimonialSerializer(
+            patrimonial, many=True, context=patrimonial_page_context(patrimonial)
+        )
         return Response(serializer.data)
         
 
@@ -1388,41 +1226,11 @@ class PermiViajeViewSet(ModelViewSet):
         data = request.data.copy()
         current_year = datetime.now().year
         
-        # Single query to get the last record (using same ordering as queryset)
-        try:
-            # Get the last record by id_viaje (same as queryset ordering)
-            last_record = models.PermiViaje.objects.filter(
-                num_formu__isnull=False
-            ).exclude(num_formu='').order_by('-id_viaje').first()
-            
-            if last_record and last_record.num_formu:
-                # Generate num_formu: continue from last global value
-                last_num_formu = int(last_record.num_formu)
-                new_num_formu = last_num_formu + 1
-                
-                # Generate num_kardex: check if last record is from current year
-                if last_record.num_kardex and last_record.num_kardex.startswith(str(current_year)):
-                    # Same year, increment correlative
-                    last_correlative = int(last_record.num_kardex[-6:])
-                    new_correlative = last_correlative + 1
-                else:
-                    # New year, start with 000001
-                    new_correlative = 1
-            else:
-                # First record ever, start with defaults
-                new_num_formu = 1
-                new_correlative = 1
-            
-            # Format the correlative numbers
-            print('new_num_formu', new_num_formu)
-            print('new_correlative', new_correlative)
-            data['num_formu'] = f"{new_num_formu:07d}"
-            data['num_kardex'] = f"{current_year}{new_correlative:06d}"
-            
-        except Exception as e:
-            # Fallback values if there's an error
-            data['num_formu'] = "0000001"
-            data['num_kardex'] = f"{current_year}000001"
+        # Correlatives from their sequences (row-locked, no scan of permiviaje)
+        new_num_formu = sequences.next_global_correlative('permi_viaje.num_formu')
+        new_correlative = sequences.next_yearly_correlative('permi_viaje.num_kardex', current_year)
+        data['num_formu'] = f"{new_num_formu:07d}"
+        data['num_kardex'] = f"{current_year}{new_correlative:06d}"
         
         # Create the serializer with the modified data
         serializer = self.get_serializer(data=data)
@@ -1594,39 +1402,11 @@ class IngresoPoderesViewSet(ModelViewSet):
         data = request.data.copy()
         current_year = datetime.now().year
         
-        # Single query to get the last record (using same ordering as queryset)
-        try:
-            # Get the last record by id_poder (same as queryset ordering)
-            last_record = models.IngresoPoderes.objects.filter(
-                num_formu__isnull=False
-            ).exclude(num_formu='').order_by('-id_poder').first()
-
-            if last_record and last_record.num_formu:
-                # Generate num_formu: continue from last global value
-                last_num_formu = int(last_record.num_formu)
-                new_num_formu = last_num_formu + 1
-                
-                # Generate num_kardex: check if last record is from current year
-                if last_record.num_kardex and last_record.num_kardex.startswith(str(current_year)):
-                    # Same year, increment correlative
-                    last_correlative = int(last_record.num_kardex[-6:])
-                    new_correlative = last_correlative + 1
-                else:
-                    # New year, start with 000001
-                    new_correlative = 1
-            else:
-                # First record ever, start with defaults
-                new_num_formu = 1
-                new_correlative = 1
-            
-            # Format the correlative numbers
-            data['num_formu'] = f"{new_num_formu:07d}"
-            data['num_kardex'] = f"{current_year}{new_correlative:06d}"
-            
-        except Exception as e:
-            # Fallback values if there's an error
-            data['num_formu'] = "0000001"
-            data['num_kardex'] = f"{current_year}000001"
+        # Correlatives from their sequences (row-locked, no scan of ingresopoderes)
+        new_num_formu = sequences.next_global_correlative('ingreso_poderes.num_formu')
+        new_correlative = sequences.next_yearly_correlative('ingreso_poderes.num_kardex', current_year)
+        data['num_formu'] = f"{new_num_formu:07d}"
+        data['num_kardex'] = f"{current_year}{new_correlative:06d}"
         
         # Create the serializer with the modified data
         serializer = self.get_serializer(data=data)
@@ -1792,6 +1572,7 @@ class IngresoCartasViewSet(ModelViewSet):
         serializer = serializers.IngresoCartasSerializer(page_cartas, many=True)
         return self.get_paginated_response(serializer.data)
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         """
         Create a IngresoCartas instance with auto-generated correlative numbers.
@@ -1802,31 +1583,9 @@ class IngresoCartasViewSet(ModelViewSet):
         data = request.data.copy()
         current_year = datetime.now().year
 
-        try:
-            # Get the last record by id_carta (same as queryset ordering)
-            last_record = models.IngresoCartas.objects.filter(
-                num_carta__isnull=False
-            ).exclude(num_carta='').order_by('-id_carta').first()
-
-            if last_record and last_record.num_carta:
-                # Generate num_carta: check if last record is from current year
-                if last_record.num_carta and last_record.num_carta.startswith(str(current_year)):
-                    # Same year, increment correlative
-                    last_correlative = int(last_record.num_carta[-6:])
-                    new_correlative = last_correlative + 1
-                else:
-                    # New year, start with 000001
-                    new_correlative = 1
-            else:
-                # First record ever, start with defaults
-                new_correlative = 1
-            
-            # Format the correlative number
-            data['num_carta'] = f"{current_year}{new_correlative:06d}"
-            
-        except Exception as e:
-            # Fallback values if there's an error
-            data['num_carta'] = f"{current_year}000001"
+        # Correlative from its yearly sequence (row-locked, no scan)
+        new_correlative = sequences.next_yearly_correlative('ingreso_cartas.num_carta', current_year)
+        data['num_carta'] = f"{current_year}{new_correlative:06d}"
 
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
@@ -1871,21 +1630,14 @@ class LibrosViewSet(ModelViewSet):
         return self.get_paginated_response(serializer.data)
 
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         """
         Create a Libros instance with auto-generated correlative numbers.
         Generates correlative numbers for numlibro field.
         """
         data = request.data.copy()
-        last_record = models.Libros.objects.filter(
-            numlibro__isnull=False
-        ).exclude(numlibro='').order_by('-id').first()
-        
-        if last_record and last_record.numlibro:
-            last_correlative = int(last_record.numlibro[-6:])
-            new_correlative = last_correlative + 1
-        else:
-            new_correlative = 1
+        new_correlative = sequences.next_global_correlative('libros.numlibro')
         
         data['numlibro'] = f"{new_correlative:06d}"
         
@@ -1897,7 +1649,7 @@ class LibrosViewSet(ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
 
-class TipolibroViewSet(ModelViewSet):
+class TipolibroViewSet(CatalogListMixin, ModelViewSet):
     """
     ViewSet for the Tipolibro model.
     """
@@ -1936,6 +1688,7 @@ class CertDomiciliarioViewSet(ModelViewSet):
         serializer = serializers.CertDomiciliarioSerializer(page_cert_domiciliario, many=True)
         return self.get_paginated_response(serializer.data)
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         """
         Create a CertDomiciliario instance with auto-generated correlative numbers.
@@ -1946,31 +1699,9 @@ class CertDomiciliarioViewSet(ModelViewSet):
         data = request.data.copy()
         current_year = datetime.now().year
 
-        try:
-            # Get the last record by id_domiciliario (same as queryset ordering)
-            last_record = models.CertDomiciliario.objects.filter(
-                num_certificado__isnull=False
-            ).exclude(num_certificado='').order_by('-id_domiciliario').first()
-
-            if last_record and last_record.num_certificado:
-                # Generate num_certificado: check if last record is from current year
-                if last_record.num_certificado and last_record.num_certificado.startswith(str(current_year)):
-                    # Same year, increment correlative
-                    last_correlative = int(last_record.num_certificado[-6:])
-                    new_correlative = last_correlative + 1
-                else:
-                    # New year, start with 000001
-                    new_correlative = 1
-            else:
-                # First record ever, start with defaults
-                new_correlative = 1
-            
-            # Format the correlative number
-            data['num_certificado'] = f"{current_year}{new_correlative:06d}"
-            
-        except Exception as e:
-            # Fallback values if there's an error
-            data['num_certificado'] = f"{current_year}000001"
+        # Correlative from its yearly sequence (row-locked, no scan)
+        new_correlative = sequences.next_yearly_correlative('cert_domiciliario.num_certificado', current_year)
+        data['num_certificado'] = f"{current_year}{new_correlative:06d}"
 
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
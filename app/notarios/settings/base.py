@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.QueryCountMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -231,3 +232,22 @@ SIMPLE_JWT = {
 # }
 
 AWS_S3_ADDRESSING_STYLE = "virtual"
+
+# Document generation logs: per-step spans at DEBUG, one summary per
+# generation at INFO. Messages below the level are never formatted.
+DOCUMENT_LOG_LEVEL = os.environ.get('DOCUMENT_LOG_LEVEL', 'WARNING')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '%(levelname)s: %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'ducumentation': {'handlers': ['console'], 'level': DOCUMENT_LOG_LEVEL, 'propagate': False},
+        'core': {'handlers': ['console'], 'level': DOCUMENT_LOG_LEVEL, 'propagate': False},
+    },
+}
@@ -20,6 +20,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 import debug_toolbar
 
+from core import views as core_views
+
 urlpatterns = []
 
 if settings.DEBUG:
@@ -34,4 +36,5 @@ urlpatterns += [
     path('viajes/', include('viajes.urls')),
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.jwt')),
+    path('metrics', core_views.metrics, name='metrics'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)